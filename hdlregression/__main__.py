@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+
+"""
+HDLRegression command line tools:
+
+  hdlregression merge [-r <report file>] [-o <result file>] <result files>
+  hdlregression worker [-j <jobs>] [--persistent] [HOST:]PORT
+  hdlregression history [-f <history file>] runs|trend|durations|flaky|test
+"""
+
+import sys
+
+
+USAGE = (
+    "Usage: hdlregression merge [-h] [-r REPORT] [-o OUTPUT] result_files [result_files ...]\n"
+    "       hdlregression worker [-h] [-j JOBS] [--name NAME] [--timeout TIMEOUT] [--persistent] [HOST:]PORT\n"
+    "       hdlregression history [-h] [-f FILE] [-n RUNS] {runs,trend,durations,flaky,test} ..."
+)
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "merge":
+        from .merge import main as merge_main
+
+        return merge_main(argv[1:])
+    if argv and argv[0] == "worker":
+        from .worker import main as worker_main
+
+        return worker_main(argv[1:])
+    if argv and argv[0] == "history":
+        from .history import main as history_main
+
+        return history_main(argv[1:])
+    print(USAGE)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,17 +13,59 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
 #
 
+import os
 import sys
 import argparse
 
 from .settings import HDLRegressionSettings
+from .hdlregression_pkg import parse_shard, parse_address, parse_license_limit
+
+
+def threading_type(value):
+    if str(value).lower() == "auto":
+        return "auto"
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid value "%s", use a number or "auto"' % (value))
+
+
+def shard_type(value) -> tuple:
+    try:
+        return parse_shard(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def address_type(value) -> tuple:
+    try:
+        return parse_address(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def license_limit_type(value):
+    try:
+        return parse_license_limit(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def retry_count_type(value) -> int:
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise argparse.ArgumentTypeError("invalid number of retries: %s" % (value))
+    return count
 
 
 def get_parser() -> argparse.ArgumentParser:
     return argparse.ArgumentParser(description="HDLRegression CLI options")
 
 
-def arg_parser_reader(arg_parser=None):
+def arg_parser_reader(arg_parser=None, argv=None):
     # Python 2
     if sys.version_info.major < 3:
         opts_short = [opt.lower() for opt in sys.argv[1:] if opt.startswith("-")]
@@ -36,123 +78,195 @@ def arg_parser_reader(arg_parser=None):
     else:
         if arg_parser is None:
             arg_parser = get_parser()
+        if not getattr(arg_parser, "hdlregression_arguments", False):
+            add_arguments(arg_parser)
 
-        arg_parser.add_argument(
-            "-v", "--verbose", action="store_true", help="enable full verbosity"
-        )
-        arg_parser.add_argument(
-            "-d", "--debug", action="store_true", help="enable debug mode"
-        )
-        arg_parser.add_argument(
-            "-g", "--gui", action="store_true", help="enable simulator GUI mode"
-        )
-        arg_parser.add_argument(
-            "-fr", "--fullRegression", action="store_true", help="run full regression"
-        )
-        arg_parser.add_argument(
-            "-c", "--clean", action="store_true", help="clean before regression run"
-        )
-        arg_parser.add_argument(
-            "-tc",
-            "--testCase",
-            action="store",
-            type=str,
-            nargs=1,
-            help="run selected testbench[.architecture[.testcase]]",
-        )
-        arg_parser.add_argument(
-            "-tg",
-            "--testGroup",
-            action="store",
-            type=str,
-            nargs=1,
-            help="run selected testgroup(s)",
-        )
-        arg_parser.add_argument(
-            "-ltc", "--listTestcase", action="store_true", help="list testcases"
-        )
-        arg_parser.add_argument(
-            "-etj", "--exportTestcaseJson", action="store", type=str, nargs=1, help="export testcases to JSON file with the given path. Example: --exportTestcaseJson testcases.json"
-        )
-        arg_parser.add_argument(
-            "-ltg", "--listTestgroup", action="store_true", help="list testgroups"
-        )
-        arg_parser.add_argument(
-            "-lco", "--listCompileOrder", action="store_true", help="list compile order"
-        )
-        arg_parser.add_argument(
-            "-fc", "--forceCompile", action="store_true", help="force recompile"
-        )
-        arg_parser.add_argument(
-            "-sof",
-            "--stopOnFailure",
-            action="store_true",
-            help="stop simulations on testcase fail",
-        )
-        arg_parser.add_argument(
-            "-s",
-            "--simulator",
-            action="store",
-            type=str,
-            nargs=1,
-            help="select simulator Modelsim/GHDL/NVC/RIVIERA-PRO/ACTIVE-HDL/Vivado",
-        )
-        arg_parser.add_argument(
-            "-t",
-            "--threading",
-            action="store",
-            type=int,
-            nargs="?",
-            const=1,
-            help="run tasks in parallel",
-        )
-        arg_parser.add_argument(
-            "-ns",
-            "--no_sim",
-            action="store_true",
-            help="no simulation, only compilation",
-        )
-
-        arg_parser.add_argument(
-            "--waveFormat",
-            action="store",
-            type=str,
-            nargs=1,
-            default="vcd",
-            help="wave file format [VCD (default) or FST]",
-        )
-
-        arg_parser.add_argument(
-            "-ll", "--loggLevel", action="store", type=str, help=argparse.SUPPRESS
-        )
-        arg_parser.add_argument(
-            "-ld", "--listDependency", action="store_true", help=argparse.SUPPRESS
-        )
-        arg_parser.add_argument(
-            "-ca", "--compileAll", action="store_true", help=argparse.SUPPRESS
-        )
-        arg_parser.add_argument(
-            "-cc", "--compileChanges", action="store_true", help=argparse.SUPPRESS
-        )
-
-        arg_parser.add_argument(
-            "--showWarnError",
-            action="store_true",
-            help="Show error and warning messages during simulations.",
-        )
-        arg_parser.add_argument(
-            "--noColor", action="store_true", help="Disable terminal output colors."
-        )
-
-        arg_parser.add_argument(
-            "--wlf", action="store_true", help="Dumps wave file in WLF format (Questa/Modelsim)."
-        )
-
-        args = arg_parser.parse_args(sys.argv[1:])
+        args = arg_parser.parse_args(sys.argv[1:] if argv is None else argv)
 
         return args
 
 
+def add_arguments(arg_parser) -> None:
+    arg_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="enable full verbosity"
+    )
+    arg_parser.add_argument(
+        "-d", "--debug", action="store_true", help="enable debug mode"
+    )
+    arg_parser.add_argument(
+        "-g", "--gui", action="store_true", help="enable simulator GUI mode"
+    )
+    arg_parser.add_argument(
+        "-fr", "--fullRegression", action="store_true", help="run full regression"
+    )
+    arg_parser.add_argument(
+        "-c", "--clean", action="store_true", help="clean before regression run"
+    )
+    arg_parser.add_argument(
+        "-tc",
+        "--testCase",
+        action="store",
+        type=str,
+        nargs=1,
+        help="run selected testbench[.architecture[.testcase]]",
+    )
+    arg_parser.add_argument(
+        "-tg",
+        "--testGroup",
+        action="store",
+        type=str,
+        nargs=1,
+        help="run selected testgroup(s)",
+    )
+    arg_parser.add_argument(
+        "-ltc", "--listTestcase", action="store_true", help="list testcases"
+    )
+    arg_parser.add_argument(
+        "-etj", "--exportTestcaseJson", action="store", type=str, nargs=1, help="export testcases to JSON file with the given path. Example: --exportTestcaseJson testcases.json"
+    )
+    arg_parser.add_argument(
+        "-ltg", "--listTestgroup", action="store_true", help="list testgroups"
+    )
+    arg_parser.add_argument(
+        "-lco", "--listCompileOrder", action="store_true", help="list compile order"
+    )
+    arg_parser.add_argument(
+        "-fc", "--forceCompile", action="store_true", help="force recompile"
+    )
+    arg_parser.add_argument(
+        "-sof",
+        "--stopOnFailure",
+        action="store_true",
+        help="stop simulations on testcase fail",
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--simulator",
+        action="store",
+        type=str,
+        nargs=1,
+        help="select simulator Modelsim/GHDL/NVC/RIVIERA-PRO/ACTIVE-HDL/Vivado",
+    )
+    arg_parser.add_argument(
+        "-t",
+        "--threading",
+        action="store",
+        type=threading_type,
+        nargs="?",
+        const=1,
+        help="run tasks in parallel, number of threads or auto for memory and CPU aware scheduling",
+    )
+    arg_parser.add_argument(
+        "-ns",
+        "--no_sim",
+        action="store_true",
+        help="no simulation, only compilation",
+    )
+
+    arg_parser.add_argument(
+        "--waveFormat",
+        action="store",
+        type=str,
+        nargs=1,
+        default="vcd",
+        help="wave file format [VCD (default) or FST]",
+    )
+
+    arg_parser.add_argument(
+        "-ll", "--loggLevel", action="store", type=str, help=argparse.SUPPRESS
+    )
+    arg_parser.add_argument(
+        "-ld", "--listDependency", action="store_true", help=argparse.SUPPRESS
+    )
+    arg_parser.add_argument(
+        "-ca", "--compileAll", action="store_true", help=argparse.SUPPRESS
+    )
+    arg_parser.add_argument(
+        "-cc", "--compileChanges", action="store_true", help=argparse.SUPPRESS
+    )
+
+    arg_parser.add_argument(
+        "--showWarnError",
+        action="store_true",
+        help="Show error and warning messages during simulations.",
+    )
+    arg_parser.add_argument(
+        "--noColor", action="store_true", help="Disable terminal output colors."
+    )
+
+    arg_parser.add_argument(
+        "--wlf", action="store_true", help="Dumps wave file in WLF format (Questa/Modelsim)."
+    )
+
+    arg_parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep project in memory and serve runs from: python -m hdlregression.daemon",
+    )
+
+    arg_parser.add_argument(
+        "--shard",
+        action="store",
+        type=shard_type,
+        help="run shard i of N of the selected tests, e.g. 1/4",
+    )
+
+    arg_parser.add_argument(
+        "--shard-durations",
+        action="store",
+        metavar="FILE",
+        help="balance shards by the simulation times in result file FILE, default shard_durations.jsonl in the script folder",
+    )
+
+    arg_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rerun affected tests when HDL files are changed, stop with Ctrl+C",
+    )
+
+    arg_parser.add_argument(
+        "--workers",
+        action="store",
+        type=address_type,
+        metavar="[HOST:]PORT",
+        help="run simulations on hdlregression-worker agents connecting to [HOST:]PORT",
+    )
+
+    arg_parser.add_argument(
+        "--licenses",
+        action="store",
+        type=license_limit_type,
+        metavar="N|auto",
+        help="max number of simulator licenses used at the same time, or auto",
+    )
+
+    arg_parser.add_argument(
+        "--retries",
+        action="store",
+        type=retry_count_type,
+        metavar="N",
+        help="run a failing test again up to N times, passing tests are PASS_AFTER_RETRY",
+    )
+
+    arg_parser.add_argument(
+        "--retry-budget",
+        action="store",
+        type=retry_count_type,
+        metavar="N",
+        help="max number of retries of all tests in a run",
+    )
+
+    arg_parser.add_argument(
+        "--trace",
+        action="store",
+        metavar="FILE",
+        help="write phase, compile and test spans to FILE in Chrome trace format",
+    )
+
+    # Mark parser as set up, i.e. it can be used for parsing again.
+    arg_parser.hdlregression_arguments = True
+
+
 def arg_parser_update_settings(settings, args) -> "HDLRegressionSettings":
     settings.set_verbose(args.verbose)
     settings.set_gui_mode(args.gui)
@@ -177,7 +291,11 @@ def arg_parser_update_settings(settings, args) -> "HDLRegressionSettings":
     if args.exportTestcaseJson:
         settings.set_export_testcases_json_path(args.exportTestcaseJson[0])
 
-    if args.threading:
+    if args.threading == "auto":
+        settings.set_threading(True)
+        settings.set_adaptive_threading(True)
+        settings.set_num_threads(os.cpu_count() or 1)
+    elif args.threading:
         settings.set_threading(True)
         settings.set_num_threads(args.threading)
 
@@ -207,12 +325,36 @@ def arg_parser_update_settings(settings, args) -> "HDLRegressionSettings":
 
     settings.set_show_err_warn_output(args.showWarnError)
 
+    settings.set_daemon_mode(args.daemon)
+    settings.set_watch_mode(args.watch)
+
     # ----------------------------------------------
     # Arguments with parameters
     # ----------------------------------------------
     if args.simulator:
         settings.set_simulator_name(simulator_name=args.simulator[0], cli=True)
 
+    if args.shard:
+        settings.set_shard(args.shard)
+
+    if args.shard_durations:
+        settings.set_shard_durations_file(args.shard_durations)
+
+    if args.workers:
+        settings.set_workers(args.workers)
+
+    if args.licenses:
+        settings.set_cli_license_limit(args.licenses)
+
+    if args.retries is not None:
+        settings.set_cli_test_retries(args.retries)
+
+    if args.retry_budget is not None:
+        settings.set_cli_retry_budget(args.retry_budget)
+
+    if args.trace:
+        settings.set_trace_file(args.trace)
+
     settings.set_cli_override(False)
 
     if args.testGroup:
@@ -52,6 +52,16 @@ class SettingsConfigurator:
         settings.set_list_testgroup(default_settings.get_list_testgroup())
         settings.set_stop_on_failure(default_settings.get_stop_on_failure())
         settings.set_no_sim(default_settings.get_no_sim())
+        settings.set_daemon_mode(default_settings.get_daemon_mode())
+        settings.set_watch_mode(default_settings.get_watch_mode())
+        settings.set_shard(default_settings.get_shard())
+        settings.set_shard_durations_file(default_settings.get_shard_durations_file())
+        settings.set_workers(default_settings.get_workers())
+        settings.set_trace_file(default_settings.get_trace_file())
+        settings.set_cli_license_limit(default_settings.get_cli_license_limit())
+        settings.set_cli_test_retries(default_settings.get_cli_test_retries())
+        settings.set_cli_retry_budget(default_settings.get_cli_retry_budget())
+        settings.set_adaptive_threading(default_settings.get_adaptive_threading())
         return settings
 
     @staticmethod
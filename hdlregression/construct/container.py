@@ -54,6 +54,13 @@ class Container:
         else:
             return False
 
+    def append(self, element) -> None:
+        """
+        Add element without checking for duplicates, i.e. the
+        caller is responsible for only adding unique elements.
+        """
+        self.storage.append(element)
+
     def add_element_from_list(self, element_list):
         if isinstance(element_list, list):
             for element in element_list:
@@ -88,6 +95,15 @@ class Container:
                          if element.get_name().lower() != element_name.get_name().lower()]
         self.storage = temp_list
 
+    def remove_elements(self, elements) -> None:
+        """
+        Remove the given element objects, i.e. elements are
+        matched by identity and not by name.
+        """
+        element_ids = {id(element) for element in elements}
+        self.storage = [element for element in self.storage
+                        if id(element) not in element_ids]
+
     def num_elements(self) -> int:
         return len(self.storage)
 
@@ -13,8 +13,26 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
 #
 
-
-class BaseModule:
+from ..projectdb import LazyRecord
+
+
+class BaseModule(LazyRecord):
+
+    __slots__ = (
+        "logger",
+        "name",
+        "library",
+        "type",
+        "is_tb",
+        "complete",
+        "hdlfile",
+        "filename",
+        "int_dep_on_this_list",
+        "int_dep_list",
+        "ext_dep_list",
+        "this_depend_of_list",
+        "depent_of_this_list",
+    )
 
     def __init__(self, logger):
         self.logger = logger
@@ -175,6 +193,9 @@ class BaseModule:
 
 
 class EntityModule(BaseModule):
+
+    __slots__ = ("arch_list", "generic_list")
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -204,6 +225,8 @@ class EntityModule(BaseModule):
 
 class PackageModule(BaseModule):
 
+    __slots__ = ()
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -216,6 +239,8 @@ class PackageModule(BaseModule):
 
 class PackageBodyModule(BaseModule):
 
+    __slots__ = ()
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -228,6 +253,8 @@ class PackageBodyModule(BaseModule):
 
 class NewPackageModule(BaseModule):
 
+    __slots__ = ()
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -240,6 +267,8 @@ class NewPackageModule(BaseModule):
 
 class ContextModule(BaseModule):
 
+    __slots__ = ()
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -252,6 +281,8 @@ class ContextModule(BaseModule):
 
 class ConfigurationModule(BaseModule):
 
+    __slots__ = ()
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -264,6 +295,8 @@ class ConfigurationModule(BaseModule):
 
 class ArchitectureModule(BaseModule):
 
+    __slots__ = ("arch_of", "testcase_list")
+
     def __init__(self, name, arch_of, library, logger):
         super().__init__(logger)
         super().set_name(name)
@@ -301,6 +334,8 @@ class ArchitectureModule(BaseModule):
 
 class VerilogModule(BaseModule):
 
+    __slots__ = ("parameter_list", "testcase_list")
+
     def __init__(self, name, library, logger):
         super().__init__(logger)
         super().set_name(name)
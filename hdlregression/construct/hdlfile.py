@@ -19,9 +19,27 @@ import time
 
 from ..scan.vhdlscanner import VHDLScanner
 from ..scan.verilogscanner import VerilogScanner
-
-
-class HDLFile:
+from ..projectdb import LazyRecord
+
+
+class HDLFile(LazyRecord):
+
+    __slots__ = (
+        "project",
+        "library",
+        "hdl_version",
+        "com_options",
+        "scanner",
+        "code_coverage",
+        "compile_time",
+        "hdlfile_this_dep_on_list",
+        "hdlfile_dep_on_this_list",
+        "parse_file",
+        "file_change_date",
+        "filename",
+        "name_from_file",
+        "filename_with_path",
+    )
 
     def __init__(
         self,
@@ -227,6 +245,8 @@ class HDLFile:
 
 class VHDLFile(HDLFile):
 
+    __slots__ = ()
+
     def __init__(
         self,
         filename_with_path,
@@ -353,6 +373,8 @@ class VHDLFile(HDLFile):
 
 class NetlistFile(VHDLFile):
 
+    __slots__ = ("netlist_instance",)
+
     def __init__(
         self,
         filename_with_path,
@@ -387,6 +409,8 @@ class NetlistFile(VHDLFile):
 
 class VerilogFile(HDLFile):
 
+    __slots__ = ()
+
     def __init__(
         self,
         filename_with_path,
@@ -468,6 +492,8 @@ class VerilogFile(HDLFile):
 
 class SVFile(HDLFile):
 
+    __slots__ = ()
+
     def __init__(
         self,
         filename_with_path,
@@ -497,6 +523,8 @@ class SVFile(HDLFile):
 
 class UnknownFile(HDLFile):
 
+    __slots__ = ()
+
     def __init__(
         self,
         filename_with_path,
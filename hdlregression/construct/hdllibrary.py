@@ -125,6 +125,9 @@ class HDLLibrary(Library):
         self.compile_req = False  # library compilation required
         self.hdlfile_container = Container()  # hdlfile container
         self.temp_hdlfile_container = Container()  # temp storage for add_file()
+        self.hdlfile_index = {}  # path -> hdlfile, lookup for hdlfile_container
+        self.temp_hdlfile_index = {}  # path -> hdlfile, lookup for temp container
+        self.temp_hdlfile_args = {}  # path -> add_file() arguments for temp container
         # self.netlist_hdlfile_container = Container()  # netlist hdlfile container
 
     def get_never_recompile(self) -> bool:
@@ -133,6 +136,47 @@ class HDLLibrary(Library):
     def set_never_recompile(self, stop_recompile) -> None:
         self.no_recompile = stop_recompile
 
+    @staticmethod
+    def _get_hdlfile_key(filename) -> str:
+        return filename.lower()
+
+    def _rebuild_hdlfile_index(self) -> None:
+        """
+        Rebuild the path lookup tables from the hdlfile containers.
+        Also used for project databases created before the tables existed.
+        """
+        self.hdlfile_index = {
+            self._get_hdlfile_key(hdlfile.get_filename_with_path()): hdlfile
+            for hdlfile in self.hdlfile_container.get()
+        }
+        self.temp_hdlfile_index = {
+            self._get_hdlfile_key(hdlfile.get_filename_with_path()): hdlfile
+            for hdlfile in self.temp_hdlfile_container.get()
+        }
+
+    def _get_hdlfile_index(self) -> dict:
+        if getattr(self, "hdlfile_index", None) is None:
+            self._rebuild_hdlfile_index()
+        return self.hdlfile_index
+
+    def _get_temp_hdlfile_index(self) -> dict:
+        if getattr(self, "temp_hdlfile_index", None) is None:
+            self._rebuild_hdlfile_index()
+        return self.temp_hdlfile_index
+
+    def _get_temp_hdlfile_args(self) -> dict:
+        if getattr(self, "temp_hdlfile_args", None) is None:
+            self.temp_hdlfile_args = {}
+        return self.temp_hdlfile_args
+
+    def get_added_file_list(self) -> list:
+        """
+        Returns the files added with add_file() since the last
+        regression run, as a list of (filename, add_file arguments),
+        without loading any cached file objects.
+        """
+        return list(self._get_temp_hdlfile_args().values())
+
     def _get_new_hdlfile_obj(
         self,
         file_item,
@@ -217,9 +261,19 @@ class HDLLibrary(Library):
         2. Check if file (with this path) has already been added.
         3. Create a HDLFile object and add it to the hdlfile_container.
         """
+        temp_index = self._get_temp_hdlfile_index()
+
         # Iterate list of found files
         for file_item in self._search_and_return_file_list(filename):
 
+            # Already added to this run?
+            key = self._get_hdlfile_key(file_item)
+            if key in temp_index:
+                self.logger.debug(
+                    "%s add_file(%s) - existing file" % (self.get_name(), file_item)
+                )
+                continue
+
             # Check if file is already added
             hdlfile_obj = self.get_hdlfile_obj(file_item)
 
@@ -242,7 +296,12 @@ class HDLLibrary(Library):
                 self.logger.debug(
                     "%s add_file(%s) - existing file" % (self.get_name(), file_item)
                 )
-            self.temp_hdlfile_container.add(hdlfile_obj)
+            temp_index[key] = hdlfile_obj
+            self._get_temp_hdlfile_args()[key] = (
+                file_item,
+                (hdl_version, com_options, parse_file, code_coverage, netlist_instance),
+            )
+            self.temp_hdlfile_container.append(hdlfile_obj)
 
     def remove_file(self, filename) -> bool:
         """
@@ -272,6 +331,13 @@ class HDLLibrary(Library):
                 self.temp_hdlfile_container.remove(obj)
                 file_found = True
 
+        self._rebuild_hdlfile_index()
+        self.temp_hdlfile_args = {
+            key: args
+            for key, args in self._get_temp_hdlfile_args().items()
+            if key in self.temp_hdlfile_index
+        }
+
         if file_found:
             self.logger.info(f"Removed file: {filename_only}")
         else:
@@ -284,14 +350,7 @@ class HDLLibrary(Library):
         Returns the file object if found in the file list.
         Returns None if no file object is found.
         """
-        # Check with all hdlfile objects in this library (container).
-        for hdlfile in self.get_hdlfile_list():
-            hdlfile_name = hdlfile.get_filename_with_path()
-            if hdlfile_name.lower() == filename.lower():
-                return hdlfile
-
-        # Filename not found
-        return None
+        return self._get_hdlfile_index().get(self._get_hdlfile_key(filename))
 
     def update_file_list(self) -> None:
         """
@@ -303,8 +362,8 @@ class HDLLibrary(Library):
         """
 
         def check_list(new_list, old_list) -> tuple:
-            new_names = [new_file.get_filename() for new_file in new_list.get()]
-            old_names = [old_file.get_filename() for old_file in old_list.get()]
+            new_names = {new_file.get_filename() for new_file in new_list.get()}
+            old_names = {old_file.get_filename() for old_file in old_list.get()}
 
             new_files = [
                 hdlfile
@@ -329,12 +388,13 @@ class HDLLibrary(Library):
 
             # Add new files to container
             for new_file in new_files:
-                self.hdlfile_container.add(new_file)
+                self.hdlfile_container.append(new_file)
                 self.logger.debug("Added: %s" % (new_file.get_filename()))
             # Remove removed files from container
-            for removed_file in removed_files:
-                self.hdlfile_container.remove(removed_file)
-                self.logger.debug("Removed: %s" % (removed_file.get_filename()))
+            if removed_files:
+                self.hdlfile_container.remove_elements(removed_files)
+                for removed_file in removed_files:
+                    self.logger.debug("Removed: %s" % (removed_file.get_filename()))
 
             # Updated library recompile when file number has changed.
             if new_files or removed_files:
@@ -342,6 +402,8 @@ class HDLLibrary(Library):
 
             # Empty temporary storage for next regression run.
             self.temp_hdlfile_container.empty_list()
+            self.temp_hdlfile_args = {}
+            self._rebuild_hdlfile_index()
 
     def check_library_files_for_changes(self) -> None:
         """
@@ -448,12 +510,13 @@ class HDLLibrary(Library):
             self._get_lib_deps_from_modules()
 
         if self.project.settings.get_debug_mode():
-            print(self._present_library())
+            print(self._present_library(), file=self.project.output)
 
     def _present_modules(self) -> None:
         for module in self.module_list:
-            print("{} ({}) -> ".format(module.get_name(), module.get_type()), end="")
-        print("\n")
+            print("{} ({}) -> ".format(module.get_name(), module.get_type()), end="",
+                  file=self.project.output)
+        print("\n", file=self.project.output)
 
     def _create_module_from_name(self) -> None:
         """
@@ -0,0 +1,294 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Resident daemon mode.
+
+A regression script started with "--daemon" keeps the project in memory
+and serves run requests on a local Unix socket. Requests are sent with:
+
+  python -m hdlregression.daemon [--socket <path>] [--stop] [arguments]
+
+where the arguments are the same as for the regression script. Output is
+streamed back to the client, and the client exits with the run return code.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+
+
+DEFAULT_SOCKET_NAME = "daemon.sock"
+
+
+class DaemonError(Exception):
+    pass
+
+
+def get_socket_path(output_path) -> str:
+    return os.path.join(output_path, DEFAULT_SOCKET_NAME)
+
+
+def _send_message(connection, message) -> None:
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _read_messages(connection):
+    """
+    Yield JSON line messages received on a connection.
+    """
+    buffer = b""
+    while True:
+        data = connection.recv(65536)
+        if not data:
+            return
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line:
+                yield json.loads(line.decode("utf-8"))
+
+
+class DaemonOutput:
+    """
+    File like object streaming output to a daemon client.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def write(self, text) -> int:
+        if text and not self.closed:
+            with self.lock:
+                try:
+                    _send_message(self.connection, {"output": text})
+                except OSError:
+                    # Client has gone, finish the run without output.
+                    self.closed = True
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class HDLRegressionDaemon:
+    """
+    Serves run requests for a project kept in memory.
+    One request is handled at a time.
+    """
+
+    def __init__(self, project, output_path):
+        self.project = project
+        self.socket_path = get_socket_path(output_path)
+        self.cwd = os.getcwd()
+        self.script_file = os.path.abspath(sys.argv[0])
+        self.script_change_date = self._get_script_change_date()
+        self.server = None
+
+    def _get_script_change_date(self):
+        try:
+            return os.path.getmtime(self.script_file)
+        except OSError:
+            return None
+
+    def _bind(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("Daemon mode requires Unix domain socket support.")
+
+        if os.path.exists(self.socket_path):
+            # Remove socket left by a daemon that was not stopped.
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_path)
+                raise DaemonError(
+                    "HDLRegression daemon already running: %s" % (self.socket_path)
+                )
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.socket_path)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(1)
+
+    def serve(self) -> int:
+        """
+        Serve requests until a stop request is received.
+
+        :rtype: int
+        :return: Return code, 0 when stopped.
+        """
+        try:
+            self._bind()
+        except (DaemonError, OSError) as error:
+            self.project.logger.error("Unable to start daemon: %s" % (error))
+            return 1
+
+        self.project.logger.info(
+            "HDLRegression daemon listening on %s (stop with: "
+            "python -m hdlregression.daemon --stop)" % (self.socket_path)
+        )
+        try:
+            running = True
+            while running:
+                connection, _ = self.server.accept()
+                with connection:
+                    running = self._handle_connection(connection)
+        finally:
+            self.server.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        self.project.logger.info("HDLRegression daemon stopped.")
+        return 0
+
+    def _handle_connection(self, connection) -> bool:
+        """
+        Handle one client request.
+
+        :rtype: bool
+        :return: False when the daemon is requested to stop.
+        """
+        try:
+            request = next(_read_messages(connection), None)
+        except (OSError, ValueError):
+            return True
+        if request is None:
+            return True
+
+        command = request.get("command")
+        if command == "stop":
+            _send_message(connection, {"exit_code": 0})
+            return False
+
+        if command != "run":
+            self._reply_error(connection, "Unknown daemon command: %s" % (command))
+        elif request.get("cwd") != self.cwd:
+            self._reply_error(
+                connection, "Daemon is serving %s, run the client from this folder." % (self.cwd)
+            )
+        else:
+            exit_code = self._run_request(connection, request.get("args", []))
+            try:
+                _send_message(connection, {"exit_code": exit_code})
+            except OSError:
+                pass
+        return True
+
+    def _reply_error(self, connection, msg) -> None:
+        try:
+            _send_message(connection, {"output": msg + "\n"})
+            _send_message(connection, {"exit_code": 1})
+        except OSError:
+            pass
+
+    def _run_request(self, connection, args) -> int:
+        # Terminal output of the project is streamed to the client,
+        # i.e. other output stays on the daemon terminal.
+        self.project.output = DaemonOutput(connection)
+        try:
+            if self._get_script_change_date() != self.script_change_date:
+                self.project.logger.warning(
+                    "Regression script changed since the daemon was started, "
+                    "restart the daemon to use the changes."
+                )
+            return self.project._run_in_memory(args)
+        except SystemExit as error:
+            # E.g. argument errors, the details are on the daemon terminal.
+            return_code = error.code if isinstance(error.code, int) else 1
+            if return_code != 0:
+                self.project.logger.error("Invalid arguments: %s" % (" ".join(args)))
+            return return_code
+        except Exception as error:
+            self.project.logger.error("Daemon request failed: %s" % (error))
+            return 1
+        finally:
+            self.project.output = None
+
+
+class DaemonClient:
+    """
+    Sends requests to a running HDLRegression daemon.
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+
+    def _request(self, message, output) -> int:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("Daemon mode requires Unix domain socket support.")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            try:
+                connection.connect(self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                raise DaemonError(
+                    "No HDLRegression daemon running on %s, start one with: "
+                    "python <regression script> --daemon" % (self.socket_path)
+                )
+            _send_message(connection, message)
+            for reply in _read_messages(connection):
+                if "output" in reply:
+                    output.write(reply["output"])
+                    output.flush()
+                if "exit_code" in reply:
+                    return reply["exit_code"]
+        raise DaemonError("Connection to HDLRegression daemon lost.")
+
+    def run(self, args, output=None) -> int:
+        """
+        Run the regression with the given arguments and
+        stream the output.
+
+        :rtype: int
+        :return: Return code of the run.
+        """
+        return self._request(
+            {"command": "run", "args": list(args), "cwd": os.getcwd()},
+            output or sys.stdout,
+        )
+
+    def stop(self) -> int:
+        return self._request({"command": "stop"}, sys.stdout)
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    socket_path = get_socket_path("hdlregression")
+    if "--socket" in argv:
+        index = argv.index("--socket")
+        if index + 1 >= len(argv):
+            print("Usage: python -m hdlregression.daemon [--socket <path>] [--stop] [arguments]")
+            return 1
+        socket_path = argv[index + 1]
+        del argv[index : index + 2]
+
+    client = DaemonClient(socket_path)
+    try:
+        if "--stop" in argv:
+            return client.stop()
+        return client.run(argv)
+    except DaemonError as error:
+        print(error)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
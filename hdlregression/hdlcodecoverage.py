@@ -13,15 +13,30 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
 #
 
+import glob
 import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from .run.cmd_runner import CommandRunner
+from .hdlregression_pkg import parse_coverage_rank
 
 
 class HdlCodeCoverage:
 
     ID_CODE_COVERAGE = []
 
+    # Max number of coverage files in one merge command, larger sets
+    # are merged in parallel batches as a reduction tree.
+    MERGE_BATCH_SIZE = 64
+
+    # Code coverage of finished tests can be merged while other tests are running.
+    INCREMENTAL_MERGE = False
+
+    # Name of the testgroup generated from code coverage ranking.
+    RANK_TESTGROUP = 'coverage_rank'
+
     def __init__(self, project):
         self.project = project
         self.file_list = []
@@ -30,6 +45,16 @@ class HdlCodeCoverage:
         self.exclude_file = None
         self.code_coverage_settings = None
         self.options = None
+        self.incremental_merge = True
+        self.merge_thread = None
+        self.merge_condition = threading.Condition()
+        self.merge_stopping = False
+        self.pending_files = []
+        self.merged_files = set()
+        self.partial_merge_file = None
+        self.num_partial_merges = 0
+        self.rank_target = None
+        self.rank_testgroup = self.RANK_TESTGROUP
 
     def set_options(self, options):
         if options is not None:
@@ -42,6 +67,24 @@ class HdlCodeCoverage:
     def get_options(self) -> str:
         return self.options
 
+    def set_incremental_merge(self, enable):
+        self.incremental_merge = enable
+
+    def get_incremental_merge(self) -> bool:
+        return self.incremental_merge
+
+    def set_rank_target(self, target):
+        self.rank_target = target
+
+    def get_rank_target(self) -> float:
+        return self.rank_target
+
+    def set_rank_testgroup(self, testgroup_name):
+        self.rank_testgroup = testgroup_name.lower()
+
+    def get_rank_testgroup(self) -> str:
+        return self.rank_testgroup
+
     def _create_path_if_missing(self, path):
         if os.path.exists(path) is False:
             os.mkdir(path)
@@ -123,14 +166,62 @@ class HdlCodeCoverage:
                                             env=os.environ.copy(),
                                             output_file=output_file):
             if verbose is True:
-                print(line.strip())
+                print(line.strip(), file=self.project.output)
+
+    def _is_code_coverage_file(self, name) -> bool:
+        '''
+        Code coverage files are matched with user file name from set_code_coverage() method.
+        '''
+        return name.lower() == os.path.basename(self.code_coverage_file).lower()
+
+    def _get_test_folders(self) -> list:
+        '''
+        Returns the output folders of the tests in this run, and with keep_code_coverage
+        the test folders kept from previous runs, i.e. test/<testbench>/<test>.
+        The complete test folder tree is searched when the tests are not known.
+        '''
+        test_path = self.project.settings.get_test_path()
+        runner = getattr(self.project, 'runner', None)
+        if runner is None:
+            return [root for (root, _, _) in os.walk(test_path)]
+
+        test_folders = [test.get_test_path() for test in runner.get_test_list()]
+        if self.project.settings.get_keep_code_coverage():
+            test_folders += glob.glob(os.path.join(test_path, '*', '*'))
+        return test_folders
 
     def _find_code_coverage_files(self) -> bool:
         '''
-        Searches for code coverage files in hdlregression/test folder,
-        Note! code coverage files are matched with user file name from set_code_coverage() method.
+        Searches for code coverage files in the test output folders.
         '''
-        return True
+        self.file_list = []
+        found_files = set()
+        # Merged files in test/coverage are not test results.
+        code_coverage_path = os.path.abspath(
+            os.path.join(self.project.settings.get_test_path(), 'coverage'))
+        for test_folder in self._get_test_folders():
+            test_folder = os.path.abspath(test_folder)
+            if test_folder == code_coverage_path or \
+               test_folder.startswith(code_coverage_path + os.sep):
+                continue
+            try:
+                names = sorted(os.listdir(test_folder))
+            except OSError:
+                continue
+            for name in names:
+                merge_file = os.path.join(test_folder, name)
+                if self._is_code_coverage_file(name) and os.path.isfile(merge_file):
+                    merge_file = os.path.abspath(merge_file)
+                    merge_file = merge_file.replace('\\', '/')
+                    if merge_file not in found_files:
+                        found_files.add(merge_file)
+                        self.file_list.append(merge_file)
+
+        if len(self.file_list) == 0:
+            self.project.logger.warning('No code coverage files found.')
+            return False
+        else:
+            return True
 
     def _insert_to_code_coverage_file_name(self, code_coverage_file_name, text):
         '''
@@ -143,12 +234,233 @@ class HdlCodeCoverage:
             text + code_coverage_file_name[dot_idx:]
         return code_coverage_file_name
 
+    def _get_merge_file(self) -> str:
+        return self._insert_to_code_coverage_file_name(self.get_code_coverage_file(), '_merge')
+
+    def _get_merge_command(self, input_files, output_file) -> list:
+        '''
+        Returns the command merging the input files to the output file,
+        None if merging is not supported.
+        '''
+        return None
+
+    def _run_merge(self, input_files, output_file) -> None:
+        merge_command = self._get_merge_command(input_files, output_file)
+        if merge_command:
+            self._run_command_list(merge_command)
+
+    def _merge_files(self, file_list, merge_file) -> None:
+        '''
+        Merges the files in batches of MERGE_BATCH_SIZE files run in parallel,
+        and the batch results again, until one merge of the remaining files
+        to the merge file is left.
+        '''
+        batch_size = max(2, self.MERGE_BATCH_SIZE)
+        extension = os.path.splitext(merge_file)[1]
+        merge_path = None
+        level = 0
+        while len(file_list) > batch_size:
+            if merge_path is None:
+                merge_path = self._create_code_coverage_sub_folder('merge')
+            merges = []
+            for index in range(0, len(file_list), batch_size):
+                output_file = '%s/level%d_%d%s' % (merge_path, level, index // batch_size, extension)
+                merges.append((file_list[index:index + batch_size], output_file))
+
+            self.project.logger.debug('Merging %d code coverage files in %d batches.'
+                                      % (len(file_list), len(merges)))
+            num_threads = min(len(merges), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                list(executor.map(lambda merge: self._run_merge(*merge), merges))
+
+            file_list = [output_file for (_, output_file) in merges if os.path.isfile(output_file)]
+            if len(file_list) < len(merges):
+                self.project.logger.warning('Code coverage merge failed for %d of %d batches.'
+                                            % (len(merges) - len(file_list), len(merges)))
+            level += 1
+
+        self._run_merge(file_list, merge_file)
+
     def _merge_code_coverage_files(self) -> str:
         '''
-        Executes code coverage merge with all UCDB files found
-        in hdlregression/test/ sub-folders.
+        Executes code coverage merge with all code coverage files found
+        in the test output folders, using the partial merge of files
+        merged while tests were running.
         '''
-        return ''
+        merge_file = self._get_merge_file()
+        file_list = self.file_list
+        if self.partial_merge_file is not None:
+            file_list = [self.partial_merge_file] + \
+                [f for f in self.file_list if f not in self.merged_files]
+        self._merge_files(file_list, merge_file)
+
+        # Remove batch results and partial merges.
+        self._reset_incremental_merge()
+        shutil.rmtree(os.path.join(self.get_code_coverage_path(), 'merge'), ignore_errors=True)
+        return merge_file
+
+    def start_incremental_merge(self) -> None:
+        '''
+        Starts merging the code coverage files of finished tests in the
+        background, called when simulations are started, i.e. after
+        previous test results have been moved.
+        '''
+        self.finish_incremental_merge()
+        self._reset_incremental_merge()
+        if not (self.INCREMENTAL_MERGE and self.get_incremental_merge()
+                and self.get_code_coverage_file() is not None):
+            return
+        self.merge_stopping = False
+        self.merge_thread = threading.Thread(target=self._incremental_merge_loop,
+                                             name='Coverage merge')
+        self.merge_thread.daemon = True
+        self.merge_thread.start()
+
+    def add_test_coverage(self, test_path) -> None:
+        '''
+        Queues the code coverage files of a finished test for
+        the background merge.
+        '''
+        if self.merge_thread is None:
+            return
+        try:
+            names = sorted(os.listdir(test_path))
+        except OSError:
+            return
+        files = [os.path.abspath(os.path.join(test_path, name)).replace('\\', '/')
+                 for name in names if self._is_code_coverage_file(name)]
+        with self.merge_condition:
+            self.pending_files += files
+            self.merge_condition.notify_all()
+
+    def finish_incremental_merge(self) -> None:
+        '''
+        Stops the background merge when the running merge is done,
+        files not merged are left for the final merge.
+        '''
+        if self.merge_thread is None:
+            return
+        with self.merge_condition:
+            self.merge_stopping = True
+            self.merge_condition.notify_all()
+        self.merge_thread.join()
+        self.merge_thread = None
+
+    def _reset_incremental_merge(self) -> None:
+        with self.merge_condition:
+            self.pending_files = []
+        self.merged_files = set()
+        self.partial_merge_file = None
+        self.num_partial_merges = 0
+
+    def _incremental_merge_loop(self) -> None:
+        while True:
+            with self.merge_condition:
+                while not self.pending_files and not self.merge_stopping:
+                    self.merge_condition.wait()
+                if self.merge_stopping:
+                    return
+                # Files added while merging are merged together in the next merge.
+                input_files = self.pending_files[:self.MERGE_BATCH_SIZE - 1]
+                del self.pending_files[:len(input_files)]
+            self._merge_partial(input_files)
+
+    def _merge_partial(self, input_files) -> None:
+        '''
+        Merges files with the partial merge to a new partial merge.
+        '''
+        self.num_partial_merges += 1
+        partial_merge_file = '%s/partial_%d%s' % (self._create_code_coverage_sub_folder('merge'),
+                                                  self.num_partial_merges,
+                                                  os.path.splitext(self.get_code_coverage_file())[1])
+        if self.partial_merge_file is not None:
+            input_files = [self.partial_merge_file] + input_files
+
+        with self.project.tracer.span('partial merge', 'coverage') as span_args:
+            self._run_merge(input_files, partial_merge_file)
+            span_args['files'] = len(input_files)
+
+        if not os.path.isfile(partial_merge_file):
+            self.project.logger.debug('Partial code coverage merge failed: %s' % (partial_merge_file))
+            return
+        if self.partial_merge_file is not None:
+            try:
+                os.remove(self.partial_merge_file)
+            except OSError:
+                pass
+        self.merged_files.update(input_files)
+        self.partial_merge_file = partial_merge_file
+
+    def _get_rank_file(self) -> str:
+        return '%s/ranktest.rank' % (self.get_code_coverage_path().replace('\\', '/'))
+
+    def _get_rank_command(self, input_files, rank_file) -> list:
+        '''
+        Returns the command ranking the input files by code coverage
+        contribution to the rank file, None if ranking is not supported.
+        '''
+        return None
+
+    def rank_code_coverage(self) -> list:
+        '''
+        Ranks the tests of this run by code coverage contribution and returns
+        the fewest tests, in rank order, reaching the rank target percentage
+        of the code coverage of all tests. None if ranking failed.
+        '''
+        runner = getattr(self.project, 'runner', None)
+        if self.get_code_coverage_file() is None or runner is None:
+            return None
+
+        test_files = {}
+        for test in runner.get_test_list():
+            try:
+                names = sorted(os.listdir(test.get_test_path()))
+            except OSError:
+                continue
+            for name in names:
+                if self._is_code_coverage_file(name):
+                    filename = os.path.abspath(os.path.join(test.get_test_path(), name))
+                    test_files[filename.replace('\\', '/')] = test
+        if not test_files:
+            self.project.logger.warning('No code coverage files found for ranking.')
+            return None
+
+        rank_file = self._get_rank_file()
+        rank_command = self._get_rank_command(list(test_files), rank_file)
+        if rank_command is None:
+            self.project.logger.warning('Code coverage ranking is not supported with %s.'
+                                        % (self.project.settings.get_simulator_name()))
+            return None
+        if os.path.isfile(rank_file):
+            os.remove(rank_file)
+
+        with self.project.tracer.span('rank', 'coverage') as span_args:
+            self._run_command_list(rank_command, path=self.get_code_coverage_path())
+            span_args['files'] = len(test_files)
+
+        try:
+            with open(rank_file, 'r') as f:
+                ranking = parse_coverage_rank(f.readlines(), list(test_files))
+        except OSError:
+            self.project.logger.warning('Code coverage ranking failed: %s not found.' % (rank_file))
+            return None
+        if not ranking:
+            self.project.logger.warning('No tests found in code coverage ranking: %s' % (rank_file))
+            return None
+
+        # Tests are ranked by contribution, i.e. the coverage is accumulated.
+        full_coverage = max([coverage or 0 for (_, coverage) in ranking])
+        target_coverage = full_coverage * self.get_rank_target() / 100
+        ranked_tests = []
+        for filename, coverage in ranking:
+            ranked_tests.append(test_files[filename])
+            if coverage is not None and coverage >= target_coverage:
+                break
+
+        self.project.logger.info('Code coverage ranking: %d of %d tests reach %.2f%% of %.2f%% coverage.'
+                                 % (len(ranked_tests), len(test_files),
+                                    self.get_rank_target(), full_coverage))
+        return ranked_tests
 
     def _apply_exceptions(self) -> str:
         '''
@@ -180,37 +492,6 @@ class HdlCodeCoverage:
         '''
         pass
 
-    def merge_code_coverage(self) -> bool:
-        '''
-        Search for code coverage files in hdlregression/test sub-folders and
-        save a merge in hdlregression/test/coverage.
-        '''
-        return True
-
-    def get_code_coverage_obj(self, simulator=None):
-        '''
-        Changes the HDLCodeCoverage instance to a sub-class object.
-        '''
-        if simulator is None:
-            self.__class__ = ModelsimCodeCoverage
-        elif simulator == 'MODELSIM':
-            self.__class__ = ModelsimCodeCoverage
-        elif simulator == 'GHDL':
-            self.__class__ = GHDLCodeCoverage
-        elif simulator == 'RIVIERA-PRO':
-            self.__class__ = RivieraProCodeCoverage            
-        else:
-            self.__class__ = ModelsimCodeCoverage
-
-
-class ModelsimCodeCoverage(HdlCodeCoverage):
-
-    ID_CODE_COVERAGE = ['-', 'b', 'c', 'e', 's', 't', 'x', 'f']
-
-    def __init__(self, project):
-        super().__init__(project=project)
-        self.project = project
-
     def merge_code_coverage(self) -> bool:
         '''
         Search for code coverage files in hdlregression/test sub-folders and
@@ -233,10 +514,10 @@ class ModelsimCodeCoverage(HdlCodeCoverage):
                 self._create_path_if_missing(code_coverage_path)
 
                 # Merge coverage files to one combined coverage file.
-                self._merge_code_coverage_files()
+                merge_file = self._merge_code_coverage_files()
 
                 # Apply coverage exceptions.
-                ucdb_file = self._apply_exceptions()
+                ucdb_file = self._apply_exceptions() or merge_file
 
                 # Write coverage reports.
                 self._generate_html_report(ucdb_file)
@@ -250,35 +531,32 @@ class ModelsimCodeCoverage(HdlCodeCoverage):
             # Don't trigger warning in HDLRegression
             return True
 
-    def _find_code_coverage_files(self) -> bool:
+    def get_code_coverage_obj(self, simulator=None):
         '''
-        Searches for code coverage files in hdlregression/test folder,
-        Note! code coverage files are matched with user file name from set_code_coverage() method.
+        Changes the HDLCodeCoverage instance to a sub-class object.
         '''
-        match_code_coverage_file = os.path.basename(self.code_coverage_file).lower()
+        if simulator is None:
+            self.__class__ = ModelsimCodeCoverage
+        elif simulator == 'MODELSIM':
+            self.__class__ = ModelsimCodeCoverage
+        elif simulator == 'GHDL':
+            self.__class__ = GHDLCodeCoverage
+        elif simulator == 'RIVIERA-PRO':
+            self.__class__ = RivieraProCodeCoverage            
+        else:
+            self.__class__ = ModelsimCodeCoverage
 
-        for root, _, files in os.walk(self.project.settings.get_test_path()):
-            for name in files:
-                if name.lower() == match_code_coverage_file:
-                    merge_file = os.path.join(root, name)
-                    merge_file = os.path.abspath(merge_file)
-                    merge_file = merge_file.replace('\\', '/')
-                    self.file_list.append(merge_file)
 
-        if len(self.file_list) == 0:
-            self.project.logger.warning('No code coverage files found.')
-            return False
-        else:
-            return True
+class ModelsimCodeCoverage(HdlCodeCoverage):
 
-    def _merge_code_coverage_files(self) -> str:
-        '''
-        Executes code coverage merge with all UCDB files found
-        in hdlregression/test/ sub-folders.
-        '''
-        merge_ucdb = self.get_code_coverage_file()
-        merge_ucdb = self._insert_to_code_coverage_file_name(merge_ucdb, '_merge')
+    ID_CODE_COVERAGE = ['-', 'b', 'c', 'e', 's', 't', 'x', 'f']
+    INCREMENTAL_MERGE = True
 
+    def __init__(self, project):
+        super().__init__(project=project)
+        self.project = project
+
+    def _get_merge_command(self, input_files, output_file) -> list:
         vcover_exec = self.get_simulator_exec('vcover')
         merge_command = [vcover_exec,
                          'merge']
@@ -288,13 +566,16 @@ class ModelsimCodeCoverage(HdlCodeCoverage):
             for option in merge_options:
                 merge_command.append(option)
 
-        for item in self.file_list:
+        for item in input_files:
             merge_command.append(item)
 
         merge_command.append('-out')
-        merge_command.append(merge_ucdb)
-        self._run_command_list(merge_command)
-        return merge_ucdb
+        merge_command.append(output_file)
+        return merge_command
+
+    def _get_rank_command(self, input_files, rank_file) -> list:
+        vcover_exec = self.get_simulator_exec('vcover')
+        return [vcover_exec, 'ranktest', '-rankfile', rank_file] + list(input_files)
 
     def _apply_exceptions(self) -> str:
         '''
@@ -362,91 +643,41 @@ class GHDLCodeCoverage(HdlCodeCoverage):
         super().__init__(project=project)
         self.project = project
 
+    def merge_code_coverage(self) -> bool:
+        '''
+        Code coverage is not supported with GHDL.
+        '''
+        return True
+
+    def rank_code_coverage(self) -> list:
+        '''
+        Code coverage is not supported with GHDL.
+        '''
+        return None
+
 
 
 class RivieraProCodeCoverage(HdlCodeCoverage):
     ID_CODE_COVERAGE = ['b', 'c', 'e', 's', 't', 'x', 'f']
+    INCREMENTAL_MERGE = True
 
     def __init__(self, project):
         super().__init__(project=project)
         self.project = project
 
-    def _find_code_coverage_files(self) -> bool:
-        """
-        Finds all .acdb files in the test tree for merging.
-        """
-        self.file_list = []
-        for root, _, files in os.walk(self.project.settings.get_test_path()):
-            for name in files:
-                if name.lower().endswith('.acdb'):
-                    acdb_file = os.path.join(root, name)
-                    acdb_file = os.path.abspath(acdb_file).replace('\\', '/')
-                    self.file_list.append(acdb_file)
-        return len(self.file_list) > 0
-
-    def _merge_code_coverage_files(self) -> str:
-        if len(self.file_list) <= 1:
-            if len(self.file_list) == 1:
-                return self.file_list[0]
-            else:
-                return None
-        merged_acdb = self._insert_to_code_coverage_file_name(self.get_code_coverage_file(), '_merge')
-        file_list_str = ' '.join(['-i "{}"'.format(f) for f in self.file_list])
-        tcl_cmd = 'coverage merge -o "{}" {}; quit;'.format(merged_acdb, file_list_str)
-        vsim_exec = self.get_simulator_exec('vsimsa')
-        command = [vsim_exec, '-c', '-do', tcl_cmd]
-        self._run_command_list(command)
-        return merged_acdb
-
-    def merge_code_coverage(self) -> bool:
-        if self.get_code_coverage_file() is not None:
-            self.project.logger.info('Creating Riviera-PRO code coverage reports...')
-            files_found = self._find_code_coverage_files()
-            if not files_found:
-                self.project.logger.warning('No code coverage files (.acdb) found.')
-                return False
-            merged_acdb = self._merge_code_coverage_files()
-            if not merged_acdb:
-                return False
-            self._generate_html_report(merged_acdb)
-            self._generate_txt_report(merged_acdb)
-            return True
-        return True
-
-    def _generate_html_report(self, acdb_file):
-        html_path = os.path.join(self.get_code_coverage_path(), 'html')
-        html_path = os.path.abspath(html_path)
-        os.makedirs(html_path, exist_ok=True)
-        html_file = os.path.join(html_path, "coverage_report.html")
-        tcl_cmd = (
-            'coverage open "{}"; '
-            'coverage report -html -o "{}"; '
-            'quit;'
-        ).format(acdb_file, html_file)
-        vsim_exec = self.get_simulator_exec('vsimsa')
-        command = [vsim_exec, '-c', '-do', tcl_cmd]
-        self._run_command_list(command)
-
-    def _generate_txt_report(self, acdb_file):
+    def _is_code_coverage_file(self, name) -> bool:
         """
-        Generates a code coverage text report using Riviera-PRO.
-        The report is saved in the test/coverage/txt/ directory.
+        All .acdb files in the test folders are merged.
         """
-        # Lag output-mappen hvis den ikke finnes
-        txt_path = self._create_code_coverage_sub_folder('txt')
-        txt_file = os.path.join(txt_path, "coverage.txt")
-        txt_file = os.path.abspath(txt_file).replace('\\', '/')
+        return name.lower().endswith('.acdb')
 
-        # Bygg TCL-kommandoen som åpner .acdb og skriver summary til fil
-        tcl_cmd = (
-            'coverage open "{}"; '
-            'coverage report -summary > "{}"; '
-            'quit;'
-        ).format(acdb_file, txt_file)
-
-        # Finn simulatorens batch-exe
+    def _get_merge_command(self, input_files, output_file) -> list:
+        file_list_str = ' '.join(['-i "{}"'.format(f) for f in input_files])
+        tcl_cmd = 'coverage merge -o "{}" {}; quit;'.format(output_file, file_list_str)
         vsim_exec = self.get_simulator_exec('vsimsa')
+        return [vsim_exec, '-c', '-do', tcl_cmd]
 
-        # Kjør batch-kommandoen
-        command = [vsim_exec, '-c', '-do', tcl_cmd]
-        self._run_command_list(command)
\ No newline at end of file
+    def _merge_code_coverage_files(self) -> str:
+        if len(self.file_list) == 1:
+            return self.file_list[0]
+        return super()._merge_code_coverage_files()
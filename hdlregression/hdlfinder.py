@@ -16,19 +16,24 @@
 
 import os
 import fnmatch
-from pathlib import Path
 from .report.logger import Logger
 
 
 class HDLFinder:
     """
     Class for locating files and creating hdlregression file objects.
+
+    Directory listings are cached in the project and shared by all
+    HDLFinder objects of that project, so that several add_files() calls
+    searching the same directory will only list that directory once.
+    The project drops the listings when a run starts.
     """
 
     def __init__(self, project, filename=None):
         self.logger = Logger(name=__name__, project=project)
         self.project = project
         self.file_list = []  # Init file name string list as empty list.
+        self._file_set = set()  # Fast lookup for duplicate files.
 
         if filename:
             if os.path.isdir(filename):
@@ -36,6 +41,46 @@ class HDLFinder:
             else:
                 self.find_files(filename)
 
+    def _scan_directory(self, directory, recursive) -> list:
+        """
+        Returns a list of (root, name, lowercase name) tuples for
+        the directory using os.scandir(). The list is cached in the
+        project. Recursive listing only returns files, same as os.walk(),
+        and will not follow symlinked directories.
+        """
+        # (directory, recursive) -> list of (root, name, name.lower()) tuples
+        dir_listing_cache = self.project.dir_listing_cache
+        key = (directory, recursive)
+        listing = dir_listing_cache.get(key)
+        if listing is not None:
+            return listing
+
+        listing = []
+        pending = [directory]
+        while pending:
+            root = pending.pop()
+            sub_dirs = []
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if recursive:
+                            try:
+                                is_dir = entry.is_dir()
+                            except OSError:
+                                is_dir = False
+                            if is_dir:
+                                if not entry.is_symlink():
+                                    sub_dirs.append(entry.path)
+                                continue
+                        listing.append((root, entry.name, entry.name.lower()))
+            except OSError:
+                continue
+            # Keep top-down order of os.walk()
+            pending.extend(reversed(sub_dirs))
+
+        dir_listing_cache[key] = listing
+        return listing
+
     def find_files(self, filename, recursive=False) -> None:
         """
         Find all files matching 'filename' (case-insensitive).
@@ -49,33 +94,17 @@ class HDLFinder:
         search_path = os.path.join(script_path, filename)
         search_path = os.path.normpath(search_path)
         search_dir = os.path.dirname(search_path) or "."
-        search_pattern = os.path.basename(search_path)
-    
+        search_pattern = os.path.basename(search_path).lower()
+
         # Check if the directory exists
-        if not Path(search_dir).is_dir():
+        if not os.path.isdir(search_dir):
             return
-    
-        def gather_candidate_paths(directory: str, recurse: bool):
-            """
-            Gathers potential (root, filename) pairs either from a single directory 
-            or by walking the directory tree, depending on 'recurse'.
-            """
-            items = []
-            if recurse:
-                for root, _, files in os.walk(directory):
-                    for f in files:
-                        items.append((root, f))
-            else:
-                for f in os.listdir(directory):
-                    items.append((directory, f))
-            return items
-    
-        candidates = gather_candidate_paths(search_dir, recursive)
-    
-        for root, name in candidates:
-            if fnmatch.fnmatch(name.lower(), search_pattern.lower()):
+
+        for root, name, name_lower in self._scan_directory(search_dir, recursive):
+            if fnmatch.fnmatchcase(name_lower, search_pattern):
                 full_path = os.path.join(root, name)
-                if full_path not in self.file_list:
+                if full_path not in self._file_set:
+                    self._file_set.add(full_path)
                     self.file_list.append(full_path)
 
     def get_file_list(self) -> list:
@@ -22,32 +22,30 @@
 
 from . import __version__
 from .hdlcodecoverage import *
-from .arg_parser import arg_parser_reader
+from .arg_parser import arg_parser_reader, get_parser
 from .hdlregression_pkg import *
 from .report.logger import Logger
+from .report.reporters import REPORTER_CLASSES, get_reporter_class
+from .report.reportmodel import build_report_model
+from .report.resultfile import write_result_file, get_result_filename, get_test_result
+from .report.resultfile import read_result_file, ResultFileError
+from .report.trace import Tracer
 from .settings import HDLRegressionSettings
 from .settings import TestcaseSettings
 from .construct.container import Container
-from .report.jsonreporter import JSONReporter
-from .report.csvreporter import CSVReporter
-from .report.txtreporter import TXTReporter
-from .report.xmlreporter import XMLReporter
-from .report.htmlreporter import HTMLReporter
-from .run.tcl_runner import TclRunnerModelsim, TclRunnerRiviera, TclRunnerActiveHDL
+from .projectdb import ProjectDatabase, replace_project_references
 from .run.cmd_runner import CommandRunner
-from .run.runner_modelsim import ModelsimRunner
-from .run.runner_nvc import NVCRunner
-from .run.runner_ghdl import GHDLRunner
-from .run.runner_aldec import RivieraRunner, ActiveHDLRunner
-from .run.vivado_runner import VivadoRunner
 from .construct.hdllibrary import HDLLibrary, PrecompiledLibrary
 from .configurator import SettingsConfigurator
 from .run.hdltests import TestStatus
+from .run.transcript import TRANSCRIPT_EXTENSIONS, get_transcript_compressions
 import copy
+import hashlib
 import sys
 import os
 import pickle
 from signal import signal, SIGINT
+from concurrent.futures import ThreadPoolExecutor
 
 # Enable terminal colors on windows OS
 if os.name == "nt":
@@ -64,6 +62,23 @@ src_path = os.path.dirname(os.path.abspath(__file__))
 # Regression script path
 script_path = os.path.abspath(sys.path[0])
 
+# Runner modules are imported when first used,
+# i.e. (module, class name).
+RUNNER_CLASSES = {
+    "MODELSIM": (".run.runner_modelsim", "ModelsimRunner"),
+    "RIVIERA-PRO": (".run.runner_aldec", "RivieraRunner"),
+    "ACTIVE-HDL": (".run.runner_aldec", "ActiveHDLRunner"),
+    "GHDL": (".run.runner_ghdl", "GHDLRunner"),
+    "NVC": (".run.runner_nvc", "NVCRunner"),
+    "VIVADO": (".run.vivado_runner", "VivadoRunner"),
+}
+
+TCL_RUNNER_CLASSES = {
+    "MODELSIM": (".run.tcl_runner", "TclRunnerModelsim"),
+    "RIVIERA-PRO": (".run.tcl_runner", "TclRunnerRiviera"),
+    "ACTIVE-HDL": (".run.tcl_runner", "TclRunnerActiveHDL"),
+}
+
 
 class HDLRegression:
     """
@@ -99,11 +114,31 @@ class HDLRegression:
         :type output_path: str
         """
         self.init_from_gui = init_from_gui
+        # Loggers shared by scanners and modules, see Logger.get_logger().
+        self.shared_loggers = {}
         self.settings = self._initialize_settings(arg_parser)
         self.logger = self._initialize_logger()
         self.hdlcodecoverage = self._initialize_hdl_code_coverage()
 
         self.cached_simulator_settings = None
+        self.project_db = None
+        self.runner = None
+        # add_files()/remove_file() calls and start() arguments,
+        # replayed for each daemon and watch mode run.
+        self.file_requests = []
+        self.run_kwargs = {}
+        # Terminal output of runs, e.g. a daemon client, None for sys.stdout.
+        self.output = None
+        # CPU time, peak memory and I/O of tests from previous runs, by test key.
+        self.test_resource_usage = {}
+        # Testgroup generated from code coverage ranking, see set_coverage_rank().
+        self.coverage_rank_testgroup = None
+        # Remote workers running the simulations, see --workers.
+        self.worker_pool = None
+        # Phase spans of a run, see --trace.
+        self.tracer = Tracer()
+        # Directory listings of the add_files() calls before a run, see HDLFinder.
+        self.dir_listing_cache = {}
 
         self._initialize_signal_handler()
         if output_path is None:
@@ -112,6 +147,7 @@ class HDLRegression:
         self._set_simulator(sim_name=simulator)
         self._setup_logger()
         self.reporter = None
+        self.reporters = []
         self.testcase_settings = TestcaseSettings()
         self.settings.detect_python_exec()
 
@@ -171,14 +207,16 @@ class HDLRegression:
 
         # Get library object to store file objects
         library = self._get_library_object(self.settings.get_library_name())
-        library.add_file(
-            filename=filename,
-            hdl_version=hdl_version,
-            com_options=com_options,
-            parse_file=parse_file,
-            code_coverage=code_coverage,
-            netlist_instance=netlist_inst,
-        )
+        add_file_kwargs = {
+            "filename": filename,
+            "hdl_version": hdl_version,
+            "com_options": com_options,
+            "parse_file": parse_file,
+            "code_coverage": code_coverage,
+            "netlist_instance": netlist_inst,
+        }
+        self.file_requests.append(("add", library.get_name(), add_file_kwargs))
+        library.add_file(**add_file_kwargs)
 
     def add_file(
         self,
@@ -203,17 +241,20 @@ class HDLRegression:
             code_coverage=code_coverage,
         )
 
-    def add_file_to_run_folder(self, filename: str, tc_id: str):
+    def add_file_to_run_folder(self, filename: str, tc_id: str, writable: bool = False):
         """
-        Copies a file to the folder where a testcase is run from.
+        Stages a file in the folder where a testcase is run from. The file
+        is linked when possible, and copied if the testcase writes to it.
 
         :param: filename : filename with full or relative path
         :type filename : str
         :param: tc_id : testcase id number that use included file
         :type tc_id : str
+        :param: writable : testcase needs a private writable copy of the file
+        :type writable : bool
 
         """
-        self.testcase_settings.copy_file_to_testcase_folder(filename, tc_id)
+        self.testcase_settings.copy_file_to_testcase_folder(filename, tc_id, writable)
 
     def remove_file(self, filename, library_name):
         """
@@ -227,6 +268,7 @@ class HDLRegression:
         """
         # Get library object to store file objects
         library = self._get_library_object(library_name)
+        self.file_requests.append(("remove", library_name, {"filename": filename}))
         library.remove_file(filename)
 
     def set_dependency(self, library_name: str, dependent_libs: list):
@@ -312,7 +354,8 @@ class HDLRegression:
         library: bool = False,
     ):
         """
-        Setup the reporting method.
+        Setup the reporting method. Can be called once for each report
+        file, all reports are written from the same results.
 
         :param report_file: Name of file to write test run report
         :type report_file: str
@@ -325,28 +368,29 @@ class HDLRegression:
         """
         # Get the file extension in lower case
         file_extension = os.path.splitext(report_file)[1].lower()
-        if report_file.lower().endswith(".txt"):
-            self.reporter = TXTReporter(filename=report_file, project=self)
-        elif report_file.lower().endswith(".csv"):
-            self.reporter = CSVReporter(filename=report_file, project=self)
-        elif report_file.lower().endswith(".json"):
-            self.reporter = JSONReporter(filename=report_file, project=self)
-        elif report_file.lower().endswith(".xml"):
-            self.reporter = XMLReporter(filename=report_file, project=self)
-        elif report_file.lower().endswith(".html") or report_file.lower().endswith(".htm"):
-            self.reporter = HTMLReporter(filename=report_file, project=self)
+        reporter_class = get_reporter_class(report_file)
+        if reporter_class is not None:
+            reporter = reporter_class(filename=report_file, project=self)
         else:
             self.logger.warning(
                 "Unsupported report file type: %s. Using: report_file.txt"
                 % (file_extension)
             )
-            self.reporter = TXTReporter(filename="report.txt", project=self)
+            reporter_class = import_class(*REPORTER_CLASSES[".txt"])
+            reporter = reporter_class(filename="report.txt", project=self)
 
-        self.reporter.set_report_items(
+        reporter.set_report_items(
             report_compile_order=compile_order,
             report_spec_cov=spec_cov,
             report_library=library,
         )
+        # A report file is only written once.
+        self.reporters = [
+            other
+            for other in self.reporters
+            if other.get_filename() != reporter.get_filename()
+        ] + [reporter]
+        self.reporter = reporter
 
     def set_simulator(
         self,
@@ -469,6 +513,7 @@ class HDLRegression:
         code_coverage_file: str,
         exclude_file: str = None,
         merge_options: str = None,
+        incremental_merge: bool = True,
     ):
         """
         Defines the code coverage for all tests
@@ -481,11 +526,140 @@ class HDLRegression:
         :type exclude_file: str
         :param merge_options: Additional options to run in a vcov merge call.
         :type merge_options: str
+        :param incremental_merge: Merge code coverage of finished tests while other tests are running.
+        :type incremental_merge: bool
         """
         self.hdlcodecoverage.set_code_coverage_settings(code_coverage_settings)
         self.hdlcodecoverage.set_code_coverage_file(code_coverage_file)
         self.hdlcodecoverage.set_exclude_file(exclude_file)
         self.hdlcodecoverage.set_options(merge_options)
+        self.hdlcodecoverage.set_incremental_merge(incremental_merge)
+
+    def set_coverage_rank(self, target: float = 95.0, testgroup_name: str = "coverage_rank"):
+        """
+        Ranks the tests by code coverage contribution when all tests are run
+        with code coverage, and generates a testgroup with the fewest tests
+        reaching the target percentage of the code coverage of all tests.
+
+        :param target: Percentage of the code coverage of all tests to reach.
+        :type target: float
+        :param testgroup_name: Name of the generated testgroup, for use with -tg.
+        :type testgroup_name: str
+        """
+        if not isinstance(target, (int, float)) or not 0 < target <= 100:
+            self.logger.warning(
+                "Invalid code coverage rank target %s, must be above 0 and at most 100."
+                % (target)
+            )
+            return
+        if not isinstance(testgroup_name, str) or not testgroup_name:
+            self.logger.warning("Invalid code coverage rank testgroup name: %s" % (testgroup_name))
+            return
+        self.hdlcodecoverage.set_rank_target(float(target))
+        self.hdlcodecoverage.set_rank_testgroup(testgroup_name)
+
+    def set_test_retries(self, retries: int = 1, budget: int = None):
+        """
+        Runs a failing test again, up to retries times, in the same run.
+        A test passing when run again is reported as PASS_AFTER_RETRY.
+
+        :param retries: Max number of retries of each test.
+        :type retries: int
+        :param budget: Max number of retries of all tests in a run, no limit if None.
+        :type budget: int
+        """
+        if not isinstance(retries, int) or retries < 0:
+            self.logger.warning("Invalid number of test retries %s, must be at least 0." % (retries))
+            return
+        if budget is not None and (not isinstance(budget, int) or budget < 0):
+            self.logger.warning("Invalid test retry budget %s, must be at least 0." % (budget))
+            return
+        self.settings.set_test_retries(retries)
+        self.settings.set_retry_budget(budget)
+
+    def set_result_history(self, enable: bool = True, keep_runs: int = None):
+        """
+        Records the verdict, simulation time, resource usage, generics and
+        seed of every test in each run in the result history, see the
+        history command.
+
+        :param enable: Record runs in the result history if set to True.
+        :type enable: bool
+        :param keep_runs: Number of runs to keep, all runs are kept if None.
+        :type keep_runs: int
+        """
+        if keep_runs is not None and (not isinstance(keep_runs, int) or keep_runs < 1):
+            self.logger.warning(
+                "Invalid number of result history runs %s, must be at least 1." % (keep_runs)
+            )
+            return
+        self.settings.set_result_history(enable)
+        self.settings.set_result_history_runs(keep_runs)
+
+    def set_test_backup_retention(self, max_backups: int = None, max_size: int = None):
+        """
+        Limits the backups of previous test runs, i.e. the test_<time>
+        folders in the output path. The oldest backups are removed when
+        a new backup is made, the newest backup is always kept.
+
+        :param max_backups: Number of backups to keep, all are kept if None.
+        :type max_backups: int
+        :param max_size: Max size (MB) of all backups, no limit if None.
+        :type max_size: int
+        """
+        if max_backups is not None and (not isinstance(max_backups, int) or max_backups < 1):
+            self.logger.warning(
+                "Invalid number of test backups %s, must be at least 1." % (max_backups)
+            )
+            return
+        if max_size is not None and (not isinstance(max_size, int) or max_size < 0):
+            self.logger.warning(
+                "Invalid test backup size %s, must be a positive number of MB." % (max_size)
+            )
+            return
+        self.settings.set_max_test_backups(max_backups)
+        self.settings.set_max_test_backup_size(max_size)
+
+    def set_transcript_compression(self, compression: str = "gzip"):
+        """
+        Compresses the transcripts of the tests, written on the fly
+        while simulating, or after simulating when the transcript is
+        written by the simulator. Test output is then read back from
+        the transcripts instead of being kept in memory.
+
+        :param compression: "gzip", "zstd" or None for no compression.
+        :type compression: str
+        """
+        if compression is not None:
+            compression = str(compression).lower()
+            if compression not in TRANSCRIPT_EXTENSIONS:
+                self.logger.warning(
+                    "Invalid transcript compression %s, must be one of: %s."
+                    % (compression, ", ".join(TRANSCRIPT_EXTENSIONS))
+                )
+                return
+            if compression not in get_transcript_compressions():
+                self.logger.warning(
+                    "Transcript compression %s not available, using gzip." % (compression)
+                )
+                compression = "gzip"
+        self.settings.set_transcript_compression(compression)
+
+    def set_license_limit(self, limit, feature: str = "simulator"):
+        """
+        Limits the number of simulations running at the same time
+        using a simulator license feature.
+
+        :param limit: Max number of simulations, or "auto" to limit
+                      when a license is first denied.
+        :type limit: int
+        :param feature: License feature, "simulator" or "coverage".
+        :type feature: str
+        """
+        try:
+            self.settings.set_license_limit(feature, parse_license_limit(limit))
+        except ValueError as error:
+            self.logger.warning(str(error))
 
     def set_simulator_wave_file_format(self, wave_format):
         """
@@ -527,10 +701,46 @@ class HDLRegression:
         """
         kwargs = dict_keys_to_lower(kwargs)
 
+        if self.settings.get_daemon_mode() is True:
+            return self._start_daemon(kwargs)
+        if self.settings.get_watch_mode() is True:
+            return self._start_watch(kwargs)
+        return self._run(kwargs)
+
+    def _run(self, kwargs: dict) -> int:
         update_settings_from_arguments(project=self, kwargs=kwargs)
 
+        self.tracer.start(self.settings.get_trace_file())
+        try:
+            with self.tracer.span("run", "phase"):
+                return self._run_selected(kwargs)
+        finally:
+            self._write_trace_file()
+
+    def _run_selected(self, kwargs: dict) -> int:
+        """
+        Run the listing, GUI or regression selected by the settings.
+        """
+        # Listing commands are answered from the project database
+        # when nothing has changed since the listing was made.
+        listing_command = self._get_listing_command()
+        listing_fingerprint = None
+        if listing_command:
+            listing_fingerprint = self._get_listing_fingerprint(listing_command, kwargs)
+            listing = self._get_cached_listing(listing_command, listing_fingerprint)
+            if listing is not None:
+                print(listing, file=self.output)
+                self.dir_listing_cache.clear()
+                self.hdlcodecoverage.get_code_coverage_obj(
+                    self.settings.get_simulator_name()
+                )
+                return self._complete_run()
+
         self._prepare_libraries()
 
+        # Any add_files() after this point shall see a fresh directory listing
+        self.dir_listing_cache.clear()
+
         self._setup_simulation_runner()
 
         self.hdlcodecoverage.get_code_coverage_obj(self.settings.get_simulator_name())
@@ -543,20 +753,27 @@ class HDLRegression:
 
         # pylint: disable=protected-access
         if self.settings.get_list_testcase():
-            print(list_testcases(self.runner))
+            listing = list_testcases(self.runner)
+            print(listing, file=self.output)
+            self._save_listing(listing_command, listing_fingerprint, listing)
 
         elif self.settings.get_export_testcases_json_path():
-            print(export_testcases_to_json(self.runner,self.settings.get_export_testcases_json_path()))
+            print(export_testcases_to_json(self.runner,self.settings.get_export_testcases_json_path()),
+                  file=self.output)
 
         elif self.settings.get_list_dependencies():
             for library in self.library_container.get():
-                print(library._present_library())
+                print(library._present_library(), file=self.output)
 
         elif self.settings.get_list_compile_order():
-            print(list_compile_order(self.library_container))
+            listing = list_compile_order(self.library_container)
+            print(listing, file=self.output)
+            self._save_listing(listing_command, listing_fingerprint, listing)
 
         elif self.settings.get_list_testgroup():
-            print(list_testgroup(self.testgroup_collection_container))
+            listing = list_testgroup(self._get_testgroup_collection())
+            print(listing, file=self.output)
+            self._save_listing(listing_command, listing_fingerprint, listing)
 
         # pylint: enable=protected-access
         elif run_from_gui(project=self) is True:
@@ -568,12 +785,11 @@ class HDLRegression:
             """
             self.logger.info("Simulator: {}".format(self.runner.get_simulator_name()))
 
-            if self.settings.get_simulator_name() == "MODELSIM":
-                self.runner = TclRunnerModelsim(project=self)
-            elif self.settings.get_simulator_name() == "RIVIERA-PRO":
-                self.runner = TclRunnerRiviera(project=self)
-            elif self.settings.get_simulator_name() == "ACTIVE-HDL":
-                self.runner = TclRunnerActiveHDL(project=self)
+            if self.settings.get_simulator_name() in TCL_RUNNER_CLASSES:
+                runner_class = import_class(
+                    *TCL_RUNNER_CLASSES[self.settings.get_simulator_name()]
+                )
+                self.runner = runner_class(project=self)
 
             # Prepare modelsim.ini file
             modelsim_ini_file = self.runner._setup_ini()
@@ -610,14 +826,19 @@ class HDLRegression:
             self.logger.info("Simulator: {}".format(self.runner.get_simulator_name()))
             self._validate_simulator_with_cached(self.runner.get_simulator_name())
 
+            # Workers can connect while libraries are compiled.
+            self._setup_worker_pool()
+
             # Prepare modelsim.ini file
             modelsim_ini_file = self.runner._setup_ini()
             self._add_precompiled_libraries_to_modelsim_ini(modelsim_ini_file)
 
-            self.runner.prepare_test_modules_and_objects(self.re_run_tc_list)
+            with self.tracer.span("build tests", "phase"):
+                self.runner.prepare_test_modules_and_objects(self.re_run_tc_list)
 
             # Compile libraries and files
-            (compile_success, self.library_container) = self.runner.compile_libraries()
+            with self.tracer.span("compile", "phase"):
+                (compile_success, self.library_container) = self.runner.compile_libraries()
 
             # Update return_code if compilation has failed
             if compile_success is False:
@@ -631,7 +852,8 @@ class HDLRegression:
 
                 else:
                     self.logger.info("\nStarting simulations...")
-                    sim_success = self.runner.simulate() if self.runner else False
+                    with self.tracer.span("simulate", "phase"):
+                        sim_success = self.runner.simulate() if self.runner else False
 
                     if not sim_success or (self.get_num_fail_tests() > 0):
                         self.settings.set_return_code(1)
@@ -652,21 +874,18 @@ class HDLRegression:
                 disable_threading(project=self)
 
                 # Save settings befor returning to project script.
-                self._save_project_to_disk(reset=True)
+                with self.tracer.span("save project", "phase"):
+                    self._save_project_to_disk(reset=True)
 
-        if self.get_num_tests_run() > 0:
-            print_run_success(project=self)
-            self._generate_run_report_files()
-        else:
-            if self.settings.get_no_sim() is False:
-                self.settings.set_return_code(1)
+            # Results to merge with other runs, e.g. other shards.
+            with self.tracer.span("result file", "phase"):
+                self._write_result_file()
 
-        # Merge coverage files and generate reports.
-        if self.hdlcodecoverage.merge_code_coverage() is False:
-            self.logger.warning("Code coverage report failed.")
+            if self.settings.get_result_history():
+                with self.tracer.span("result history", "phase"):
+                    self._write_result_history()
 
-        # Exit regression with return code
-        return self.settings.get_return_code()
+        return self._complete_run()
 
     def get_results(self) -> list:
         """
@@ -680,6 +899,43 @@ class HDLRegression:
         else:
             return [[], [], []]
 
+    def _iter_test_results(self):
+        """
+        Returns the results of the tests one at a time, see
+        get_test_result(), with a function reading the last output
+        lines of failing tests.
+        """
+        if not self.runner:
+            return
+        for test in self.runner.get_test_list():
+            test_result = get_test_result(test)
+            if test.get_status() == TestStatus.FAIL:
+                test_result["output_tail"] = lambda test=test: test.get_output_lines(30)
+            yield test_result
+
+    def get_resource_usage(self) -> list:
+        """
+        Returns the resource usage of the tests run, i.e. user and system
+        CPU time (s), peak resident memory (bytes) and read/write bytes.
+        Values not available on the platform are 0.
+
+        :rtype: list
+        :return: List of (test name, resource usage dict) tuples.
+        """
+        if not self.runner:
+            return []
+        return [
+            (test.get_test_id_string() or test.get_testcase_name(), test.get_resource_usage())
+            for test in self.runner.get_test_list()
+            if test.get_status()
+            in [
+                TestStatus.PASS,
+                TestStatus.PASS_WITH_MINOR,
+                TestStatus.PASS_AFTER_RETRY,
+                TestStatus.FAIL,
+            ]
+        ]
+
     def get_num_tests_run(self) -> int:
         """
         Returns the number of tests that have been run.
@@ -717,6 +973,16 @@ class HDLRegression:
         """
         return self.runner.get_num_pass_with_minor_alerts_test()
 
+    def get_num_pass_after_retry_tests(self) -> int:
+        """
+        Returns the number of tests that have passed in this run after
+        failing one or more times, see set_test_retries().
+
+        :rtype: int
+        :return: number of passed tests in run.
+        """
+        return self.runner.get_num_pass_after_retry_test()
+
     def check_run_results(
         self, exp_pass: int = None, exp_fail: int = None, exp_run: int = None
     ) -> bool:
@@ -900,7 +1166,9 @@ class HDLRegression:
 
     def _initialize_settings(self, arg_parser):
         self.settings_config = SettingsConfigurator(project=self)
-        self.args = arg_parser_reader(arg_parser=arg_parser)
+        self.arg_parser = arg_parser if arg_parser is not None else get_parser()
+        self.args_list = sys.argv[1:]
+        self.args = arg_parser_reader(arg_parser=self.arg_parser, argv=self.args_list)
         return self.settings_config.setup_settings(HDLRegressionSettings(), self.args)
 
     def _initialize_logger(self):
@@ -974,10 +1242,336 @@ class HDLRegression:
             empty_project_folder(project=self)
             self._load_project_databases(output_path)
 
+    def _upgrade_cached_settings(self):
+        """
+        Add settings introduced after the cached version was saved,
+        using their default values.
+        """
+        default_settings = HDLRegressionSettings()
+        for name, value in vars(default_settings).items():
+            if name not in vars(self.settings):
+                setattr(self.settings, name, value)
+
+    def _start_daemon(self, kwargs: dict) -> int:
+        """
+        Keep the project in memory and serve run requests from
+        daemon clients until stopped.
+        """
+        self.settings.set_daemon_mode(False)
+        self.run_kwargs = kwargs
+        update_settings_from_arguments(project=self, kwargs=kwargs)
+
+        # Scan files before the first request.
+        self._prepare_libraries()
+
+        daemon_class = import_class(".daemon", "HDLRegressionDaemon")
+        daemon = daemon_class(project=self, output_path=self.settings.get_output_path())
+        return daemon.serve()
+
+    def _start_watch(self, kwargs: dict) -> int:
+        """
+        Run the regression, then rerun it each time registered HDL
+        files are changed until stopped with Ctrl+C.
+        """
+        self.settings.set_watch_mode(False)
+        self.run_kwargs = kwargs
+
+        watcher_class = import_class(".watch", "FileWatcher")
+        watcher = watcher_class(project=self)
+        watcher.update()
+        return_code = self._run(dict(kwargs))
+
+        # Clean and full regression only apply to the first run.
+        args = [
+            arg
+            for arg in self.args_list
+            if arg not in ("-c", "--clean", "-fr", "--fullRegression")
+        ]
+
+        while True:
+            self.logger.info(
+                "\nWatching {} files for changes (stop with Ctrl+C)...".format(
+                    len(watcher.get_watched_files())
+                )
+            )
+            changed_files = watcher.wait_for_changes()
+            if changed_files is None:
+                self.logger.info("\nWatch mode stopped.")
+                return return_code
+
+            for filename in changed_files:
+                self.logger.info("Changed: {}".format(filename))
+            # Changes made during the run are seen by the next wait.
+            watcher.update()
+            return_code = self._run_in_memory(args)
+
+    def _run_in_memory(self, args: list) -> int:
+        """
+        Run the regression with the given arguments using the
+        project kept in memory, i.e. a daemon request or a
+        watch mode rerun.
+        """
+        self.settings = self.settings_config.unset_argument_settings(self.settings)
+        self.args = arg_parser_reader(arg_parser=self.arg_parser, argv=args)
+        self.settings = self.settings_config.setup_settings(self.settings, self.args)
+        self.settings.set_daemon_mode(False)
+        self.settings.set_watch_mode(False)
+        self._setup_logger()
+
+        if self.settings.get_clean():
+            self.logger.error(
+                "Clean is not supported in daemon and watch mode, restart with -c."
+            )
+            return 1
+
+        # Default settings for success run and return code, as when
+        # the project is loaded.
+        self.settings.set_return_code(0)
+        self.settings.set_run_success(True)
+
+        # Pick up files added to or removed from the searched folders.
+        self.dir_listing_cache.clear()
+        for (request, library_name, request_kwargs) in self.file_requests:
+            library = self._get_library_object(library_name)
+            if request == "add":
+                library.add_file(**request_kwargs)
+            else:
+                library.remove_file(**request_kwargs)
+
+        return self._run(dict(self.run_kwargs))
+
+    def _complete_run(self) -> int:
+        """
+        Report run results, merge code coverage and return the
+        run return code.
+        """
+        if self.runner and self.get_num_tests_run() > 0:
+            print_run_success(project=self)
+            with self.tracer.span("report", "phase"):
+                self._generate_run_report_files()
+        else:
+            if self.settings.get_no_sim() is False:
+                self.settings.set_return_code(1)
+
+        # Merge coverage files and generate reports.
+        with self.tracer.span("coverage merge", "phase"):
+            coverage_success = self.hdlcodecoverage.merge_code_coverage()
+        if coverage_success is False:
+            self.logger.warning("Code coverage report failed.")
+        elif (
+            self.hdlcodecoverage.get_code_coverage_file() is not None
+            and self.hdlcodecoverage.get_rank_target() is not None
+        ):
+            self._rank_code_coverage()
+
+        # Exit regression with return code
+        return self.settings.get_return_code()
+
+    def _get_listing_command(self) -> str:
+        """
+        Returns the listing command selected for this run,
+        or None if the run is not a testcase, compile order
+        or testgroup listing.
+        """
+        if self.settings.get_list_testcase():
+            return "testcase"
+        if self.settings.get_export_testcases_json_path():
+            return None
+        if self.settings.get_list_dependencies():
+            return None
+        if self.settings.get_list_compile_order():
+            return "compile_order"
+        if self.settings.get_list_testgroup():
+            return "testgroup"
+        return None
+
+    def _get_listing_fingerprint(self, command: str, kwargs: dict) -> str:
+        """
+        Returns a digest of everything a listing depends on, i.e.
+        arguments, testcase settings, generics, testgroups and the
+        added files with their change dates.
+        """
+        items = [
+            command,
+            self._get_install_version(),
+            sorted(vars(self.args).items()) if self.args else None,
+            sorted(kwargs.items()),
+            self.settings.get_simulator_name(),
+            self.settings.get_testcase_identifier_name(),
+            self.settings.get_testcase(),
+            self.settings.get_testcase_list(),
+            self.settings.get_testgroup(),
+            self.settings.get_run_all(),
+            self.generic_container,
+            self.testgroup_collection_container,
+            self.coverage_rank_testgroup,
+        ]
+        for library in self.library_container.get():
+            items.append(
+                (library.get_name(), library.get_is_precompiled(), library.get_lib_dep())
+            )
+            if library.get_is_precompiled():
+                continue
+            for filename, add_file_args in library.get_added_file_list():
+                try:
+                    change_date = os.path.getmtime(filename)
+                except OSError:
+                    change_date = None
+                items.append((filename, add_file_args, change_date))
+        try:
+            return hashlib.sha1(pickle.dumps(items)).hexdigest()
+        except Exception as error:
+            self.logger.debug("Listing not cached: %s" % (error))
+            return None
+
+    def _get_cached_listing(self, command: str, fingerprint: str) -> str:
+        if fingerprint is None or self.settings.get_clean():
+            return None
+        cached_fingerprint, listing = self.project_db.load_object("listing", {}).get(
+            command, (None, None)
+        )
+        if cached_fingerprint != fingerprint:
+            return None
+        self.logger.debug("Using cached %s listing." % (command))
+        return listing
+
+    def _save_listing(self, command: str, fingerprint: str, listing: str) -> None:
+        if fingerprint is None:
+            return
+        listing_cache = self.project_db.load_object("listing", {})
+        listing_cache[command] = (fingerprint, listing)
+        self.project_db.save_object("listing", listing_cache)
+
+    def _get_shard_durations(self) -> dict:
+        """
+        Simulation time (ms) of tests by test key, read from the result
+        file given with --shard-durations or else from
+        SHARD_DURATIONS_FILENAME in the regression script folder, e.g. a
+        merged result file shared by all nodes. Empty if there is no such
+        file, i.e. all tests count the same.
+        """
+        filename = self.settings.get_shard_durations_file()
+        if not filename:
+            filename = os.path.join(self.settings.get_script_path(), SHARD_DURATIONS_FILENAME)
+            if not os.path.isfile(filename):
+                return {}
+        shard_durations = {}
+        try:
+            for record in read_result_file(filename):
+                if record.get("key") and record.get("sim_time"):
+                    shard_durations[record["key"]] = record["sim_time"]
+        except (OSError, ResultFileError) as error:
+            self.logger.warning(
+                "Unable to read shard durations, splitting by number of tests: %s" % (error)
+            )
+            return {}
+        return shard_durations
+
+    def _get_test_peak_rss(self) -> dict:
+        return {
+            test_key: resource_usage["peak_rss"]
+            for (test_key, resource_usage) in self.test_resource_usage.items()
+            if resource_usage.get("peak_rss", 0) > 0
+        }
+
+    def _update_test_history(self) -> None:
+        """
+        Register the resource usage of tests run, used for
+        adaptive scheduling.
+        """
+        if not self.runner:
+            return
+        for test in self.runner.get_test_list():
+            if test.get_status() not in [
+                TestStatus.PASS,
+                TestStatus.PASS_WITH_MINOR,
+                TestStatus.PASS_AFTER_RETRY,
+                TestStatus.FAIL,
+            ]:
+                continue
+            self.test_resource_usage[test.get_test_key()] = test.get_resource_usage()
+
+    def _setup_worker_pool(self) -> None:
+        """
+        Start accepting remote workers when enabled. The pool is
+        kept for daemon and watch mode runs using the same address.
+        """
+        address = self.settings.get_workers()
+        if self.worker_pool is not None:
+            if self.worker_pool.get_requested_address() == address:
+                return
+            self.worker_pool.close()
+            self.worker_pool = None
+
+        if address is not None:
+            pool_class = import_class(".worker", "WorkerPool")
+            worker_error_class = import_class(".worker", "WorkerError")
+            worker_pool = pool_class(project=self, address=address)
+            try:
+                worker_pool.start()
+                self.worker_pool = worker_pool
+            except (OSError, worker_error_class) as error:
+                self.logger.warning(
+                    "Unable to accept workers on %s:%d, running simulations locally: %s"
+                    % (address[0], address[1], error)
+                )
+
+    def _write_trace_file(self) -> None:
+        filename = self.tracer.get_filename()
+        if filename is None:
+            return
+        try:
+            self.tracer.write()
+            self.logger.info("Trace: {}".format(filename))
+        except OSError as error:
+            self.logger.warning("Unable to write trace file %s: %s" % (filename, error))
+
+    def _write_result_file(self) -> None:
+        filename = get_result_filename(
+            self.settings.get_output_path(), self.settings.get_shard()
+        )
+        write_result_file(project=self, filename=filename)
+        if self.settings.get_shard():
+            self.logger.info("Shard results: {}".format(filename))
+
+    def _write_result_history(self) -> None:
+        """
+        Add the results of this run to the result history.
+        """
+        if not self.runner:
+            return
+        # Imported when first used, as runners and reporters.
+        from .history import ResultHistory, ResultHistoryError, get_history_filename
+
+        test_results = []
+        for test in self.runner.get_test_list():
+            test_result = get_test_result(test)
+            test_result["generics"] = test.get_gc_str(filter_testcase_id=True)
+            test_results.append(test_result)
+        run_info = {
+            "simulator": self.settings.get_simulator_name(),
+            "shard": "%d/%d" % self.settings.get_shard() if self.settings.get_shard() else None,
+            "sim_time": self.settings.get_sim_time(),
+            "return_code": self.settings.get_return_code(),
+        }
+        try:
+            with ResultHistory(get_history_filename(self.settings.get_output_path())) as history:
+                history.add_run(run_info, test_results)
+                if self.settings.get_result_history_runs():
+                    history.remove_runs(self.settings.get_result_history_runs())
+        except ResultHistoryError as error:
+            self.logger.warning("Unable to write result history: %s" % (error))
+
     def _generate_run_report_files(self):
-        if not self.reporter:
+        if not self.reporters:
             self.gen_report()
-        self.reporter.report()
+        # Results are collected once and rendered by all reporters.
+        model = build_report_model(self)
+        if len(self.reporters) == 1:
+            self.reporter.report(model)
+        else:
+            with ThreadPoolExecutor(max_workers=len(self.reporters)) as executor:
+                list(executor.map(lambda reporter: reporter.report(model), self.reporters))
 
     def _add_precompiled_libraries_to_modelsim_ini(self, modelsim_ini_file: str):
         if modelsim_ini_file is not None:
@@ -1021,10 +1615,12 @@ class HDLRegression:
         """
         # Make all Library objects prepare for compile/simulate
         self.logger.info("Scanning files...")
-        request_libraries_prepare(project=self)
+        with self.tracer.span("scan files", "phase"):
+            request_libraries_prepare(project=self)
         # Organize the libraries by dependecy
         self.logger.info("Building test suite structure...")
-        organize_libraries_by_dependency(project=self)
+        with self.tracer.span("dependencies", "phase"):
+            organize_libraries_by_dependency(project=self)
 
     def _setup_simulation_runner(self):
         # Get runner object based on configuration settings
@@ -1086,6 +1682,33 @@ class HDLRegression:
         # Exit with return code
         return self.settings.get_return_code()
 
+    def _serve_gui(self) -> int:
+        """
+        HDLRegression helper process started from Modelsim GUI. Compile
+        requests from the "r", "ra" and "ro" commands are read from stdin,
+        one per line, i.e. "changes" or "all", and compiled with the
+        project kept in memory. Each request is ended with a
+        "hdlregression:done" line.
+
+        :rtype: int
+        :return: Return code of the last request.
+        """
+        for line in sys.stdin:
+            request = line.strip().lower()
+            if request in ("changes", "all"):
+                self.settings.set_gui_compile_changes(request == "changes")
+                self.settings.set_gui_compile_all(request == "all")
+                try:
+                    self._start_gui()
+                except Exception as error:
+                    self.settings.set_return_code(1)
+                    print("Compilation request failed: %s" % (error))
+                    print("hdlregression:failed")
+            elif request:
+                print("Unknown compile request: %s" % (request))
+            print("hdlregression:done", flush=True)
+        return self.settings.get_return_code()
+
     def _get_install_version(self) -> str:
         """
         :rtype: str
@@ -1118,18 +1741,9 @@ class HDLRegression:
         :rtype: Runner
         :return: Simulator runner object.
         """
-        if simulator == "MODELSIM":
-            runner_obj = ModelsimRunner(project=self)
-        elif simulator == "RIVIERA-PRO":
-            runner_obj = RivieraRunner(project=self)
-        elif simulator == "ACTIVE-HDL":
-            runner_obj = ActiveHDLRunner(project=self)
-        elif simulator == "GHDL":
-            runner_obj = GHDLRunner(project=self)
-        elif simulator == "NVC":
-            runner_obj = NVCRunner(project=self)
-        elif simulator == "VIVADO":
-            runner_obj = VivadoRunner(project=self)
+        if simulator in RUNNER_CLASSES:
+            runner_class = import_class(*RUNNER_CLASSES[simulator])
+            runner_obj = runner_class(project=self)
         else:
             sim_info = self.settings.get_simulators_info()
             sim_name = sim_info.get("simulator")
@@ -1182,6 +1796,51 @@ class HDLRegression:
         """
         return self.library_container
 
+    def _rank_code_coverage(self) -> None:
+        """
+        Replace the testgroup generated from code coverage ranking
+        when all tests have been run.
+        """
+        if self.runner is None or self.get_num_tests_run() == 0:
+            return
+        if self.runner.get_num_tests_run() < self.runner.get_num_tests():
+            self.logger.info(
+                "Code coverage ranking requires all tests to be run, keeping testgroup %s."
+                % (self.hdlcodecoverage.get_rank_testgroup())
+            )
+            return
+
+        with self.tracer.span("coverage rank", "phase"):
+            ranked_tests = self.hdlcodecoverage.rank_code_coverage()
+        if ranked_tests is None:
+            return
+
+        testgroup_container = Container(self.hdlcodecoverage.get_rank_testgroup())
+        for test in ranked_tests:
+            arch = test.get_arch()
+            testgroup_container.add(
+                (test.get_name(), arch.get_name() if arch else None, test.get_tc(), None)
+            )
+        self.coverage_rank_testgroup = testgroup_container
+        self.project_db.save_object("coverage_rank", self.coverage_rank_testgroup)
+        self.logger.info(
+            "Testgroup %s: %d test(s)."
+            % (testgroup_container.get_name(), testgroup_container.num_elements())
+        )
+
+    def _get_testgroup_collection(self) -> "Container":
+        """
+        Returns the testgroups defined with add_to_testgroup() and
+        the testgroup generated from code coverage ranking.
+        """
+        testgroup_collection = Container("testgroup_collection")
+        testgroup_collection.add_element_from_list(self.testgroup_collection_container.get())
+        if self.coverage_rank_testgroup is not None and not testgroup_collection.exists(
+            self.coverage_rank_testgroup.get_name()
+        ):
+            testgroup_collection.add(self.coverage_rank_testgroup)
+        return testgroup_collection
+
     def _get_testgroup_container(
         self, testgroup_name: str, create_if_not_found: bool = True
     ) -> "Container":
@@ -1205,6 +1864,12 @@ class HDLRegression:
             new_container = Container(testgroup_name)
             self.testgroup_collection_container.add(new_container)
             return new_container
+        # Testgroups defined in the regression script are used before
+        # the generated testgroup.
+        if self.coverage_rank_testgroup is not None and (
+            self.coverage_rank_testgroup.get_name() == testgroup_name.lower()
+        ):
+            return self.coverage_rank_testgroup
         # else
         return None
 
@@ -1252,48 +1917,134 @@ class HDLRegression:
 
     def _save_project_to_disk(self, reset: bool = True):
         """
-        Save project structure to files.
+        Save project structure to the project database.
 
         :param reset: Enables resetting of all HDLRegressionSettings obj settings.
         :type reset: bool
         """
-
-        # Helper method
-        def _dump(container, filename, output_path):
-            filename = os.path.join(os.getcwd(), output_path, filename)
-            filename = os_adjust_path(filename)
-            dump_file = open(filename, "wb")
-            pickle.dump(container, dump_file, pickle.HIGHEST_PROTOCOL)
-            dump_file.close()
-
-        settings_copy = copy.deepcopy(self.settings)
+        # Settings reference the project structure, which is stored
+        # separately, i.e. do not copy it with the settings.
+        memo = {id(self): self}
+        memo.update({id(lib): lib for lib in self.library_container.get()})
+        settings_copy = copy.deepcopy(self.settings, memo)
+        re_run_tc_list = self.runner.get_re_run_test_obj_list()
+        self._update_test_history()
         simulator_settings = settings_copy.get_simulator_settings()
         if reset:
             # Do not save argument settings, i.e. this will make next run
             # behave as selected with previous run arguments.
             settings_copy = self.settings_config.unset_argument_settings(settings_copy)
 
-        _dump(self.library_container, "library.dat", settings_copy.get_output_path())
-        _dump(self.generic_container, "generic.dat", settings_copy.get_output_path())
-        _dump(
-            self.testgroup_container, "testgroup.dat", settings_copy.get_output_path()
+        self.project_db.save(
+            library_list=self.library_container.get(),
+            objects={
+                "settings": settings_copy,
+                "simulator": simulator_settings,
+                "generic": self.generic_container,
+                "testgroup": self.testgroup_container,
+                "testgroup_collection": self.testgroup_collection_container,
+                "testcase": re_run_tc_list,
+                "test_resource_usage": self.test_resource_usage,
+                # Cached listings are only valid for the saved structure.
+                "listing": {},
+            },
         )
-        _dump(
-            self.testgroup_collection_container,
-            "testgroup_collection.dat",
-            settings_copy.get_output_path(),
-        )
-        _dump(settings_copy, "settings.dat", settings_copy.get_output_path())
-        _dump(
-            self.runner.get_re_run_test_obj_list(),
-            "testcase.dat",
-            settings_copy.get_output_path(),
-        )
-        _dump(simulator_settings, "simulator.dat", settings_copy.get_output_path())
+        self._remove_legacy_project_files(settings_copy.get_output_path())
+        # Next run in this process continues from the saved tests.
+        self.re_run_tc_list = re_run_tc_list
 
     def _load_project_from_disk(self, output_path: str) -> None:
         """
-        Load project structure from files.
+        Load project structure from the project database.
+        """
+        if self.project_db is not None:
+            self.project_db.close()
+        self.project_db = ProjectDatabase(project=self, output_path=output_path)
+
+        if not self.project_db.exists() and self._get_legacy_project_files(output_path):
+            self._load_legacy_project_from_disk(output_path)
+        else:
+            self.settings = self.project_db.load_object("settings")
+            if self.settings is None:
+                self.settings = HDLRegressionSettings()
+            else:
+                # Settings may be saved before new settings were added.
+                self._upgrade_cached_settings()
+            self.settings.set_output_path(output_path)
+
+            self.library_container = Container("library")
+            for library in self.project_db.load_libraries():
+                self.library_container.add(library)
+
+            # Generics, testcases or testcase groups are only loaded
+            # when called from GUI, i.e. not from runner script.
+            self.generic_container = Container("generic")
+            self.testgroup_container = Container("testgroup")
+            self.testgroup_collection_container = Container("testgroup_collection")
+            if self.init_from_gui is True:
+                self.generic_container = self.project_db.load_object(
+                    "generic", self.generic_container
+                )
+                self.testgroup_container = self.project_db.load_object(
+                    "testgroup", self.testgroup_container
+                )
+                self.testgroup_collection_container = self.project_db.load_object(
+                    "testgroup_collection", self.testgroup_collection_container
+                )
+
+            self.re_run_tc_list = self.project_db.load_object("testcase", [])
+            self.test_resource_usage = self.project_db.load_object(
+                "test_resource_usage", {}
+            )
+            self.coverage_rank_testgroup = self.project_db.load_object(
+                "coverage_rank", None
+            )
+            self.cached_simulator_settings = self.project_db.load_object(
+                "simulator", self.cached_simulator_settings
+            )
+
+        # default settings for success run and return code:
+        self.settings.set_return_code(0)
+        self.settings.set_run_success(True)
+
+    # Project files used before the project database was introduced.
+    LEGACY_PROJECT_FILES = [
+        "library.dat",
+        "generic.dat",
+        "testgroup.dat",
+        "testgroup_collection.dat",
+        "settings.dat",
+        "testcase.dat",
+        "simulator.dat",
+    ]
+
+    def _has_cached_project(self) -> bool:
+        """
+        Returns True if the output folder has a project database, or
+        project files from versions without a project database.
+        """
+        return self.project_db.exists() or bool(
+            self._get_legacy_project_files(self.settings.get_output_path())
+        )
+
+    def _get_legacy_project_files(self, output_path: str) -> list:
+        legacy_files = [
+            os_adjust_path(os.path.join(os.getcwd(), output_path, filename))
+            for filename in self.LEGACY_PROJECT_FILES
+        ]
+        return [filename for filename in legacy_files if os.path.isfile(filename)]
+
+    def _remove_legacy_project_files(self, output_path: str) -> None:
+        for filename in self._get_legacy_project_files(output_path):
+            try:
+                os.remove(filename)
+            except OSError as error:
+                self.logger.debug("Unable to remove %s: %s" % (filename, error))
+
+    def _load_legacy_project_from_disk(self, output_path: str) -> None:
+        """
+        Load project structure from pickle files created by
+        previous HDLRegression versions.
         """
 
         # Helper method
@@ -1309,6 +2060,8 @@ class HDLRegression:
             return container
 
         self.settings = _load(HDLRegressionSettings(), "settings.dat", output_path)
+        # Settings are saved before new settings were added.
+        self._upgrade_cached_settings()
         self.settings.set_output_path(output_path)
         self.library_container = _load(Container("library"), "library.dat", output_path)
 
@@ -1320,13 +2073,28 @@ class HDLRegression:
             Container("testgroup_collection"), "testgroup_collection.dat", output_path
         )
 
-        # self.failing_tc_list = _load([], "testcase.dat")
-        self.re_run_tc_list = _load([], "testcase.dat", output_path)
+        self.re_run_tc_list = self.project_db.migrate_legacy_object(
+            "testcase", _load([], "testcase.dat", output_path)
+        )
 
         self.cached_simulator_settings = _load(
             self.cached_simulator_settings, "simulator.dat", output_path
         )
 
+        # Libraries, files and tests shall use this project and not
+        # the copy of the project saved with them.
+        replace_project_references(
+            [
+                self.settings,
+                self.library_container,
+                self.generic_container,
+                self.testgroup_container,
+                self.testgroup_collection_container,
+                self.re_run_tc_list,
+            ],
+            self,
+        )
+
         # Do not load configured generics, testcases or testcase groups when
         # called from runner script, only from GUI
         if self.init_from_gui is False:
@@ -1334,10 +2102,6 @@ class HDLRegression:
             self.testgroup_container.empty_list()
             self.testgroup_collection_container.empty_list()
 
-        # default settings for success run and return code:
-        self.settings.set_return_code(0)
-        self.settings.set_run_success(True)
-
 
 # pylint: disable=unused-argument
 
@@ -13,7 +13,9 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
 #
 
+import hashlib
 import platform
+import importlib
 import os
 import re
 import shutil
@@ -183,6 +185,15 @@ def export_testcases_to_json(runner, filename) -> str:
 # ========================================================
 
 
+def import_class(module_name, class_name):
+    """
+    Import a class from a HDLRegression module when first used,
+    i.e. runners and reporters are not loaded at import.
+    """
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, class_name)
+
+
 def get_window_width() -> int:
     try:
         # Fallback for Windows platforms
@@ -271,6 +282,130 @@ def convert_from_millisec(millis):
     return int(seconds), int(minutes), int(hours)
 
 
+def parse_shard(shard) -> tuple:
+    """
+    Convert a shard selection, i.e. "i/N", to a tuple (i, N).
+    Shards are numbered from 1 to N.
+    """
+    if isinstance(shard, (tuple, list)) and len(shard) == 2:
+        (shard_index, num_shards) = shard
+    else:
+        try:
+            (shard_index, num_shards) = str(shard).split("/")
+        except ValueError:
+            raise ValueError('Invalid shard "%s", use "i/N", e.g. "1/4".' % (shard))
+    try:
+        (shard_index, num_shards) = (int(shard_index), int(num_shards))
+    except ValueError:
+        raise ValueError('Invalid shard "%s", use "i/N", e.g. "1/4".' % (shard))
+    if not 1 <= shard_index <= num_shards:
+        raise ValueError(
+            'Invalid shard "%s", shard number must be 1 to %d.' % (shard, num_shards)
+        )
+    return (shard_index, num_shards)
+
+
+# Result file in the regression script folder used for splitting shards
+# when no file is given with --shard-durations.
+SHARD_DURATIONS_FILENAME = "shard_durations.jsonl"
+
+# Shards are filled up to this factor of the average shard time.
+SHARD_LOAD_FACTOR = 1.1
+
+
+def _shard_hash(value) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def split_shards(test_durations, num_shards) -> dict:
+    """
+    Split tests, i.e. a dict of test key to duration, over num_shards
+    shards and return the shard number (1 to num_shards) of each test.
+
+    Each test has its own order of preferred shards, from a hash of the
+    test key and the shard number (rendezvous hashing), and is put in
+    the first of these shards with room for its duration. Tests are
+    placed in hash order and shards are filled up to SHARD_LOAD_FACTOR
+    times the average shard time, i.e. the shards take about the same
+    time and adding or removing a test only moves a few other tests.
+    """
+    max_shard_duration = SHARD_LOAD_FACTOR * sum(test_durations.values()) / num_shards
+    shard_durations = [0] * num_shards
+    test_shards = {}
+    for test_key in sorted(test_durations, key=lambda key: (_shard_hash(key), key)):
+        duration = test_durations[test_key]
+        preferred_shards = sorted(
+            range(num_shards),
+            key=lambda shard: _shard_hash("%s/%d" % (test_key, shard)),
+            reverse=True,
+        )
+        shard = next(
+            (shard for shard in preferred_shards
+             if shard_durations[shard] + duration <= max_shard_duration),
+            shard_durations.index(min(shard_durations)),
+        )
+        shard_durations[shard] += duration
+        test_shards[test_key] = shard + 1
+    return test_shards
+
+
+def parse_address(address, default_host="localhost") -> tuple:
+    """
+    Convert a network address, i.e. "[host:]port", to a tuple (host, port).
+    Raises ValueError if the address is not valid.
+    """
+    if isinstance(address, (tuple, list)) and len(address) == 2:
+        (host, port) = address
+    else:
+        (host, _, port) = str(address).rpartition(":")
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid address "%s", use "[host:]port", e.g. "9600".' % (address))
+    if not 0 <= port <= 65535:
+        raise ValueError('Invalid address "%s", port must be 0 to 65535.' % (address))
+    return (host or default_host, port)
+
+
+def parse_license_limit(limit):
+    """
+    Convert a license limit to a number of simulations, or "auto"
+    for a limit discovered when a license is denied.
+    Raises ValueError if the limit is not valid.
+    """
+    if str(limit).lower() == "auto":
+        return "auto"
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid license limit "%s", use a number or "auto".' % (limit))
+    if limit < 1:
+        raise ValueError('Invalid license limit "%s", must be at least 1.' % (limit))
+    return limit
+
+
+def parse_coverage_rank(lines, file_list) -> list:
+    """
+    Convert a code coverage ranking report, e.g. from "vcover ranktest",
+    to a list of (file, cumulative coverage) in rank order.
+    Report lines are matched with the ranked files, and the cumulative
+    coverage is the highest percentage on the line.
+    """
+    ranking = []
+    ranked_files = set()
+    # Longest first, i.e. a file name ending another file name is not matched.
+    file_list = sorted(file_list, key=len, reverse=True)
+    for line in lines:
+        for filename in file_list:
+            if filename in line and filename not in ranked_files:
+                numbers = re.findall(r"\d+\.\d+", line.replace(filename, ""))
+                coverage = max([float(number) for number in numbers], default=None)
+                ranking.append((filename, coverage))
+                ranked_files.add(filename)
+                break
+    return ranking
+
+
 def validate_testgroup_parameters(
     testgroup_name: str, entity: str, architecture: str, testcase: str, generic: list
 ) -> bool:
@@ -314,17 +449,35 @@ def validate_testgroup_parameters(
     return v_arguments_ok
 
 
+def get_version_numbers(version: str) -> tuple:
+    """Version string as a tuple of numbers, e.g. (0, 60, 1) for "0.60.1"."""
+    return tuple(int(number) for number in re.findall(r"\d+", version))
+
+
 def validate_cached_version(project, installed_version: str) -> bool:
     """
     Compare installed version with cache version.
+    A project from an older version, i.e. a project database or the
+    project files of versions without a database, is migrated, while
+    a project from a newer version is rebuilt.
 
     :rtype: bool
-    :return: True if cached version matches installed version.
+    :return: True if cached version matches or can be migrated to installed version.
     """
     # Load cached HDLRegression version number
     cached_version = project.settings.get_hdlregression_version()
     # Compare current version with cached version
     if (cached_version != installed_version) and (cached_version != "0.0.0"):
+        # Project records are migrated when loaded
+        if project._has_cached_project() and (
+            get_version_numbers(cached_version) <= get_version_numbers(installed_version)
+        ):
+            print(
+                "HDLRegression v{} differs from cached v{}.\nMigrating project.".format(
+                    installed_version, cached_version
+                )
+            )
+            return True
         print(
             "WARNING! HDLRegression v{} not compatible with cached v{}.\nExecuting database rebuild.".format(
                 installed_version, cached_version
@@ -367,7 +520,7 @@ def display_info_text(version) -> None:
 
 def print_run_success(project):
     width = get_window_width()
-    print("%s" % ("-" * width))
+    print("%s" % ("-" * width), file=project.output)
 
     elapsed_time = project.settings.get_sim_time()
     sim_sec, sim_min, sim_hrs = convert_from_millisec(elapsed_time)
@@ -385,6 +538,11 @@ def print_run_success(project):
             project.logger.warning(
                 "%d test(s) passed with minor alert(s)." % (num_minor_alerts)
             )
+        num_pass_after_retry = project.get_num_pass_after_retry_tests()
+        if num_pass_after_retry > 0:
+            project.logger.warning(
+                "%d test(s) passed after retry." % (num_pass_after_retry)
+            )
     else:
         project.logger.warning(
             "SIMULATION FAIL: %d tests run, %d test(s) failed."
@@ -401,16 +559,27 @@ def clean_generated_output(project, restore_settings=False):
 
 
 def empty_project_folder(project):
-    # Clean output, i.e. delete all
+    # Release project database before deleting it
+    if getattr(project, "project_db", None) is not None:
+        project.project_db.close()
+    # Clean output, i.e. delete all but the result history of earlier runs
+    from .history import HISTORY_FILENAME
+
     if os.path.isdir(project.settings.get_output_path()):
-        shutil.rmtree(project.settings.get_output_path())
+        try:
+            for name in os.listdir(project.settings.get_output_path()):
+                if name == HISTORY_FILENAME:
+                    continue
+                path = os.path.join(project.settings.get_output_path(), name)
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+        except OSError as error:
+            project.logger.error("Unable to clean output folder, %s." % (error))
         project.logger.info(
             "Project output path %s cleaned." % (project.settings.get_output_path())
         )
-        try:
-            os.mkdir(project.settings.get_output_path())
-        except OSError as error:
-            project.logger.error("Unable to create output folder, %s." % (error))
     else:
         project.logger.info(
             "No output folder to delete: %s." % (project.settings.get_output_path())
@@ -421,6 +590,7 @@ def disable_threading(project):
     """Disable threading so the next run will start as normal."""
     project.settings.set_threading(False)
     project.settings.set_num_threads(1)
+    project.settings.set_adaptive_threading(False)
 
 
 def run_from_gui(project) -> bool:
@@ -459,7 +629,12 @@ def update_settings_from_arguments(project, kwargs: dict):
     # Enable multi-threading
     if "threading" in kwargs:
         project.logger.info("Threading active.")
-        project.settings.set_threading(kwargs.get("threading"))
+        if kwargs.get("threading") == "auto":
+            project.settings.set_threading(True)
+            project.settings.set_adaptive_threading(True)
+            project.settings.set_num_threads(os.cpu_count() or 1)
+        else:
+            project.settings.set_threading(kwargs.get("threading"))
     # Verbosity
     if "verbose" in kwargs:
         project.settings.set_verbose(True)
@@ -491,6 +666,26 @@ def update_settings_from_arguments(project, kwargs: dict):
             if project.settings.get_is_default_com_options() is True:
                 project.settings.remove_com_options()
 
+    # CI sharding, without overriding terminal argument
+    if project.settings.get_shard() is None:
+        if kwargs.get("shard"):
+            project.settings.set_shard(parse_shard(kwargs.get("shard")))
+    if project.settings.get_shard_durations_file() is None:
+        if kwargs.get("shard_durations"):
+            project.settings.set_shard_durations_file(kwargs.get("shard_durations"))
+
+    # Remote workers, without overriding terminal argument
+    if project.settings.get_workers() is None:
+        if kwargs.get("workers"):
+            project.settings.set_workers(parse_address(kwargs.get("workers")))
+
+    if "license_retries" in kwargs:
+        license_retries = kwargs.get("license_retries")
+        if isinstance(license_retries, int) is False or license_retries < 0:
+            project.logger.warning("license_retries is not a positive integer.")
+        else:
+            project.settings.set_license_retries(license_retries)
+
     if "ignore_simulator_exit_codes" in kwargs:
         exit_codes = kwargs.get("ignore_simulator_exit_codes")
         if isinstance(exit_codes, list) is False:
@@ -0,0 +1,412 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+
+"""
+History of test results from all runs in a SQLite database, with
+queries for pass rate trends, duration regressions and flaky tests:
+
+  hdlregression history [-f <history file>] runs|trend|durations|flaky|test
+"""
+
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import sys
+
+
+HISTORY_FILENAME = "history.db"
+
+# Increment when the database tables are changed.
+HISTORY_FORMAT = 1
+
+PASS_STATUS = ["PASS", "PASS_WITH_MINOR", "PASS_AFTER_RETRY"]
+
+HISTORY_TABLES = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time_of_run TEXT,
+    simulator TEXT,
+    shard TEXT,
+    sim_time INTEGER,
+    return_code INTEGER,
+    num_tests INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER REFERENCES runs(run_id) ON DELETE CASCADE,
+    test_key TEXT,
+    test TEXT,
+    status TEXT,
+    sim_time INTEGER,
+    sim_errors INTEGER,
+    sim_warnings INTEGER,
+    user_time REAL,
+    system_time REAL,
+    peak_rss INTEGER,
+    read_bytes INTEGER,
+    write_bytes INTEGER,
+    generics TEXT,
+    seed TEXT
+);
+CREATE INDEX IF NOT EXISTS results_test_key ON results (test_key, run_id);
+"""
+
+
+class ResultHistoryError(Exception):
+    pass
+
+
+def get_history_filename(output_path) -> str:
+    return os.path.join(output_path, HISTORY_FILENAME)
+
+
+def get_seed(generics) -> str:
+    """
+    Value of the first generic with SEED in the name, e.g. "-gGC_SEED=42".
+    """
+    match = re.search(r"-g\w*SEED\w*=(\S+)", generics or "", re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def _get_test_pattern(test) -> str:
+    """
+    Test name with wildcards, as SQL LIKE pattern.
+    """
+    if test is None:
+        return "%"
+    pattern = test.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "%" + pattern.replace("*", "%") + "%"
+
+
+def _get_median(values) -> float:
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+class ResultHistory:
+    """
+    Results of the tests in all runs, one row for each test run,
+    kept in a SQLite database in the project output folder.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            # Shards run at the same time may write to the same file.
+            self.connection = sqlite3.connect(filename, timeout=30)
+            self.connection.execute("PRAGMA foreign_keys = ON")
+            with self.connection:
+                history_format = self.connection.execute("PRAGMA user_version").fetchone()[0]
+                if history_format not in [0, HISTORY_FORMAT]:
+                    raise ResultHistoryError(
+                        "%s: unsupported history format %d." % (filename, history_format)
+                    )
+                self.connection.executescript(HISTORY_TABLES)
+                self.connection.execute("PRAGMA user_version = %d" % (HISTORY_FORMAT))
+        except sqlite3.Error as error:
+            raise ResultHistoryError("%s: %s" % (filename, error))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _query(self, sql, parameters=()) -> list:
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as error:
+            raise ResultHistoryError("%s: %s" % (self.filename, error))
+
+    def add_run(self, run_info, test_results) -> int:
+        """
+        Add a run, i.e. a dict with simulator, shard, sim_time and return_code,
+        and the results of its tests, see resultfile.get_test_result(),
+        optionally with the generics of each test.
+
+        :rtype: int
+        :return: Run id.
+        """
+        test_results = list(test_results)
+        try:
+            with self.connection:
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (time_of_run, simulator, shard, sim_time, return_code, num_tests) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        run_info.get("time_of_run")
+                        or datetime.datetime.now().isoformat(sep=" ", timespec="seconds"),
+                        run_info.get("simulator"),
+                        run_info.get("shard"),
+                        run_info.get("sim_time"),
+                        run_info.get("return_code"),
+                        len(test_results),
+                    ),
+                )
+                run_id = cursor.lastrowid
+                self.connection.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._get_result_row(run_id, test_result) for test_result in test_results],
+                )
+        except sqlite3.Error as error:
+            raise ResultHistoryError("%s: %s" % (self.filename, error))
+        return run_id
+
+    @staticmethod
+    def _get_result_row(run_id, test_result) -> tuple:
+        resource_usage = test_result.get("resource_usage") or {}
+        generics = test_result.get("generics") or None
+        return (
+            run_id,
+            test_result.get("key") or test_result["test"],
+            test_result["test"],
+            test_result["status"],
+            test_result.get("sim_time") or 0,
+            test_result.get("sim_errors") or 0,
+            test_result.get("sim_warnings") or 0,
+            resource_usage.get("user_time", 0),
+            resource_usage.get("system_time", 0),
+            resource_usage.get("peak_rss", 0),
+            resource_usage.get("read_bytes", 0),
+            resource_usage.get("write_bytes", 0),
+            generics,
+            get_seed(generics),
+        )
+
+    def remove_runs(self, keep_runs) -> int:
+        """
+        Remove all but the last keep_runs runs.
+
+        :rtype: int
+        :return: Number of runs removed.
+        """
+        try:
+            with self.connection:
+                cursor = self.connection.execute(
+                    "DELETE FROM runs WHERE run_id NOT IN "
+                    "(SELECT run_id FROM runs ORDER BY run_id DESC LIMIT ?)",
+                    (keep_runs,),
+                )
+        except sqlite3.Error as error:
+            raise ResultHistoryError("%s: %s" % (self.filename, error))
+        return cursor.rowcount
+
+    def _get_first_run_id(self, num_runs) -> int:
+        """
+        Id of the first of the last num_runs runs, i.e. all runs if None.
+        """
+        if num_runs is None:
+            return 0
+        rows = self._query(
+            "SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?", (num_runs - 1,)
+        )
+        return rows[0][0] if rows else 0
+
+    def get_runs(self, num_runs=None) -> list:
+        """
+        Returns the last num_runs runs, oldest first.
+
+        :rtype: list
+        :return: List of (run id, time of run, simulator, shard, sim time, return code, number of tests).
+        """
+        return self._query(
+            "SELECT run_id, time_of_run, simulator, shard, sim_time, return_code, num_tests "
+            "FROM runs WHERE run_id >= ? ORDER BY run_id",
+            (self._get_first_run_id(num_runs),),
+        )
+
+    def get_test_history(self, test, num_runs=None) -> list:
+        """
+        Returns the results of the tests matching test, wildcards allowed,
+        in the last num_runs runs, oldest first.
+
+        :rtype: list
+        :return: List of (run id, test key, status, sim time, seed).
+        """
+        return self._query(
+            "SELECT run_id, test_key, status, sim_time, seed FROM results "
+            "WHERE run_id >= ? AND test_key LIKE ? ESCAPE '\\' ORDER BY run_id, test_key",
+            (self._get_first_run_id(num_runs), _get_test_pattern(test)),
+        )
+
+    def get_pass_rate_trend(self, num_runs=None, test=None) -> list:
+        """
+        Returns the pass rate of each of the last num_runs runs, optionally
+        only for tests matching test, oldest first. Tests not run are not counted.
+
+        :rtype: list
+        :return: List of (run id, time of run, number of tests run, number of passing tests, pass rate).
+        """
+        rows = self._query(
+            "SELECT runs.run_id, runs.time_of_run, COUNT(results.status), "
+            "SUM(results.status IN ('PASS', 'PASS_WITH_MINOR', 'PASS_AFTER_RETRY')) "
+            "FROM runs JOIN results ON results.run_id = runs.run_id "
+            "WHERE runs.run_id >= ? AND results.status IN ('PASS', 'PASS_WITH_MINOR', 'PASS_AFTER_RETRY', 'FAIL') "
+            "AND results.test_key LIKE ? ESCAPE '\\' "
+            "GROUP BY runs.run_id ORDER BY runs.run_id",
+            (self._get_first_run_id(num_runs), _get_test_pattern(test)),
+        )
+        return [
+            (run_id, time_of_run, num_run, num_pass, num_pass / num_run)
+            for (run_id, time_of_run, num_run, num_pass) in rows
+        ]
+
+    def _get_test_runs(self, num_runs) -> dict:
+        """
+        Test key -> [(run id, status, sim time)] of the tests run, oldest first.
+        """
+        test_runs = {}
+        for (run_id, test_key, status, sim_time) in self._query(
+            "SELECT run_id, test_key, status, sim_time FROM results "
+            "WHERE run_id >= ? AND status IN ('PASS', 'PASS_WITH_MINOR', 'PASS_AFTER_RETRY', 'FAIL') "
+            "ORDER BY run_id",
+            (self._get_first_run_id(num_runs),),
+        ):
+            test_runs.setdefault(test_key, []).append((run_id, status, sim_time))
+        return test_runs
+
+    def get_duration_regressions(self, num_runs=None, factor=1.5, min_sim_time=1000) -> list:
+        """
+        Returns the tests where the last simulation time is at least factor
+        times the median of the previous runs in the last num_runs runs.
+        Tests faster than min_sim_time ms are not reported.
+
+        :rtype: list
+        :return: List of (test key, median sim time, last sim time, ratio), largest ratio first.
+        """
+        regressions = []
+        for (test_key, test_runs) in self._get_test_runs(num_runs).items():
+            previous_times = [sim_time for (_, _, sim_time) in test_runs[:-1] if sim_time]
+            last_time = test_runs[-1][2]
+            if not previous_times or not last_time or last_time < min_sim_time:
+                continue
+            median_time = _get_median(previous_times)
+            if last_time >= median_time * factor:
+                regressions.append((test_key, median_time, last_time, last_time / median_time))
+        return sorted(regressions, key=lambda regression: regression[3], reverse=True)
+
+    def get_flaky_tests(self, num_runs=None, min_flips=1) -> list:
+        """
+        Returns the tests that changed between passing and failing at least
+        min_flips times in the last num_runs runs. A test passing after retry
+        has changed from failing to passing in the run.
+
+        :rtype: list
+        :return: List of (test key, number of flips, number of runs, number of fails), most flips first.
+        """
+        flaky_tests = []
+        for (test_key, test_runs) in self._get_test_runs(num_runs).items():
+            passed = [status in PASS_STATUS for (_, status, _) in test_runs]
+            num_flips = sum(1 for (previous, current) in zip(passed, passed[1:]) if previous != current)
+            num_flips += sum(1 for (_, status, _) in test_runs if status == "PASS_AFTER_RETRY")
+            if num_flips >= min_flips:
+                flaky_tests.append((test_key, num_flips, len(passed), passed.count(False)))
+        return sorted(flaky_tests, key=lambda flaky_test: (-flaky_test[1], flaky_test[0]))
+
+
+def get_history_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="hdlregression history",
+        description="Query the HDLRegression result history",
+    )
+    arg_parser.add_argument(
+        "-f",
+        "--file",
+        default=get_history_filename("hdlregression"),
+        help="history file, default: hdlregression/%s" % (HISTORY_FILENAME),
+    )
+    arg_parser.add_argument(
+        "-n", "--runs", type=int, default=20, help="number of last runs to query, default: 20"
+    )
+    subparsers = arg_parser.add_subparsers(dest="query", metavar="query")
+    subparsers.required = True
+
+    subparsers.add_parser("runs", help="list runs")
+
+    trend_parser = subparsers.add_parser("trend", help="pass rate of each run")
+    trend_parser.add_argument("test", nargs="?", help="only tests matching name, wildcards allowed")
+
+    durations_parser = subparsers.add_parser("durations", help="tests with longer simulation time")
+    durations_parser.add_argument(
+        "--factor", type=float, default=1.5, help="min ratio to median simulation time, default: 1.5"
+    )
+    durations_parser.add_argument(
+        "--min-time", type=int, default=1000, help="min simulation time (ms), default: 1000"
+    )
+
+    flaky_parser = subparsers.add_parser("flaky", help="tests changing between PASS and FAIL")
+    flaky_parser.add_argument(
+        "--min-flips", type=int, default=1, help="min number of changes, default: 1"
+    )
+
+    test_parser = subparsers.add_parser("test", help="results of tests")
+    test_parser.add_argument("test", help="test name, wildcards allowed")
+    return arg_parser
+
+
+def print_history(history, args) -> None:
+    if args.query == "runs":
+        for (run_id, time_of_run, simulator, shard, sim_time, return_code, num_tests) in history.get_runs(args.runs):
+            print(
+                "Run %d: %s, %s%s, %d tests, %d ms, %s"
+                % (
+                    run_id,
+                    time_of_run,
+                    simulator,
+                    " shard %s" % (shard) if shard else "",
+                    num_tests,
+                    sim_time or 0,
+                    "FAIL" if return_code else "PASS",
+                )
+            )
+    elif args.query == "trend":
+        for (run_id, time_of_run, num_run, num_pass, pass_rate) in history.get_pass_rate_trend(args.runs, args.test):
+            print("Run %d: %s, %d/%d passed (%.1f%%)" % (run_id, time_of_run, num_pass, num_run, pass_rate * 100))
+    elif args.query == "durations":
+        for (test_key, median_time, last_time, ratio) in history.get_duration_regressions(
+            args.runs, args.factor, args.min_time
+        ):
+            print("%s: %d ms, median %d ms (x%.2f)" % (test_key, last_time, median_time, ratio))
+    elif args.query == "flaky":
+        for (test_key, num_flips, num_runs, num_fails) in history.get_flaky_tests(args.runs, args.min_flips):
+            print("%s: %d changes, %d of %d runs failed" % (test_key, num_flips, num_fails, num_runs))
+    elif args.query == "test":
+        for (run_id, test_key, status, sim_time, seed) in history.get_test_history(args.test, args.runs):
+            print(
+                "Run %d: %s %s, %d ms%s"
+                % (run_id, test_key, status, sim_time or 0, ", seed %s" % (seed) if seed else "")
+            )
+
+
+def main(argv=None) -> int:
+    args = get_history_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    if not os.path.isfile(args.file):
+        print("No result history: %s" % (args.file))
+        return 1
+    try:
+        with ResultHistory(args.file) as history:
+            print_history(history, args)
+    except ResultHistoryError as error:
+        print("Unable to read result history: %s" % (error))
+        return 1
+    return 0
@@ -0,0 +1,113 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+
+"""
+Merge result files from sharded or distributed runs to one report
+and one return code:
+
+  hdlregression merge [-r <report file>] [-o <result file>] <result files>
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+from .report.reporters import get_reporter_class
+from .report.reportmodel import build_report_model
+from .report.resultfile import MergedResults, ResultFileError
+
+
+def get_merge_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="hdlregression merge",
+        description="Merge HDLRegression result files to one report",
+    )
+    arg_parser.add_argument(
+        "result_files", nargs="+", help="result files (.jsonl), wildcards allowed"
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--report",
+        action="append",
+        default=[],
+        help="report file, .txt/.csv/.json/.xml/junit.xml/.html, can be repeated",
+    )
+    arg_parser.add_argument(
+        "-o", "--output", action="store", help="write merged results to result file"
+    )
+    return arg_parser
+
+
+def merge_results(result_files, report_files=[], output=None) -> int:
+    """
+    Merge result files and write reports.
+
+    :rtype: int
+    :return: Return code of the merged run, 0=Pass, 1=Fail/No tests run.
+    """
+    merged_results = MergedResults()
+    for result_file in result_files:
+        try:
+            merged_results.merge(result_file)
+        except (OSError, ResultFileError) as error:
+            print("Unable to merge results: %s" % (error))
+            return 1
+
+    # The model is collected once and rendered by all reporters, test
+    # results are read from the result files one line at a time.
+    model = build_report_model(merged_results)
+    for report_file in report_files:
+        reporter_class = get_reporter_class(report_file)
+        if reporter_class is None:
+            print("Unsupported report file type: %s" % (report_file))
+            return 1
+        reporter = reporter_class(project=merged_results, filename=report_file)
+        reporter.set_report_items(
+            report_compile_order=False, report_spec_cov=False, report_library=False
+        )
+        # Reporters may append to an existing file.
+        if os.path.isfile(reporter.get_full_filename()):
+            os.remove(reporter.get_full_filename())
+        reporter.report(model)
+
+    if output:
+        merged_results.write_result_file(output)
+
+    print(
+        "Merged %d result file(s): %d tests run, %d passed, %d failed, %d not run."
+        % (
+            merged_results.num_files,
+            model.num_tests_run,
+            len(model.pass_tests),
+            len(model.fail_tests),
+            len(model.not_run_tests),
+        )
+    )
+    for test_name in model.fail_tests:
+        print("FAIL: %s" % (test_name))
+    return merged_results.get_return_code(model)
+
+
+def main(argv=None) -> int:
+    args = get_merge_parser().parse_args(sys.argv[1:] if argv is None else argv)
+
+    # Expand wildcards, e.g. on Windows where the shell does not.
+    result_files = []
+    for pattern in args.result_files:
+        result_files += sorted(glob.glob(pattern)) or [pattern]
+
+    return merge_results(result_files, report_files=args.report, output=args.output)
@@ -0,0 +1,677 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+
+import functools
+import hashlib
+import importlib
+import io
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+
+from .report.logger import Logger
+
+
+class ProjectDatabaseError(Exception):
+    pass
+
+
+class RecordLoadError(ProjectDatabaseError):
+    def __init__(self, key):
+        self.key = key
+
+    def __str__(self):
+        return (
+            'Unable to load project database record "%s". '
+            'Use "-c" to clean the project.' % (self.key)
+        )
+
+
+class Record:
+    """
+    Base class for compact __slots__ based objects, i.e. modules, files
+    and tests. Pickles created before __slots__ were used are supported.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self):
+        return _get_state(self)
+
+    def __setstate__(self, state):
+        # Default pickle state for __slots__ is (__dict__, slots)
+        if isinstance(state, tuple):
+            for part in state:
+                if part:
+                    _set_state(self, part)
+        else:
+            _set_state(self, state)
+
+
+class LazyRecord(Record):
+    """
+    Base class for objects that are stored as separate records in the
+    project database. Objects loaded from the database are created as
+    empty shells and read their content on first attribute access.
+    """
+
+    __slots__ = ("_record_loader",)
+
+    def __getattr__(self, name):
+        # Only called when normal attribute lookup fails.
+        if name.startswith("__") or name == "_record_loader":
+            raise AttributeError(name)
+        try:
+            loader = object.__getattribute__(self, "_record_loader")
+        except AttributeError:
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+            ) from None
+        loader()
+        return object.__getattribute__(self, name)
+
+
+def is_record_loaded(obj) -> bool:
+    """
+    Returns False if obj is a LazyRecord shell not yet loaded from
+    the project database.
+    """
+    try:
+        object.__getattribute__(obj, "_record_loader")
+    except AttributeError:
+        return True
+    return False
+
+
+def _get_state(obj) -> dict:
+    """
+    Returns a dict with all attributes of obj, both from __dict__
+    and from __slots__.
+    """
+    state = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            if slot in ("__dict__", "__weakref__", "_record_loader"):
+                continue
+            try:
+                state[slot] = object.__getattribute__(obj, slot)
+            except AttributeError:
+                pass
+    return state
+
+
+def _set_state(obj, state) -> None:
+    for name, value in state.items():
+        object.__setattr__(obj, name, value)
+
+
+def _get_class_path(obj) -> str:
+    cls = type(obj)
+    return "%s:%s" % (cls.__module__, cls.__qualname__)
+
+
+def _get_class(class_path):
+    module_name, qualname = class_path.split(":")
+    module = sys.modules.get(module_name) or importlib.import_module(module_name)
+    cls = module
+    for name in qualname.split("."):
+        cls = getattr(cls, name)
+    return cls
+
+
+class _RecordPickler(pickle.Pickler):
+    """
+    Pickler that writes references to other records instead of
+    pickling the referenced objects.
+    """
+
+    def __init__(self, file, refs):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.refs = refs
+
+    def persistent_id(self, obj):
+        ref = self.refs.get(id(obj))
+        if ref is None and isinstance(obj, LazyRecord) and not is_record_loaded(obj):
+            # Referenced shell that is not a record of its own,
+            # i.e. it has to be loaded before being pickled.
+            object.__getattribute__(obj, "_record_loader")()
+        return ref
+
+
+class _RecordUnpickler(pickle.Unpickler):
+    def __init__(self, file, resolve):
+        super().__init__(file)
+        self.resolve = resolve
+
+    def persistent_load(self, pid):
+        return self.resolve(pid)
+
+
+def replace_project_references(objects, project) -> None:
+    """
+    Objects unpickled from project files of versions without a project
+    database reference a copy of the project they were saved with.
+    Replace those references with project, i.e. search the attributes
+    of the objects and all objects they reference.
+    """
+    project_class = type(project)
+    pending = list(objects)
+    visited = set()
+    while pending:
+        obj = pending.pop()
+        if id(obj) in visited or isinstance(obj, project_class):
+            continue
+        visited.add(id(obj))
+        if isinstance(obj, (list, tuple, set)):
+            pending.extend(obj)
+        elif isinstance(obj, dict):
+            pending.extend(obj.values())
+        elif type(obj).__module__.startswith("hdlregression."):
+            for name, value in _get_state(obj).items():
+                if isinstance(value, project_class):
+                    object.__setattr__(obj, name, project)
+                else:
+                    pending.append(value)
+
+
+def _migrate_legacy_testcase(test_list):
+    # v1: simulation time, resource usage, retries and transcript file of tests.
+    for test in test_list:
+        for name, value in [
+            ("sim_time", 0),
+            ("peak_rss", 0),
+            ("user_time", 0.0),
+            ("system_time", 0.0),
+            ("read_bytes", 0),
+            ("write_bytes", 0),
+            ("num_retries", 0),
+            ("transcript_file", None),
+        ]:
+            if not hasattr(test, name):
+                setattr(test, name, value)
+    return test_list
+
+
+class ProjectDatabase:
+    """
+    SQLite based storage of the project structure.
+
+    Each library and each HDL file (including its scanned modules) is
+    stored as a separate record. References between records are
+    stored as keys, i.e. a record can be read and written without
+    touching the rest of the project:
+
+    - Records are only written when their content has changed.
+    - HDL files are loaded on first access (see LazyRecord).
+    """
+
+    SCHEMA_VERSION = 1
+    FILENAME = "project.db"
+
+    # Format version of each record type. Increase the version when the
+    # stored objects change, and add a migration from the previous version
+    # to RECORD_MIGRATIONS. Record types without a migration path are
+    # invalidated, together with the record types that depend on them.
+    RECORD_FORMATS = {
+        "settings": 1,
+        "simulator": 1,
+        "generic": 1,
+        "testgroup": 1,
+        "testgroup_collection": 1,
+        "testcase": 1,
+        "test_resource_usage": 1,
+        "coverage_rank": 1,
+        "listing": 1,
+        "library": 1,
+        "hdlfile": 1,
+    }
+
+    # (record type, format version) -> function converting the unpickled
+    # record to format version + 1. Format 0 is the project files (.dat)
+    # of versions without a project database.
+    RECORD_MIGRATIONS = {
+        ("testcase", 0): _migrate_legacy_testcase,
+    }
+
+    # Record types that can not be kept when a record type is invalidated.
+    RECORD_DEPENDENCIES = {
+        "library": ["hdlfile", "testcase", "listing"],
+        "hdlfile": ["library", "testcase", "listing"],
+    }
+
+    def __init__(self, project, output_path):
+        self.logger = Logger(name=__name__, project=project)
+        self.project = project
+        self.filename = os.path.join(os.getcwd(), output_path, self.FILENAME)
+        self.lock = threading.RLock()
+        self.connection = None
+        self.digests = {}  # (kind, key) -> digest of stored record
+        self.shells = {}  # ("library"/"hdlfile", key) -> loaded object
+        self.module_shells = {}  # hdlfile key -> list of module objects
+        self.shell_keys = {}  # id(hdlfile shell) -> hdlfile key
+
+    # ====================================================================
+    # Connection
+    # ====================================================================
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.filename)
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            self.connection = sqlite3.connect(
+                self.filename, timeout=30, check_same_thread=False
+            )
+            self._create_schema()
+        return self.connection
+
+    def _create_schema(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            schema_version = self._get_meta("schema_version")
+            if schema_version is not None and int(schema_version) != self.SCHEMA_VERSION:
+                # Created by another HDLRegression version.
+                self.logger.warning(
+                    "Project database schema v%s not supported, "
+                    "rebuilding database." % (schema_version)
+                )
+                self.connection.execute("DROP TABLE IF EXISTS records")
+                self.connection.execute("DELETE FROM meta")
+                schema_version = None
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, owner TEXT, "
+                "position INTEGER, cls TEXT, header TEXT, digest TEXT, data BLOB, "
+                "format INTEGER NOT NULL DEFAULT 1, "
+                "PRIMARY KEY (kind, key))"
+            )
+            if schema_version is None:
+                self._set_meta("schema_version", self.SCHEMA_VERSION)
+                for record_type, version in self.RECORD_FORMATS.items():
+                    self._set_meta("format:" + record_type, version)
+            else:
+                self._validate_record_formats()
+
+    def _has_record_migration(self, record_type, from_version) -> bool:
+        to_version = self.RECORD_FORMATS[record_type]
+        if from_version > to_version:
+            return False
+        return all(
+            (record_type, version) in self.RECORD_MIGRATIONS
+            for version in range(from_version, to_version)
+        )
+
+    def _validate_record_formats(self) -> None:
+        """
+        Invalidate record types that have changed format without a
+        migration. All other records are kept, and migrated when loaded.
+        """
+        invalid_types = set()
+        for record_type, version in self.RECORD_FORMATS.items():
+            stored_version = int(self._get_meta("format:" + record_type, 1))
+            if not self._has_record_migration(record_type, stored_version):
+                invalid_types.add(record_type)
+                invalid_types.update(self.RECORD_DEPENDENCIES.get(record_type, []))
+
+        for record_type in sorted(invalid_types):
+            self.logger.info(
+                "Project database: %s format changed, rebuilding." % (record_type)
+            )
+            if record_type in ("library", "hdlfile"):
+                self.connection.execute("DELETE FROM records WHERE kind=?", (record_type,))
+            else:
+                self.connection.execute(
+                    "DELETE FROM records WHERE kind='object' AND key=?", (record_type,)
+                )
+
+        for record_type, version in self.RECORD_FORMATS.items():
+            self._set_meta("format:" + record_type, version)
+
+    def migrate_legacy_object(self, record_type, data):
+        """
+        Migrate an object loaded from the project files of versions
+        without a project database to the current record format.
+        """
+        return self._migrate_record(record_type, data, 0)
+
+    def _migrate_record(self, record_type, data, version):
+        while version < self.RECORD_FORMATS[record_type]:
+            data = self.RECORD_MIGRATIONS[(record_type, version)](data)
+            version += 1
+        return data
+
+    @staticmethod
+    def _get_record_type(kind, key) -> str:
+        return key if kind == "object" else kind
+
+    def _get_meta(self, key, default=None):
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key=?", (key,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key, value) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    # ====================================================================
+    # Serialization
+    # ====================================================================
+
+    def _resolve(self, pid):
+        kind = pid[0]
+        if kind == "project":
+            return self.project
+        if kind == "settings":
+            return self.project.settings
+        if kind == "module":
+            module_list = self.module_shells.get(pid[1], [])
+            return module_list[pid[2]] if pid[2] < len(module_list) else None
+        return self.shells.get(pid)
+
+    def _dumps(self, obj, refs) -> bytes:
+        buffer = io.BytesIO()
+        _RecordPickler(buffer, refs).dump(obj)
+        return buffer.getvalue()
+
+    def _loads(self, data):
+        return _RecordUnpickler(io.BytesIO(data), self._resolve).load()
+
+    @staticmethod
+    def _digest(data) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    # ====================================================================
+    # Load
+    # ====================================================================
+
+    def load_object(self, key, default=None):
+        """
+        Load a single object record, e.g. settings or a container.
+        Returns default if not found.
+        """
+        if not self.exists():
+            return default
+        with self.lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT data, digest, format FROM records "
+                    "WHERE kind='object' AND key=?",
+                    (key,),
+                )
+                .fetchone()
+            )
+            if row is None:
+                return default
+            try:
+                obj = self._loads(row[0])
+                obj = self._load_migrated("object", key, obj, row[2], row[1])
+            except Exception as error:
+                self.logger.warning("Unable to load %s from project database: %s" % (key, error))
+                return default
+            return obj
+
+    def _load_migrated(self, kind, key, data, version, digest):
+        """
+        Migrate data loaded from a record to the current format,
+        and register the digest of the loaded record. Migrated
+        records are written on next save.
+        """
+        record_type = self._get_record_type(kind, key)
+        if record_type in self.RECORD_FORMATS:
+            current_version = self.RECORD_FORMATS[record_type]
+            if version < current_version:
+                self.logger.debug(
+                    "Migrating %s record %s from format v%d to v%d."
+                    % (record_type, key, version, current_version)
+                )
+                data = self._migrate_record(record_type, data, version)
+                digest = None
+        self.digests[(kind, key)] = digest
+        return data
+
+    def load_libraries(self) -> list:
+        """
+        Load all libraries in the order they were saved.
+        HDL files are created as shells and loaded on first access.
+        """
+        if not self.exists():
+            return []
+        with self.lock:
+            connection = self._connect()
+            rows = connection.execute(
+                "SELECT kind, key, cls, header, digest FROM records "
+                "WHERE kind IN ('library', 'hdlfile') ORDER BY position"
+            ).fetchall()
+
+            # Create all objects before any content is loaded so that
+            # references between records can be resolved.
+            library_list = []
+            for kind, key, class_path, header, digest in rows:
+                try:
+                    cls = _get_class(class_path)
+                except (ImportError, AttributeError, ValueError):
+                    self.logger.warning("Unknown class in project database: %s" % (class_path))
+                    continue
+                shell = cls.__new__(cls)
+                self.shells[(kind, key)] = shell
+                self.digests[(kind, key)] = digest
+                if kind == "library":
+                    library_list.append((key, shell))
+                else:
+                    self._create_hdlfile_shell(key, shell, header)
+
+            for key, library in library_list:
+                data, digest, version = connection.execute(
+                    "SELECT data, digest, format FROM records "
+                    "WHERE kind='library' AND key=?",
+                    (key,),
+                ).fetchone()
+                state = self._load_migrated(
+                    "library", key, self._loads(data), version, digest
+                )
+                _set_state(library, state)
+            return [library for _, library in library_list]
+
+    def _create_hdlfile_shell(self, key, shell, header) -> None:
+        loader = functools.partial(self._load_hdlfile_record, key)
+        module_list = []
+        for class_path in json.loads(header or "[]"):
+            cls = _get_class(class_path)
+            module = cls.__new__(cls)
+            object.__setattr__(module, "_record_loader", loader)
+            module_list.append(module)
+        object.__setattr__(shell, "_record_loader", loader)
+        self.module_shells[key] = module_list
+        self.shell_keys[id(shell)] = key
+
+    def _load_hdlfile_record(self, key) -> None:
+        with self.lock:
+            hdlfile = self.shells.get(("hdlfile", key))
+            if hdlfile is None or is_record_loaded(hdlfile):
+                return
+            if self.connection is None and not self.exists():
+                raise RecordLoadError(key)
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT data, digest, format FROM records "
+                    "WHERE kind='hdlfile' AND key=?",
+                    (key,),
+                )
+                .fetchone()
+            )
+            if row is None:
+                raise RecordLoadError(key)
+            hdlfile_state, module_states = self._load_migrated(
+                "hdlfile", key, self._loads(row[0]), row[2], row[1]
+            )
+            module_list = self.module_shells.get(key, [])
+            _set_state(hdlfile, hdlfile_state)
+            for module, module_state in zip(module_list, module_states):
+                _set_state(module, module_state)
+            for obj in [hdlfile] + module_list:
+                object.__delattr__(obj, "_record_loader")
+
+    # ====================================================================
+    # Save
+    # ====================================================================
+
+    def _get_library_hdlfiles(self, library) -> list:
+        hdlfile_list = []
+        for container_name in ("hdlfile_container", "temp_hdlfile_container"):
+            container = getattr(library, container_name, None)
+            if container is not None:
+                for hdlfile in container.get():
+                    if hdlfile not in hdlfile_list:
+                        hdlfile_list.append(hdlfile)
+        return hdlfile_list
+
+    def _get_hdlfile_key(self, library, hdlfile) -> str:
+        key = self.shell_keys.get(id(hdlfile))
+        if key is None:
+            key = "%s:%s" % (library.get_name(), hdlfile.get_filename_with_path())
+        return key
+
+    def _get_hdlfile_modules(self, key, hdlfile) -> list:
+        if is_record_loaded(hdlfile):
+            return hdlfile.get_modules()
+        return self.module_shells.get(key, [])
+
+    def _write_record(self, kind, key, data, owner=None, position=None, cls=None, header=None) -> bool:
+        digest = self._digest(data)
+        if self.digests.get((kind, key)) == digest:
+            return False
+        version = self.RECORD_FORMATS.get(self._get_record_type(kind, key), 1)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO records "
+            "(kind, key, owner, position, cls, header, digest, data, format) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, key, owner, position, cls, header, digest, sqlite3.Binary(data), version),
+        )
+        self.digests[(kind, key)] = digest
+        return True
+
+    def save(self, library_list, objects) -> int:
+        """
+        Save libraries and objects to the database.
+        Only changed records are written, and only loaded HDL files
+        can have changed.
+
+        :param library_list: List of library objects
+        :type library_list: list
+        :param objects: Dict of object records to save, key -> object
+        :type objects: dict
+
+        :rtype: int
+        :return: Number of records written.
+        """
+        with self.lock:
+            connection = self._connect()
+            refs = {id(self.project): ("project",), id(self.project.settings): ("settings",)}
+
+            # Build references for all records before pickling any.
+            hdlfile_records = []
+            for position, library in enumerate(library_list):
+                refs[id(library)] = ("library", library.get_name())
+                for hdlfile in self._get_library_hdlfiles(library):
+                    key = self._get_hdlfile_key(library, hdlfile)
+                    module_list = self._get_hdlfile_modules(key, hdlfile)
+                    refs[id(hdlfile)] = ("hdlfile", key)
+                    for index, module in enumerate(module_list):
+                        refs[id(module)] = ("module", key, index)
+                    hdlfile_records.append((key, library, hdlfile, module_list))
+
+            num_written = 0
+            with connection:
+                for key, obj in objects.items():
+                    num_written += self._write_record("object", key, self._dumps(obj, refs))
+
+                current_keys = set()
+                for position, library in enumerate(library_list):
+                    key = library.get_name()
+                    current_keys.add(("library", key))
+                    num_written += self._write_record(
+                        "library",
+                        key,
+                        self._dumps(_get_state(library), refs),
+                        position=position,
+                        cls=_get_class_path(library),
+                    )
+
+                for position, (key, library, hdlfile, module_list) in enumerate(hdlfile_records):
+                    current_keys.add(("hdlfile", key))
+                    if not is_record_loaded(hdlfile):
+                        continue
+                    data = self._dumps(
+                        (_get_state(hdlfile), [_get_state(module) for module in module_list]),
+                        refs,
+                    )
+                    num_written += self._write_record(
+                        "hdlfile",
+                        key,
+                        data,
+                        owner=library.get_name(),
+                        position=position,
+                        cls=_get_class_path(hdlfile),
+                        header=json.dumps([_get_class_path(module) for module in module_list]),
+                    )
+
+                # Remove records for libraries and files no longer in project
+                stored_keys = connection.execute(
+                    "SELECT kind, key FROM records WHERE kind IN ('library', 'hdlfile')"
+                ).fetchall()
+                for kind, key in stored_keys:
+                    if (kind, key) not in current_keys:
+                        connection.execute(
+                            "DELETE FROM records WHERE kind=? AND key=?", (kind, key)
+                        )
+                        self.digests.pop((kind, key), None)
+                        num_written += 1
+
+            self.logger.debug("Project database: %d record(s) written." % (num_written))
+            return num_written
+
+    def save_object(self, key, obj) -> bool:
+        """
+        Save a single object record that does not reference the
+        project structure, e.g. cached listings.
+
+        :rtype: bool
+        :return: True if the record was written.
+        """
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                return self._write_record("object", key, self._dumps(obj, {}))
@@ -52,7 +52,7 @@ class CSVReporter(HDLReporter):
                 lf.writerow([])
                 lf.writerow([])
                 # Write test results
-                pass_tests, fail_tests, not_run_tests = self.project.get_results()
+                pass_tests, fail_tests, not_run_tests = self._get_results()
                 lf.writerow(['Passing tests (%d):' % (len(pass_tests))])
                 for test in pass_tests:
                     lf.writerow([test])
@@ -71,59 +71,42 @@ class CSVReporter(HDLReporter):
 
                 # Write testcases
                 lf.writerow([])
-                for library in self.project.library_container.get():
-                    # All files
-                    for hdlfile in library.get_hdlfile_list():
-                        # All TB modules in file
-                        for tb_module in hdlfile.get_tb_modules():
-                            # All architectures connected with this TB
-                            for arch_module in tb_module.get_architecture():
-                                lf.writerow(['Testcase:', '%s.%s' % (
-                                    tb_module.get_name(), arch_module.get_name())])
-                                # All testcases connected with this architecture
-                                for testcase in arch_module.get_testcase():
-                                    lf.writerow(['Testcase:', '%s.%s.%s' % (
-                                        tb_module.get_name(), arch_module.get_name(), testcase)])
+                for testcase_info in self._get_testcases():
+                    lf.writerow(['Testcase:', '%s.%s' % (
+                        testcase_info.testbench, testcase_info.architecture)])
+                    # All testcases connected with this architecture
+                    for testcase in testcase_info.testcases:
+                        lf.writerow(['Testcase:', '%s.%s.%s' % (
+                            testcase_info.testbench, testcase_info.architecture, testcase)])
 
                 # Write testgroups
                 lf.writerow([])
-                for testgroup_container in self.project.testgroup_collection_container.get():
+                for testgroup in self._get_testgroups():
                     lf.writerow([])
-                    lf.writerow(
-                        ['Testgroup: ' + testgroup_container.get_name()])
-                    testgroup_items_list = testgroup_container.get()
-                    for idx, testgroup_items_list in enumerate(testgroup_container.get()):
-                        entity, architecture, testcase, generics = tuple(
-                            testgroup_items_list)
-                        tg_str = '%d %s' % (idx + 1, entity)
-                        if architecture:
-                            tg_str += '.%s' % (architecture)
-                        if testcase:
-                            tg_str += '.%s' % (testcase)
-                        if generics:
-                            tg_str += ', generics=%s' % (generics)
-                        lf.writerow([tg_str])
+                    lf.writerow(['Testgroup: ' + testgroup.name])
+                    for idx, testgroup_item in enumerate(testgroup.items):
+                        lf.writerow(['%d %s' % (idx + 1, self._get_testgroup_item_str(testgroup_item))])
 
                 # Write compilation order
                 if self.get_report_compile_order():
                     lf.writerow([])
                     lf.writerow([])
                     lf.writerow(['Compilation order:'])
-                    for library in self.project.library_container.get():
+                    for library in self._get_libraries():
                         lf.writerow([])
-                        lf.writerow(['Library', library.get_name()])
-                        for idx, module_instance in enumerate(library.get_compile_order_list()):
-                            tb = "(TB)" if module_instance.get_is_tb() else ""
+                        lf.writerow(['Library', library.name])
+                        for idx, compiled_file in enumerate(library.compile_order):
+                            tb = "(TB)" if compiled_file.is_tb else ""
                             lf.writerow(
-                                ['File %d' % (idx + 1), module_instance.get_filename(), tb])
+                                ['File %d' % (idx + 1), compiled_file.filename, tb])
 
                 # Write library information
                 if self.get_report_library():
                     lf.writerow([])
                     lf.writerow([])
                     lf.writerow(['Library information'])
-                    for library in self.project.library_container.get():
+                    for library in self._get_libraries():
                         lf.writerow([])
-                        lf.writerow(['Library %s:' % (library.get_name())])
-                        for module in library._get_list_of_lib_modules():
-                            lf.writerow([module.get_type(), module.get_name()])
+                        lf.writerow(['Library %s:' % (library.name)])
+                        for module in library.modules:
+                            lf.writerow([module.type, module.name])
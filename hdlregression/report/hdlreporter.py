@@ -17,6 +17,7 @@ import os
 from abc import abstractmethod
 
 from .logger import Logger
+from .reportmodel import build_report_model
 
 
 class HDLReporter:
@@ -24,6 +25,8 @@ class HDLReporter:
     def __init__(self, project=None, filename=None):
         self.logger = Logger(name=__name__, project=project)
         self.project = project
+        # Report model of the run, see report().
+        self.model = None
         if filename:
             self.set_filename(filename)
 
@@ -36,80 +39,117 @@ class HDLReporter:
         self.set_report_testgroup()
         self.set_report_files()
 
+    def _get_model(self):
+        if self.model is None:
+            self.model = build_report_model(self.project)
+        return self.model
+
     def _check_test_was_run(self) -> bool:
-        if self.project.get_num_tests_run() == 0:
+        if self._get_model().num_tests_run == 0:
             self.logger.debug('No testcases run - skipping reporting.')
             return False
         else:
             return True
 
     def _is_ci_run(self) -> bool:
-        return self.project.settings.get_run_all()
+        return self._get_model().settings.ci_run
 
     def _is_testcase_run(self) -> bool:
-        return (self.project.settings.get_testcase() is not None)
+        return self._get_model().settings.testcase_run
 
     def _is_testgroup_run(self) -> bool:
-        return (self.project.settings.get_testgroup() is not None)
+        return self._get_model().settings.testgroup_run
 
     def _is_gui_run(self) -> bool:
-        return self.project.settings.get_gui_mode()
+        return self._get_model().settings.gui_mode
 
     def _time_of_run(self) -> str:
-        return self.project.settings.get_time_of_run()
+        return self._get_model().settings.time_of_run
 
     def _time_of_sim(self) -> str:
-        return self.project.settings.get_sim_time()
+        return self._get_model().settings.time_of_sim
+
+    def _get_results(self) -> tuple:
+        '''
+        Names of passed, failed and not run tests.
+        '''
+        model = self._get_model()
+        return (model.pass_tests, model.fail_tests, model.not_run_tests)
+
+    def _iter_test_results(self, status_list=None):
+        '''
+        Result records of the tests one at a time, optionally only
+        the tests with a status in status_list.
+        '''
+        for test_result in self._get_model().test_results:
+            if status_list is None or test_result.status in status_list:
+                yield test_result
+
+    def _get_resource_usage(self) -> tuple:
+        '''
+        (test name, resource usage) of tests run, most CPU time first.
+        '''
+        return self._get_model().resource_usage
+
+    def _get_testcases(self) -> tuple:
+        return self._get_model().testcases
+
+    def _get_testgroups(self) -> tuple:
+        return self._get_model().testgroups
+
+    def _get_libraries(self) -> tuple:
+        return self._get_model().libraries
 
-    @classmethod
-    def set_report_items(cls, report_compile_order, report_spec_cov, report_library):
-        cls.set_report_compile_order(report_compile_order)
-        cls.set_report_spec_cov(report_spec_cov)
-        cls.set_report_library(report_library)
+    @staticmethod
+    def _get_testgroup_item_str(testgroup_item) -> str:
+        entity, architecture, testcase, generics = tuple(testgroup_item)
+        tg_str = '%s' % (entity)
+        if architecture:
+            tg_str += '.%s' % (architecture)
+        if testcase:
+            tg_str += '.%s' % (testcase)
+        if generics:
+            tg_str += ', generics=%s' % (generics)
+        return tg_str
+
+    def set_report_items(self, report_compile_order, report_spec_cov, report_library):
+        self.set_report_compile_order(report_compile_order)
+        self.set_report_spec_cov(report_spec_cov)
+        self.set_report_library(report_library)
 
     @staticmethod
     def get_compile_order(self) -> list:
         self.project._get_compile_order()
 
-    @classmethod
-    def set_report_compile_order(cls, enable=True):
-        cls.report_compile_order = enable
+    def set_report_compile_order(self, enable=True):
+        self.report_compile_order = enable
 
-    @classmethod
-    def get_report_compile_order(cls) -> bool:
-        return cls.report_compile_order
+    def get_report_compile_order(self) -> bool:
+        return self.report_compile_order
 
-    @classmethod
-    def set_report_spec_cov(cls, enable=False):
-        cls.report_spec_cov = enable
+    def set_report_spec_cov(self, enable=False):
+        self.report_spec_cov = enable
 
-    @classmethod
-    def get_report_spec_cov(cls) -> bool:
-        return cls.report_spec_cov
+    def get_report_spec_cov(self) -> bool:
+        return self.report_spec_cov
 
-    @classmethod
-    def set_report_library(cls, enable=False):
-        cls.report_library = enable
+    def set_report_library(self, enable=False):
+        self.report_library = enable
 
-    @classmethod
-    def get_report_library(cls) -> bool:
-        return cls.report_library
+    def get_report_library(self) -> bool:
+        return self.report_library
 
-    @classmethod
-    def set_report_test_results(cls, enable=True):
-        cls.report_test_results = enable
+    def set_report_test_results(self, enable=True):
+        self.report_test_results = enable
 
-    @classmethod
-    def set_report_testcase(cls, enable=True):
-        cls.report_testcase = enable
+    def set_report_testcase(self, enable=True):
+        self.report_testcase = enable
 
-    @classmethod
-    def set_report_testgroup(cls, enable=True):
-        cls.report_testgroup = enable
+    def set_report_testgroup(self, enable=True):
+        self.report_testgroup = enable
 
-    @classmethod
-    def set_report_files(cls, enable=False):
-        cls.report_files = enable
+    def set_report_files(self, enable=False):
+        self.report_files = enable
 
     def set_filename(self, filename):
         self.filename = filename.lower()
@@ -124,5 +164,10 @@ class HDLReporter:
     def write_to_file(self):
         pass
 
-    def report(self):
+    def report(self, model=None):
+        '''
+        Write the report, rendered from model if given, e.g. when
+        the same model is rendered by several reporters.
+        '''
+        self.model = model if model is not None else build_report_model(self.project)
         self.write_to_file()
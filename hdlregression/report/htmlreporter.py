@@ -56,7 +56,7 @@ class HTMLReporter(HDLReporter):
             f.write('</ul>\n')
 
             # Test Results
-            pass_tests, fail_tests, not_run_tests = self.project.get_results()
+            pass_tests, fail_tests, not_run_tests = self._get_results()
             f.write('<h2>Test Results</h2>\n')
 
             def write_test_list(title, tests, css_class):
@@ -69,53 +69,58 @@ class HTMLReporter(HDLReporter):
             write_test_list("Failing Tests", fail_tests, "fail")
             write_test_list("Not Run Tests", not_run_tests, "notrun")
 
+            # Resource Usage
+            resource_usage = self._get_resource_usage()
+            if resource_usage:
+                f.write('<h2>Resource Usage</h2>\n<table>\n')
+                f.write('<tr><th>Test</th><th>User Time (s)</th><th>System Time (s)</th>'
+                        '<th>Peak Memory (MB)</th><th>Read (MB)</th><th>Write (MB)</th></tr>\n')
+                for test, usage in resource_usage:
+                    f.write('<tr><td>%s</td><td>%.2f</td><td>%.2f</td><td>%.1f</td><td>%.1f</td><td>%.1f</td></tr>\n' % (
+                        test,
+                        usage.get("user_time", 0),
+                        usage.get("system_time", 0),
+                        usage.get("peak_rss", 0) / 2**20,
+                        usage.get("read_bytes", 0) / 2**20,
+                        usage.get("write_bytes", 0) / 2**20))
+                f.write('</table>\n')
+
             # Testcases
             f.write('<h2>Testcases</h2>\n<ul>\n')
-            for library in self.project.library_container.get():
-                for hdlfile in library.get_hdlfile_list():
-                    for tb_module in hdlfile.get_tb_modules():
-                        for arch_module in tb_module.get_architecture():
-                            f.write('<li>%s.%s<ul>\n' % (tb_module.get_name(), arch_module.get_name()))
-                            for testcase in arch_module.get_testcase():
-                                f.write('<li>%s</li>\n' % testcase)
-                            f.write('</ul></li>\n')
+            for testcase_info in self._get_testcases():
+                f.write('<li>%s.%s<ul>\n' % (testcase_info.testbench, testcase_info.architecture))
+                for testcase in testcase_info.testcases:
+                    f.write('<li>%s</li>\n' % testcase)
+                f.write('</ul></li>\n')
             f.write('</ul>\n')
 
             # Testgroups
             f.write('<h2>Testgroups</h2>\n<ul>\n')
-            for testgroup_container in self.project.testgroup_collection_container.get():
-                f.write(f'<li>{testgroup_container.get_name()}<ul>\n')
-                for idx, item in enumerate(testgroup_container.get()):
-                    entity, arch, testcase, generics = item
-                    line = f'{idx+1}: {entity}'
-                    if arch:
-                        line += f'.{arch}'
-                    if testcase:
-                        line += f'.{testcase}'
-                    if generics:
-                        line += f', generics={generics}'
-                    f.write(f'<li>{line}</li>\n')
+            for testgroup in self._get_testgroups():
+                f.write(f'<li>{testgroup.name}<ul>\n')
+                for idx, item in enumerate(testgroup.items):
+                    f.write(f'<li>{idx+1}: {self._get_testgroup_item_str(item)}</li>\n')
                 f.write('</ul></li>\n')
             f.write('</ul>\n')
 
             # Compile Order
             if self.get_report_compile_order():
                 f.write('<h2>Compilation Order</h2>\n<ul>\n')
-                for library in self.project.library_container.get():
-                    f.write(f'<li>{library.get_name()}<ul>\n')
-                    for idx, module in enumerate(library.get_compile_order_list()):
-                        tb = " (TB)" if module.get_is_tb() else ""
-                        f.write(f'<li>File {idx+1}: {module.get_filename()}{tb}</li>\n')
+                for library in self._get_libraries():
+                    f.write(f'<li>{library.name}<ul>\n')
+                    for idx, compiled_file in enumerate(library.compile_order):
+                        tb = " (TB)" if compiled_file.is_tb else ""
+                        f.write(f'<li>File {idx+1}: {compiled_file.filename}{tb}</li>\n')
                     f.write('</ul></li>\n')
                 f.write('</ul>\n')
 
             # Library Info
             if self.get_report_library():
                 f.write('<h2>Library Information</h2>\n<ul>\n')
-                for library in self.project.library_container.get():
-                    f.write(f'<li>{library.get_name()}<ul>\n')
-                    for mod in library._get_list_of_lib_modules():
-                        f.write(f'<li>{mod.get_type()}: {mod.get_name()}</li>\n')
+                for library in self._get_libraries():
+                    f.write(f'<li>{library.name}<ul>\n')
+                    for mod in library.modules:
+                        f.write(f'<li>{mod.type}: {mod.name}</li>\n')
                     f.write('</ul></li>\n')
                 f.write('</ul>\n')
 
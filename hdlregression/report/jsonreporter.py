@@ -14,9 +14,14 @@
 #
 
 from .hdlreporter import HDLReporter
+from .streamwriter import JSONStreamWriter
 
 
 class JSONReporter(HDLReporter):
+    '''
+    HDLReporter sub-class for documenting testcase run
+    to a JSON file, written one test at a time.
+    '''
 
     def __init__(self, project=None, filename=None):
         super().__init__(project=project, filename=filename)
@@ -27,162 +32,94 @@ class JSONReporter(HDLReporter):
         '''
 
         # Only create report if test was run
-        if self._check_test_was_run():
+        if not self._check_test_was_run():
+            return
+
+        with open(self.get_full_filename(), 'w') as lf:
+            writer = JSONStreamWriter(lf)
+            writer.begin_object()
 
             # Write settings for this run
-            data = '''
-{
-    "Test run settings" :
-        {
-            "CI run" : "%s",
-            "Testcase run" : "%s",
-            "Testgroup run" : "%s",
-            "GUI mode" : "%s",
-            "Time of run" : "%s",
-            "Time of sim" : "%s"
-        }''' % (self._is_ci_run(),
-                self._is_testcase_run(),
-                self._is_testgroup_run(),
-                self._is_gui_run(),
-                self._time_of_run(),
-                self._time_of_sim())
+            writer.begin_object("Test run settings")
+            writer.value(str(self._is_ci_run()), "CI run")
+            writer.value(str(self._is_testcase_run()), "Testcase run")
+            writer.value(str(self._is_testgroup_run()), "Testgroup run")
+            writer.value(str(self._is_gui_run()), "GUI mode")
+            writer.value(str(self._time_of_run()), "Time of run")
+            writer.value(str(self._time_of_sim()), "Time of sim")
+            writer.end_object()
 
             # Write test results
-            pass_tests, fail_tests, not_run_tests = self.project.get_results()
-            pass_test_str = ''
-            fail_test_str = ''
-            not_run_test_str = ''
-            for idx, test in enumerate(pass_tests):
-                if idx + 1 == len(pass_tests):
-                    if len(fail_tests) == 0:
-                        pass_test_str += '"%s" : "PASS"\n' % (test)
-                    else:
-                        pass_test_str += '"%s" : "PASS",\n' % (test)
-                else:
-                    pass_test_str += '"%s" : "PASS",\n' % (test)
-            for idx, test in enumerate(fail_tests):
-                if idx + 1 == len(fail_tests):
-                    fail_test_str += '"%s" : "FAIL"\n' % (test)
-                else:
-                    fail_test_str += '"%s" : "FAIL",\n' % (test)
-
-            for idx, test in enumerate(not_run_tests):
-                if idx + 1 == len(not_run_tests):
-                    not_run_test_str += '"%s" : "NOT_RUN"\n' % (test)
-                else:
-                    not_run_test_str += '"%s" : "NOT_RUN",\n' % (test)
-
-            data += '''
-    "Test results" :
-        {
-            %s''' % (pass_test_str)
-            if fail_test_str:
-                data += '''
-            %s''' % (fail_test_str)
-            if not_run_test_str:
-                data += '''
-            %s''' % (not_run_test_str)
-
-            data += '''
-        }
-'''
+            writer.begin_object("Test results")
+            for (status_list, status) in [(["PASS", "PASS_WITH_MINOR"], "PASS"),
+                                          (["PASS_AFTER_RETRY"], "PASS_AFTER_RETRY"),
+                                          (["FAIL"], "FAIL"),
+                                          (["NOT_RUN"], "NOT_RUN")]:
+                for test_result in self._iter_test_results(status_list):
+                    writer.value(status, test_result.test)
+            writer.end_object()
+
+            # Write resource usage
+            resource_usage = self._get_resource_usage()
+            if resource_usage:
+                writer.begin_array("Resource usage")
+                for test, usage in resource_usage:
+                    writer.value({"Name": test,
+                                  "User time": usage.get("user_time", 0),
+                                  "System time": usage.get("system_time", 0),
+                                  "Peak memory": usage.get("peak_rss", 0),
+                                  "Read bytes": usage.get("read_bytes", 0),
+                                  "Write bytes": usage.get("write_bytes", 0)})
+                writer.end_array()
 
             # Write testcases
-            data += '''
-    "Testcase" : ['''
-            for library in self.project.library_container.get():
-                # All files
-                for hdlfile in library.get_hdlfile_list():
-                    # All TB modules in file
-                    for tb_module in hdlfile.get_tb_modules():
-                        # All architectures connected with this TB
-                        for idx, arch_module in enumerate(tb_module.get_architecture()):
-                            # TODO! Fix commas
-                            data += '''
-            {
-                "Name" : "%s.%s"
-            },''' % (tb_module.get_name(), arch_module.get_name())
-                            # All testcases connected with this architecture
-                            for testcase in arch_module.get_testcase():
-                                # TODO! Fix commas
-                                data += '''
-            {
-                "Name" : "%s.%s.%s"
-            },''' % (tb_module.get_name(), arch_module.get_name(), testcase)
-            data += '''
-                ],
-            '''
+            writer.begin_array("Testcase")
+            for testcase_info in self._get_testcases():
+                writer.value({"Name": "%s.%s" % (testcase_info.testbench, testcase_info.architecture)})
+                # All testcases connected with this architecture
+                for testcase in testcase_info.testcases:
+                    writer.value({"Name": "%s.%s.%s" % (testcase_info.testbench,
+                                                        testcase_info.architecture,
+                                                        testcase)})
+            writer.end_array()
 
             # Write testgroups
-            data += '''
-    "Testgroup" : ['''
-            for testgroup_container in self.project.testgroup_collection_container.get():
-                data += '''
-            {
-            "Name" : "%s"
-            "Items" : [''' % (testgroup_container.get_name())
-                testgroup_items_list = testgroup_container.get()
-                for idx, testgroup_items_list in enumerate(testgroup_container.get()):
-                    entity, architecture, testcase, generics = tuple(
-                        testgroup_items_list)
-                    tg_str = '%s' % (entity)
-                    if architecture:
-                        tg_str += '.%s' % (architecture)
-                    if testcase:
-                        tg_str += '.%s' % (testcase)
-                    if generics:
-                        tg_str += ', generics=%s' % (generics)
-                    data += '''
-                "Name" : "%s",''' % (tg_str)
-                data += '''
-                    ],'''
-                data += '''
-                },'''
-            data += '''
-            ]'''
+            writer.begin_array("Testgroup")
+            for testgroup in self._get_testgroups():
+                writer.begin_object()
+                writer.value(testgroup.name, "Name")
+                writer.begin_array("Items")
+                for testgroup_item in testgroup.items:
+                    writer.value({"Name": self._get_testgroup_item_str(testgroup_item)})
+                writer.end_array()
+                writer.end_object()
+            writer.end_array()
 
             # Write compilation order
             if self.get_report_compile_order():
-                data += ''',
-    "Compile_order" : ['''
-                for library in self.project.library_container.get():
-                    data += '''
-                "Library" : "%s"
-                "Module" : [''' % (library.get_name())
-                    for idx, module_instance in enumerate(library.get_compile_order_list()):
-                        tb = "(TB)" if module_instance.get_is_tb() else ""
-                        data += '''
-                        {
-                            "name" : "%s",
-                            "tb" : "%s"
-                        }''' % (module_instance.get_filename(), tb)
-                    data += '''
-                            ],'''
-                data += '''
-                        ]'''
-
-                # Write library information
-                if self.get_report_library():
-                    data += ''',
-    "Library_info" : ['''
-                    for library in self.project.library_container.get():
-                        data += '''
-                    {
-                        "Name" : "%s",
-                        "Items" : [''' % (library.get_name())
-                        for module in library._get_list_of_lib_modules():
-                            data += '''
-                                {
-                                    "type" : "%s",
-                                    "name" : "%s"
-                                },''' % (module.get_type(), module.get_name())
-                        data += '''
-                            ]
-                    },'''
-                    data += '''
-                    ]'''
-
-            data += '''
-}'''
-            with open(self.get_full_filename(), 'a') as lf:
-                lf.write(data)
+                writer.begin_array("Compile_order")
+                for library in self._get_libraries():
+                    writer.begin_object()
+                    writer.value(library.name, "Library")
+                    writer.begin_array("Module")
+                    for compiled_file in library.compile_order:
+                        tb = "(TB)" if compiled_file.is_tb else ""
+                        writer.value({"name": compiled_file.filename, "tb": tb})
+                    writer.end_array()
+                    writer.end_object()
+                writer.end_array()
+
+            # Write library information
+            if self.get_report_library():
+                writer.begin_array("Library_info")
+                for library in self._get_libraries():
+                    writer.begin_object()
+                    writer.value(library.name, "Name")
+                    writer.begin_array("Items")
+                    for module in library.modules:
+                        writer.value({"type": module.type, "name": module.name})
+                    writer.end_array()
+                    writer.end_object()
+                writer.end_array()
+
+            writer.end_object()
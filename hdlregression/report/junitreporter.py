@@ -0,0 +1,76 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+from .hdlreporter import HDLReporter
+from .streamwriter import XMLStreamWriter
+
+
+class JUnitReporter(HDLReporter):
+    '''
+    HDLReporter sub-class for documenting testcase run to a
+    JUnit XML file, e.g. for test result views in CI servers.
+    '''
+
+    def __init__(self, project=None, filename=None):
+        super().__init__(project=project, filename=filename)
+
+    @staticmethod
+    def _get_classname(test_result) -> str:
+        '''
+        Library and testbench of test key "library.testbench.architecture...".
+        '''
+        test_key = test_result.key or test_result.test
+        return ".".join(test_key.split(" ")[0].split(".")[:2])
+
+    def write_to_file(self) -> None:
+        '''
+        Writes regression run result to file in JUnit XML format.
+        '''
+
+        # Do not create report if no test was run
+        if not self._check_test_was_run():
+            return
+
+        # Test counts are written before the tests, i.e. taken from the
+        # model and the test results are only read once.
+        model = self._get_model()
+        with open(self.get_full_filename(), 'w', encoding='utf-8') as lf:
+            writer = XMLStreamWriter(lf)
+            suite_attrib = {"name": "HDLRegression",
+                            "tests": model.num_tests,
+                            "failures": len(model.fail_tests),
+                            "errors": 0,
+                            "skipped": model.num_tests - model.num_tests_run,
+                            "time": "%.3f" % (model.tests_sim_time / 1000)}
+            writer.start("testsuites", suite_attrib)
+            writer.start("testsuite", suite_attrib)
+
+            for test_result in self._iter_test_results():
+                writer.start("testcase", {"classname": self._get_classname(test_result),
+                                          "name": test_result.test,
+                                          "time": "%.3f" % ((test_result.sim_time) / 1000)})
+                if test_result.status == "FAIL":
+                    message = "Test failed"
+                    if test_result.sim_errors:
+                        message += " with %d error(s)" % (test_result.sim_errors)
+                    writer.element("failure",
+                                   "\n".join(test_result.output_tail),
+                                   {"message": message, "type": "FAIL"})
+                elif test_result.status not in ["PASS", "PASS_WITH_MINOR", "PASS_AFTER_RETRY"]:
+                    writer.element("skipped", attrib={"message": test_result.status})
+                writer.end()
+
+            writer.end()
+            writer.end()
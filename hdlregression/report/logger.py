@@ -27,21 +27,52 @@ class bcolors:
     ENDC = '\033[0m'
 
 class Logger():
+    LEVELS = {'debug': 1, 'info': 2, 'warning': 3, 'error': 4}
+
+    COLORS = {
+        'info' : '\033[37m',    # white
+        'warning' : '\033[33m', # yellow
+        'error' : '\033[31m',   # red
+        'debug' : '\033[34m',   # blue
+        'green' : '\033[32m',   # green
+        'red'   : '\033[31m',   # red
+        'endc'  : '\033[0m'     # end color
+    }
+
+    # Shared loggers without a project, name -> logger. Shared loggers
+    # of a project are stored in the project, see get_logger().
+    _shared_loggers = {}
+
     def __init__(self, name, project=None):
         self.name = name
         self.level = 'info'
-        self.levels = {'debug': 1, 'info': 2, 'warning': 3, 'error': 4}
         self.project = project
 
-        self.COLORS = {
-            'info' : '\033[37m',    # white
-            'warning' : '\033[33m', # yellow
-            'error' : '\033[31m',   # red
-            'debug' : '\033[34m',   # blue
-            'green' : '\033[32m',   # green
-            'red'   : '\033[31m',   # red
-            'endc'  : '\033[0m'     # end color
-        }
+    @classmethod
+    def get_logger(cls, name, project=None, level=None) -> 'Logger':
+        """
+        Returns a logger shared by all objects with the same name and
+        project, i.e. for objects created in large numbers. The loggers
+        are stored in the project, i.e. they are released with it.
+        Projects without shared loggers, e.g. a project being unpickled,
+        get a new logger.
+        """
+        if project is None:
+            shared_loggers = cls._shared_loggers
+        else:
+            shared_loggers = getattr(project, "shared_loggers", None)
+        logger = shared_loggers.get(name) if shared_loggers is not None else None
+        if logger is None:
+            logger = cls(name=name, project=project)
+            if shared_loggers is not None:
+                shared_loggers[name] = logger
+        if level:
+            logger.set_level(level)
+        return logger
+
+    def __reduce__(self):
+        # Pickled loggers are restored as shared loggers.
+        return (Logger.get_logger, (self.name, self.project, self.level))
 
     def is_gui_mode(self) -> bool:
         if self.project:
@@ -49,6 +80,12 @@ class Logger():
         else:
             return None
 
+    def get_output(self):
+        """
+        Returns the terminal output stream of the project, None for sys.stdout.
+        """
+        return getattr(self.project, "output", None)
+
     def use_color(self) -> bool:
         return self.project.settings.get_use_log_color()
 
@@ -69,7 +106,7 @@ class Logger():
         color = color or level
         if not self.is_gui_mode() and self.use_color():
             msg = self.colorize(msg, color)
-        print(msg, end=end)
+        print(msg, end=end, file=self.get_output())
 
 
     def info(self, msg, end='\n', color=None):
@@ -82,8 +119,8 @@ class Logger():
         self.log('error', msg, end, color)
 
     def debug(self, msg, end='\n', color=None):
-        current_level = self.levels.get(self.level)
-        if current_level <= self.levels.get('debug'):
+        current_level = self.LEVELS.get(self.level)
+        if current_level <= self.LEVELS.get('debug'):
             self.log('debug', msg, end, color)
 
     def red(self):
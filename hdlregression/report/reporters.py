@@ -0,0 +1,46 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Report file types and their reporters, kept apart from the project
+so that reports can be written without importing HDLRegression,
+e.g. when merging results.
+"""
+
+from ..hdlregression_pkg import import_class
+
+
+# Reporter modules are imported when first used, i.e. (module, class name).
+REPORTER_CLASSES = {
+    ".txt": (".report.txtreporter", "TXTReporter"),
+    ".csv": (".report.csvreporter", "CSVReporter"),
+    ".json": (".report.jsonreporter", "JSONReporter"),
+    # Before .xml, i.e. "report_junit.xml" is a JUnit report.
+    "junit.xml": (".report.junitreporter", "JUnitReporter"),
+    ".xml": (".report.xmlreporter", "XMLReporter"),
+    ".html": (".report.htmlreporter", "HTMLReporter"),
+    ".htm": (".report.htmlreporter", "HTMLReporter"),
+}
+
+
+def get_reporter_class(report_file):
+    """
+    Reporter class of a report file, by file name ending.
+    None if the file type is not supported.
+    """
+    for extension, (module_name, class_name) in REPORTER_CLASSES.items():
+        if report_file.lower().endswith(extension):
+            return import_class(module_name, class_name)
+    return None
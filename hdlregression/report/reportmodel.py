@@ -0,0 +1,186 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Report model, i.e. the results and project structure of a run
+collected once and rendered by every configured reporter.
+All records are immutable, i.e. reporters can render in parallel.
+The result record of each test is built once, only the output tails
+of failing tests are read from the transcripts each time they are used.
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+
+
+RunSettings = namedtuple(
+    "RunSettings",
+    ["ci_run", "testcase_run", "testgroup_run", "gui_mode", "time_of_run", "time_of_sim"],
+)
+
+# Result of a test, see resultfile.get_test_result().
+TestResult = namedtuple(
+    "TestResult",
+    ["test", "key", "status", "sim_time", "sim_errors", "resource_usage", "output_tail"],
+)
+
+# Testbench architecture and its sequencer testcases.
+Testcase = namedtuple("Testcase", ["testbench", "architecture", "testcases"])
+
+# Testgroup with (entity, architecture, testcase, generics) items.
+Testgroup = namedtuple("Testgroup", ["name", "items"])
+
+CompiledFile = namedtuple("CompiledFile", ["filename", "is_tb"])
+
+LibraryModule = namedtuple("LibraryModule", ["type", "name"])
+
+# Library with files in compile order and the modules found in the files.
+Library = namedtuple("Library", ["name", "compile_order", "modules"])
+
+ReportModel = namedtuple(
+    "ReportModel",
+    [
+        "settings",
+        "test_results",
+        "pass_tests",
+        "fail_tests",
+        "not_run_tests",
+        "num_tests",
+        "num_tests_run",
+        "tests_sim_time",
+        "resource_usage",
+        "testcases",
+        "testgroups",
+        "libraries",
+    ],
+)
+
+PASS_STATUS = ["PASS", "PASS_WITH_MINOR", "PASS_AFTER_RETRY"]
+RUN_STATUS = PASS_STATUS + ["FAIL"]
+
+
+class OutputTail:
+    """
+    Last output lines of a failing test, read each time they are
+    iterated, i.e. the transcripts are not kept in memory.
+    """
+
+    __slots__ = ("_read_lines",)
+
+    def __init__(self, read_lines):
+        self._read_lines = read_lines
+
+    def __iter__(self):
+        return iter(self._read_lines())
+
+
+def _get_output_tail(output_tail):
+    if callable(output_tail):
+        return OutputTail(output_tail)
+    return tuple(output_tail or ())
+
+
+def _get_test_result(test_result) -> TestResult:
+    return TestResult(
+        test=test_result["test"],
+        key=test_result.get("key"),
+        status=test_result["status"],
+        sim_time=test_result.get("sim_time") or 0,
+        sim_errors=test_result.get("sim_errors") or 0,
+        resource_usage=MappingProxyType(dict(test_result.get("resource_usage") or {})),
+        output_tail=_get_output_tail(test_result.get("output_tail")),
+    )
+
+
+def _get_testcases(project) -> tuple:
+    testcases = []
+    for library in project.library_container.get():
+        for hdlfile in library.get_hdlfile_list():
+            for tb_module in hdlfile.get_tb_modules():
+                for arch_module in tb_module.get_architecture():
+                    testcases.append(Testcase(testbench=tb_module.get_name(),
+                                              architecture=arch_module.get_name(),
+                                              testcases=tuple(arch_module.get_testcase())))
+    return tuple(testcases)
+
+
+def _get_testgroups(project) -> tuple:
+    return tuple(
+        Testgroup(name=testgroup_container.get_name(),
+                  items=tuple(tuple(item) for item in testgroup_container.get()))
+        for testgroup_container in project._get_testgroup_collection().get()
+    )
+
+
+def _get_libraries(project) -> tuple:
+    return tuple(
+        Library(name=library.get_name(),
+                compile_order=tuple(CompiledFile(filename=module.get_filename(),
+                                                 is_tb=module.get_is_tb())
+                                    for module in library.get_compile_order_list()),
+                modules=tuple(LibraryModule(type=module.get_type(), name=module.get_name())
+                              for module in library._get_list_of_lib_modules()))
+        for library in project.library_container.get()
+    )
+
+
+def build_report_model(project) -> ReportModel:
+    """
+    Collect the results and project structure of a run, i.e. a project
+    or merged results, in one pass over the tests.
+    """
+    settings = project.settings
+    run_settings = RunSettings(
+        ci_run=settings.get_run_all(),
+        testcase_run=(settings.get_testcase() is not None),
+        testgroup_run=(settings.get_testgroup() is not None),
+        gui_mode=settings.get_gui_mode(),
+        time_of_run=settings.get_time_of_run(),
+        time_of_sim=settings.get_sim_time(),
+    )
+
+    # Passing tests are listed before passing tests with minor alerts and
+    # tests passing after retry.
+    test_names = {status: [] for status in RUN_STATUS + ["NOT_RUN"]}
+    resource_usage = []
+    tests_sim_time = 0
+    test_results = tuple(_get_test_result(test_result) for test_result in project._iter_test_results())
+    for test_result in test_results:
+        tests_sim_time += test_result.sim_time
+        if test_result.status in test_names:
+            test_names[test_result.status].append(test_result.test)
+        if test_result.status in RUN_STATUS and test_result.resource_usage:
+            resource_usage.append((test_result.test, test_result.resource_usage))
+
+    # Most CPU time first.
+    resource_usage.sort(
+        key=lambda item: item[1].get("user_time", 0) + item[1].get("system_time", 0),
+        reverse=True,
+    )
+
+    return ReportModel(
+        settings=run_settings,
+        test_results=test_results,
+        pass_tests=tuple(sum([test_names[status] for status in PASS_STATUS], [])),
+        fail_tests=tuple(test_names["FAIL"]),
+        not_run_tests=tuple(test_names["NOT_RUN"]),
+        num_tests=len(test_results),
+        num_tests_run=sum(len(test_names[status]) for status in RUN_STATUS),
+        tests_sim_time=tests_sim_time,
+        resource_usage=tuple(resource_usage),
+        testcases=_get_testcases(project),
+        testgroups=_get_testgroups(project),
+        libraries=_get_libraries(project),
+    )
@@ -0,0 +1,317 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Result files, i.e. machine readable results of a run that can be
+merged with the results of other runs, e.g. CI shards.
+
+Result files are JSON lines: a header line with the run information
+followed by one line for each test.
+"""
+
+import json
+import os
+
+from .. import __version__
+from ..construct.container import Container
+
+
+RESULT_FILE_FORMAT = 1
+
+
+class ResultFileError(Exception):
+    pass
+
+
+def get_result_filename(output_path, shard=None) -> str:
+    """
+    Result file of a run, one for each shard of a sharded run.
+    """
+    if shard is None:
+        return os.path.join(output_path, "results.jsonl")
+    (shard_index, num_shards) = shard
+    return os.path.join(
+        output_path, "results_shard_%d_of_%d.jsonl" % (shard_index, num_shards)
+    )
+
+
+def get_test_result(test) -> dict:
+    return {
+        "test": test.get_test_id_string() or test.get_testcase_name(),
+        "key": test.get_test_key(),
+        "status": test.get_status(),
+        "sim_time": test.get_sim_time(),
+        "sim_errors": test.get_num_sim_errors(),
+        "sim_warnings": test.get_num_sim_warnings(),
+        "test_path": test.get_test_path(),
+        "resource_usage": test.get_resource_usage(),
+    }
+
+
+def write_result_file(project, filename) -> None:
+    """
+    Write the results of the tests run by the project runner.
+    """
+    settings = project.settings
+    test_list = project.runner.get_test_list() if project.runner else []
+    header = {
+        "format": RESULT_FILE_FORMAT,
+        "hdlregression_version": settings.get_hdlregression_version(),
+        "simulator": settings.get_simulator_name(),
+        "shard": settings.get_shard(),
+        "time_of_run": settings.get_time_of_run(),
+        "sim_time": settings.get_sim_time(),
+        "return_code": settings.get_return_code(),
+        "num_tests": len(test_list),
+    }
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps(header) + "\n")
+        for test in test_list:
+            result_file.write(json.dumps(get_test_result(test)) + "\n")
+
+
+def read_result_file(filename):
+    """
+    Read a result file one line at a time.
+
+    :rtype: generator
+    :return: The run header, followed by one dict for each test.
+    """
+    with open(filename, "r") as result_file:
+        for line_number, line in enumerate(result_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ResultFileError(
+                    "%s, line %d: not a HDLRegression result file." % (filename, line_number)
+                )
+            if line_number == 1:
+                if record.get("format") != RESULT_FILE_FORMAT:
+                    raise ResultFileError(
+                        "%s: unsupported result file format %s."
+                        % (filename, record.get("format"))
+                    )
+            yield record
+
+
+class MergedSettings:
+    """
+    Run settings of merged results, as used by the reporters.
+    """
+
+    def __init__(self, test_path="."):
+        self.test_path = test_path
+        self.time_of_run = None
+        self.sim_time = 0
+        self.simulator_name = None
+        self.return_code = 0
+
+    def get_run_all(self) -> bool:
+        return True
+
+    def get_testcase(self):
+        return None
+
+    def get_testgroup(self):
+        return None
+
+    def get_gui_mode(self) -> bool:
+        return False
+
+    def get_time_of_run(self):
+        return self.time_of_run
+
+    def get_sim_time(self):
+        return self.sim_time
+
+    def get_simulator_name(self) -> str:
+        return self.simulator_name
+
+    def get_hdlregression_version(self) -> str:
+        return __version__
+
+    def get_shard(self):
+        return None
+
+    def get_return_code(self) -> int:
+        return self.return_code
+
+    def get_test_path(self) -> str:
+        return self.test_path
+
+
+class MergedResults:
+    """
+    Results from any number of result files, presented to the reporters
+    in place of a project. Test results are not kept, the files are read
+    one line at a time each time the results are iterated. A test found
+    in several files is reported with the result from the last file,
+    which requires the test keys to be kept unless the files are the
+    shards of one run, i.e. have no tests in common.
+    """
+
+    def __init__(self, test_path="."):
+        self.settings = MergedSettings(test_path=test_path)
+        self.library_container = Container("library")
+        self.testgroup_collection_container = Container("testgroup_collection")
+        self.runner = None
+        self.num_files = 0
+        self.result_files = []
+        self.shards = []
+        self.num_records = 0
+        # Test key -> index of the last result file with the test, when required.
+        self.last_file_of_test = None
+
+    def merge(self, filename) -> None:
+        records = read_result_file(filename)
+        header = next(records, None)
+        if header is None:
+            raise ResultFileError("%s: empty result file." % (filename))
+        # Read the whole file, i.e. invalid files are found when merged.
+        num_records = sum(1 for _ in records)
+
+        self.num_files += 1
+        self.result_files.append(filename)
+        self.shards.append(tuple(header["shard"]) if header.get("shard") else None)
+        self.num_records += num_records
+        self.last_file_of_test = None
+        if header.get("return_code"):
+            self.settings.return_code = 1
+        # Shards run in parallel, i.e. the run takes as long as the slowest.
+        self.settings.sim_time = max(self.settings.sim_time, header.get("sim_time") or 0)
+        if header.get("time_of_run"):
+            self.settings.time_of_run = max(
+                self.settings.time_of_run or "", header.get("time_of_run")
+            )
+        self.settings.simulator_name = (
+            self.settings.simulator_name or header.get("simulator")
+        )
+
+    def _is_shards_of_one_run(self) -> bool:
+        if None in self.shards:
+            return False
+        return (len(set(self.shards)) == len(self.shards)
+                and len(set(num_shards for (_, num_shards) in self.shards)) == 1)
+
+    def _get_last_file_of_test(self):
+        """
+        Index of the last result file of each test, None if no test
+        can be in more than one file.
+        """
+        if self._is_shards_of_one_run():
+            return None
+        if self.last_file_of_test is None:
+            self.last_file_of_test = {}
+            for (file_index, record) in self._iter_records():
+                self.last_file_of_test[record["key"]] = file_index
+        return self.last_file_of_test
+
+    def _iter_records(self):
+        for (file_index, filename) in enumerate(self.result_files):
+            records = read_result_file(filename)
+            next(records, None)
+            for record in records:
+                yield (file_index, record)
+
+    def _iter_test_results(self):
+        last_file_of_test = self._get_last_file_of_test()
+        for (file_index, record) in self._iter_records():
+            if last_file_of_test is not None and last_file_of_test[record["key"]] != file_index:
+                continue
+            yield {
+                "test": record["test"],
+                "key": record["key"],
+                "status": record["status"],
+                "sim_time": record.get("sim_time", 0),
+                "resource_usage": record.get("resource_usage"),
+            }
+
+    def get_num_tests(self) -> int:
+        last_file_of_test = self._get_last_file_of_test()
+        if last_file_of_test is None:
+            return self.num_records
+        return len(last_file_of_test)
+
+    def get_results(self) -> list:
+        pass_list = []
+        fail_list = []
+        not_run_list = []
+        for test_result in self._iter_test_results():
+            if test_result["status"] in ["PASS", "PASS_WITH_MINOR", "PASS_AFTER_RETRY"]:
+                pass_list.append(test_result["test"])
+            elif test_result["status"] == "FAIL":
+                fail_list.append(test_result["test"])
+            else:
+                not_run_list.append(test_result["test"])
+        return [pass_list, fail_list, not_run_list]
+
+    def _get_testgroup_collection(self) -> Container:
+        return self.testgroup_collection_container
+
+    def get_resource_usage(self) -> list:
+        return [
+            (test_result["test"], test_result["resource_usage"])
+            for test_result in self._iter_test_results()
+            if test_result["status"] in ["PASS", "PASS_WITH_MINOR", "PASS_AFTER_RETRY", "FAIL"]
+            and test_result["resource_usage"]
+        ]
+
+    def get_return_code(self, model=None) -> int:
+        """
+        Return code of the merged run, 0=Pass, 1=Fail/No tests run.
+        The results are taken from the report model of the merged
+        results when given, i.e. the files are not read again.
+        """
+        if self.settings.get_return_code() != 0:
+            return 1
+        if model is None:
+            (pass_list, fail_list, _) = self.get_results()
+            (num_fail_tests, num_tests_run) = (len(fail_list), len(pass_list) + len(fail_list))
+        else:
+            (num_fail_tests, num_tests_run) = (len(model.fail_tests), model.num_tests_run)
+        if num_fail_tests > 0 or num_tests_run == 0:
+            return 1
+        return 0
+
+    def write_result_file(self, filename) -> None:
+        """
+        Write the merged results, e.g. to be merged again. The file is
+        replaced when written, i.e. it can be one of the merged files.
+        """
+        header = {
+            "format": RESULT_FILE_FORMAT,
+            "hdlregression_version": self.settings.get_hdlregression_version(),
+            "simulator": self.settings.get_simulator_name(),
+            "shard": None,
+            "time_of_run": self.settings.get_time_of_run(),
+            "sim_time": self.settings.get_sim_time(),
+            "return_code": self.settings.get_return_code(),
+            "num_tests": self.get_num_tests(),
+        }
+        with open(filename + ".tmp", "w") as result_file:
+            result_file.write(json.dumps(header) + "\n")
+            for test_result in self._iter_test_results():
+                record = {
+                    "test": test_result["test"],
+                    "key": test_result["key"],
+                    "status": test_result["status"],
+                    "sim_time": test_result["sim_time"],
+                }
+                if test_result["resource_usage"]:
+                    record["resource_usage"] = test_result["resource_usage"]
+                result_file.write(json.dumps(record) + "\n")
+        os.replace(filename + ".tmp", filename)
@@ -0,0 +1,129 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Writers for reports that are written to file one item at a time,
+i.e. memory use does not grow with the number of tests.
+"""
+
+import json
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+
+# Characters not allowed in XML 1.0, e.g. terminal color codes in test output.
+_XML_ILLEGAL_CHARS = re.compile("[^\x09\x0a\x0d\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def xml_text(text) -> str:
+    return _XML_ILLEGAL_CHARS.sub("", str(text))
+
+
+class JSONStreamWriter:
+    """
+    Writes a JSON document as objects, arrays and values are added.
+    """
+
+    def __init__(self, file, indent=4):
+        self.file = file
+        self.indent = indent
+        # Number of items written to each open object/array.
+        self.num_items = []
+
+    def _write_key(self, key) -> None:
+        if self.num_items:
+            if self.num_items[-1] > 0:
+                self.file.write(",")
+            self.num_items[-1] += 1
+            self.file.write("\n" + " " * self.indent * len(self.num_items))
+        if key is not None:
+            self.file.write(json.dumps(str(key)) + ": ")
+
+    def _end(self, bracket) -> None:
+        num_items = self.num_items.pop()
+        if num_items > 0:
+            self.file.write("\n" + " " * self.indent * len(self.num_items))
+        self.file.write(bracket)
+        if not self.num_items:
+            self.file.write("\n")
+
+    def begin_object(self, key=None) -> None:
+        self._write_key(key)
+        self.file.write("{")
+        self.num_items.append(0)
+
+    def end_object(self) -> None:
+        self._end("}")
+
+    def begin_array(self, key=None) -> None:
+        self._write_key(key)
+        self.file.write("[")
+        self.num_items.append(0)
+
+    def end_array(self) -> None:
+        self._end("]")
+
+    def value(self, value, key=None) -> None:
+        self._write_key(key)
+        self.file.write(json.dumps(value))
+
+
+class XMLStreamWriter:
+    """
+    Writes an indented XML document as elements are added.
+    """
+
+    def __init__(self, file, indent=4):
+        self.file = file
+        self.indent = indent
+        self.elements = []
+        # Start tag not written until the element gets content.
+        self.pending_tag = None
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    @staticmethod
+    def _get_tag(tag, attrib) -> str:
+        tag_str = tag
+        for name, value in (attrib or {}).items():
+            tag_str += " %s=%s" % (name, quoteattr(xml_text(value)))
+        return tag_str
+
+    def _write_pending_tag(self) -> None:
+        if self.pending_tag is not None:
+            self.file.write("<%s>\n" % (self.pending_tag))
+            self.pending_tag = None
+
+    def start(self, tag, attrib=None) -> None:
+        self._write_pending_tag()
+        self.file.write(" " * self.indent * len(self.elements))
+        self.pending_tag = self._get_tag(tag, attrib)
+        self.elements.append(tag)
+
+    def end(self) -> None:
+        tag = self.elements.pop()
+        if self.pending_tag is not None:
+            self.file.write("<%s/>\n" % (self.pending_tag))
+            self.pending_tag = None
+        else:
+            self.file.write("%s</%s>\n" % (" " * self.indent * len(self.elements), tag))
+
+    def element(self, tag, text=None, attrib=None) -> None:
+        self._write_pending_tag()
+        self.file.write(" " * self.indent * len(self.elements))
+        tag_str = self._get_tag(tag, attrib)
+        if text is None or text == "":
+            self.file.write("<%s/>\n" % (tag_str))
+        else:
+            self.file.write("<%s>%s</%s>\n" % (tag_str, escape(xml_text(text)), tag))
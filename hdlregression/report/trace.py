@@ -0,0 +1,135 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Phase tracing in Chrome Trace Event format.
+
+Spans are recorded for run phases, compiled files and simulated tests, one
+lane for each thread and one for each remote worker slot. The trace file
+can be opened in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Process ids of the lanes in the trace.
+COORDINATOR_PID = 1
+WORKERS_PID = 2
+
+
+class Tracer:
+    """
+    Records spans when started with a trace file, spans are
+    ignored otherwise.
+    """
+
+    def __init__(self):
+        self.filename = None
+        self.events = []
+        self.lanes = {}  # (pid, lane name) -> tid
+        self.start_time = 0
+        self.lock = threading.Lock()
+
+    def start(self, filename) -> None:
+        """
+        Start a new trace, not traced when filename is None.
+        """
+        with self.lock:
+            self.filename = filename
+            self.events = []
+            self.lanes = {}
+            self.start_time = time.perf_counter()
+
+    def is_enabled(self) -> bool:
+        return self.filename is not None
+
+    def get_filename(self) -> str:
+        return self.filename
+
+    def _get_timestamp(self) -> float:
+        # Chrome trace timestamps are in microseconds.
+        return round((time.perf_counter() - self.start_time) * 1e6, 1)
+
+    def _get_tid(self, pid, lane) -> int:
+        """
+        Lane id, lanes are named by a metadata event.
+        """
+        tid = self.lanes.get((pid, lane))
+        if tid is None:
+            tid = len(self.lanes) + 1
+            self.lanes[(pid, lane)] = tid
+            self.events.append(
+                {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": lane}}
+            )
+        return tid
+
+    @contextmanager
+    def span(self, name, category, lane=None, pid=COORDINATOR_PID):
+        """
+        Record the time spent in the with block as a span on the lane,
+        the lane of the current thread by default. Yields a dict for
+        adding arguments shown with the span.
+        """
+        if not self.is_enabled():
+            yield {}
+            return
+        args = {}
+        begin_time = self._get_timestamp()
+        try:
+            yield args
+        finally:
+            end_time = self._get_timestamp()
+            with self.lock:
+                if self.is_enabled():
+                    tid = self._get_tid(pid, lane or threading.current_thread().name)
+                    self.events.append(
+                        {
+                            "ph": "X",
+                            "name": name,
+                            "cat": category,
+                            "ts": begin_time,
+                            "dur": round(end_time - begin_time, 1),
+                            "pid": pid,
+                            "tid": tid,
+                            "args": args,
+                        }
+                    )
+
+    def write(self) -> None:
+        """
+        Write the trace file and stop tracing.
+        """
+        with self.lock:
+            if self.filename is None:
+                return
+            (filename, events) = (self.filename, self.events)
+            self.filename = None
+            self.events = []
+        process_names = [
+            {"ph": "M", "name": "process_name", "pid": pid, "args": {"name": name}}
+            for (pid, name) in [(COORDINATOR_PID, "HDLRegression"), (WORKERS_PID, "Remote workers")]
+        ]
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w") as trace_file:
+            json.dump(
+                {"traceEvents": process_names + events, "displayTimeUnit": "ms"},
+                trace_file,
+            )
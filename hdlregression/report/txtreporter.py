@@ -44,7 +44,7 @@ class TXTReporter(HDLReporter):
                 lf.write('Time of sim   : %s ms.\n' % (self._time_of_sim()))
 
                 # Write test results
-                pass_tests, fail_tests, not_run_tests = self.project.get_results()
+                pass_tests, fail_tests, not_run_tests = self._get_results()
                 lf.write('\n\nPassing tests (%d):\n' % (len(pass_tests)))
                 for test in pass_tests:
                     lf.write(test + '\n')
@@ -57,53 +57,36 @@ class TXTReporter(HDLReporter):
 
                 # Write testcases
                 lf.write('\n\n')
-                for library in self.project.library_container.get():
-                    # All files
-                    for hdlfile in library.get_hdlfile_list():
-                        # All TB modules in file
-                        for tb_module in hdlfile.get_tb_modules():
-                            # All architectures connected with this TB
-                            for arch_module in tb_module.get_architecture():
-                                lf.write('Testcase: %s.%s\n' % (
-                                    tb_module.get_name(), arch_module.get_name()))
-                                # All testcases connected with this architecture
-                                for testcase in arch_module.get_testcase():
-                                    lf.write('Testcase: %s.%s.%s\n' % (
-                                        tb_module.get_name(), arch_module.get_name(), testcase))
+                for testcase_info in self._get_testcases():
+                    lf.write('Testcase: %s.%s\n' % (
+                        testcase_info.testbench, testcase_info.architecture))
+                    # All testcases connected with this architecture
+                    for testcase in testcase_info.testcases:
+                        lf.write('Testcase: %s.%s.%s\n' % (
+                            testcase_info.testbench, testcase_info.architecture, testcase))
 
                 # Write testgroups
                 lf.write('\n\n')
-                for testgroup_container in self.project.testgroup_collection_container.get():
-                    lf.write('Testgroup: ' +
-                             testgroup_container.get_name() + '\n')
-                    testgroup_items_list = testgroup_container.get()
-                    for idx, testgroup_items_list in enumerate(testgroup_container.get()):
-                        entity, architecture, testcase, generics = tuple(
-                            testgroup_items_list)
-                        tg_str = '%d: %s' % (idx + 1, entity)
-                        if architecture:
-                            tg_str += '.%s' % (architecture)
-                        if testcase:
-                            tg_str += '.%s' % (testcase)
-                        if generics:
-                            tg_str += ', generics=%s' % (generics)
-                        lf.write(tg_str + '\n')
+                for testgroup in self._get_testgroups():
+                    lf.write('Testgroup: ' + testgroup.name + '\n')
+                    for idx, testgroup_item in enumerate(testgroup.items):
+                        lf.write('%d: %s\n' % (idx + 1, self._get_testgroup_item_str(testgroup_item)))
 
                 # Write compilation order
                 if self.get_report_compile_order():
                     lf.write('\n\nCompilation order:\n')
-                    for library in self.project.library_container.get():
-                        lf.write('Library ' + library.get_name() + ':\n')
-                        for idx, module_instance in enumerate(library.get_compile_order_list()):
-                            tb = "(TB)" if module_instance.get_is_tb() else ""
+                    for library in self._get_libraries():
+                        lf.write('Library ' + library.name + ':\n')
+                        for idx, compiled_file in enumerate(library.compile_order):
+                            tb = "(TB)" if compiled_file.is_tb else ""
                             lf.write('  File %d: %s %s\n' % (
-                                idx + 1, module_instance.get_filename(), tb))
+                                idx + 1, compiled_file.filename, tb))
 
                 # Write library information
                 if self.get_report_library():
                     lf.write('\nLibrary information:\n')
-                    for library in self.project.library_container.get():
-                        lf.write('  %s:\n' % (library.get_name()))
-                        for module in library._get_list_of_lib_modules():
+                    for library in self._get_libraries():
+                        lf.write('  %s:\n' % (library.name))
+                        for module in library.modules:
                             lf.write('    %s: %s\n' %
-                                     (module.get_type(), module.get_name()))
+                                     (module.type, module.name))
@@ -13,14 +13,14 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
 #
 
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
 from .hdlreporter import HDLReporter
+from .streamwriter import XMLStreamWriter
+
 
 class XMLReporter(HDLReporter):
     '''
     HDLReporter sub-class for documenting testcase run
-    to an XML file.
+    to an XML file, written one test at a time.
     '''
 
     def __init__(self, project=None, filename=None):
@@ -31,88 +31,96 @@ class XMLReporter(HDLReporter):
         Writes regression run result to file in XML format.
         '''
 
-        report = ET.Element("TestReport")
-
-        # Write settings
-        settings = ET.SubElement(report, "Settings")
-        ET.SubElement(settings, "CI_run").text = str(self._is_ci_run())
-        ET.SubElement(settings, "Testcase_run").text = str(self._is_testcase_run())
-        ET.SubElement(settings, "Testgroup_run").text = str(self._is_testgroup_run())
-        ET.SubElement(settings, "GUI_mode").text = str(self._is_gui_run())
-        ET.SubElement(settings, "Time_of_run").text = str(self._time_of_run())
-        ET.SubElement(settings, "Time_of_sim").text = str(self._time_of_sim())
-
-        # Write test results
-        results = ET.SubElement(report, "Results")
-
-        passing_tests, fail_tests, not_run_tests = self.project.get_results()
-
-        pass_elem = ET.SubElement(results, "Passing")
-        for test in passing_tests:
-            ET.SubElement(pass_elem, "Test").text = test
-
-        fail_elem = ET.SubElement(results, "Failing")
-        for test in fail_tests:
-            ET.SubElement(fail_elem, "Test").text = test
-
-        not_run_elem = ET.SubElement(results, "NotRun")
-        for test in not_run_tests:
-            ET.SubElement(not_run_elem, "Test").text = test
-
-        # Write testcase info
-        testcases = ET.SubElement(report, "Testcases")
-        for library in self.project.library_container.get():
-            for hdlfile in library.get_hdlfile_list():
-                for tb_module in hdlfile.get_tb_modules():
-                    for arch_module in tb_module.get_architecture():
-                        testcase_elem = ET.SubElement(testcases, "Testcase")
-                        ET.SubElement(testcase_elem, "ModuleName").text = tb_module.get_name()
-                        ET.SubElement(testcase_elem, "ArchitectureName").text = arch_module.get_name()
-
-        # Write testgroup info
-        testgroups = ET.SubElement(report, "Testgroups")
-        for testgroup_container in self.project.testgroup_collection_container.get():
-            testgroup_elem = ET.SubElement(testgroups, "Testgroup")
-            ET.SubElement(testgroup_elem, "Name").text = testgroup_container.get_name()
-            for idx, testgroup_items_list in enumerate(testgroup_container.get()):
-                entity, architecture, testcase, generics = tuple(testgroup_items_list)
-                tg_str = '%s' % entity
-                if architecture:
-                    tg_str += '.%s' % architecture
-                if testcase:
-                    tg_str += '.%s' % testcase
-                if generics:
-                    tg_str += ', generics=%s' % generics
-                ET.SubElement(testgroup_elem, "Item").text = tg_str
-
-        # Write compilation order
-        if self.get_report_compile_order():
-            comp_order = ET.SubElement(report, "CompilationOrder")
-            for library in self.project.library_container.get():
-                library_elem = ET.SubElement(comp_order, "Library")
-                ET.SubElement(library_elem, "LibraryName").text = library.get_name()
-                for idx, module_instance in enumerate(library.get_compile_order_list()):
-                    module_elem = ET.SubElement(library_elem, "Module")
-                    tb = "(TB)" if module_instance.get_is_tb() else ""
-                    ET.SubElement(module_elem, "ModuleName").text = module_instance.get_filename() + " " + tb
-
-        # Write library info
-        if self.get_report_library():
-            library_info = ET.SubElement(report, "LibraryInformation")
-            for library in self.project.library_container.get():
-                library_elem = ET.SubElement(library_info, "Library")
-                ET.SubElement(library_elem, "LibraryName").text = library.get_name()
-                for module in library._get_list_of_lib_modules():
-                    module_elem = ET.SubElement(library_elem, "Module")
-                    ET.SubElement(module_elem, "ModuleType").text = module.get_type()
-                    ET.SubElement(module_elem, "ModuleName").text = module.get_name()
-
         # Do not create report if no test was run
-        if self._check_test_was_run():
-            # Convert the XML tree to a prettified string
-            xml_string = ET.tostring(report, encoding="unicode", method="xml")
-            formatted_xml = minidom.parseString(xml_string).toprettyxml(indent="    ")
-
-            # Write the formatted XML string to file
-            with open(self.get_full_filename(), 'w') as lf:
-                lf.write(formatted_xml)
+        if not self._check_test_was_run():
+            return
+
+        with open(self.get_full_filename(), 'w', encoding='utf-8') as lf:
+            writer = XMLStreamWriter(lf)
+            writer.start("TestReport")
+
+            # Write settings
+            writer.start("Settings")
+            writer.element("CI_run", str(self._is_ci_run()))
+            writer.element("Testcase_run", str(self._is_testcase_run()))
+            writer.element("Testgroup_run", str(self._is_testgroup_run()))
+            writer.element("GUI_mode", str(self._is_gui_run()))
+            writer.element("Time_of_run", str(self._time_of_run()))
+            writer.element("Time_of_sim", str(self._time_of_sim()))
+            writer.end()
+
+            # Write test results
+            writer.start("Results")
+            for (status_list, tag) in [(["PASS", "PASS_WITH_MINOR"], "Passing"),
+                                       (["PASS_AFTER_RETRY"], "PassingAfterRetry"),
+                                       (["FAIL"], "Failing"),
+                                       (["NOT_RUN"], "NotRun")]:
+                writer.start(tag)
+                for test_result in self._iter_test_results(status_list):
+                    writer.element("Test", test_result.test)
+                writer.end()
+
+            # Write resource usage
+            resource_usage = self._get_resource_usage()
+            if resource_usage:
+                writer.start("ResourceUsage")
+                for test, usage in resource_usage:
+                    writer.start("Test")
+                    writer.element("Name", test)
+                    writer.element("UserTime", str(usage.get("user_time", 0)))
+                    writer.element("SystemTime", str(usage.get("system_time", 0)))
+                    writer.element("PeakMemory", str(usage.get("peak_rss", 0)))
+                    writer.element("ReadBytes", str(usage.get("read_bytes", 0)))
+                    writer.element("WriteBytes", str(usage.get("write_bytes", 0)))
+                    writer.end()
+                writer.end()
+            writer.end()
+
+            # Write testcase info
+            writer.start("Testcases")
+            for testcase_info in self._get_testcases():
+                writer.start("Testcase")
+                writer.element("ModuleName", testcase_info.testbench)
+                writer.element("ArchitectureName", testcase_info.architecture)
+                writer.end()
+            writer.end()
+
+            # Write testgroup info
+            writer.start("Testgroups")
+            for testgroup in self._get_testgroups():
+                writer.start("Testgroup")
+                writer.element("Name", testgroup.name)
+                for testgroup_item in testgroup.items:
+                    writer.element("Item", self._get_testgroup_item_str(testgroup_item))
+                writer.end()
+            writer.end()
+
+            # Write compilation order
+            if self.get_report_compile_order():
+                writer.start("CompilationOrder")
+                for library in self._get_libraries():
+                    writer.start("Library")
+                    writer.element("LibraryName", library.name)
+                    for compiled_file in library.compile_order:
+                        tb = "(TB)" if compiled_file.is_tb else ""
+                        writer.start("Module")
+                        writer.element("ModuleName", compiled_file.filename + " " + tb)
+                        writer.end()
+                    writer.end()
+                writer.end()
+
+            # Write library info
+            if self.get_report_library():
+                writer.start("LibraryInformation")
+                for library in self._get_libraries():
+                    writer.start("Library")
+                    writer.element("LibraryName", library.name)
+                    for module in library.modules:
+                        writer.start("Module")
+                        writer.element("ModuleType", module.type)
+                        writer.element("ModuleName", module.name)
+                        writer.end()
+                    writer.end()
+                writer.end()
+
+            writer.end()
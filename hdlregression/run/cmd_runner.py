@@ -22,6 +22,12 @@ from queue import Queue, Empty
 from pathlib import Path
 
 from ..report.logger import Logger
+from .resource_monitor import get_empty_resource_usage, get_process_tree_rss, reap_process
+from .transcript import open_transcript_writer
+
+
+# Interval (s) for sampling the memory use of a running command.
+RSS_SAMPLE_INTERVAL = 0.5
 
 
 class HDLRunnerError(Exception):
@@ -57,25 +63,50 @@ class CommandRunner:
     def __init__(self, project):
         self.logger = Logger(name=__name__, project=project)
         self.project = project
+        self.peak_rss = 0
+        self.resource_usage = get_empty_resource_usage()
+
+    def get_peak_rss(self) -> int:
+        '''
+        Peak resident memory (bytes) of the last command and its
+        child processes, sampled while running. 0 if not available.
+        '''
+        return self.peak_rss
+
+    def _set_resource_usage(self, usage) -> None:
+        self.resource_usage = get_empty_resource_usage()
+        self.resource_usage.update(usage or {})
+        self.peak_rss = max(self.peak_rss, self.resource_usage['peak_rss'])
+        self.resource_usage['peak_rss'] = self.peak_rss
+
+    def get_resource_usage(self) -> dict:
+        '''
+        CPU time (s), peak memory (bytes) and block I/O (bytes) of the
+        last command, from os.wait4() when the command was reaped.
+        '''
+        return dict(self.resource_usage)
 
     @staticmethod
-    def _enqueue_output(out_fd, queue, transcript_file_path, error):
-        '''Reads from the 'out' file descriptor and puts it in a queue and optionally a transcript file.
+    def _enqueue_output(out_fd, queue, error):
+        '''Reads from the 'out' file descriptor and puts it in a queue.
            Used for os-independent non-blocking reads.
         '''
         try:
-            if transcript_file_path:
-                with open(transcript_file_path, 'a') as transcript_file:
-                    for line in iter(out_fd.readline, ""):
-                        queue.put((line, not error))
-                        transcript_file.write(line)
-            else:
-                for line in iter(out_fd.readline, ""):
-                    queue.put((line, not error))
+            for line in iter(out_fd.readline, ""):
+                queue.put((line, not error))
         except ValueError:  # We get a value error if 'out_fd' is closed by the subprocess
             pass
         out_fd.close()
 
+    def _open_transcript(self, output_file):
+        '''
+        Transcript of stdout and stderr, compressed on the fly when
+        enabled with set_transcript_compression().
+        '''
+        if not output_file:
+            return None
+        return open_transcript_writer(output_file, self.project.settings.get_transcript_compression())
+
     def _get_process(self, command, path):
         return subprocess.Popen(command,
                                 stdout=subprocess.PIPE,
@@ -92,15 +123,21 @@ class CommandRunner:
 
         return_code = None
         popen = None
+        transcript_file = None
+        self.peak_rss = 0
+        self.resource_usage = get_empty_resource_usage()
+        rss_sample_time = 0
 
         ignored_simulator_exit_codes = self.project.settings.get_ignored_simulator_exit_codes()
 
         try:
+            transcript_file = self._open_transcript(output_file)
             popen = self._get_process(command, path)
             q_transcript = Queue()
 
-            t_stdout = Thread(target=self._enqueue_output, args=(popen.stdout, q_transcript, output_file, False))
-            t_stderr = Thread(target=self._enqueue_output, args=(popen.stderr, q_transcript, output_file, True))
+            # Output of both streams is written to the transcript by this thread.
+            t_stdout = Thread(target=self._enqueue_output, args=(popen.stdout, q_transcript, False))
+            t_stderr = Thread(target=self._enqueue_output, args=(popen.stderr, q_transcript, True))
 
             t_stdout.daemon = True  # thread dies with the program
             t_stderr.daemon = True  # thread dies with the program
@@ -108,8 +145,14 @@ class CommandRunner:
             t_stderr.start()
 
             while True:
+                if return_code is None and time.time() - rss_sample_time >= RSS_SAMPLE_INTERVAL:
+                    rss_sample_time = time.time()
+                    self.peak_rss = max(self.peak_rss, get_process_tree_rss(popen.pid))
+
                 try:
                     transcript_line = q_transcript.get_nowait()
+                    if transcript_file:
+                        transcript_file.write(transcript_line[0])
                     self.logger.debug(transcript_line)
                     yield transcript_line
                 except Empty:
@@ -128,8 +171,10 @@ class CommandRunner:
                 if transcript_line is None:
                     # Yield thread when there's no line to process to limit CPU usage
                     time.sleep(0.05)
-                    return_code = popen.poll()
-                    if return_code is not None:
+                    resource_usage = reap_process(popen)
+                    if resource_usage is not None:
+                        return_code = popen.returncode
+                        self._set_resource_usage(resource_usage)
                         # Subprocess finished, wait for the threads to complete
                         t_stdout.join()
                         t_stderr.join()
@@ -139,6 +184,9 @@ class CommandRunner:
         except:
             tb = sys.exc_info()[2]
             raise CommandExecuteError(command).with_traceback(tb)
+        finally:
+            if transcript_file:
+                transcript_file.close()
 
         if return_code is None and popen is not None:
             return_code = popen.returncode
@@ -211,7 +259,7 @@ class CommandRunner:
 
         for stdout_line in iter(popen.stdout.readline, ""):
             if verbose is True:
-                print(stdout_line.rstrip())
+                print(stdout_line.rstrip(), file=self.project.output)
 
             return_txt += stdout_line
 
@@ -219,3 +267,73 @@ class CommandRunner:
         return_code = popen.wait()
 
         return (return_txt, return_code)
+
+
+class RemoteCommandRunner(CommandRunner):
+    '''
+    Runs simulation commands on remote workers.
+    '''
+
+    def __init__(self, project, worker_pool, name=None):
+        super().__init__(project)
+        self.worker_pool = worker_pool
+        self.name = name
+
+    @staticmethod
+    def _get_run_do_content(path):
+        run_file = os.path.join(path, 'run.do')
+        if os.path.isfile(run_file):
+            with open(run_file, 'r') as file:
+                return file.read()
+        return None
+
+    @staticmethod
+    def _get_env_overrides(env) -> dict:
+        '''
+        Variables of env that differ from the environment of the
+        regression script. Workers run jobs in their own environment
+        with these added, i.e. their own simulator and license setup.
+        '''
+        return {name: value for (name, value) in (env or {}).items()
+                if os.environ.get(name) != value}
+
+    def get_job(self, command, path='./', env=None) -> dict:
+        '''
+        Test descriptor sent to a worker.
+        '''
+        return {'command': self._convert_to_list(command),
+                'cwd': os.path.abspath(path),
+                'env': self._get_env_overrides(env),
+                'run_do': self._get_run_do_content(path),
+                'name': self.name}
+
+    def run(self, command, path='./', env=None, output_file=None) -> tuple:
+        self._create_path_if_missing(path)
+
+        return_code = None
+        transcript_file = None
+        self.peak_rss = 0
+        self.resource_usage = get_empty_resource_usage()
+
+        ignored_simulator_exit_codes = self.project.settings.get_ignored_simulator_exit_codes()
+
+        try:
+            transcript_file = self._open_transcript(output_file)
+
+            for message in self.worker_pool.run_job(self.get_job(command, path, env)):
+                if 'output' in message:
+                    transcript_line = message['output']
+                    if transcript_file:
+                        transcript_file.write(transcript_line)
+                    self.logger.debug(transcript_line)
+                    yield transcript_line, not message.get('stderr', False)
+                if 'exit_code' in message:
+                    return_code = message['exit_code']
+                    self._set_resource_usage(message.get('resource_usage'))
+        finally:
+            if transcript_file:
+                transcript_file.close()
+
+        if return_code != 0:
+            if return_code not in ignored_simulator_exit_codes:
+                yield "Error: Program ended with exit code {}".format(return_code), False
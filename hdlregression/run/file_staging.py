@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Linux ioctl sharing the data blocks of one file with another (reflink).
+FICLONE = 0x40049409
+
+# Ways a file is staged in a test folder, see stage_file().
+STAGE_REFLINK = "reflink"
+STAGE_HARDLINK = "hardlink"
+STAGE_SYMLINK = "symlink"
+STAGE_COPY = "copy"
+
+
+def clone_file(src, dst) -> bool:
+    """
+    Clones src to dst, i.e. dst shares the data blocks of src until
+    either file is written. Returns False if not supported by the
+    file system, e.g. not Btrfs or XFS, or not on Linux.
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _is_staged(src, dst) -> bool:
+    try:
+        return os.path.samefile(src, dst)
+    except OSError:
+        return False
+
+
+class FileStager:
+    """
+    Stages files in test folders without copying the file data when
+    possible. Clones and links not supported by the file system are
+    only tried once.
+    """
+
+    def __init__(self):
+        self.use_clone = fcntl is not None
+        self.use_link = hasattr(os, "link")
+
+    def _clone_file(self, src, dst) -> bool:
+        if not self.use_clone:
+            return False
+        if not clone_file(src, dst):
+            # Not supported by this file system, no need to try again.
+            self.use_clone = False
+            return False
+        return True
+
+    def stage_file(self, src, dst, writable=False) -> str:
+        """
+        Stages src as dst. A writable dst is a private copy of src,
+        i.e. a clone or a copy. Else dst is a clone, a hard link or a
+        symbolic link to src, and only copied as a last resort.
+        Returns how the file was staged, None if dst already is a
+        link to src.
+        """
+        if not writable and _is_staged(src, dst):
+            return None
+        if os.path.lexists(dst):
+            os.remove(dst)
+
+        if self._clone_file(src, dst):
+            return STAGE_REFLINK
+        if not writable:
+            if self.use_link:
+                try:
+                    os.link(src, dst)
+                    return STAGE_HARDLINK
+                except OSError:
+                    self.use_link = False
+            try:
+                os.symlink(os.path.abspath(src), dst)
+                return STAGE_SYMLINK
+            except (OSError, NotImplementedError):
+                pass
+        shutil.copy2(src, dst)
+        return STAGE_COPY
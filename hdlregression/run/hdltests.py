@@ -18,17 +18,50 @@ import zlib
 from pickle import FALSE
 
 from ..hdlregression_pkg import get_window_width
+from ..projectdb import Record
+from .resource_monitor import add_resource_usage, get_empty_resource_usage
+from .transcript import read_transcript_lines
 
 
 class TestStatus:
     PASS = "PASS"
     PASS_WITH_MINOR = "PASS_WITH_MINOR"
+    PASS_AFTER_RETRY = "PASS_AFTER_RETRY"
     FAIL = "FAIL"
     NOT_RUN = "NOT_RUN"
     RE_RUN = "RE_RUN"
 
 
-class HdlRegressionTest:
+class HdlRegressionTest(Record):
+
+    __slots__ = (
+        "path",
+        "tb",
+        "test_mapping_name",
+        "test_string",
+        "settings",
+        "id_number",
+        "terminal_test_details_str",
+        "test_error_summary",
+        "terminal_test_string",
+        "num_sim_errors",
+        "num_sim_warnings",
+        "test_status",
+        "hdlfile",
+        "library",
+        "test_output",
+        "netlist_timing",
+        "test_output_folder_name",
+        "sim_time",
+        "peak_rss",
+        "user_time",
+        "system_time",
+        "read_bytes",
+        "write_bytes",
+        "num_retries",
+        "transcript_file",
+    )
+
     def __init__(self, tb=None, settings=None):
         self.path = None
         self.tb = None
@@ -44,10 +77,18 @@ class HdlRegressionTest:
         self.num_sim_warnings = 0
 
         self.test_status = TestStatus.NOT_RUN
+        self.sim_time = 0
+        self.peak_rss = 0
+        self.user_time = 0.0
+        self.system_time = 0.0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.num_retries = 0
 
         self.hdlfile = None
         self.library = None
         self.test_output = []
+        self.transcript_file = None
 
         self.set_tb(tb)
 
@@ -78,15 +119,48 @@ class HdlRegressionTest:
         """
         Returns sim output from test run.
         """
-        return "\n".join(self.test_output)
+        return "\n".join(self.get_output_lines())
 
     def get_output_no_format(self) -> list:
         return self.test_output
 
+    def set_transcript_file(self, transcript_file) -> None:
+        """
+        Compressed transcript the sim output is read from when
+        not kept in memory, see release_output().
+        """
+        self.transcript_file = transcript_file
+
+    def get_transcript_file(self) -> str:
+        return self.transcript_file
+
+    def release_output(self) -> None:
+        """
+        Clears the sim output kept in memory when it can be
+        read from the transcript file.
+        """
+        if self.transcript_file and os.path.isfile(self.transcript_file):
+            self.test_output = []
+
+    def get_output_lines(self, num_lines=None) -> list:
+        """
+        Returns the sim output lines of the test run, only the last
+        num_lines if given. Read from the transcript file when the
+        output is not kept in memory.
+        """
+        output_lines = self.test_output
+        if not output_lines and self.transcript_file:
+            try:
+                return read_transcript_lines(self.transcript_file, num_lines)
+            except (OSError, EOFError):
+                return []
+        if num_lines is not None:
+            return output_lines[max(len(output_lines) - num_lines, 0) :]
+        return output_lines
+
     def get_test_error_summary(self) -> str:
         sep = "=" * get_window_width()
-        output_lines = self.test_output
-        error_lines = "\n".join(output_lines[len(output_lines) - 30 :])
+        error_lines = "\n".join(self.get_output_lines(30))
         test_error_summary = "\n\n{}\n\n{}\n\n{}\n\n".format(sep, error_lines, sep)
         return test_error_summary
 
@@ -126,6 +200,61 @@ class HdlRegressionTest:
         """
         return self.test_string
 
+    def get_test_key(self) -> str:
+        """
+        Identifies the test across runs, i.e. library, testcase name
+        and generics, but not the test id number.
+        """
+        test_key = self.get_library().get_name() + "." + self.get_testcase_name()
+        generics = self.get_gc_str(filter_testcase_id=True)
+        if generics:
+            test_key += " " + generics
+        return test_key
+
+    def set_sim_time(self, sim_time):
+        """
+        Simulation time in milliseconds.
+        """
+        self.sim_time = sim_time
+
+    def get_sim_time(self) -> int:
+        return self.sim_time
+
+    def set_peak_rss(self, peak_rss):
+        """
+        Peak resident memory of the simulation in bytes.
+        """
+        self.peak_rss = peak_rss
+
+    def get_peak_rss(self) -> int:
+        return self.peak_rss
+
+    def clear_resource_usage(self) -> None:
+        self.set_resource_usage(get_empty_resource_usage())
+
+    def set_resource_usage(self, usage):
+        """
+        CPU time (s), peak memory (bytes) and block I/O (bytes)
+        of the simulation.
+        """
+        self.user_time = usage.get("user_time", 0.0)
+        self.system_time = usage.get("system_time", 0.0)
+        self.peak_rss = usage.get("peak_rss", 0)
+        self.read_bytes = usage.get("read_bytes", 0)
+        self.write_bytes = usage.get("write_bytes", 0)
+
+    def add_resource_usage(self, usage):
+        self.set_resource_usage(add_resource_usage(self.get_resource_usage(), usage))
+
+    def get_resource_usage(self) -> dict:
+        return {
+            "user_time": self.user_time,
+            "system_time": self.system_time,
+            "peak_rss": self.peak_rss,
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+        }
+
     def set_hdlfile(self, hdlfile):
         self.hdlfile = hdlfile
 
@@ -138,6 +267,15 @@ class HdlRegressionTest:
     def set_library(self, library):
         self.library = library
 
+    def set_num_retries(self, num_retries):
+        """
+        Number of times the test was run again after failing in this run.
+        """
+        self.num_retries = num_retries
+
+    def get_num_retries(self) -> int:
+        return self.num_retries
+
     # ----------- test status ---------------
     def set_status(self, status: TestStatus):
         self.test_status = status.upper()
@@ -250,6 +388,9 @@ class HdlRegressionTest:
 
 
 class VHDLTest(HdlRegressionTest):
+
+    __slots__ = ("arch", "tc", "gc")
+
     def __init__(self, tb=None, arch=None, tc=None, gc=[], settings=None):
         super().__init__(tb=tb, settings=settings)
         self.arch = None
@@ -331,6 +472,9 @@ class VHDLTest(HdlRegressionTest):
 
 
 class VerilogTest(HdlRegressionTest):
+
+    __slots__ = ("tc", "gc")
+
     def __init__(self, tb=None, tc=None, gc=[], settings=None):
         super().__init__(tb=tb, settings=settings)
         self.tc = None
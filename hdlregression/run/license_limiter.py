@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+import threading
+from contextlib import contextmanager
+
+
+# Limit discovered from the number of running simulations
+# when a license is first denied.
+AUTO_LIMIT = "auto"
+
+
+class LicenseLimiter:
+    """
+    Limits the number of simulations using each license feature,
+    e.g. "simulator" and "coverage". Tokens for all features used
+    by a simulation are taken at once, i.e. simulations waiting for
+    one feature do not hold tokens for other features.
+    """
+
+    def __init__(self, limits=None):
+        # Feature name to max concurrency, int or AUTO_LIMIT.
+        self.limits = dict(limits or {})
+        self.in_use = {}
+        self.condition = threading.Condition()
+
+    def get_limit(self, feature):
+        """
+        Returns the max concurrency of a feature, None if unlimited.
+        """
+        limit = self.limits.get(feature)
+        return None if limit == AUTO_LIMIT else limit
+
+    def get_in_use(self, feature) -> int:
+        return self.in_use.get(feature, 0)
+
+    def _is_available(self, features) -> bool:
+        for feature in features:
+            limit = self.get_limit(feature)
+            if limit is not None and self.get_in_use(feature) >= limit:
+                return False
+        return True
+
+    def acquire(self, features) -> None:
+        with self.condition:
+            while not self._is_available(features):
+                self.condition.wait()
+            for feature in features:
+                self.in_use[feature] = self.get_in_use(feature) + 1
+
+    def release(self, features) -> None:
+        with self.condition:
+            for feature in features:
+                self.in_use[feature] = self.get_in_use(feature) - 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def tokens(self, features):
+        self.acquire(features)
+        try:
+            yield
+        finally:
+            self.release(features)
+
+    def set_denied(self, features) -> dict:
+        """
+        Called with the tokens still held when a license was denied.
+        Features with an automatic limit are limited to the other
+        simulations running, at least one.
+
+        Returns:
+            dict: discovered limits by feature.
+        """
+        discovered = {}
+        with self.condition:
+            for feature in features:
+                if self.limits.get(feature) == AUTO_LIMIT:
+                    limit = max(1, self.get_in_use(feature) - 1)
+                    self.limits[feature] = limit
+                    discovered[feature] = limit
+        return discovered
@@ -0,0 +1,261 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+
+# Memory kept free for the rest of the system, fraction of total memory.
+MEMORY_RESERVE_FRACTION = 0.1
+# Interval (s) for checking live memory and load while simulations wait.
+ADMISSION_POLL_INTERVAL = 0.5
+
+
+def _read_proc_file(filename):
+    try:
+        with open(filename, "r") as proc_file:
+            return proc_file.read()
+    except (IOError, OSError):
+        return None
+
+
+def get_process_tree_rss(pid) -> int:
+    """
+    Resident memory (bytes) of a process and its child processes,
+    0 when not available, i.e. not on Linux.
+    """
+    rss_pages = 0
+    pids = [pid]
+    while pids:
+        pid = pids.pop()
+        statm = _read_proc_file("/proc/%d/statm" % (pid))
+        if not statm:
+            continue
+        rss_pages += int(statm.split()[1])
+        try:
+            tasks = os.listdir("/proc/%d/task" % (pid))
+        except OSError:
+            tasks = []
+        for task in tasks:
+            children = _read_proc_file("/proc/%d/task/%s/children" % (pid, task))
+            if children:
+                pids += [int(child) for child in children.split()]
+    return rss_pages * os.sysconf("SC_PAGE_SIZE") if rss_pages else 0
+
+
+def get_empty_resource_usage() -> dict:
+    return {
+        "user_time": 0.0,
+        "system_time": 0.0,
+        "peak_rss": 0,
+        "read_bytes": 0,
+        "write_bytes": 0,
+    }
+
+
+def _get_resource_usage(rusage) -> dict:
+    # ru_maxrss is in kilobytes, except on macOS.
+    peak_rss = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+    return {
+        "user_time": round(rusage.ru_utime, 3),
+        "system_time": round(rusage.ru_stime, 3),
+        "peak_rss": peak_rss,
+        # Block I/O operations are counted in 512 byte units.
+        "read_bytes": rusage.ru_inblock * 512,
+        "write_bytes": rusage.ru_oublock * 512,
+    }
+
+
+def _get_exit_code(status) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def reap_process(process, wait=False):
+    """
+    Reap a finished subprocess with os.wait4 to get the resource usage
+    of the process and the child processes it has waited for. The
+    process return code is set as by Popen.poll().
+
+    Returns:
+        dict: resource usage, empty if not available, or None if the
+              process is still running.
+    """
+    if process.returncode is not None or not hasattr(os, "wait4"):
+        return_code = process.wait() if wait else process.poll()
+        return None if return_code is None else {}
+    try:
+        (pid, status, rusage) = os.wait4(process.pid, 0 if wait else os.WNOHANG)
+    except ChildProcessError:
+        # Already reaped.
+        return_code = process.wait() if wait else process.poll()
+        return None if return_code is None else {}
+    if pid == 0:
+        return None
+    process.returncode = _get_exit_code(status)
+    return _get_resource_usage(rusage)
+
+
+def add_resource_usage(usage, added) -> dict:
+    """
+    Add the resource usage of a command to the usage of a test,
+    peak memory is the largest of the commands.
+    """
+    usage = dict(usage)
+    for (key, value) in added.items():
+        if key == "peak_rss":
+            usage[key] = max(usage.get(key, 0), value)
+        elif key in usage:
+            usage[key] += value
+    return usage
+
+
+class ResourceMonitor:
+    """
+    Reads live system memory and load from /proc. Values are None
+    when not available.
+    """
+
+    def _get_meminfo(self, field):
+        meminfo = _read_proc_file("/proc/meminfo")
+        if meminfo:
+            for line in meminfo.splitlines():
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+        return None
+
+    def get_total_memory(self):
+        return self._get_meminfo("MemTotal")
+
+    def get_available_memory(self):
+        return self._get_meminfo("MemAvailable")
+
+    def get_num_running_processes(self):
+        """
+        Number of processes running or ready to run, i.e. the
+        instant CPU load without the lag of the load average.
+        """
+        stat = _read_proc_file("/proc/stat")
+        if stat:
+            for line in stat.splitlines():
+                if line.startswith("procs_running"):
+                    return int(line.split()[1])
+        return None
+
+    def get_num_cpus(self) -> int:
+        return os.cpu_count() or 1
+
+
+class AdaptiveScheduler:
+    """
+    Admits simulations while memory and CPU headroom remain.
+
+    The memory use of a simulation is estimated from its peak RSS in
+    earlier runs, or the largest known peak RSS for new tests. Estimates
+    of running simulations are reserved from the memory available when
+    the run started, as simulations may not yet have reached their peak.
+    One simulation is always admitted when none are running.
+    """
+
+    def __init__(self, max_concurrency, peak_rss=None, monitor=None):
+        self.monitor = monitor or ResourceMonitor()
+        self.max_concurrency = max(1, max_concurrency)
+        self.peak_rss = dict(peak_rss or {})
+        self.num_running = 0
+        self.reserved_memory = 0
+        self.condition = threading.Condition()
+
+        total_memory = self.monitor.get_total_memory()
+        available_memory = self.monitor.get_available_memory()
+        self.memory_reserve = int(total_memory * MEMORY_RESERVE_FRACTION) if total_memory else 0
+        self.memory_budget = None
+        if available_memory is not None:
+            self.memory_budget = max(0, available_memory - self.memory_reserve)
+
+    def get_memory_budget(self):
+        return self.memory_budget
+
+    def get_num_running(self) -> int:
+        return self.num_running
+
+    def get_estimate(self, test_key) -> int:
+        """
+        Estimated peak RSS (bytes) of a test.
+        """
+        if self.peak_rss.get(test_key):
+            return self.peak_rss[test_key]
+        if self.peak_rss:
+            return max(self.peak_rss.values())
+        if self.memory_budget:
+            # Nothing known, share the memory between the simulations.
+            return self.memory_budget // self.max_concurrency
+        return 0
+
+    def _has_headroom(self, estimate) -> bool:
+        if self.num_running == 0:
+            return True
+        if self.num_running >= self.max_concurrency:
+            return False
+
+        if self.memory_budget is not None:
+            if self.reserved_memory + estimate > self.memory_budget:
+                return False
+            available_memory = self.monitor.get_available_memory()
+            if available_memory is not None and available_memory < self.memory_reserve + estimate:
+                return False
+
+        num_running_processes = self.monitor.get_num_running_processes()
+        if num_running_processes is not None:
+            # Other load on the host, not counting simulations and this process.
+            other_load = max(0, num_running_processes - self.num_running - 1)
+            if self.num_running + other_load >= self.monitor.get_num_cpus():
+                return False
+        return True
+
+    def admit(self, test_key) -> int:
+        """
+        Wait until a simulation of the test can be started.
+
+        Returns:
+            int: memory reserved for the simulation.
+        """
+        estimate = self.get_estimate(test_key)
+        with self.condition:
+            while not self._has_headroom(estimate):
+                # Live memory and load change without notification.
+                self.condition.wait(timeout=ADMISSION_POLL_INTERVAL)
+            self.num_running += 1
+            self.reserved_memory += estimate
+        return estimate
+
+    def release(self, test_key, estimate, peak_rss=0) -> None:
+        with self.condition:
+            self.num_running -= 1
+            self.reserved_memory -= estimate
+            if peak_rss:
+                self.peak_rss[test_key] = peak_rss
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, test):
+        test_key = test.get_test_key()
+        estimate = self.admit(test_key)
+        try:
+            yield
+        finally:
+            self.release(test_key, estimate, test.get_peak_rss())
@@ -0,0 +1,251 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+import os
+import glob
+import shutil
+import threading
+
+from .file_staging import clone_file, fcntl
+
+
+# Folder in the test path with the merged code coverage files.
+COVERAGE_FOLDER = "coverage"
+
+
+def get_test_backups(test_path) -> list:
+    """
+    Backup folders of previous test runs, i.e. test_<time of run>,
+    oldest first.
+    """
+    return sorted(
+        folder for folder in glob.glob(glob.escape(test_path) + "_*")
+        if os.path.isdir(folder)
+    )
+
+
+def get_backup_sizes(backups) -> list:
+    """
+    Size (bytes) of each backup folder. Files hard linked between
+    backups are counted in the newest backup using them, i.e. the
+    size of a backup is the space freed when it is removed before
+    any newer backup.
+    """
+    seen = set()
+    sizes = {}
+    for backup in reversed(backups):
+        size = 0
+        for (root, _, files) in os.walk(backup):
+            for name in files:
+                try:
+                    stat = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if (stat.st_dev, stat.st_ino) not in seen:
+                    seen.add((stat.st_dev, stat.st_ino))
+                    size += stat.st_size
+        sizes[backup] = size
+    return [sizes[backup] for backup in backups]
+
+
+def prune_test_backups(test_path, max_backups=None, max_size=None) -> list:
+    """
+    Removes the oldest backup folders until at most max_backups are
+    left and they use at most max_size MB. The newest backup is
+    always kept. Returns the removed folders.
+    """
+    backups = get_test_backups(test_path)
+    remove = []
+    if max_backups is not None and len(backups) > max_backups:
+        remove = backups[: len(backups) - max(max_backups, 1)]
+    if max_size is not None:
+        sizes = get_backup_sizes(backups)
+        total_size = sum(sizes[len(remove):])
+        for (backup, size) in zip(backups[len(remove):-1], sizes[len(remove):-1]):
+            if total_size <= max_size * 1024 * 1024:
+                break
+            remove.append(backup)
+            total_size -= size
+    for backup in remove:
+        shutil.rmtree(backup, ignore_errors=True)
+    return remove
+
+
+class RunBackup:
+    """
+    Backup of the previous test run to test_<time of run>.
+
+    The test folder is either moved to the backup folder, or, when
+    test results are kept for the new run, e.g. with keep_code_coverage,
+    snapshot to it. Files are cloned (reflink) where the file system
+    supports it, else hard linked, and only copied as a last resort.
+    The test folders are snapshot in a background thread while the
+    new simulations start, and a test folder is always snapshot before
+    a test writes to it, see detach(). Old backups are pruned after
+    the backup is done.
+    """
+
+    def __init__(self, test_path, backup_folder, logger, max_backups=None, max_size=None):
+        self.test_path = test_path
+        self.backup_folder = backup_folder
+        self.logger = logger
+        self.max_backups = max_backups
+        self.max_size = max_size
+
+        self.use_clone = fcntl is not None
+        self.use_link = hasattr(os, "link")
+        # Folder name in the test path to snapshot lock, removed when snapshot.
+        self.folder_locks = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    # ---------------------------------------------------------
+    # File copy
+    # ---------------------------------------------------------
+    def _clone_file(self, src, dst) -> bool:
+        if not self.use_clone:
+            return False
+        if not clone_file(src, dst):
+            # Not supported by this file system, no need to try again.
+            self.use_clone = False
+            return False
+        return True
+
+    def _copy_file(self, src, dst) -> str:
+        """
+        Clones or copies src to dst.
+        """
+        if not self._clone_file(src, dst):
+            shutil.copy2(src, dst)
+        return dst
+
+    def _link_or_copy_file(self, src, dst) -> str:
+        """
+        Clones, hard links or copies src to dst.
+        """
+        if self._clone_file(src, dst):
+            return dst
+        if self.use_link:
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                self.use_link = False
+        shutil.copy2(src, dst)
+        return dst
+
+    # ---------------------------------------------------------
+    # Backup
+    # ---------------------------------------------------------
+    def move(self) -> None:
+        """
+        Moves the test folder to the backup folder.
+        """
+        self.logger.info("Moving previous test run to: {}.".format(self.backup_folder))
+        try:
+            os.rename(self.test_path, self.backup_folder)
+        except OSError as error:
+            self.logger.warning("Unable to backup tests: {}".format(error))
+            return
+        self._start_thread([])
+
+    def snapshot(self) -> None:
+        """
+        Snapshots the test folder to the backup folder. Files in the test
+        path, e.g. reports and the test mapping file, are updated in place
+        and are cloned or copied. The code coverage folder is snapshot
+        before any test is run, and test folders in the background.
+        """
+        self.logger.info("Backing up previous test run to: {}.".format(self.backup_folder))
+        folders = []
+        try:
+            os.makedirs(self.backup_folder)
+            for name in sorted(os.listdir(self.test_path)):
+                path = os.path.join(self.test_path, name)
+                if os.path.isdir(path):
+                    folders.append(name)
+                    self.folder_locks[name] = threading.Lock()
+                else:
+                    self._copy_file(path, os.path.join(self.backup_folder, name))
+        except OSError as error:
+            self.logger.warning("Unable to backup tests: {}".format(error))
+            self.folder_locks = {}
+            return
+
+        if COVERAGE_FOLDER in self.folder_locks:
+            self.detach(os.path.join(self.test_path, COVERAGE_FOLDER))
+        self._start_thread(folders)
+
+    def _start_thread(self, folders) -> None:
+        self.thread = threading.Thread(
+            target=self._backup_loop, args=(folders,), name="Test run backup"
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _backup_loop(self, folders) -> None:
+        for name in folders:
+            self._snapshot_folder(name)
+        if self.max_backups is not None or self.max_size is not None:
+            for backup in prune_test_backups(self.test_path, self.max_backups, self.max_size):
+                self.logger.info("Removed test run backup: {}.".format(backup))
+
+    def _snapshot_folder(self, name) -> None:
+        with self.lock:
+            folder_lock = self.folder_locks.get(name)
+        if folder_lock is None:
+            return
+        with folder_lock:
+            with self.lock:
+                if name not in self.folder_locks:
+                    return
+            try:
+                shutil.copytree(
+                    os.path.join(self.test_path, name),
+                    os.path.join(self.backup_folder, name),
+                    copy_function=self._link_or_copy_file,
+                )
+            except OSError as error:
+                self.logger.warning("Unable to backup {}: {}".format(name, error))
+            with self.lock:
+                del self.folder_locks[name]
+
+    def detach(self, path) -> None:
+        """
+        Called before files in path, a folder in the test path, are
+        written. Snapshots the folder if not done yet, and removes files
+        hard linked to the backup, i.e. the test writes new files and
+        the backup is left unchanged.
+        """
+        relative_path = os.path.relpath(path, self.test_path)
+        if relative_path.startswith(os.pardir):
+            return
+        self._snapshot_folder(relative_path.split(os.sep)[0])
+        for (root, _, files) in os.walk(path):
+            for name in files:
+                filename = os.path.join(root, name)
+                try:
+                    if os.lstat(filename).st_nlink > 1:
+                        os.remove(filename)
+                except OSError as error:
+                    self.logger.warning("Unable to detach {}: {}".format(filename, error))
+
+    def wait(self) -> None:
+        """
+        Waits for the backup and pruning to finish.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -21,6 +21,7 @@ from .sim_runner import SimRunner, OutputFileError
 from ..report.logger import Logger
 from ..hdlregression_pkg import os_adjust_path
 from ..scan.hdl_regex_pkg import RE_RIVIERA_WARNING, RE_RIVIERA_ERROR, RE_ACTIVE_HDL_ERROR, RE_ACTIVE_HDL_WARNING
+from ..scan.hdl_regex_pkg import RE_LICENSE_DENIED
 
 
 class RivieraRunner(SimRunner):
@@ -133,8 +134,8 @@ class RivieraRunner(SimRunner):
             if hdlfile.get_need_compile() or force_compile:
                 self.logger.debug("Recompiling file: {}".format(hdlfile.get_name()))
 
-                success = self._run_cmd(
-                    command=self._get_compile_call(hdlfile), path=libraries_path
+                success = self._compile_file(
+                    hdlfile, command=self._get_compile_call(hdlfile), path=libraries_path
                 )
                 if success is False:
                     compile_ok = False
@@ -255,6 +256,9 @@ class RivieraRunner(SimRunner):
     def _get_ignored_error_detection_str(self) -> str:
         return r"^\/\/  (Reconnected|Lost connection) to license server"
 
+    def _get_license_denied_regex(self):
+        return RE_LICENSE_DENIED
+
 
 
 class ActiveHDLRunner(RivieraRunner, SimRunner):
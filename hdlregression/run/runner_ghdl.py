@@ -144,7 +144,7 @@ class GHDLRunner(SimRunner):
                 self.logger.debug("Recompiling file: %s" % (hdlfile.get_name()))
                 cmd = self._get_simulator_call(hdlfile=hdlfile)
                 # Call command runner in super-class
-                if not self._run_cmd(cmd):
+                if not self._compile_file(hdlfile, cmd):
                     file_name = hdlfile.get_filename_with_path()
                     self.logger.error("Failed to compile %s!" % (file_name))
                     success = False
@@ -20,7 +20,7 @@ import os
 from .sim_runner import SimRunner, OutputFileError
 from ..report.logger import Logger
 from ..hdlregression_pkg import os_adjust_path
-from ..scan.hdl_regex_pkg import RE_MODELSIM_WARNING, RE_MODELSIM_ERROR
+from ..scan.hdl_regex_pkg import RE_MODELSIM_WARNING, RE_MODELSIM_ERROR, RE_LICENSE_DENIED
 
 
 class ModelsimRunner(SimRunner):
@@ -164,8 +164,8 @@ class ModelsimRunner(SimRunner):
             if hdlfile.get_need_compile() or force_compile:
                 self.logger.debug("Recompiling file: %s" % (hdlfile.get_name()))
 
-                success = self._run_cmd(
-                    command=self._get_compile_call(hdlfile), path=libraries_path
+                success = self._compile_file(
+                    hdlfile, command=self._get_compile_call(hdlfile), path=libraries_path
                 )
                 if success is False:
                     compile_ok = False
@@ -329,3 +329,6 @@ class ModelsimRunner(SimRunner):
 
     def _get_ignored_error_detection_str(self) -> str:
         return r"^\/\/  (Reconnected|Lost connection) to license server"
+
+    def _get_license_denied_regex(self):
+        return RE_LICENSE_DENIED
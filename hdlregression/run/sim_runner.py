@@ -16,15 +16,20 @@
 import os
 import re
 import time
-import shutil
+import random
+from contextlib import nullcontext
 from abc import abstractmethod
-from threading import Thread
+from threading import Lock, Thread
 from queue import Queue
-from shutil import copytree
 
 from .testbuilder import TestBuilder
 from ..construct.hdl_modules_pkg import *
-from .cmd_runner import CommandRunner
+from .cmd_runner import CommandRunner, RemoteCommandRunner
+from .license_limiter import LicenseLimiter
+from .resource_monitor import AdaptiveScheduler
+from .run_backup import RunBackup
+from .file_staging import FileStager, STAGE_COPY
+from .transcript import compress_transcript, get_transcript_filename
 from ..report.logger import Logger
 from ..hdlregression_pkg import convert_from_millisec
 from ..hdlregression_pkg import os_adjust_path
@@ -32,6 +37,11 @@ from .hdltests import VHDLTest, VerilogTest, TestStatus
 from ..construct.hdlfile import VHDLFile, VerilogFile
 
 
+# Wait before retrying a simulation denied a license, doubled for each retry.
+LICENSE_BACKOFF_TIME = 5.0
+LICENSE_BACKOFF_MAX_TIME = 60.0
+
+
 class HDLRunnerError(Exception):
     pass
 
@@ -80,6 +90,18 @@ class SimRunner:
         # Test builder will create a list of test objects to run
         self.testbuilder = TestBuilder(project=project)
 
+        # Limits simulations to available licenses, set for each run
+        self.license_limiter = LicenseLimiter()
+        # Limits simulations to available memory and CPU with "-t auto"
+        self.resource_scheduler = None
+        # Retries of failing tests left in this run, None for no limit
+        self.retry_budget = None
+        self.retry_lock = Lock()
+        # Backup of the previous test run, done while tests are run
+        self.test_run_backup = None
+        # Stages files added with add_file_to_run_folder()
+        self.file_stager = FileStager()
+
         # Prepare regex
         self.RE_UVVM_SUMMARY = None
         self.RE_UVVM_RESULT = None
@@ -90,7 +112,11 @@ class SimRunner:
         return self.SIMULATOR_NAME
 
     def get_test_result(self) -> list:
-        pass_list = self._get_pass_test_list() + self._get_pass_with_minor_alert_list()
+        pass_list = (
+            self._get_pass_test_list()
+            + self._get_pass_with_minor_alert_list()
+            + self._get_pass_after_retry_list()
+        )
         fail_list = self._get_fail_test_list()
         not_run_list = self._get_not_run_test_list()
         return [pass_list, fail_list, not_run_list]
@@ -104,12 +130,19 @@ class SimRunner:
     def get_num_pass_with_minor_alerts_test(self) -> int:
         return len(self._get_pass_with_minor_alert_list())
 
+    def get_num_pass_after_retry_test(self) -> int:
+        return len(self._get_pass_after_retry_list())
+
     def get_num_tests_run(self) -> int:
         """
         Returns the number of all passing and
         failing tests in this run.
         """
-        pass_list = self._get_pass_test_list() + self._get_pass_with_minor_alert_list()
+        pass_list = (
+            self._get_pass_test_list()
+            + self._get_pass_with_minor_alert_list()
+            + self._get_pass_after_retry_list()
+        )
         fail_list = self._get_fail_test_list()
         return len(pass_list + fail_list)
 
@@ -201,9 +234,11 @@ class SimRunner:
                 self.logger.info(
                     "Compiling library: {}".format(library.get_name()), end=" "
                 )
-                compiled_library = self._compile_library(
-                    library=library, force_compile=force_compile
-                )
+                with self.project.tracer.span(library.get_name(), "library") as span_args:
+                    compiled_library = self._compile_library(
+                        library=library, force_compile=force_compile
+                    )
+                    span_args["success"] = bool(compiled_library)
 
                 if not compiled_library:
                     self.logger.info(" - FAIL - ", end="\n", color="red")
@@ -235,15 +270,36 @@ class SimRunner:
             while not test_queue.empty():
                 # try:
                 test = test_queue.get()
-                self._prepare_test_folder(test)
-                self._run_terminal_test(test)
+                test.set_num_retries(0)
+                while True:
+                    with self.project.tracer.span(test.get_test_key(), "test") as span_args:
+                        self._prepare_test_folder(test)
+                        self._run_terminal_test(test)
+                        span_args["test"] = test.get_test_id_string()
+                        span_args["status"] = test.get_status()
+                        span_args["retry"] = test.get_num_retries()
+
+                    # Failing test is run again in the slot it was using.
+                    if test.get_status() != TestStatus.FAIL or not self._use_test_retry(test):
+                        break
+                    print(test.get_terminal_test_details_str(), file=self.project.output)
+                    self.logger.warning(
+                        "Retrying {}, retry {} of {}.".format(
+                            test.get_test_id_string(),
+                            test.get_num_retries(),
+                            self.project.settings.get_test_retries(),
+                        )
+                    )
+
+                # Merge code coverage while other tests are running.
+                self.project.hdlcodecoverage.add_test_coverage(test.get_test_path())
 
                 # Display test information and results
-                print(test.get_terminal_test_details_str())
+                print(test.get_terminal_test_details_str(), file=self.project.output)
 
                 # Present errors
                 if test.get_status() == TestStatus.FAIL:
-                    print(test.get_test_error_summary())
+                    print(test.get_test_error_summary(), file=self.project.output)
                     if self.project.settings.get_stop_on_failure():
                         self.logger.warning(
                             "Simulations stopped because of failing testcase."
@@ -252,7 +308,7 @@ class SimRunner:
                     failing_test = True
                 # Print test output in verbose mode
                 elif self.project.settings.get_verbose():
-                    print(test.get_output())
+                    print(test.get_output(), file=self.project.output)
 
                 # finally:
                 test_queue.task_done()
@@ -269,29 +325,78 @@ class SimRunner:
         # Start timer
         start_time = round(time.time() * 1000)
 
+        # Threads are sized to the capacity of the connected workers.
+        if test_list and getattr(self.project, "worker_pool", None) is not None:
+            self.project.worker_pool.wait_for_workers()
+
         num_threads = self._get_number_of_threads()
 
-        if num_threads > 0:
+        self.resource_scheduler = None
+        if self.project.settings.get_adaptive_threading() and (
+            getattr(self.project, "worker_pool", None) is None
+        ):
+            self.resource_scheduler = AdaptiveScheduler(
+                max_concurrency=num_threads,
+                peak_rss=self.project._get_test_peak_rss(),
+            )
+            memory_budget = self.resource_scheduler.get_memory_budget()
+            self.logger.info(
+                "Adaptive scheduling of up to {} simulation(s){}.".format(
+                    num_threads,
+                    ", memory budget {} MB".format(memory_budget // (1024 * 1024))
+                    if memory_budget is not None
+                    else "",
+                )
+            )
+
+        self.retry_budget = self.project.settings.get_retry_budget()
+
+        license_limits = self.project.settings.get_license_limits()
+        self.license_limiter = LicenseLimiter(license_limits)
+        if license_limits:
             self.logger.info(
-                "Running {} out of {} test(s) using {} thread(s).".format(
-                    len(test_list), self.get_num_tests(), num_threads
+                "License limits: {}.".format(
+                    ", ".join("%s=%s" % (f, l) for f, l in sorted(license_limits.items()))
                 )
             )
 
+        if num_threads > 0:
+            if getattr(self.project, "worker_pool", None) is not None:
+                self.logger.info(
+                    "Running {} out of {} test(s) on remote workers.".format(
+                        len(test_list), self.get_num_tests()
+                    )
+                )
+            else:
+                self.logger.info(
+                    "Running {} out of {} test(s) using {} thread(s).".format(
+                        len(test_list), self.get_num_tests(), num_threads
+                    )
+                )
+
+            self.project.hdlcodecoverage.start_incremental_merge()
+
             # create test queue for threads to operate with
             test_queue = Queue()
             for test in self.get_test_list():
                 test_queue.put(test)
 
             # run threads
-            for _ in range(num_threads):
-                thread = Thread(target=run_test, args=(test_queue,))
+            for thread_number in range(num_threads):
+                thread = Thread(
+                    target=run_test,
+                    args=(test_queue,),
+                    name="Simulation thread {}".format(thread_number + 1),
+                )
                 thread.daemon = True
                 thread.start()
 
             # wait for test queue to finish
             test_queue.join()
 
+            # Any files not merged yet are left for the final merge.
+            self.project.hdlcodecoverage.finish_incremental_merge()
+
             # Calculate and update timing
             finish_time = round(time.time() * 1000)
             elapsed_time = finish_time - start_time
@@ -300,6 +405,8 @@ class SimRunner:
             # Write mapping file for run tests.
             self._write_test_mapping(self.get_test_list())
 
+        self._wait_for_test_run_backup()
+
         if failing_test is True:
             self.project.settings.set_sim_success(False)
         else:
@@ -334,6 +441,13 @@ class SimRunner:
             if test.get_status() == TestStatus.PASS_WITH_MINOR
         ]
 
+    def _get_pass_after_retry_list(self) -> list:
+        return [
+            test.get_test_id_string()
+            for test in self.get_test_list()
+            if test.get_status() == TestStatus.PASS_AFTER_RETRY
+        ]
+
     def _get_not_run_test_list(self) -> list:
         return [
             test.get_test_id_string()
@@ -406,6 +520,13 @@ class SimRunner:
         # Default number of threads
         num_threads = 1
         num_tests_to_run = len(self.get_test_list())
+        worker_pool = getattr(self.project, "worker_pool", None)
+        # Remote workers run one test in each slot of the connected workers.
+        if worker_pool is not None:
+            num_threads = max(worker_pool.get_capacity(), 1)
+            if self.project.settings.get_num_threads() > 0:
+                num_threads = min(num_threads, self.project.settings.get_num_threads())
+            return max(min(num_threads, num_tests_to_run), 1)
         # Adjust to one thread per parser if threading is enabled
         if self.project.settings.get_num_threads() > 0:
             num_threads = self.project.settings.get_num_threads()
@@ -442,25 +563,10 @@ class SimRunner:
     def _backup_test_run(self) -> None:
         """
         Check if there has been a previous test run and move
-        those test results to a backup folder.
+        those test results to a backup folder. Test results are
+        snapshot instead when kept for this run, see RunBackup.
         """
-
-        def backup_test_results(backup_folder):
-            try:
-                if keep_code_coverage:
-                    self.logger.info(
-                        "Backing up previous test run to: {}.".format(backup_folder)
-                    )
-                    copytree(self.project.settings.get_test_path(), backup_folder)
-                else:
-                    self.logger.info(
-                        "Moving previous test run to: {}.".format(backup_folder)
-                    )
-                    os.rename(self.project.settings.get_test_path(), backup_folder)
-            except OSError as error:
-                self.logger.warning("Unable to backup tests: {}".format(error))
-
-        keep_code_coverage = self.project.settings.get_keep_code_coverage()
+        self.test_run_backup = None
 
         if self.project.settings.get_time_of_run() and os.path.exists(
             self.project.settings.get_test_path()
@@ -471,12 +577,28 @@ class SimRunner:
             )
 
             if not os.path.exists(backup_folder):
-                backup_test_results(backup_folder)
+                self.test_run_backup = RunBackup(
+                    self.project.settings.get_test_path(),
+                    backup_folder,
+                    self.logger,
+                    max_backups=self.project.settings.get_max_test_backups(),
+                    max_size=self.project.settings.get_max_test_backup_size(),
+                )
+                if self.project.settings.get_keep_code_coverage():
+                    self.test_run_backup.snapshot()
+                else:
+                    self.test_run_backup.move()
             else:
                 self.logger.warning(
                     "Backup folder {} already exists.".format(backup_folder)
                 )
 
+    def _wait_for_test_run_backup(self) -> None:
+        if self.test_run_backup is not None:
+            with self.project.tracer.span("test run backup", "phase"):
+                self.test_run_backup.wait()
+            self.test_run_backup = None
+
     def _write_test_mapping(self, tests) -> None:
         """
         Create a test and folder mapping file to locate
@@ -606,10 +728,14 @@ class SimRunner:
         # Write command to file
         self._save_cmd(command)
 
-        cmd_runner = CommandRunner(project=self.project)
+        cmd_runner = self._get_command_runner(test)
 
         if test is not None:
             test.clear_output()
+            test.set_transcript_file(None)
+            compression = self.project.settings.get_transcript_compression()
+            if output_file and compression:
+                test.set_transcript_file(get_transcript_filename(output_file, compression))
 
         success = True
 
@@ -635,8 +761,33 @@ class SimRunner:
                 if test is not None:
                     test.inc_num_sim_warnings()
 
+        if test is not None:
+            test.add_resource_usage(cmd_runner.get_resource_usage())
+
+        return success
+
+    def _compile_file(self, hdlfile, command, path="./") -> bool:
+        """
+        Run the compile command of a file.
+        """
+        with self.project.tracer.span(hdlfile.get_filename(), "compile") as span_args:
+            success = self._run_cmd(command=command, path=path)
+            span_args["file"] = hdlfile.get_filename_with_path()
+            span_args["success"] = success
         return success
 
+    def _get_command_runner(self, test=None) -> CommandRunner:
+        """
+        Simulations are run on remote workers when enabled,
+        compilations are always run locally.
+        """
+        worker_pool = getattr(self.project, "worker_pool", None)
+        if test is not None and worker_pool is not None:
+            return RemoteCommandRunner(
+                project=self.project, worker_pool=worker_pool, name=test.get_test_key()
+            )
+        return CommandRunner(project=self.project)
+
     def _output_handler(self, test, line):
         """
         Directs simulation output to the terminal or the
@@ -648,7 +799,7 @@ class SimRunner:
                 test.add_output(line)
 
             if self.project.settings.get_verbose() and single_sim_thread:
-                print(line, flush=True)
+                print(line, flush=True, file=self.project.output)
 
     # ---------------------------------------------------------
     # Testbench and simulations
@@ -681,11 +832,15 @@ class SimRunner:
                 test, descriptive_test_name
             )
             test.set_test_id_string(terminal_output_string)
+            test.clear_resource_usage()
             self._write_run_do_file(
                 test=test, generic_call=gen_call, module_call=module_call
             )
-            self._simulate(test=test, generic_call=gen_call, module_call=module_call)
+            self._simulate_with_license(
+                test=test, generic_call=gen_call, module_call=module_call
+            )
             self._check_test_result(test=test, sim_start_time=sim_start_time)
+            self._store_test_transcript(test)
             test.set_folder_to_name_mapping(descriptive_test_name)
 
         gen_call = test.get_gc_str()
@@ -698,28 +853,165 @@ class SimRunner:
 
         run_simulation(test, descriptive_test_name, module_call, gen_call)
 
+    def _store_test_transcript(self, test) -> None:
+        """
+        With compressed transcripts, a transcript written by the simulator
+        is compressed, and the test output is read back from the transcript
+        instead of being kept in memory.
+        """
+        compression = self.project.settings.get_transcript_compression()
+        if not compression:
+            return
+
+        if test.get_transcript_file() is None:
+            transcript_file = os.path.join(test.get_test_path(), "transcript")
+            if os.path.isfile(transcript_file):
+                try:
+                    test.set_transcript_file(compress_transcript(transcript_file, compression))
+                except OSError as error:
+                    self.logger.warning(
+                        "Unable to compress transcript {}: {}".format(transcript_file, error)
+                    )
+        test.release_output()
+
+    def _get_simulation_slot(self, test):
+        """
+        Waits for memory and CPU headroom with adaptive scheduling.
+        """
+        if self.resource_scheduler is None:
+            return nullcontext()
+        return self.resource_scheduler.slot(test)
+
+    def _get_license_features(self, test) -> list:
+        """
+        License features used by a test simulation.
+        """
+        features = ["simulator"]
+        if self.project.hdlcodecoverage.get_code_coverage_file():
+            features.append("coverage")
+        return features
+
+    def _get_license_denied_regex(self):
+        """
+        Simulator output when the license server denies a simulation,
+        None for simulators not using a license server.
+        """
+        return None
+
+    def _is_license_denied(self, test) -> bool:
+        license_denied_regex = self._get_license_denied_regex()
+        if license_denied_regex is None:
+            return False
+        return any(
+            license_denied_regex.search(line) for line in test.get_output_no_format()
+        )
+
+    def _simulate_with_license(self, test, generic_call, module_call) -> None:
+        """
+        Simulate when the license features are available. A simulation
+        denied a license is retried with exponential back-off.
+        """
+        features = self._get_license_features(test)
+        max_retries = self.project.settings.get_license_retries()
+        backoff_time = LICENSE_BACKOFF_TIME
+
+        for attempt in range(max_retries + 1):
+            with self._get_simulation_slot(test), self.license_limiter.tokens(features):
+                self._simulate(test=test, generic_call=generic_call, module_call=module_call)
+                license_denied = self._is_license_denied(test)
+                if license_denied:
+                    discovered = self.license_limiter.set_denied(features)
+                    for feature, limit in discovered.items():
+                        self.logger.info(
+                            "License limit for {} set to {}.".format(feature, limit)
+                        )
+
+            if not license_denied or attempt == max_retries:
+                return
+
+            # Random part spreads out the retries of waiting tests.
+            wait_time = backoff_time * random.uniform(1.0, 1.5)
+            self.logger.warning(
+                "License denied for {}, retry {} of {} in {:.0f}s.".format(
+                    test.get_test_id_string(), attempt + 1, max_retries, wait_time
+                )
+            )
+            time.sleep(wait_time)
+            backoff_time = min(backoff_time * 2, LICENSE_BACKOFF_MAX_TIME)
+            test.set_num_sim_errors(0)
+            test.set_num_sim_warnings(0)
+
+    def _use_test_retry(self, test) -> bool:
+        """
+        Returns True if a failing test is to be run again, i.e. the test
+        has retries left and the retry budget of the run is not used up.
+        """
+        if test.get_num_retries() >= self.project.settings.get_test_retries():
+            return False
+        with self.retry_lock:
+            if self.retry_budget is not None:
+                if self.retry_budget <= 0:
+                    return False
+                self.retry_budget -= 1
+        test.set_num_retries(test.get_num_retries() + 1)
+        test.set_num_sim_errors(0)
+        test.set_num_sim_warnings(0)
+        return True
+
     def _prepare_test_folder(self, test):
         test_folder = test.get_test_path()
 
+        # Files from the previous run are left unchanged in the backup.
+        if self.test_run_backup is not None:
+            self.test_run_backup.detach(test_folder)
+
         self._create_test_folder(test_folder)
 
         tc_id = test.get_id_number()
         file_list = self.project.testcase_settings.get_copy_file_to_testcase_folder(
             tc_id
         )
+        if file_list:
+            self._stage_test_files(test_folder, tc_id, file_list)
 
-        try:
-            sim_path = self.project.settings.get_sim_path()
-            for filename in file_list:
-                source_path = os.path.join(sim_path, filename)
-                if os.path.exists(source_path):
-                    shutil.copy(source_path, test_folder)
-                else:
-                    self.logger.warning("File not found: {}".format(source_path))
-        except OSError as e:
-            self.logger.error("File system error: {}".format(e))
-        except Exception as e:
-            self.logger.error("An unexpected error occurred: {}".format(e))
+    def _stage_test_files(self, test_folder, tc_id, file_list) -> None:
+        """
+        Stages the files added with add_file_to_run_folder() in the
+        test folder, linked unless the test needs a writable copy.
+        """
+        with self.project.tracer.span("stage files", "stage") as span_args:
+            staged_bytes = 0
+            copied_bytes = 0
+            methods = {}
+            try:
+                sim_path = self.project.settings.get_sim_path()
+                for filename in file_list:
+                    source_path = os.path.join(sim_path, filename)
+                    if os.path.exists(source_path):
+                        method = self.file_stager.stage_file(
+                            source_path,
+                            os.path.join(test_folder, os.path.basename(source_path)),
+                            self.project.testcase_settings.get_is_writable_file(
+                                filename, tc_id
+                            ),
+                        )
+                        if method is not None:
+                            size = os.path.getsize(source_path)
+                            staged_bytes += size
+                            if method == STAGE_COPY:
+                                copied_bytes += size
+                        method = method or "unchanged"
+                        methods[method] = methods.get(method, 0) + 1
+                    else:
+                        self.logger.warning("File not found: {}".format(source_path))
+            except OSError as e:
+                self.logger.error("File system error: {}".format(e))
+            except Exception as e:
+                self.logger.error("An unexpected error occurred: {}".format(e))
+            span_args["files"] = len(file_list)
+            span_args["staged_bytes"] = staged_bytes
+            span_args["copied_bytes"] = copied_bytes
+            span_args["methods"] = methods
 
     @staticmethod
     def _create_test_folder(path) -> None:
@@ -788,6 +1080,10 @@ class SimRunner:
                 test_str_result = self.logger.green() + "PASS"
                 if not test_ok_no_minor_alerts:
                     test_str_result += self.logger.yellow() + " (with minor alerts)"
+                if test.get_num_retries() > 0:
+                    test_str_result += self.logger.yellow() + " (after {} retry(s))".format(
+                        test.get_num_retries()
+                    )
             else:
                 test_str_result = self.logger.red() + "FAIL"
             return test_str_result + self.logger.reset_color()
@@ -807,6 +1103,7 @@ class SimRunner:
         ):
             sim_end_time = round(time.time() * 1000)
             elapsed_time = sim_end_time - sim_start_time
+            test.set_sim_time(elapsed_time)
             sim_sec, sim_min, sim_hrs = convert_from_millisec(elapsed_time)
             return "{}{} ({}h:{}m:{}s){}.\n".format(
                 test.get_terminal_test_string(),
@@ -832,6 +1129,8 @@ class SimRunner:
 
             if test_ok is False:
                 test.set_status(TestStatus.FAIL)
+            elif test.get_num_retries() > 0:
+                test.set_status(TestStatus.PASS_AFTER_RETRY)
             elif not test_ok_no_minor_alerts:
                 test.set_status(TestStatus.PASS_WITH_MINOR)                
             elif test_ok:
@@ -133,28 +133,76 @@ proc h {} {
     def _simulate(self, test) -> str:
         pass
 
-    def _recompile_changed(self) -> str:
-        cmd = "{{*}}{} -c \"import sys; sys.path.append('{}'); ".format(
+    def _get_helper_command(self) -> str:
+        cmd = "{{*}}{} -u -c \"import sys; sys.path.append('{}'); ".format(
             self.python_exec,
             self.project._get_install_path()
         )
-        cmd += 'from hdlregression import HDLRegression; hu = HDLRegression(init_from_gui=True); hu._start_gui()" --compileChanges'
+        cmd += 'from hdlregression import HDLRegression; hu = HDLRegression(init_from_gui=True); hu._serve_gui()"'
+        return cmd
+
+    def _get_helper_proc(self) -> str:
+        """
+        Tcl procs for the HDLRegression helper process, which is started
+        once for the GUI session and keeps the project in memory, i.e.
+        recompiling only pays for the compilation itself.
+        """
         txt = """
-proc r {} {
-    set cmd_show {%s}
+quietly set hdlregression_helper ""
 
-    puts "Re-compiling changes using command ${cmd_show}"
+proc _start_helper {} {
+    global hdlregression_helper
+    if {$hdlregression_helper == ""} {
+        set hdlregression_helper [open |[list %s] r+]
+        fconfigure $hdlregression_helper -buffering line
+    }
+    return $hdlregression_helper
+}
+
+proc _stop_helper {} {
+    global hdlregression_helper
+    catch {close $hdlregression_helper}
+    set hdlregression_helper ""
+}
 
-    set chan [open |[list %s] r]
+proc _helper_compile {request} {
+    set chan [_start_helper]
+    if {[catch {puts $chan $request; flush $chan}]} {
+        # Helper process has exited, start a new one.
+        _stop_helper
+        set chan [_start_helper]
+        puts $chan $request
+        flush $chan
+    }
 
     set hdlregression_success false
     while {[gets $chan line] >= 0} {
+        if {[regexp -nocase {^hdlregression:done} $line]} {
+            return $hdlregression_success
+        }
         if {[return_checker $line] == true} {
             set hdlregression_success true
         }
     }
+    _stop_helper
+    return $hdlregression_success
+}
+
+# Load project in helper process while the simulation is loaded
+_start_helper
+""" % (
+            self._get_helper_command()
+        )
+        return txt
+
+    def _recompile_changed(self) -> str:
+        txt = """
+proc r {} {
+    set cmd_show {%s}
+
+    puts "Re-compiling changes using command ${cmd_show}"
 
-    if {$hdlregression_success == true} {
+    if {[_helper_compile changes] == true} {
         puts "-----------------------------------"
         puts "     Re-compilation success!"
         puts "-----------------------------------"
@@ -165,33 +213,18 @@ proc r {} {
     }
 }
 """ % (
-            cmd,
-            cmd,
+            self._get_helper_command()
         )
         return txt
 
     def _recompile_all(self) -> str:
-        cmd = "{{*}}{} -c \"import sys; sys.path.append('{}'); ".format(
-            self.python_exec,
-            self.project._get_install_path()
-        )
-        cmd += 'from hdlregression import HDLRegression; hu = HDLRegression(init_from_gui=True); hu._start_gui()" --compileAll'
         txt = """
 proc ra {} {
     set cmd_show {%s}
 
     puts "Re-compiling all using command ${cmd_show}"
 
-    set chan [open |[list %s] r]
-
-    set hdlregression_success false
-    while {[gets $chan line] >= 0} {
-        if {[return_checker $line] == true} {
-            set hdlregression_success true
-        }
-    }
-
-    if {$hdlregression_success == true} {
+    if {[_helper_compile all] == true} {
         puts "-----------------------------------"
         puts "     Re-compilation success!"
         puts "-----------------------------------"
@@ -203,33 +236,18 @@ proc ra {} {
     }
 }
 """ % (
-            cmd,
-            cmd,
+            self._get_helper_command()
         )
         return txt
 
     def _recompile_all_only(self) -> str:
-        cmd = "{{*}}{} -c \"import sys; sys.path.append('{}'); ".format(
-            self.python_exec,
-            self.project._get_install_path()
-        )
-        cmd += 'from hdlregression import HDLRegression; hu = HDLRegression(init_from_gui=True); hu._start_gui()" --compileAll'
         txt = """
 proc ro {} {
     set cmd_show {%s}
 
     puts "Re-compiling all using command ${cmd_show}"
 
-    set chan [open |[list %s] r]
-
-    set hdlregression_success false
-    while {[gets $chan line] >= 0} {
-        if {[return_checker $line] == true} {
-            set hdlregression_success true
-        }
-    }
-
-    if {$hdlregression_success == true} {
+    if {[_helper_compile all] == true} {
         puts "-----------------------------------"
         puts "     Re-compilation success!"
         puts "-----------------------------------"
@@ -240,8 +258,7 @@ proc ro {} {
     }
 }
 """ % (
-            cmd,
-            cmd,
+            self._get_helper_command()
         )
         return txt
 
@@ -275,6 +292,8 @@ proc q {} {
         txt = self._get_menu()
         txt += self._cd_sim()
         txt += self._simulate(test=test)
+        txt += self._get_quietly()
+        txt += self._get_helper_proc()
         txt += self._recompile_all()
         txt += self._recompile_all_only()
         txt += self._recompile_changed()
@@ -283,7 +302,6 @@ proc q {} {
         txt += self._restart_and_run()
         txt += self._quit()
         txt += self._quit_complete()
-        txt += self._get_quietly()
         return txt
 
     def _init(self, test=None) -> str:
@@ -19,6 +19,7 @@ from ..construct.container import Container
 from ..report.logger import Logger
 from ..construct.hdlfile import VHDLFile, VerilogFile
 from .hdltests import VHDLTest, VerilogTest, TestStatus
+from ..hdlregression_pkg import split_shards
 
 
 class TestBuilder:
@@ -101,6 +102,10 @@ class TestBuilder:
         else:
             self._build_modified()
 
+        # Run this node's share of the selected tests
+        if self.project.settings.get_shard() and not self.project.settings.get_gui_mode():
+            self._build_shard()
+
     def get_list_of_tests_to_run(self) -> list:
         """
         Returns list of all testbenches and testcases
@@ -570,6 +575,44 @@ class TestBuilder:
 
         self._copy_filtered_tests_to_tests_to_run_container(filtered_tests)
 
+    def _build_shard(self) -> None:
+        """
+        Keep the tests selected for this shard. Tests are split by their
+        simulation time in the shard durations file, i.e. the shards take
+        about the same time, see split_shards(). Tests without a time are
+        counted with the median time of the other tests. The split only
+        depends on the tests and the durations file, i.e. it is the same
+        on all nodes sharing the file.
+        """
+        (shard_index, num_shards) = self.project.settings.get_shard()
+        shard_durations = self.project._get_shard_durations()
+
+        known_durations = sorted(shard_durations.values())
+        default_duration = known_durations[len(known_durations) // 2] if known_durations else 1
+        test_durations = {
+            test.get_test_key(): shard_durations.get(test.get_test_key()) or default_duration
+            for test in self.get_list_of_tests_to_run()
+        }
+        test_shards = split_shards(test_durations, num_shards)
+        shard_tests = [
+            test for test in self.get_list_of_tests_to_run()
+            if test_shards[test.get_test_key()] == shard_index
+        ]
+
+        self.logger.info(
+            "Shard {}/{}: {} of {} selected test(s).".format(
+                shard_index,
+                num_shards,
+                len(shard_tests),
+                self._get_num_tests_to_run(),
+            )
+        )
+        # Keep run order of the selected tests.
+        shard_test_ids = set(id(test) for test in shard_tests)
+        self._copy_filtered_tests_to_tests_to_run_container(
+            [test for test in self.get_list_of_tests_to_run() if id(test) in shard_test_ids]
+        )
+
     def _get_test_object(self, tb=None, arch=None, tc=None, gc=None):
         """
         Will return test object based on HDL file type.
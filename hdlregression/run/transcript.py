@@ -0,0 +1,116 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+import os
+import gzip
+import shutil
+from collections import deque
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+
+# Compression to file extension of compressed transcripts.
+TRANSCRIPT_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Fast compression, simulator output is written while the simulation runs.
+GZIP_COMPRESS_LEVEL = 1
+
+
+def get_transcript_compressions() -> list:
+    """
+    Transcript compressions available, zstd requires Python 3.14
+    or the zstandard package.
+    """
+    return [c for c in TRANSCRIPT_EXTENSIONS if c != "zstd" or zstd is not None]
+
+
+def get_transcript_filename(filename, compression=None) -> str:
+    return filename + TRANSCRIPT_EXTENSIONS.get(compression, "")
+
+
+def _get_compression(filename):
+    for (compression, extension) in TRANSCRIPT_EXTENSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+def open_transcript(filename, mode="r"):
+    """
+    Opens a transcript in text mode, compressed as given by the
+    file extension, see get_transcript_filename().
+    """
+    compression = _get_compression(filename)
+    if compression == "gzip":
+        return gzip.open(filename, mode + "t", compresslevel=GZIP_COMPRESS_LEVEL)
+    elif compression == "zstd":
+        if zstd is None:
+            raise OSError("zstd compression not available for %s." % (filename))
+        return zstd.open(filename, mode + "t")
+    return open(filename, mode)
+
+
+def open_transcript_writer(filename, compression=None):
+    """
+    Opens the transcript filename for writing simulator output.
+    Uncompressed transcripts are appended to. Compressed transcripts
+    are written from the start and replace any other transcript with
+    the same name, i.e. the transcript of an earlier run of the test.
+    """
+    if compression is None:
+        return open(filename, "a")
+    transcript_file = get_transcript_filename(filename, compression)
+    for other_file in [filename] + [get_transcript_filename(filename, c) for c in TRANSCRIPT_EXTENSIONS]:
+        if other_file != transcript_file and os.path.isfile(other_file):
+            os.remove(other_file)
+    return open_transcript(transcript_file, "w")
+
+
+def compress_transcript(filename, compression) -> str:
+    """
+    Compresses a transcript written by the simulator and removes
+    the uncompressed file. Returns the compressed transcript.
+    """
+    transcript_file = get_transcript_filename(filename, compression)
+    with open(filename, "rb") as src_file:
+        if compression == "gzip":
+            dst_file = gzip.open(transcript_file, "wb", compresslevel=GZIP_COMPRESS_LEVEL)
+        else:
+            dst_file = zstd.open(transcript_file, "wb")
+        with dst_file:
+            shutil.copyfileobj(src_file, dst_file)
+    os.remove(filename)
+    return transcript_file
+
+
+def read_transcript_lines(filename, num_lines=None) -> list:
+    """
+    Returns the output lines of a transcript, read one line at a time,
+    without line endings and empty lines like the output kept by the
+    test. Only the last num_lines are kept if given.
+    """
+    lines = deque(maxlen=num_lines)
+    with open_transcript(filename, "r") as transcript_file:
+        for line in transcript_file:
+            line = line.strip()
+            if line:
+                lines.append(line)
+    return list(lines)
@@ -81,7 +81,7 @@ class VivadoRunner(SimRunner):
 
             if hdlfile.get_need_compile() or force_compile:
                 self.logger.debug('Recompiling file: %s' % (hdlfile.get_name()))
-                success = self._run_cmd(command=self._get_compile_call(hdlfile), path=libraries_path)
+                success = self._compile_file(hdlfile, command=self._get_compile_call(hdlfile), path=libraries_path)
                 if not success:
                     compile_ok = False
                 else:
@@ -45,6 +45,12 @@ RE_MODELSIM_ERROR = re.compile(ID_MODELSIM_ERROR, flags=re.IGNORECASE)
 ID_MODELSIM_WARNING = r"[\r\n\s]?\*\*\s*Warning[\s+]?[:]?"
 RE_MODELSIM_WARNING = re.compile(ID_MODELSIM_WARNING, flags=re.IGNORECASE)
 
+# Simulator launch denied by the license server (Questa/Modelsim and Riviera/Active-HDL)
+ID_LICENSE_DENIED = (r"(unable to check ?out (a |the )?license|failure to obtain .*license|"
+                     r"license checkout (has been disallowed|failed)|no licenses? (are )?available|"
+                     r"licensed number of users already reached|cannot (obtain|check ?out) (a |the )?license)")
+RE_LICENSE_DENIED = re.compile(ID_LICENSE_DENIED, flags=re.IGNORECASE)
+
 ID_NVC_ERROR = r"(error: (.*):(\d+):(\d+):\s(.*))"
 RE_NVC_ERROR = re.compile(ID_NVC_ERROR, flags=re.IGNORECASE)
 ID_NVC_WARNING = r"(warning: (.*):(\d+):(\d+):\s(.*))"
@@ -17,15 +17,30 @@ from abc import abstractmethod
 
 from ..construct.container import Container
 from ..report.logger import Logger
+from ..projectdb import Record
 
 
-class HDLScanner:
+class HDLScanner(Record):
     """
     Base scanner class
     """
 
+    __slots__ = (
+        "logger",
+        "testcase_string",
+        "container",
+        "library",
+        "filename",
+        "hdlfile",
+        "library_list",
+        "int_use_list",
+        "testcase_list",
+        "assertion_list",
+        "assertion_count",
+    )
+
     def __init__(self, project, library, filename, hdlfile):
-        self.logger = Logger(name=__name__, project=project)
+        self.logger = Logger.get_logger(name=__name__, project=project)
         self.testcase_string = project.settings.get_testcase_identifier_name()
         self.container = Container()
         self.library = library
@@ -47,6 +62,16 @@ class HDLScanner:
     def scan(self, file_content):
         file_content = self._clean_code(file_content)
         self.tokenize(file_content)
+        self._release_scan_state()
+
+    def _release_scan_state(self):
+        """
+        Empty lists only used while scanning, the scan result
+        is kept in the module objects.
+        """
+        self.library_list = []
+        self.int_use_list = []
+        self.testcase_list = []
 
     def set_filename(self, filename):
         self.filename = filename
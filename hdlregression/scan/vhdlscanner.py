@@ -30,12 +30,17 @@ class VHDLScanner(HDLScanner):
 
     '''
 
+    __slots__ = ("library_name", "project")
+
     def __init__(self, project, library, filename, hdlfile):
         super().__init__(project, library, filename, hdlfile)
-        self.logger = Logger(name=__name__, project=project)
+        self.logger = Logger.get_logger(
+            name=__name__,
+            project=project,
+            level=project.settings.get_logger_level(),
+        )
         self.library_name = self.get_library().get_name().lower()
         self.project = project
-        self.logger.set_level(self.project.settings.get_logger_level())
 
     def get_entity_module(self, name) -> 'EntityModule':
         for module in self.container.get():
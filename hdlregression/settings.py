@@ -54,10 +54,29 @@ class HDLRegressionSettings:
         self.sim_time = None
         self.threading = False
         self.num_threads = 0
+        self.adaptive_threading = False
         self.no_sim = False
         self.no_compile = False
         self.show_err_warn_output = False
         self.use_log_color = True
+        self.daemon_mode = False
+        self.watch_mode = False
+        self.shard = None
+        self.shard_durations_file = None
+        self.workers = None
+        self.trace_file = None
+        self.result_history = True
+        self.result_history_runs = None
+        self.max_test_backups = None
+        self.max_test_backup_size = None
+        self.transcript_compression = None
+        self.license_limits = {}
+        self.cli_license_limit = None
+        self.license_retries = 5
+        self.test_retries = 0
+        self.cli_test_retries = None
+        self.retry_budget = None
+        self.cli_retry_budget = None
 
         self.python_exec = None
 
@@ -225,6 +244,15 @@ class HDLRegressionSettings:
     def get_num_threads(self) -> int:
         return self.num_threads
 
+    def set_adaptive_threading(self, enable) -> None:
+        """
+        Admit simulations by available memory and CPU, i.e. "-t auto".
+        """
+        self.adaptive_threading = enable
+
+    def get_adaptive_threading(self) -> bool:
+        return self.adaptive_threading
+
     # ----------------------------------
     # Running
     # ----------------------------------
@@ -353,6 +381,165 @@ class HDLRegressionSettings:
     def get_show_err_warn_output(self) -> bool:
         return self.show_err_warn_output
 
+    def set_daemon_mode(self, enable):
+        self.daemon_mode = enable
+
+    def get_daemon_mode(self) -> bool:
+        return self.daemon_mode
+
+    def set_watch_mode(self, enable):
+        self.watch_mode = enable
+
+    def get_watch_mode(self) -> bool:
+        return self.watch_mode
+
+    def set_shard(self, shard):
+        """
+        Shard of the selected tests to run, i.e. (shard number, number of shards).
+        """
+        self.shard = shard
+
+    def get_shard(self) -> tuple:
+        return self.shard
+
+    def set_shard_durations_file(self, filename):
+        """
+        Result file with the simulation times used for balancing shards.
+        """
+        self.shard_durations_file = filename
+
+    def get_shard_durations_file(self) -> str:
+        return self.shard_durations_file
+
+    def set_workers(self, address):
+        """
+        Address to accept remote workers on, i.e. (host, port).
+        """
+        self.workers = address
+
+    def get_workers(self) -> tuple:
+        return self.workers
+
+    def set_trace_file(self, filename):
+        """
+        Chrome trace file to write run phase spans to.
+        """
+        self.trace_file = filename
+
+    def get_trace_file(self) -> str:
+        return self.trace_file
+
+    def set_result_history(self, enable):
+        """
+        Record the results of each run in the result history.
+        """
+        self.result_history = enable
+
+    def get_result_history(self) -> bool:
+        return self.result_history
+
+    def set_result_history_runs(self, num_runs):
+        """
+        Number of runs kept in the result history, None to keep all.
+        """
+        self.result_history_runs = num_runs
+
+    def get_result_history_runs(self) -> int:
+        return self.result_history_runs
+
+    def set_max_test_backups(self, num_backups):
+        """
+        Number of test run backups kept, None to keep all.
+        """
+        self.max_test_backups = num_backups
+
+    def get_max_test_backups(self) -> int:
+        return self.max_test_backups
+
+    def set_max_test_backup_size(self, size):
+        """
+        Max size (MB) of all test run backups, None for no limit.
+        """
+        self.max_test_backup_size = size
+
+    def get_max_test_backup_size(self) -> int:
+        return self.max_test_backup_size
+
+    def set_transcript_compression(self, compression):
+        """
+        Compression of test transcripts, "gzip", "zstd" or None.
+        """
+        self.transcript_compression = compression
+
+    def get_transcript_compression(self) -> str:
+        return self.transcript_compression
+
+    def set_license_limit(self, feature, limit):
+        """
+        Max number of simulations using a license feature, or "auto".
+        """
+        self.license_limits[feature] = limit
+
+    def set_cli_license_limit(self, limit):
+        self.cli_license_limit = limit
+
+    def get_cli_license_limit(self):
+        return self.cli_license_limit
+
+    def get_license_limits(self) -> dict:
+        """
+        License limits by feature, terminal argument overrides
+        the simulator limit.
+        """
+        limits = dict(self.license_limits)
+        if self.cli_license_limit is not None:
+            limits["simulator"] = self.cli_license_limit
+        return limits
+
+    def set_license_retries(self, retries):
+        self.license_retries = retries
+
+    def get_license_retries(self) -> int:
+        return self.license_retries
+
+    def set_test_retries(self, retries):
+        """
+        Max number of times a failing test is run again in the same run.
+        """
+        self.test_retries = retries
+
+    def set_cli_test_retries(self, retries):
+        self.cli_test_retries = retries
+
+    def get_cli_test_retries(self):
+        return self.cli_test_retries
+
+    def get_test_retries(self) -> int:
+        """
+        Retries of a failing test, terminal argument overrides
+        the script setting.
+        """
+        if self.cli_test_retries is not None:
+            return self.cli_test_retries
+        return self.test_retries
+
+    def set_retry_budget(self, budget):
+        """
+        Max number of retries of all tests in a run, None for no limit.
+        """
+        self.retry_budget = budget
+
+    def set_cli_retry_budget(self, budget):
+        self.cli_retry_budget = budget
+
+    def get_cli_retry_budget(self):
+        return self.cli_retry_budget
+
+    def get_retry_budget(self) -> int:
+        if self.cli_retry_budget is not None:
+            return self.cli_retry_budget
+        return self.retry_budget
+
     def set_wlf_dunmp_enable(self, enable):
         self.wlf_dunmp_enable = enable
 
@@ -590,6 +777,9 @@ class SimulatorDetector:
     ID_NVC_SIMULATOR = ["nvc", "NVC"]
     ID_VIVADO_SIMULATOR = ["vivado", "VIVADO"]
 
+    # Detected simulators are shared by all detector objects,
+    # i.e. PATH -> simulator info dict.
+    _simulators_info_cache = {}
 
     def __init__(self):
         self.simulator_info = self.get_simulators_info()
@@ -619,6 +809,16 @@ class SimulatorDetector:
             return False
 
     def get_simulators_info(self) -> dict:
+        """
+        Returns installed simulators, the simulators are only
+        detected once per PATH setting.
+        """
+        path_env = os.environ.get("PATH", "")
+        if path_env not in SimulatorDetector._simulators_info_cache:
+            SimulatorDetector._simulators_info_cache[path_env] = self._detect_simulators()
+        return dict(SimulatorDetector._simulators_info_cache[path_env])
+
+    def _detect_simulators(self) -> dict:
         platform_info = platform.system()
         modelsim_installed = self.is_simulator_installed(
             simulator_call="vsim", version_call="-version"
@@ -708,17 +908,26 @@ class SimulatorDetector:
 class TestcaseSettings:
     def __init__(self):
         self.copy_file = {}
+        self.writable_file = {}
 
-    def copy_file_to_testcase_folder(self, filename: str, testcase: str) -> None:
+    def copy_file_to_testcase_folder(self, filename: str, testcase: str, writable: bool = False) -> None:
         testcase = testcase.lower()
         if testcase in self.copy_file:
             self.copy_file[testcase].append(filename)
         else:
             self.copy_file[testcase] = [filename]
+        if writable:
+            self.writable_file.setdefault(testcase, set()).add(filename)
 
     def get_copy_file_to_testcase_folder(self, testcase: str) -> list:
         return self.copy_file.get(str(testcase), [])
 
+    def get_is_writable_file(self, filename: str, testcase: str) -> bool:
+        """
+        True if the test needs a private writable copy of the file.
+        """
+        return filename in self.writable_file.get(str(testcase), set())
+
 
 class SimulatorSettings(ABC):
 
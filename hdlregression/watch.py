@@ -0,0 +1,121 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+
+"""
+Watch mode.
+
+A regression script started with "--watch" polls the registered HDL
+files for changes and reruns the regression, i.e. rescans the changed
+files, recompiles them and their dependents and runs the affected tests,
+with the project kept in memory between runs.
+"""
+
+import os
+import time
+from signal import signal, getsignal, default_int_handler, SIGINT
+
+
+WATCH_POLL_INTERVAL = 0.5
+WATCH_DEBOUNCE_TIME = 1.0
+
+
+class FileWatcher:
+    """
+    Polls the change date of HDL files in the project libraries.
+    """
+
+    def __init__(
+        self,
+        project,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        debounce_time: float = WATCH_DEBOUNCE_TIME,
+    ):
+        self.project = project
+        self.poll_interval = poll_interval
+        self.debounce_time = debounce_time
+        self.file_change_dates = {}
+
+    def get_watched_files(self) -> list:
+        watched_files = []
+        for library in self.project.library_container.get():
+            if library.get_is_precompiled():
+                continue
+            for hdlfile in library.get_hdlfile_list():
+                watched_files.append(hdlfile.get_filename_with_path())
+        return watched_files
+
+    def _get_file_change_dates(self) -> dict:
+        file_change_dates = {}
+        for filename in self.get_watched_files():
+            try:
+                file_change_dates[filename] = os.path.getmtime(filename)
+            except OSError:
+                file_change_dates[filename] = None
+        return file_change_dates
+
+    def update(self) -> None:
+        """
+        Store the current file change dates, any change after
+        this call is reported by wait_for_changes().
+        """
+        self.file_change_dates = self._get_file_change_dates()
+
+    def get_changed_files(self) -> list:
+        """
+        Returns files changed since last update(). Files new to the
+        project are registered with their current change date.
+        """
+        changed_files = []
+        for filename, change_date in self._get_file_change_dates().items():
+            if filename not in self.file_change_dates:
+                self.file_change_dates[filename] = change_date
+            elif self.file_change_dates[filename] != change_date:
+                changed_files.append(filename)
+        return changed_files
+
+    def wait_for_changes(self) -> list:
+        """
+        Wait until files are changed and no further changes have been
+        seen for the debounce time, i.e. a burst of saves gives one run.
+
+        :rtype: list
+        :return: Changed files, or None when stopped with Ctrl+C.
+        """
+        # Stopping while waiting leaves the run structure intact,
+        # thus use a regular KeyboardInterrupt instead of the
+        # HDLRegression exit handler.
+        exit_handler = getsignal(SIGINT)
+        signal(SIGINT, default_int_handler)
+        try:
+            changed_files = []
+            while not changed_files:
+                time.sleep(self.poll_interval)
+                changed_files = self.get_changed_files()
+
+            # Wait for the burst of saves to end.
+            file_change_dates = self._get_file_change_dates()
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < self.debounce_time:
+                time.sleep(self.poll_interval)
+                current_change_dates = self._get_file_change_dates()
+                if current_change_dates != file_change_dates:
+                    file_change_dates = current_change_dates
+                    quiet_since = time.monotonic()
+            return self.get_changed_files()
+        except KeyboardInterrupt:
+            return None
+        finally:
+            signal(SIGINT, exit_handler)
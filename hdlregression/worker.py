@@ -0,0 +1,568 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Remote simulation workers.
+
+A regression script started with "--workers [HOST:]PORT" accepts worker
+agents on the given address and runs the simulations on them. Worker agents
+are started on hosts sharing the project filesystem with:
+
+  hdlregression-worker [-j <jobs>] [--persistent] [HOST:]PORT
+
+Each simulation is sent as a test descriptor with the run.do content,
+command, working directory and environment. Output lines, exit code and
+resource usage are streamed back and checked by the coordinator as for local simulations.
+
+Workers run any command sent by the coordinator. The coordinator and the
+workers prove to each other that they know the token in the
+HDLREGRESSION_WORKER_TOKEN environment variable, with a HMAC of random
+challenges of both sides, before any job is sent. The token may only be
+left out when the coordinator is on a loopback address.
+"""
+
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from queue import Queue
+
+from .daemon import _send_message, _read_messages
+from .hdlregression_pkg import parse_address
+from .report.trace import WORKERS_PID
+from .run.resource_monitor import reap_process
+
+
+RETRY_INTERVAL = 1.0
+
+# Seconds to complete the authentication when connected.
+AUTH_TIMEOUT = 10.0
+
+WORKER_TOKEN_ENV = "HDLREGRESSION_WORKER_TOKEN"
+
+
+class WorkerError(Exception):
+    pass
+
+
+def get_worker_token():
+    return os.environ.get(WORKER_TOKEN_ENV) or None
+
+
+def _is_loopback_host(host) -> bool:
+    try:
+        addresses = socket.getaddrinfo(host, None)
+    except OSError:
+        return False
+    return all(
+        ipaddress.ip_address(address[4][0].split("%")[0]).is_loopback for address in addresses
+    )
+
+
+def _check_token(token, host) -> None:
+    if not token and not _is_loopback_host(host):
+        raise WorkerError(
+            "Workers on %s require a token, set %s on the coordinator and the workers."
+            % (host, WORKER_TOKEN_ENV)
+        )
+
+
+def _get_auth(token, role, worker_challenge, coordinator_challenge) -> str:
+    """
+    Proof of the token by the coordinator or a worker, for the challenges
+    of both sides, i.e. it can not be replayed or reflected.
+    """
+    message = "%s:%s:%s" % (role, worker_challenge, coordinator_challenge)
+    return hmac.new((token or "").encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _is_valid_auth(auth, token, role, worker_challenge, coordinator_challenge) -> bool:
+    expected = _get_auth(token, role, worker_challenge, coordinator_challenge)
+    return isinstance(auth, str) and hmac.compare_digest(auth, expected)
+
+
+class RemoteWorker:
+    """
+    A worker agent connected to the coordinator.
+    """
+
+    def __init__(self, connection, name, capacity):
+        self.connection = connection
+        self.name = name
+        self.capacity = capacity
+        self.num_running = 0
+        self.jobs = {}
+        self.slots = {}  # job id -> slot number
+        self.connected = True
+        self.lock = threading.Lock()
+
+    def get_free_slots(self) -> int:
+        if not self.connected:
+            return 0
+        return self.capacity - self.num_running
+
+    def get_free_slot_number(self) -> int:
+        return min(set(range(self.capacity)) - set(self.slots.values()))
+
+    def send(self, message) -> None:
+        with self.lock:
+            _send_message(self.connection, message)
+
+
+class WorkerPool:
+    """
+    Accepts worker agents and schedules jobs on the worker
+    with the most free slots.
+    """
+
+    def __init__(self, project, address, token=None):
+        self.project = project
+        self.address = address
+        self.token = token or get_worker_token()
+        self.workers = []
+        self.condition = threading.Condition()
+        self.job_id = 0
+        self.waiting_for_workers = False
+        self.server = None
+
+    def start(self) -> None:
+        _check_token(self.token, self.address[0])
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(self.address)
+        self.server.listen(16)
+
+        thread = threading.Thread(target=self._accept_workers)
+        thread.daemon = True
+        thread.start()
+        self.project.logger.info(
+            "Accepting hdlregression-worker agents on %s:%d." % self.get_address()
+        )
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        with self.condition:
+            workers = list(self.workers)
+        for worker in workers:
+            try:
+                worker.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def get_address(self) -> tuple:
+        """
+        Address workers connect to, with the port selected
+        by the OS when started on port 0.
+        """
+        if self.server is not None:
+            return self.server.getsockname()[:2]
+        return self.address
+
+    def get_requested_address(self) -> tuple:
+        return self.address
+
+    def get_workers(self) -> list:
+        with self.condition:
+            return list(self.workers)
+
+    def get_capacity(self) -> int:
+        with self.condition:
+            return sum(worker.capacity for worker in self.workers)
+
+    def wait_for_workers(self) -> None:
+        """
+        Wait until at least one worker is connected.
+        """
+        with self.condition:
+            while not self.workers:
+                self._log_waiting_for_workers()
+                self.condition.wait()
+
+    def _log_waiting_for_workers(self) -> None:
+        if not self.waiting_for_workers:
+            self.waiting_for_workers = True
+            self.project.logger.info(
+                "Waiting for a worker to connect on %s:%d." % self.get_address()
+            )
+
+    def _accept_workers(self) -> None:
+        server = self.server
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                # Server closed.
+                return
+            thread = threading.Thread(target=self._serve_worker, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def _authenticate_worker(self, connection, messages) -> dict:
+        """
+        Challenge a connected worker agent to prove the token.
+        Return the hello of the worker, None if not authenticated.
+        """
+        connection.settimeout(AUTH_TIMEOUT)
+        hello = next(messages, None)
+        if not hello or not isinstance(hello.get("hello"), dict):
+            return None
+        worker_challenge = str(hello["hello"].get("challenge", ""))
+        challenge = os.urandom(16).hex()
+        _send_message(connection, {
+            "challenge": challenge,
+            "auth": _get_auth(self.token, "coordinator", worker_challenge, challenge),
+        })
+        reply = next(messages, None) or {}
+        if not _is_valid_auth(reply.get("auth"), self.token, "worker", worker_challenge, challenge):
+            self.project.logger.warning(
+                "Worker %s rejected, invalid %s."
+                % (hello["hello"].get("name", "worker"), WORKER_TOKEN_ENV)
+            )
+            return None
+        connection.settimeout(None)
+        return hello["hello"]
+
+    def _serve_worker(self, connection) -> None:
+        """
+        Register a worker agent and route its messages to the
+        running jobs.
+        """
+        worker = None
+        messages = _read_messages(connection)
+        try:
+            hello = self._authenticate_worker(connection, messages)
+            if hello is None:
+                return
+            worker = RemoteWorker(
+                connection=connection,
+                name=str(hello.get("name", "worker")),
+                capacity=max(1, int(hello.get("capacity", 1))),
+            )
+            self._add_worker(worker)
+            for message in messages:
+                job_queue = worker.jobs.get(message.get("id"))
+                if job_queue is not None:
+                    job_queue.put(message)
+        except (OSError, ValueError, TypeError):
+            pass
+        finally:
+            if worker is not None:
+                self._remove_worker(worker)
+            connection.close()
+
+    def _add_worker(self, worker) -> None:
+        with self.condition:
+            self.workers.append(worker)
+            self.waiting_for_workers = False
+            self.condition.notify_all()
+        self.project.logger.info(
+            "Worker %s connected, capacity %d." % (worker.name, worker.capacity)
+        )
+
+    def _remove_worker(self, worker) -> None:
+        with self.condition:
+            worker.connected = False
+            if worker in self.workers:
+                self.workers.remove(worker)
+            jobs = list(worker.jobs.values())
+            self.condition.notify_all()
+        # Fail the tests running on the worker.
+        for job_queue in jobs:
+            job_queue.put(
+                {"output": "Error: Lost connection to worker %s\n" % (worker.name), "stderr": True}
+            )
+            job_queue.put({"exit_code": None})
+        if self.server is not None:
+            self.project.logger.warning("Worker %s disconnected." % (worker.name))
+
+    def _acquire(self, job_id, job_queue) -> RemoteWorker:
+        """
+        Wait for a free slot and reserve it for a job.
+        """
+        with self.condition:
+            while True:
+                worker = max(self.workers, key=lambda w: w.get_free_slots(), default=None)
+                if worker is not None and worker.get_free_slots() > 0:
+                    worker.num_running += 1
+                    worker.jobs[job_id] = job_queue
+                    worker.slots[job_id] = worker.get_free_slot_number()
+                    return worker
+                if not self.workers:
+                    self._log_waiting_for_workers()
+                self.condition.wait()
+
+    def _release(self, worker, job_id) -> None:
+        with self.condition:
+            worker.num_running -= 1
+            worker.jobs.pop(job_id, None)
+            worker.slots.pop(job_id, None)
+            self.condition.notify_all()
+
+    def run_job(self, job):
+        """
+        Run a job on a worker and yield the messages received
+        for it, ending with the exit code message.
+        """
+        job_queue = Queue()
+        with self.condition:
+            self.job_id += 1
+            job_id = self.job_id
+
+        worker = self._acquire(job_id, job_queue)
+        lane = "%s slot %d" % (worker.name, worker.slots[job_id] + 1)
+        try:
+            self.project.logger.debug("Running job %d on worker %s." % (job_id, worker.name))
+            with self.project.tracer.span(
+                job.get("name") or "job %d" % (job_id), "worker", lane=lane, pid=WORKERS_PID
+            ) as span_args:
+                try:
+                    worker.send({"run": dict(job, id=job_id)})
+                except OSError:
+                    yield {"output": "Error: Unable to send job to worker %s\n" % (worker.name), "stderr": True}
+                    yield {"exit_code": None}
+                    return
+                while True:
+                    message = job_queue.get()
+                    yield message
+                    if "exit_code" in message:
+                        span_args["exit_code"] = message["exit_code"]
+                        return
+        finally:
+            self._release(worker, job_id)
+
+
+class WorkerAgent:
+    """
+    Connects to a coordinator and runs the received jobs.
+    """
+
+    ON_POSIX = "posix" in sys.builtin_module_names
+
+    def __init__(self, address, capacity=None, name=None, token=None):
+        self.address = address
+        self.capacity = capacity or os.cpu_count() or 1
+        self.name = name or "%s:%d" % (socket.gethostname(), os.getpid())
+        self.token = token or get_worker_token()
+        self.connection = None
+        self.messages = None
+        self.processes = {}
+        self.lock = threading.Lock()
+
+    def connect(self, timeout=None) -> bool:
+        """
+        Connect to the coordinator, retrying until timeout
+        seconds have passed or forever if timeout is None.
+        Raises WorkerError if the coordinator does not prove the token.
+        """
+        _check_token(self.token, self.address[0])
+        start_time = time.time()
+        while True:
+            try:
+                self.connection = socket.create_connection(self.address)
+                self.messages = _read_messages(self.connection)
+                self._authenticate_coordinator()
+                return True
+            except OSError:
+                if self.connection is not None:
+                    self.connection.close()
+                if timeout is not None and time.time() - start_time >= timeout:
+                    return False
+                time.sleep(RETRY_INTERVAL)
+
+    def _authenticate_coordinator(self) -> None:
+        """
+        Challenge the coordinator to prove the token before any job
+        is accepted, and prove the token in return.
+        """
+        challenge = os.urandom(16).hex()
+        self.connection.settimeout(AUTH_TIMEOUT)
+        self._send({"hello": {"name": self.name, "capacity": self.capacity, "challenge": challenge}})
+        try:
+            reply = next(self.messages, None) or {}
+        except ValueError:
+            reply = {}
+        coordinator_challenge = str(reply.get("challenge", ""))
+        if not _is_valid_auth(reply.get("auth"), self.token, "coordinator", challenge, coordinator_challenge):
+            self.connection.close()
+            raise WorkerError(
+                "Coordinator on %s:%d rejected, invalid %s." % (self.address + (WORKER_TOKEN_ENV,))
+            )
+        self._send({"auth": _get_auth(self.token, "worker", challenge, coordinator_challenge)})
+        self.connection.settimeout(None)
+
+    def serve(self) -> None:
+        """
+        Run jobs until the coordinator disconnects.
+        """
+        try:
+            for message in self.messages:
+                if "run" in message:
+                    thread = threading.Thread(target=self._run_job, args=(message["run"],))
+                    thread.daemon = True
+                    thread.start()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._terminate_jobs()
+            self.connection.close()
+
+    def _send(self, message) -> None:
+        with self.lock:
+            _send_message(self.connection, message)
+
+    def _send_job_message(self, job_id, message) -> None:
+        message["id"] = job_id
+        try:
+            self._send(message)
+        except OSError:
+            # Coordinator has gone, the job is terminated.
+            pass
+
+    def _send_output(self, job_id, out_fd, stderr) -> None:
+        for line in iter(out_fd.readline, ""):
+            self._send_job_message(job_id, {"output": line, "stderr": stderr})
+        out_fd.close()
+
+    @staticmethod
+    def _get_env(env_overrides) -> dict:
+        """
+        Environment of the worker with the overrides of the job.
+        """
+        env = os.environ.copy()
+        env.update(env_overrides or {})
+        return env
+
+    def _run_job(self, job) -> None:
+        job_id = job.get("id")
+        return_code = None
+        resource_usage = {}
+        try:
+            cwd = job.get("cwd") or "./"
+            os.makedirs(cwd, exist_ok=True)
+            if job.get("run_do") is not None:
+                with open(os.path.join(cwd, "run.do"), "w") as run_file:
+                    run_file.write(job["run_do"])
+
+            process = subprocess.Popen(
+                job["command"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                cwd=cwd,
+                env=self._get_env(job.get("env")),
+                close_fds=self.ON_POSIX,
+            )
+            self.processes[job_id] = process
+
+            stderr_thread = threading.Thread(
+                target=self._send_output, args=(job_id, process.stderr, True)
+            )
+            stderr_thread.daemon = True
+            stderr_thread.start()
+            self._send_output(job_id, process.stdout, False)
+            stderr_thread.join()
+            resource_usage = reap_process(process, wait=True)
+            return_code = process.returncode
+        except (OSError, ValueError, KeyError) as error:
+            self._send_job_message(
+                job_id, {"output": "Command error: {}.\n".format(error), "stderr": True}
+            )
+        finally:
+            self.processes.pop(job_id, None)
+            self._send_job_message(
+                job_id, {"exit_code": return_code, "resource_usage": resource_usage}
+            )
+
+    def _terminate_jobs(self) -> None:
+        for process in list(self.processes.values()):
+            try:
+                process.terminate()
+            except OSError:
+                pass
+
+
+def get_worker_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="hdlregression-worker",
+        description="Run simulations for a regression started with --workers",
+        epilog="The coordinator and the workers must have the same token in %s, "
+        "which may only be left out for a coordinator on a loopback address." % (WORKER_TOKEN_ENV),
+    )
+    arg_parser.add_argument("address", metavar="[HOST:]PORT", help="coordinator address")
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        default=None,
+        help="number of simulations to run in parallel, default is number of CPUs",
+    )
+    arg_parser.add_argument("--name", action="store", help="worker name shown by the coordinator")
+    arg_parser.add_argument(
+        "--timeout",
+        action="store",
+        type=float,
+        default=60.0,
+        help="seconds to wait for the coordinator, default 60",
+    )
+    arg_parser.add_argument(
+        "--persistent",
+        action="store_true",
+        help="wait for the next run when the coordinator finishes",
+    )
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    arg_parser = get_worker_parser()
+    args = arg_parser.parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        address = parse_address(args.address)
+    except ValueError as error:
+        arg_parser.error(str(error))
+
+    agent = WorkerAgent(address, capacity=args.jobs, name=args.name)
+    timeout = args.timeout
+    try:
+        while True:
+            try:
+                connected = agent.connect(timeout=timeout)
+            except WorkerError as error:
+                print(error)
+                return 1
+            if not connected:
+                print("Unable to connect to coordinator on %s:%d." % address)
+                return 1
+            print("Worker %s connected to %s:%d, capacity %d." % ((agent.name,) + address + (agent.capacity,)))
+            agent.serve()
+            print("Coordinator on %s:%d finished." % address)
+            if not args.persistent:
+                return 0
+            timeout = None
+    except KeyboardInterrupt:
+        agent._terminate_jobs()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,4 +49,10 @@ setup(name="hdlregression",
       python_requires=">=3.0",
       long_description=read('README.rst'),
       long_description_content_type="text/x-rst",
+      entry_points={
+          "console_scripts": [
+              "hdlregression=hdlregression.__main__:main",
+              "hdlregression-worker=hdlregression.worker:main",
+          ],
+      },
      )
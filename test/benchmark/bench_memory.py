@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2022 by HDLRegression Authors.  All rights reserved.
+# Licensed under the MIT License; you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://opensource.org/licenses/MIT.
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# HDLRegression AND ANY PART THEREOF ARE PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS
+# OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH UVVM OR THE USE OR OTHER DEALINGS IN HDLRegression.
+#
+
+"""
+Memory benchmark for the project structure.
+
+Builds a synthetic project with one scanned testbench file per entity
+and architecture module pair, and one test per testbench, and reports
+the memory used by the objects (tracemalloc) and the size of the
+pickled structure.
+
+Usage: python bench_memory.py [num_modules]
+"""
+
+import os
+import sys
+import pickle
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from hdlregression.construct.hdlfile import VHDLFile
+from hdlregression.run.hdltests import VHDLTest
+
+
+class FakeSettings:
+    def get_testcase_identifier_name(self):
+        return "gc_testcase"
+
+    def get_logger_level(self):
+        return "info"
+
+    def get_num_threads(self):
+        return 0
+
+    def get_netlist_timing(self):
+        return None
+
+    def get_is_gui_mode(self):
+        return False
+
+    def get_use_log_color(self):
+        return False
+
+
+class FakeProject:
+    def __init__(self):
+        self.settings = FakeSettings()
+
+
+class FakeLibrary:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return self.name
+
+
+def build_project(num_modules, filename):
+    project = FakeProject()
+    library = FakeLibrary("bench_lib")
+    hdlfile_list = []
+    test_list = []
+
+    for idx in range(num_modules // 2):
+        hdlfile = VHDLFile(
+            filename_with_path=filename,
+            project=project,
+            library=library,
+            hdl_version="2008",
+            com_options=None,
+            parse_file=True,
+            code_coverage=False,
+        )
+        scanner = hdlfile.scanner
+        scanner.scan(
+            [
+                "--hdlregression:tb",
+                "entity tb_%d is" % (idx),
+                "  generic (gc_testcase : string);",
+                "end entity;",
+                "architecture sim of tb_%d is" % (idx),
+                "begin",
+                "end architecture;",
+            ]
+        )
+        entity, arch = scanner.get_module_container().get()
+
+        test = VHDLTest(tb=entity, arch=arch, settings=project.settings)
+        test.set_hdlfile(hdlfile)
+
+        hdlfile_list.append(hdlfile)
+        test_list.append(test)
+    return project, hdlfile_list, test_list
+
+
+def main():
+    num_modules = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.NamedTemporaryFile(suffix=".vhd", delete=False) as tmp:
+        filename = tmp.name
+    try:
+        tracemalloc.start()
+        structure = build_project(num_modules, filename)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pickle_size = len(pickle.dumps(structure))
+    finally:
+        os.remove(filename)
+
+    print("Modules      : %d" % (num_modules))
+    print("Tests        : %d" % (len(structure[2])))
+    print("Memory       : %.1f MB" % (current / 1e6))
+    print("Memory peak  : %.1f MB" % (peak / 1e6))
+    print("Pickle size  : %.1f MB" % (pickle_size / 1e6))
+
+
+if __name__ == "__main__":
+    main()
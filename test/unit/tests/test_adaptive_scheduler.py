@@ -0,0 +1,167 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+from hdlregression.run import resource_monitor
+from hdlregression.run.resource_monitor import AdaptiveScheduler, get_process_tree_rss
+from hdlregression.arg_parser import threading_type
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+MB = 1024 * 1024
+
+
+class FakeMonitor:
+    def __init__(self, total_memory=None, available_memory=None, num_cpus=4, num_running_processes=None):
+        self.total_memory = total_memory
+        self.available_memory = available_memory
+        self.num_cpus = num_cpus
+        self.num_running_processes = num_running_processes
+
+    def get_total_memory(self):
+        return self.total_memory
+
+    def get_available_memory(self):
+        return self.available_memory
+
+    def get_num_running_processes(self):
+        return self.num_running_processes
+
+    def get_num_cpus(self):
+        return self.num_cpus
+
+
+class FakeTest:
+    def __init__(self, test_key, peak_rss=0):
+        self.test_key = test_key
+        self.peak_rss = peak_rss
+
+    def get_test_key(self):
+        return self.test_key
+
+    def get_peak_rss(self):
+        return self.peak_rss
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(resource_monitor, "ADMISSION_POLL_INTERVAL", 0.01)
+
+
+def admit_in_thread(scheduler, test_key):
+    admitted = threading.Event()
+    thread = threading.Thread(target=lambda: (scheduler.admit(test_key), admitted.set()))
+    thread.daemon = True
+    thread.start()
+    return admitted
+
+
+def test_threading_argument():
+    assert threading_type("auto") == "auto"
+    assert threading_type("AUTO") == "auto"
+    assert threading_type("4") == 4
+
+
+def test_estimate_from_earlier_runs():
+    monitor = FakeMonitor(total_memory=1000 * MB, available_memory=900 * MB)
+    scheduler = AdaptiveScheduler(4, peak_rss={"lib.small": 10 * MB, "lib.netlist": 300 * MB}, monitor=monitor)
+
+    assert scheduler.get_memory_budget() == 800 * MB
+    assert scheduler.get_estimate("lib.small") == 10 * MB
+    # Unknown tests are expected to be as large as the largest known test.
+    assert scheduler.get_estimate("lib.new") == 300 * MB
+    # Nothing known, memory is shared between simulations.
+    assert AdaptiveScheduler(4, monitor=monitor).get_estimate("lib.new") == 200 * MB
+
+
+def test_max_concurrency_without_memory_information():
+    scheduler = AdaptiveScheduler(2, monitor=FakeMonitor())
+    scheduler.admit("lib.a")
+    scheduler.admit("lib.b")
+
+    admitted = admit_in_thread(scheduler, "lib.c")
+    assert not admitted.wait(0.1)
+
+    scheduler.release("lib.a", 0)
+    assert admitted.wait(5)
+
+
+def test_large_simulations_wait_for_memory():
+    monitor = FakeMonitor(total_memory=1000 * MB, available_memory=900 * MB)
+    peak_rss = {"lib.netlist": 500 * MB, "lib.small": 100 * MB}
+    scheduler = AdaptiveScheduler(8, peak_rss=peak_rss, monitor=monitor)
+
+    netlist_estimate = scheduler.admit("lib.netlist")
+    small_estimate = scheduler.admit("lib.small")
+    scheduler.admit("lib.small")
+
+    # 700 MB reserved, second netlist simulation does not fit in 800 MB.
+    admitted = admit_in_thread(scheduler, "lib.netlist")
+    assert not admitted.wait(0.1)
+    assert scheduler.get_num_running() == 3
+
+    scheduler.release("lib.netlist", netlist_estimate)
+    assert admitted.wait(5)
+    scheduler.release("lib.small", small_estimate)
+
+
+def test_first_simulation_always_admitted():
+    monitor = FakeMonitor(total_memory=1000 * MB, available_memory=100 * MB, num_running_processes=64)
+    scheduler = AdaptiveScheduler(4, peak_rss={"lib.netlist": 500 * MB}, monitor=monitor)
+    scheduler.admit("lib.netlist")
+    assert scheduler.get_num_running() == 1
+
+
+def test_live_memory_and_load_checked():
+    monitor = FakeMonitor(total_memory=1000 * MB, available_memory=900 * MB, num_running_processes=1)
+    scheduler = AdaptiveScheduler(4, peak_rss={"lib.a": 100 * MB}, monitor=monitor)
+    scheduler.admit("lib.a")
+
+    # Memory used by other processes since the run started.
+    monitor.available_memory = 150 * MB
+    admitted = admit_in_thread(scheduler, "lib.a")
+    assert not admitted.wait(0.1)
+    monitor.available_memory = 800 * MB
+    assert admitted.wait(5)
+
+    # Two simulations and three other processes running on four CPUs.
+    monitor.num_running_processes = 2 + 3 + 1
+    admitted = admit_in_thread(scheduler, "lib.a")
+    assert not admitted.wait(0.1)
+    monitor.num_running_processes = 2 + 1
+    assert admitted.wait(5)
+
+
+def test_slot_registers_peak_rss():
+    scheduler = AdaptiveScheduler(2, monitor=FakeMonitor())
+    test = FakeTest("lib.a")
+    with scheduler.slot(test):
+        test.peak_rss = 42 * MB
+    assert scheduler.get_estimate("lib.a") == 42 * MB
+    assert scheduler.get_num_running() == 0
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/task"), reason="/proc not available")
+def test_process_tree_rss():
+    assert get_process_tree_rss(os.getpid()) > 0
+    assert get_process_tree_rss(2 ** 22 + 1) == 0
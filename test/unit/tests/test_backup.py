@@ -0,0 +1,147 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+
+from hdlregression.run.run_backup import (
+    RunBackup,
+    get_test_backups,
+    prune_test_backups,
+)
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+
+def write_file(filename, content):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w") as f:
+        f.write(content)
+
+
+def read_file(filename):
+    with open(filename, "r") as f:
+        return f.read()
+
+
+def create_test_run(test_path):
+    write_file(os.path.join(test_path, "test_mapping.csv"), "tb_a,tb_a\n")
+    write_file(os.path.join(test_path, "tb_a", "arch_1", "transcript"), "run 1 a")
+    write_file(os.path.join(test_path, "tb_b", "arch_1", "transcript"), "run 1 b")
+    write_file(os.path.join(test_path, "coverage", "coverage_merge.ucdb"), "merge 1")
+
+
+def test_snapshot_keeps_test_results(tmp_path):
+    test_path = str(tmp_path / "test")
+    backup_folder = test_path + "_2025-01-01_00.00.00.000000"
+    create_test_run(test_path)
+
+    backup = RunBackup(test_path, backup_folder, FakeLogger())
+    backup.snapshot()
+    backup.wait()
+
+    for name in ["test_mapping.csv", "tb_a/arch_1/transcript", "tb_b/arch_1/transcript"]:
+        assert read_file(os.path.join(test_path, name)) == read_file(
+            os.path.join(backup_folder, name)
+        )
+    assert read_file(os.path.join(backup_folder, "coverage", "coverage_merge.ucdb")) == "merge 1"
+
+
+def test_detach_leaves_backup_unchanged(tmp_path):
+    test_path = str(tmp_path / "test")
+    backup_folder = test_path + "_2025-01-01_00.00.00.000000"
+    create_test_run(test_path)
+
+    backup = RunBackup(test_path, backup_folder, FakeLogger())
+    backup.snapshot()
+    # Test is run again before the background snapshot is done.
+    test_folder = os.path.join(test_path, "tb_a", "arch_1")
+    backup.detach(test_folder)
+    with open(os.path.join(test_folder, "transcript"), "w") as f:
+        f.write("run 2 a")
+    with open(os.path.join(test_path, "test_mapping.csv"), "a") as f:
+        f.write("tb_b,tb_b\n")
+    backup.wait()
+
+    assert read_file(os.path.join(backup_folder, "tb_a", "arch_1", "transcript")) == "run 1 a"
+    assert read_file(os.path.join(backup_folder, "test_mapping.csv")) == "tb_a,tb_a\n"
+    # Test not run again is kept in the test folder.
+    assert read_file(os.path.join(test_path, "tb_b", "arch_1", "transcript")) == "run 1 b"
+
+
+def test_move(tmp_path):
+    test_path = str(tmp_path / "test")
+    backup_folder = test_path + "_2025-01-01_00.00.00.000000"
+    create_test_run(test_path)
+
+    backup = RunBackup(test_path, backup_folder, FakeLogger())
+    backup.move()
+    backup.wait()
+
+    assert not os.path.exists(test_path)
+    assert read_file(os.path.join(backup_folder, "tb_a", "arch_1", "transcript")) == "run 1 a"
+
+
+def test_prune_by_count(tmp_path):
+    test_path = str(tmp_path / "test")
+    for idx in range(4):
+        write_file("%s_2025-01-0%d_00.00.00.000000/report.txt" % (test_path, idx + 1), "report")
+
+    removed = prune_test_backups(test_path, max_backups=2)
+
+    assert [os.path.basename(b) for b in removed] == [
+        "test_2025-01-01_00.00.00.000000",
+        "test_2025-01-02_00.00.00.000000",
+    ]
+    assert len(get_test_backups(test_path)) == 2
+
+
+def test_prune_by_size_keeps_newest(tmp_path):
+    test_path = str(tmp_path / "test")
+    for idx in range(3):
+        write_file(
+            "%s_2025-01-0%d_00.00.00.000000/transcript" % (test_path, idx + 1),
+            "x" * (1024 * 1024),
+        )
+
+    prune_test_backups(test_path, max_size=0)
+
+    assert [os.path.basename(b) for b in get_test_backups(test_path)] == [
+        "test_2025-01-03_00.00.00.000000"
+    ]
+
+
+def test_prune_counts_shared_files_once(tmp_path):
+    test_path = str(tmp_path / "test")
+    old_file = "%s_2025-01-01_00.00.00.000000/transcript" % (test_path)
+    new_file = "%s_2025-01-02_00.00.00.000000/transcript" % (test_path)
+    write_file(old_file, "x" * (1024 * 1024))
+    os.makedirs(os.path.dirname(new_file))
+    os.link(old_file, new_file)
+
+    assert prune_test_backups(test_path, max_size=1) == []
@@ -16,12 +16,14 @@ import os
 import platform
 import shutil
 import subprocess
+import time
 
 from pathlib import Path
 from types import SimpleNamespace
 
 from hdlregression import HDLRegression
 import hdlregression.hdlcodecoverage as hcov
+from hdlregression.report.trace import Tracer
 
 
 def make_tree_with_ucdb(tmp_path, cov_name="code_coverage.ucdb", n=2):
@@ -365,4 +367,204 @@ def test_merge_code_coverage_not_enabled_returns_true(tmp_path, sim_env):
         proj = FakeProject(test_path=proj_abs(tmp_path / "hdlregression" / "test"))
         cc = hcov.ModelsimCodeCoverage(project=proj)
         # code_coverage_file not set → coverage not enabled → True
-        assert cc.merge_code_coverage() is True
\ No newline at end of file
+        assert cc.merge_code_coverage() is True
+
+class MergeCommandRunner:
+    """Replace CommandRunner to capture merge commands and create the merged file."""
+    def __init__(self):
+        self.captured = []
+    def run(self, command, path="./", env=None, output_file=None):
+        self.captured.append(command)
+        out_file = command[command.index("-out") + 1]
+        with open(out_file, "w") as f:
+            f.write("merged")
+        yield ("", True)
+
+
+class FakeTest:
+    def __init__(self, test_path):
+        self.test_path = test_path
+    def get_test_path(self): return self.test_path
+
+
+def make_project_with_tests(tmp_path, folders, keep_code_coverage=False):
+    proj = FakeProject(test_path=proj_abs(tmp_path / "hdlregression" / "test"))
+    proj.settings.get_keep_code_coverage = lambda: keep_code_coverage
+    test_list = []
+    for folder in folders:
+        test_path = os.path.join(proj.settings.get_test_path(), folder)
+        os.makedirs(test_path)
+        Path(test_path, "coverage.ucdb").write_text("dummy")
+        test_list.append(FakeTest(test_path))
+    proj.runner = SimpleNamespace(get_test_list=lambda: test_list)
+    return proj
+
+
+def test_find_code_coverage_files_in_test_folders(tmp_path):
+    proj = make_project_with_tests(tmp_path, ["tb_a/arch_1", "tb_a/arch_2"])
+    # Test folder from a previous run.
+    old_test_path = Path(proj.settings.get_test_path(), "tb_b", "arch_3")
+    old_test_path.mkdir(parents=True)
+    (old_test_path / "coverage.ucdb").write_text("dummy")
+
+    cc = hcov.ModelsimCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+    assert cc._find_code_coverage_files() is True
+    assert [os.path.relpath(f, proj.settings.get_test_path()) for f in cc.file_list] == [
+        os.path.join("tb_a", "arch_1", "coverage.ucdb"),
+        os.path.join("tb_a", "arch_2", "coverage.ucdb"),
+    ]
+
+    # Kept code coverage from previous runs is merged too.
+    proj.settings.get_keep_code_coverage = lambda: True
+    assert cc._find_code_coverage_files() is True
+    assert len(cc.file_list) == 3
+
+
+def test_merge_reduction_tree(tmp_path, monkeypatch):
+    proj = make_project_with_tests(tmp_path, ["tb/test_%d" % (i) for i in range(5)])
+    cc = hcov.ModelsimCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+    cc.MERGE_BATCH_SIZE = 2
+
+    merge_runner = MergeCommandRunner()
+    monkeypatch.setattr(hcov, "CommandRunner", lambda project=None: merge_runner)
+
+    cc._find_code_coverage_files()
+    merge_file = cc._merge_code_coverage_files()
+
+    # 5 files -> 3 batches -> 2 batches -> final merge.
+    assert len(merge_runner.captured) == 6
+    assert all(len(cmd) - 4 <= 2 for cmd in merge_runner.captured)
+    final_command = merge_runner.captured[-1]
+    assert final_command[-1] == merge_file
+    assert merge_file.endswith("coverage_merge.ucdb")
+    assert all("/merge/level1_" in f for f in final_command[2:-2])
+    # Batch results are removed after the merge.
+    assert not os.path.exists(os.path.join(cc.get_code_coverage_path(), "merge"))
+
+
+def test_riviera_merge_command(tmp_path):
+    proj = FakeProject(test_path=proj_abs(tmp_path / "hdlregression" / "test"))
+    proj.settings._exec_map["vsimsa"] = "vsimsa"
+    cc = hcov.RivieraProCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.acdb")
+
+    assert cc._is_code_coverage_file("fcover.ACDB") is True
+    assert cc._is_code_coverage_file("coverage.ucdb") is False
+    command = cc._get_merge_command(["a.acdb", "b.acdb"], "out.acdb")
+    assert command[0] == "vsimsa"
+    assert command[-1] == 'coverage merge -o "out.acdb" -i "a.acdb" -i "b.acdb"; quit;'
+
+
+def test_incremental_merge(tmp_path, monkeypatch):
+    folders = ["tb/test_%d" % (i) for i in range(3)]
+    proj = make_project_with_tests(tmp_path, folders)
+    proj.tracer = Tracer()
+    cc = hcov.ModelsimCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+
+    merge_runner = MergeCommandRunner()
+    monkeypatch.setattr(hcov, "CommandRunner", lambda project=None: merge_runner)
+
+    cc.start_incremental_merge()
+    assert cc.merge_thread is not None
+    for test in proj.runner.get_test_list()[:2]:
+        cc.add_test_coverage(test.get_test_path())
+    # Let the background merge fold in the finished tests.
+    for _ in range(100):
+        with cc.merge_condition:
+            if not cc.pending_files and len(cc.merged_files) == 2:
+                break
+        time.sleep(0.05)
+    cc.finish_incremental_merge()
+    assert cc.merge_thread is None
+    partial_merge_file = cc.partial_merge_file
+    assert partial_merge_file is not None
+    assert os.path.isfile(partial_merge_file)
+
+    cc._find_code_coverage_files()
+    merge_file = cc._merge_code_coverage_files()
+
+    # Only the partial merge and the last test are left for the final merge.
+    final_command = merge_runner.captured[-1]
+    assert final_command[-1] == merge_file
+    assert final_command[2:-2] == [
+        partial_merge_file,
+        proj_abs(Path(proj.runner.get_test_list()[2].get_test_path(), "coverage.ucdb")),
+    ]
+    assert cc.partial_merge_file is None
+    assert not os.path.exists(os.path.join(cc.get_code_coverage_path(), "merge"))
+
+
+def test_incremental_merge_disabled(tmp_path):
+    proj = make_project_with_tests(tmp_path, ["tb/test_1"])
+    proj.tracer = Tracer()
+    cc = hcov.ModelsimCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+    cc.set_incremental_merge(False)
+
+    cc.start_incremental_merge()
+    assert cc.merge_thread is None
+    cc.add_test_coverage(proj.runner.get_test_list()[0].get_test_path())
+    assert cc.pending_files == []
+    cc.finish_incremental_merge()
+
+
+def test_parse_coverage_rank():
+    files = ["/t/tb/test_1/coverage.ucdb", "/t/tb/test_11/coverage.ucdb", "/t/tb/test_2/coverage.ucdb"]
+    lines = [
+        "Test#  Cumulative  Contribution  Test name\n",
+        "    1       60.25         60.25  /t/tb/test_11/coverage.ucdb\n",
+        "    2       71.50         11.25  /t/tb/test_2/coverage.ucdb\n",
+        "Non-contributing tests:\n",
+        "    3  /t/tb/test_1/coverage.ucdb\n",
+    ]
+    assert hcov.parse_coverage_rank(lines, files) == [
+        ("/t/tb/test_11/coverage.ucdb", 60.25),
+        ("/t/tb/test_2/coverage.ucdb", 71.5),
+        ("/t/tb/test_1/coverage.ucdb", None),
+    ]
+
+
+class RankCommandRunner:
+    """Replace CommandRunner to write a ranking of the input files, first file last."""
+    def __init__(self, coverage):
+        self.coverage = coverage
+        self.captured = []
+    def run(self, command, path="./", env=None, output_file=None):
+        self.captured.append(command)
+        rank_file = command[command.index("-rankfile") + 1]
+        with open(rank_file, "w") as f:
+            for idx, (filename, coverage) in enumerate(zip(reversed(command[4:]), self.coverage)):
+                f.write("%5d  %6.2f  %s\n" % (idx + 1, coverage, filename))
+        yield ("", True)
+
+
+def test_rank_code_coverage(tmp_path, monkeypatch):
+    proj = make_project_with_tests(tmp_path, ["tb/test_%d" % (i) for i in range(4)])
+    proj.tracer = Tracer()
+    cc = hcov.ModelsimCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+    cc.set_rank_target(95.0)
+
+    rank_runner = RankCommandRunner([70.0, 90.0, 96.0, 100.0])
+    monkeypatch.setattr(hcov, "CommandRunner", lambda project=None: rank_runner)
+
+    ranked_tests = cc.rank_code_coverage()
+    assert rank_runner.captured[0][:4] == ["vcover", "ranktest", "-rankfile", cc._get_rank_file()]
+    # 96% of 100% coverage is reached with the three highest ranked tests.
+    test_list = proj.runner.get_test_list()
+    assert ranked_tests == [test_list[3], test_list[2], test_list[1]]
+
+    cc.set_rank_target(100.0)
+    assert cc.rank_code_coverage() == list(reversed(test_list))
+
+
+def test_rank_code_coverage_not_supported(tmp_path):
+    proj = make_project_with_tests(tmp_path, ["tb/test_1"])
+    proj.settings.get_simulator_name = lambda: "GHDL"
+    cc = hcov.HdlCodeCoverage(project=proj)
+    cc.set_code_coverage_file("coverage.ucdb")
+    cc.set_rank_target(95.0)
+    assert cc.rank_code_coverage() is None
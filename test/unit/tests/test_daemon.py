@@ -0,0 +1,154 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import io
+import shutil
+import socket
+import threading
+
+from hdlregression import HDLRegression
+from hdlregression.daemon import HDLRegressionDaemon, DaemonClient, DaemonError, get_socket_path
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets not supported"
+)
+
+
+class FakeLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+    def error(self, msg):
+        self.messages.append(msg)
+
+
+class FakeProject:
+    def __init__(self):
+        self.logger = FakeLogger()
+        self.output = None
+        self.requests = []
+
+    def _run_in_memory(self, args):
+        self.requests.append(args)
+        print("running %s" % (" ".join(args)), file=self.output)
+        print("daemon terminal output")
+        return 1 if "-fail" in args else 0
+
+
+def start_daemon_thread(target, output_path):
+    thread = threading.Thread(target=target)
+    thread.start()
+    socket_path = get_socket_path(output_path)
+    for _ in range(500):
+        if os.path.exists(socket_path):
+            break
+        thread.join(0.01)
+    return thread, socket_path
+
+
+def start_daemon(project, output_path):
+    daemon = HDLRegressionDaemon(project=project, output_path=output_path)
+    return start_daemon_thread(daemon.serve, output_path)
+
+
+def test_daemon_run_requests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("hdlregression")
+    project = FakeProject()
+    thread, socket_path = start_daemon(project, "hdlregression")
+
+    client = DaemonClient(socket_path)
+    output = io.StringIO()
+    assert client.run(["-tc", "tb_a"], output=output) == 0
+    assert "running -tc tb_a" in output.getvalue()
+    # Only output of the project is streamed to the client.
+    assert "daemon terminal output" not in output.getvalue()
+    assert project.output is None
+    assert client.run(["-fail"], output=io.StringIO()) == 1
+    assert project.requests == [["-tc", "tb_a"], ["-fail"]]
+
+    assert client.stop() == 0
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
+
+
+def get_file_path(path) -> str:
+    """
+    Adjust file paths to match running directory.
+    """
+    TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(TEST_DIR, path)
+
+
+def test_daemon_runs_project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["regression.py", "--daemon"])
+    # Listings do not run the simulator, it only has to be detected.
+    os.mkdir("ghdl")
+    with open(os.path.join("ghdl", "ghdl"), "w") as ghdl:
+        ghdl.write("#!/bin/sh\necho GHDL\n")
+    os.chmod(os.path.join("ghdl", "ghdl"), 0o755)
+    monkeypatch.setenv("PATH", str(tmp_path / "ghdl") + os.pathsep + os.environ["PATH"])
+    os.mkdir("tb")
+    shutil.copy(get_file_path("../../tb/tb_passing.vhd"), "tb")
+
+    hr = HDLRegression(simulator="GHDL")
+    hr.add_files(str(tmp_path / "tb" / "*.vhd"), "tb_lib")
+    thread, socket_path = start_daemon_thread(hr.start, "hdlregression")
+    client = DaemonClient(socket_path)
+    try:
+        # Files added to the searched folders are scanned by the next request.
+        shutil.copy(get_file_path("../../tb/tb_passing_2.vhd"), "tb")
+        output = io.StringIO()
+        client.run(["-ltc", "-ns"], output=output)
+        assert "tb_passing.test" in output.getvalue()
+        assert "tb_simple_passing" in output.getvalue()
+        assert hr.settings.get_no_sim() is True
+
+        # Settings from the previous request are reset.
+        output = io.StringIO()
+        client.run(["-lco"], output=output)
+        assert "tb_passing_2.vhd" in output.getvalue()
+        assert "tb_passing.test" not in output.getvalue()
+        assert hr.settings.get_no_sim() is False
+
+        output = io.StringIO()
+        assert client.run(["-c"], output=output) == 1
+        assert "Clean is not supported" in output.getvalue()
+    finally:
+        client.stop()
+        thread.join(30)
+    assert not thread.is_alive()
+
+
+def test_daemon_client_without_daemon(tmp_path):
+    client = DaemonClient(get_socket_path(str(tmp_path)))
+    with pytest.raises(DaemonError):
+        client.run([], output=io.StringIO())
@@ -0,0 +1,152 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+
+from hdlregression.report.trace import Tracer
+from hdlregression.run import file_staging
+from hdlregression.run.file_staging import FileStager, STAGE_COPY, STAGE_REFLINK
+from hdlregression.run.sim_runner import SimRunner
+from hdlregression import settings
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeLogger:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+    def error(self, msg):
+        self.messages.append(msg)
+
+
+class FakeSettings:
+    def __init__(self, sim_path):
+        self.sim_path = sim_path
+
+    def get_sim_path(self):
+        return self.sim_path
+
+
+class FakeProject:
+    def __init__(self, sim_path):
+        self.settings = FakeSettings(sim_path)
+        self.testcase_settings = settings.TestcaseSettings()
+        self.tracer = Tracer()
+
+
+class FakeRunner(SimRunner):
+    def __init__(self, project):
+        self.project = project
+        self.logger = FakeLogger()
+        self.file_stager = FileStager()
+
+
+def write_file(filename, content):
+    with open(filename, "w") as f:
+        f.write(content)
+
+
+def test_read_only_file_shares_data(tmpdir):
+    src = os.path.join(str(tmpdir), "stimuli.txt")
+    dst = os.path.join(str(tmpdir), "test", "stimuli.txt")
+    write_file(src, "0101")
+    os.makedirs(os.path.dirname(dst))
+
+    assert FileStager().stage_file(src, dst) != STAGE_COPY
+    assert open(dst).read() == "0101"
+    # Already staged, nothing to do.
+    assert FileStager().stage_file(src, dst) in (None, STAGE_REFLINK)
+
+
+def test_writable_file_is_private_copy(tmpdir):
+    src = os.path.join(str(tmpdir), "memory_init.txt")
+    dst = os.path.join(str(tmpdir), "test", "memory_init.txt")
+    write_file(src, "0101")
+    os.makedirs(os.path.dirname(dst))
+
+    assert FileStager().stage_file(src, dst, writable=True) in (STAGE_COPY, STAGE_REFLINK)
+    write_file(dst, "1111")
+    assert open(src).read() == "0101"
+
+
+def test_staged_file_replaces_earlier_copy(tmpdir):
+    src = os.path.join(str(tmpdir), "stimuli.txt")
+    dst = os.path.join(str(tmpdir), "stimuli_copy.txt")
+    write_file(src, "new")
+    write_file(dst, "old")
+
+    FileStager().stage_file(src, dst)
+    assert open(dst).read() == "new"
+
+
+def test_staging_is_traced(tmpdir):
+    sim_path = str(tmpdir)
+    write_file(os.path.join(sim_path, "stimuli.txt"), "0" * 1000)
+    write_file(os.path.join(sim_path, "memory_init.txt"), "0" * 100)
+    project = FakeProject(sim_path)
+    project.testcase_settings.copy_file_to_testcase_folder("stimuli.txt", "1")
+    project.testcase_settings.copy_file_to_testcase_folder("memory_init.txt", "1", writable=True)
+    project.testcase_settings.copy_file_to_testcase_folder("missing.txt", "1")
+    project.tracer.start(os.path.join(sim_path, "trace.json"))
+
+    test_folder = os.path.join(sim_path, "test", "tb_1")
+    os.makedirs(test_folder)
+    runner = FakeRunner(project)
+    runner._stage_test_files(
+        test_folder, 1, project.testcase_settings.get_copy_file_to_testcase_folder(1)
+    )
+
+    assert sorted(os.listdir(test_folder)) == ["memory_init.txt", "stimuli.txt"]
+    assert runner.logger.messages == [
+        "File not found: {}".format(os.path.join(sim_path, "missing.txt"))
+    ]
+    (event,) = [e for e in project.tracer.events if e["name"] == "stage files"]
+    assert event["args"]["files"] == 3
+    assert event["args"]["staged_bytes"] == 1100
+    assert event["args"]["copied_bytes"] in (0, 100)
+    assert sum(event["args"]["methods"].values()) == 2
+
+    # Files already staged are not counted.
+    runner._stage_test_files(
+        test_folder, 1, project.testcase_settings.get_copy_file_to_testcase_folder(1)
+    )
+    event = [e for e in project.tracer.events if e["name"] == "stage files"][-1]
+    assert event["args"]["staged_bytes"] in (100, 1100)
+    if event["args"]["methods"].get("unchanged"):
+        assert event["args"]["staged_bytes"] == 100
+
+
+def test_unsupported_clone_is_not_retried(tmpdir, monkeypatch):
+    clone_calls = []
+
+    def clone_file(src, dst):
+        clone_calls.append(src)
+        return False
+
+    monkeypatch.setattr(file_staging, "clone_file", clone_file)
+    stager = FileStager()
+    stager.use_clone = True
+    for name in ["a.txt", "b.txt"]:
+        src = os.path.join(str(tmpdir), name)
+        write_file(src, name)
+        assert stager.stage_file(src, src + ".staged", writable=True) == STAGE_COPY
+    assert len(clone_calls) == 1
@@ -0,0 +1,92 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import io
+
+from hdlregression import HDLRegression
+from hdlregression.run.tcl_runner import TclRunnerBase
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def __init__(self):
+        self.gui_compile_all = None
+        self.gui_compile_changes = None
+        self.return_code = 0
+
+    def set_gui_compile_all(self, enabled=True):
+        self.gui_compile_all = enabled
+
+    def set_gui_compile_changes(self, enabled=True):
+        self.gui_compile_changes = enabled
+
+    def set_return_code(self, return_code):
+        self.return_code = return_code
+
+    def get_return_code(self):
+        return self.return_code
+
+
+class FakeProject:
+    def __init__(self):
+        self.settings = FakeSettings()
+        self.requests = []
+
+    def _start_gui(self):
+        self.requests.append(
+            (self.settings.gui_compile_changes, self.settings.gui_compile_all)
+        )
+        print("hdlregression:success")
+        return 0
+
+    def _get_install_path(self):
+        return "/path/to/hdlregression"
+
+
+class FakeTclRunner:
+    def __init__(self):
+        self.python_exec = "python"
+        self.project = FakeProject()
+
+
+def test_serve_gui_requests(monkeypatch, capsys):
+    project = FakeProject()
+    monkeypatch.setattr(sys, "stdin", io.StringIO("changes\nall\nunknown\n"))
+
+    assert HDLRegression._serve_gui(project) == 0
+    assert project.requests == [(True, False), (False, True)]
+
+    output = capsys.readouterr().out.splitlines()
+    assert output.count("hdlregression:done") == 3
+    assert "Unknown compile request: unknown" in output
+
+
+def test_gui_recompile_uses_helper_process():
+    runner = FakeTclRunner()
+    helper_command = TclRunnerBase._get_helper_command(runner)
+    assert "hu._serve_gui()" in helper_command
+    assert "-u" in helper_command.split()
+
+    runner._get_helper_command = lambda: helper_command
+    helper_proc = TclRunnerBase._get_helper_proc(runner)
+    assert helper_command in helper_proc
+    assert "_helper_compile changes" in TclRunnerBase._recompile_changed(runner)
+    assert "_helper_compile all" in TclRunnerBase._recompile_all(runner)
+    assert "_helper_compile all" in TclRunnerBase._recompile_all_only(runner)
@@ -0,0 +1,88 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+
+from hdlregression.hdlfinder import HDLFinder
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def __init__(self, script_path):
+        self._script_path = script_path
+
+    def get_script_path(self):
+        return self._script_path
+
+    def get_is_gui_mode(self):
+        return False
+
+    def get_use_log_color(self):
+        return False
+
+
+class FakeProject:
+    def __init__(self, script_path):
+        self.settings = FakeSettings(script_path)
+        self.dir_listing_cache = {}
+
+
+@pytest.fixture
+def src_tree(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "sub").mkdir()
+    (tmp_path / "src" / "a.vhd").write_text("")
+    (tmp_path / "src" / "B.VHD").write_text("")
+    (tmp_path / "src" / "c.v").write_text("")
+    (tmp_path / "src" / "sub" / "d.vhd").write_text("")
+    return tmp_path
+
+
+def test_find_files_case_insensitive(src_tree):
+    finder = HDLFinder(project=FakeProject(str(src_tree)), filename="src/*.vhd")
+    names = sorted(os.path.basename(f) for f in finder.get_file_list())
+    assert names == ["B.VHD", "a.vhd"]
+
+
+def test_find_files_recursive(src_tree):
+    finder = HDLFinder(project=FakeProject(str(src_tree)))
+    finder.find_files("src/*.vhd", recursive=True)
+    names = sorted(os.path.basename(f) for f in finder.get_file_list())
+    assert names == ["B.VHD", "a.vhd", "d.vhd"]
+
+
+def test_find_files_no_duplicates(src_tree):
+    finder = HDLFinder(project=FakeProject(str(src_tree)), filename="src/a.vhd")
+    finder.find_files("src/*.vhd")
+    assert len(finder.get_file_list()) == 2
+
+
+def test_directory_listing_is_shared_by_project_until_cleared(src_tree):
+    project = FakeProject(str(src_tree))
+    assert len(HDLFinder(project=project, filename="src/*.vhd").get_file_list()) == 2
+
+    (src_tree / "src" / "e.vhd").write_text("")
+    assert len(HDLFinder(project=project, filename="src/*.vhd").get_file_list()) == 2
+    # Other projects list the directory themselves.
+    other_project = FakeProject(str(src_tree))
+    assert len(HDLFinder(project=other_project, filename="src/*.vhd").get_file_list()) == 3
+
+    project.dir_listing_cache.clear()
+    assert len(HDLFinder(project=project, filename="src/*.vhd").get_file_list()) == 3
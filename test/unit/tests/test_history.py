@@ -0,0 +1,118 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+from types import SimpleNamespace
+
+from hdlregression.history import ResultHistory, get_history_filename, get_seed, main
+from hdlregression.hdlregression_pkg import empty_project_folder
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+def get_test_result(key, status, sim_time, generics=None):
+    return {"test": key, "key": key, "status": status, "sim_time": sim_time,
+            "resource_usage": {"user_time": sim_time / 1000}, "generics": generics}
+
+
+def get_history(tmp_path):
+    """
+    tb_a always passes, tb_b alternates and tb_c is slower in the last run.
+    """
+    history = ResultHistory(str(tmp_path / "history.db"))
+    for (run, b_status, c_time) in [(1, "PASS", 2000), (2, "FAIL", 2100), (3, "PASS", 1900), (4, "PASS", 5000)]:
+        history.add_run(
+            {"simulator": "GHDL", "sim_time": 100, "return_code": int(b_status == "FAIL")},
+            [get_test_result("lib.tb_a.arch", "PASS", 1500),
+             get_test_result("lib.tb_b.arch -gGC_SEED=%d" % (run), b_status, 1000, "-gGC_SEED=%d" % (run)),
+             get_test_result("lib.tb_c.arch", "PASS", c_time),
+             get_test_result("lib.tb_d.arch", "NOT_RUN", 0)])
+    return history
+
+
+def test_get_seed():
+    assert get_seed("-gGC_WIDTH=8 -gGC_SEED=1234") == "1234"
+    assert get_seed("-gGC_WIDTH=8") is None
+    assert get_seed(None) is None
+
+
+def test_pass_rate_trend(tmp_path):
+    with get_history(tmp_path) as history:
+        assert [(run_id, num_run, num_pass) for (run_id, _, num_run, num_pass, _) in history.get_pass_rate_trend()] == \
+            [(1, 3, 3), (2, 3, 2), (3, 3, 3), (4, 3, 3)]
+        assert [pass_rate for (_, _, _, _, pass_rate) in history.get_pass_rate_trend(2, "tb_b")] == [1.0, 1.0]
+        assert [status for (_, _, status, _, _) in history.get_test_history("lib.tb_b*")] == \
+            ["PASS", "FAIL", "PASS", "PASS"]
+        assert [seed for (_, _, _, _, seed) in history.get_test_history("tb_b", 1)] == ["4"]
+
+
+def test_duration_regressions_and_flaky_tests(tmp_path):
+    with get_history(tmp_path) as history:
+        assert history.get_duration_regressions() == [("lib.tb_c.arch", 2000, 5000, 2.5)]
+        assert history.get_duration_regressions(factor=3) == []
+        # tb_b keys differ by seed, i.e. each run of tb_b is a separate test.
+        assert history.get_flaky_tests() == []
+        assert history.get_flaky_tests(num_runs=2) == []
+
+
+def test_flaky_tests(tmp_path):
+    history = ResultHistory(str(tmp_path / "history.db"))
+    for status in ["PASS", "FAIL", "PASS", "PASS_WITH_MINOR", "FAIL"]:
+        history.add_run({}, [get_test_result("lib.tb_a.arch", status, 1000),
+                             get_test_result("lib.tb_b.arch", "PASS", 1000)])
+    assert history.get_flaky_tests() == [("lib.tb_a.arch", 3, 5, 2)]
+    assert history.get_flaky_tests(min_flips=4) == []
+    assert history.get_flaky_tests(num_runs=2) == [("lib.tb_a.arch", 1, 2, 1)]
+
+    assert history.remove_runs(2) == 3
+    assert [run[0] for run in history.get_runs()] == [4, 5]
+    assert len(history.get_test_history("*")) == 4
+    history.close()
+
+
+def test_history_command(tmp_path, capsys):
+    get_history(tmp_path).close()
+    assert main(["-f", str(tmp_path / "history.db"), "durations"]) == 0
+    assert "lib.tb_c.arch: 5000 ms, median 2000 ms (x2.50)" in capsys.readouterr().out
+    assert main(["-f", str(tmp_path / "history.db"), "-n", "1", "trend"]) == 0
+    assert capsys.readouterr().out.count("Run ") == 1
+    assert main(["-f", str(tmp_path / "missing.db"), "runs"]) == 1
+
+
+def test_pass_after_retry_is_flaky(tmp_path):
+    with ResultHistory(str(tmp_path / "history.db")) as history:
+        history.add_run({}, [get_test_result("lib.tb_a.arch", "PASS_AFTER_RETRY", 1000)])
+        assert history.get_flaky_tests() == [("lib.tb_a.arch", 1, 1, 0)]
+        assert history.get_pass_rate_trend()[0][4] == 1.0
+
+
+def test_history_kept_when_output_cleaned(tmp_path):
+    with get_history(tmp_path):
+        pass
+    (tmp_path / "library").mkdir()
+    (tmp_path / "project.db").write_text("")
+    project = SimpleNamespace(
+        project_db=None,
+        settings=SimpleNamespace(get_output_path=lambda: str(tmp_path)),
+        logger=SimpleNamespace(info=lambda msg: None, error=lambda msg: None))
+
+    empty_project_folder(project)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["history.db"]
+    with ResultHistory(get_history_filename(str(tmp_path))) as history:
+        assert len(history.get_pass_rate_trend()) == 4
@@ -0,0 +1,210 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import threading
+import time
+
+from hdlregression.run import sim_runner
+from hdlregression.run.sim_runner import SimRunner
+from hdlregression.run.license_limiter import LicenseLimiter
+from hdlregression.scan.hdl_regex_pkg import RE_LICENSE_DENIED
+from hdlregression.hdlregression_pkg import parse_license_limit
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+
+class FakeSettings:
+    def get_license_retries(self):
+        return 3
+
+
+class FakeCodeCoverage:
+    def __init__(self, coverage_file=None):
+        self.coverage_file = coverage_file
+
+    def get_code_coverage_file(self):
+        return self.coverage_file
+
+
+class FakeProject:
+    def __init__(self, coverage_file=None):
+        self.settings = FakeSettings()
+        self.hdlcodecoverage = FakeCodeCoverage(coverage_file)
+
+
+class FakeTest:
+    def __init__(self):
+        self.output = []
+        self.num_sim_errors = 0
+        self.num_sim_warnings = 0
+
+    def get_test_id_string(self):
+        return "lib.tb.arch.test"
+
+    def get_output_no_format(self):
+        return self.output
+
+    def set_num_sim_errors(self, num):
+        self.num_sim_errors = num
+
+    def set_num_sim_warnings(self, num):
+        self.num_sim_warnings = num
+
+
+class FakeRunner(SimRunner):
+    """
+    Runner where each simulation outputs the next of the given transcripts.
+    """
+
+    def __init__(self, project, transcripts, limits=None):
+        self.project = project
+        self.logger = FakeLogger()
+        self.license_limiter = LicenseLimiter(limits)
+        self.resource_scheduler = None
+        self.transcripts = list(transcripts)
+        self.num_simulations = 0
+
+    def _get_license_denied_regex(self):
+        return RE_LICENSE_DENIED
+
+    def _simulate(self, test, generic_call, module_call):
+        self.num_simulations += 1
+        test.output = [self.transcripts.pop(0)]
+        test.num_sim_errors += 1
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(sim_runner.time, "sleep", lambda seconds: None)
+
+
+def test_parse_license_limit():
+    assert parse_license_limit("4") == 4
+    assert parse_license_limit(2) == 2
+    assert parse_license_limit("AUTO") == "auto"
+    with pytest.raises(ValueError):
+        parse_license_limit("0")
+    with pytest.raises(ValueError):
+        parse_license_limit("many")
+
+
+def test_limiter_limits_concurrency():
+    limiter = LicenseLimiter({"simulator": 2})
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def simulate():
+        with limiter.tokens(["simulator"]):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=simulate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_running[0] == 2
+    assert limiter.get_in_use("simulator") == 0
+
+
+def test_limiter_takes_all_features_at_once():
+    limiter = LicenseLimiter({"simulator": 2, "coverage": 1})
+    limiter.acquire(["simulator", "coverage"])
+
+    acquired = threading.Event()
+
+    def simulate_with_coverage():
+        with limiter.tokens(["simulator", "coverage"]):
+            acquired.set()
+
+    thread = threading.Thread(target=simulate_with_coverage)
+    thread.start()
+    time.sleep(0.1)
+    # Waiting for coverage without holding a simulator token.
+    assert not acquired.is_set()
+    assert limiter.get_in_use("simulator") == 1
+    with limiter.tokens(["simulator"]):
+        pass
+
+    limiter.release(["simulator", "coverage"])
+    thread.join(timeout=5)
+    assert acquired.is_set()
+
+
+def test_limiter_auto_limit_discovered_when_denied():
+    limiter = LicenseLimiter({"simulator": "auto"})
+    assert limiter.get_limit("simulator") is None
+    for _ in range(4):
+        limiter.acquire(["simulator"])
+
+    assert limiter.set_denied(["simulator"]) == {"simulator": 3}
+    assert limiter.get_limit("simulator") == 3
+    # Configured limits are kept.
+    assert LicenseLimiter({"simulator": 2}).set_denied(["simulator"]) == {}
+
+
+def test_denied_simulation_is_retried(no_backoff):
+    runner = FakeRunner(
+        FakeProject(),
+        [
+            "** Fatal: (vsim-19) Unable to checkout a license.",
+            "# Error: Failure to obtain a Verilog simulation license.",
+            "UVVM: Simulation SUCCESS",
+        ],
+    )
+    test = FakeTest()
+    runner._simulate_with_license(test, generic_call="", module_call="")
+
+    assert runner.num_simulations == 3
+    assert test.output == ["UVVM: Simulation SUCCESS"]
+    assert test.num_sim_errors == 1
+    assert len([m for m in runner.logger.messages if "License denied" in m]) == 2
+
+
+def test_retries_are_limited(no_backoff):
+    runner = FakeRunner(FakeProject(), ["Unable to checkout a license"] * 10)
+    test = FakeTest()
+    runner._simulate_with_license(test, generic_call="", module_call="")
+
+    # First simulation and 3 retries, last denied run reported as is.
+    assert runner.num_simulations == 4
+    assert runner.license_limiter.get_in_use("simulator") == 0
+
+
+def test_coverage_feature_used_with_code_coverage():
+    assert FakeRunner(FakeProject(), [])._get_license_features(FakeTest()) == ["simulator"]
+    runner = FakeRunner(FakeProject(coverage_file="coverage.ucdb"), [])
+    assert runner._get_license_features(FakeTest()) == ["simulator", "coverage"]
@@ -0,0 +1,122 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import json
+
+from hdlregression.merge import merge_results
+from hdlregression.report.resultfile import MergedResults, ResultFileError, read_result_file
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+def write_result_file(filename, tests, return_code=0, sim_time=100, shard=None):
+    header = {
+        "format": 1,
+        "hdlregression_version": "1.4.0",
+        "simulator": "GHDL",
+        "shard": shard,
+        "time_of_run": "2024-01-01_00.00.00.000000",
+        "sim_time": sim_time,
+        "return_code": return_code,
+        "num_tests": len(tests),
+    }
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps(header) + "\n")
+        for (key, status) in tests:
+            record = {"test": key + " (test_id: 1)", "key": key, "status": status, "sim_time": 10}
+            result_file.write(json.dumps(record) + "\n")
+    return str(filename)
+
+
+def test_merge_results(tmp_path):
+    merged_results = MergedResults()
+    merged_results.merge(write_result_file(tmp_path / "a.jsonl", [("lib.tb_a", "PASS")], sim_time=300))
+    merged_results.merge(
+        write_result_file(
+            tmp_path / "b.jsonl", [("lib.tb_b", "PASS_WITH_MINOR"), ("lib.tb_c", "NOT_RUN")]
+        )
+    )
+
+    (pass_list, fail_list, not_run_list) = merged_results.get_results()
+    assert pass_list == ["lib.tb_a (test_id: 1)", "lib.tb_b (test_id: 1)"]
+    assert fail_list == []
+    assert not_run_list == ["lib.tb_c (test_id: 1)"]
+    assert merged_results.settings.get_sim_time() == 300
+    assert merged_results.get_return_code() == 0
+
+    # Merged results can be merged again.
+    merged_file = str(tmp_path / "merged.jsonl")
+    merged_results.write_result_file(merged_file)
+    assert len(list(read_result_file(merged_file))) == 4
+
+
+def test_merge_return_code(tmp_path):
+    passing = write_result_file(tmp_path / "a.jsonl", [("lib.tb_a", "PASS")])
+    failing = write_result_file(tmp_path / "b.jsonl", [("lib.tb_b", "FAIL")], return_code=1)
+    empty = write_result_file(tmp_path / "c.jsonl", [])
+
+    assert merge_results([passing]) == 0
+    assert merge_results([passing, failing]) == 1
+    assert merge_results([empty]) == 1
+
+    # A test rerun in a later file is reported with the last result.
+    rerun = write_result_file(tmp_path / "d.jsonl", [("lib.tb_b", "PASS")])
+    merged_results = MergedResults()
+    merged_results.merge(failing)
+    merged_results.merge(rerun)
+    assert merged_results.get_results()[1] == []
+
+
+def test_merge_shards_streamed(tmp_path):
+    shards = [
+        write_result_file(tmp_path / "a.jsonl", [("lib.tb_a", "PASS")], shard=[1, 2]),
+        write_result_file(tmp_path / "b.jsonl", [("lib.tb_b", "FAIL")], shard=[2, 2]),
+    ]
+    merged_results = MergedResults()
+    for shard in shards:
+        merged_results.merge(shard)
+
+    # Shards of one run have no tests in common, i.e. no test keys are kept.
+    assert merged_results.get_results()[:2] == [["lib.tb_a (test_id: 1)"], ["lib.tb_b (test_id: 1)"]]
+    assert merged_results.last_file_of_test is None
+
+    # The merged results can replace one of the merged files.
+    assert merge_results(shards, output=shards[0]) == 1
+    records = list(read_result_file(shards[0]))
+    assert records[0]["num_tests"] == 2
+    assert [record["key"] for record in records[1:]] == ["lib.tb_a", "lib.tb_b"]
+
+
+def test_merge_reports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result_file = write_result_file(tmp_path / "a.jsonl", [("lib.tb_a", "PASS"), ("lib.tb_b", "FAIL")])
+
+    assert merge_results([result_file], report_files=["report.xml", "report.txt"]) == 1
+    with open("report.xml") as report:
+        assert "<Test>lib.tb_b (test_id: 1)</Test>" in report.read()
+    with open("report.txt") as report:
+        assert "Failing tests (1)" in report.read()
+
+
+def test_merge_invalid_file(tmp_path):
+    invalid = tmp_path / "invalid.jsonl"
+    invalid.write_text("not a result file\n")
+    with pytest.raises(ResultFileError):
+        MergedResults().merge(str(invalid))
+    assert merge_results([str(invalid)]) == 1
@@ -0,0 +1,347 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import copyreg
+import gc
+import pickle
+import shutil
+import weakref
+from types import SimpleNamespace
+
+from hdlregression import HDLRegression
+from hdlregression.construct.container import Container
+from hdlregression.construct.hdl_modules_pkg import EntityModule
+from hdlregression.hdlregression_pkg import validate_cached_version
+from hdlregression.projectdb import ProjectDatabase, LazyRecord, is_record_loaded
+from hdlregression.report.logger import Logger
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def get_is_gui_mode(self):
+        return False
+
+    def get_use_log_color(self):
+        return False
+
+
+class FakeProject:
+    def __init__(self):
+        self.settings = FakeSettings()
+        self.shared_loggers = {}
+
+
+class FakeLibrary:
+    def __init__(self, name, project):
+        self.name = name
+        self.project = project
+        self.hdlfile_container = Container()
+
+    def get_name(self):
+        return self.name
+
+
+class FakeModule(LazyRecord):
+    def __init__(self, name, hdlfile):
+        self.name = name
+        self.hdlfile = hdlfile
+        self.dep_list = []
+
+
+class FakeFile(LazyRecord):
+    def __init__(self, filename, library, project):
+        self.filename = filename
+        self.library = library
+        self.project = project
+        self.modules = []
+
+    def get_filename_with_path(self):
+        return self.filename
+
+    def get_modules(self):
+        return self.modules
+
+
+def create_project(num_files=3):
+    project = FakeProject()
+    library = FakeLibrary("my_lib", project)
+    for index in range(num_files):
+        hdlfile = FakeFile("src/file_%d.vhd" % (index), library, project)
+        hdlfile.modules.append(FakeModule("module_%d" % (index), hdlfile))
+        library.hdlfile_container.add(hdlfile)
+    # Connect modules across files
+    files = library.hdlfile_container.get()
+    for index in range(1, num_files):
+        files[index].modules[0].dep_list.append(files[index - 1].modules[0])
+    return project, library
+
+
+def test_save_and_lazy_load(tmp_path):
+    project, library = create_project()
+    project_db = ProjectDatabase(project=project, output_path=str(tmp_path))
+    project_db.save(library_list=[library], objects={"testcase": ["tc_1"]})
+    project_db.close()
+
+    new_project = FakeProject()
+    project_db = ProjectDatabase(project=new_project, output_path=str(tmp_path))
+    libraries = project_db.load_libraries()
+    assert [lib.get_name() for lib in libraries] == ["my_lib"]
+    assert project_db.load_object("testcase") == ["tc_1"]
+    assert project_db.load_object("missing", "default") == "default"
+
+    files = libraries[0].hdlfile_container.get()
+    assert len(files) == 3
+    assert not any(is_record_loaded(hdlfile) for hdlfile in files)
+
+    # Access loads only the accessed file
+    assert files[2].get_filename_with_path() == "src/file_2.vhd"
+    assert is_record_loaded(files[2])
+    assert not is_record_loaded(files[1])
+
+    # References between records resolve to the same objects
+    module = files[2].modules[0]
+    assert module.dep_list[0] is files[1].modules[0]
+    assert module.hdlfile is files[2]
+    assert files[2].library is libraries[0]
+    assert files[2].project is new_project
+    project_db.close()
+
+
+def test_only_changed_records_are_written(tmp_path):
+    project, library = create_project()
+    project_db = ProjectDatabase(project=project, output_path=str(tmp_path))
+    assert project_db.save(library_list=[library], objects={}) == 4
+    assert project_db.save(library_list=[library], objects={}) == 0
+
+    library.hdlfile_container.get()[0].modules[0].name = "renamed"
+    assert project_db.save(library_list=[library], objects={}) == 1
+    project_db.close()
+
+    # Unloaded files are not rewritten, removed files are deleted
+    project_db = ProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    library = project_db.load_libraries()[0]
+    assert project_db.save(library_list=[library], objects={}) == 0
+    library.hdlfile_container.get().pop()
+    assert project_db.save(library_list=[library], objects={}) == 2
+    project_db.close()
+
+    project_db = ProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    library = project_db.load_libraries()[0]
+    assert len(library.hdlfile_container.get()) == 2
+    assert library.hdlfile_container.get()[0].modules[0].name == "renamed"
+    project_db.close()
+
+
+def add_file_attribute(data):
+    hdlfile_state, module_states = data
+    hdlfile_state["new_attribute"] = "migrated"
+    return (hdlfile_state, module_states)
+
+
+class MigratingProjectDatabase(ProjectDatabase):
+    RECORD_FORMATS = dict(ProjectDatabase.RECORD_FORMATS, hdlfile=2)
+    RECORD_MIGRATIONS = {("hdlfile", 1): add_file_attribute}
+
+
+class ChangedLibraryProjectDatabase(ProjectDatabase):
+    RECORD_FORMATS = dict(ProjectDatabase.RECORD_FORMATS, library=2)
+
+
+def test_record_migration(tmp_path):
+    project, library = create_project()
+    project_db = ProjectDatabase(project=project, output_path=str(tmp_path))
+    project_db.save(library_list=[library], objects={"testcase": ["tc_1"]})
+    project_db.close()
+
+    project_db = MigratingProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    library = project_db.load_libraries()[0]
+    hdlfile = library.hdlfile_container.get()[0]
+    assert hdlfile.new_attribute == "migrated"
+    assert project_db.load_object("testcase") == ["tc_1"]
+    # Only the migrated (loaded) file record is rewritten
+    assert project_db.save(library_list=[library], objects={"testcase": ["tc_1"]}) == 1
+    project_db.close()
+
+
+def test_record_invalidated_without_migration(tmp_path):
+    project, library = create_project()
+    project_db = ProjectDatabase(project=project, output_path=str(tmp_path))
+    project_db.save(
+        library_list=[library], objects={"testcase": ["tc_1"], "generic": "kept"}
+    )
+    project_db.close()
+
+    project_db = ChangedLibraryProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    assert project_db.load_libraries() == []
+    assert project_db.load_object("testcase") is None
+    assert project_db.load_object("generic") == "kept"
+    project_db.close()
+
+
+def test_validate_cached_version(tmp_path):
+    project_db = ProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+
+    def validate(cached_version, installed_version):
+        project = SimpleNamespace(
+            _has_cached_project=project_db.exists,
+            settings=SimpleNamespace(get_hdlregression_version=lambda: cached_version))
+        return validate_cached_version(project, installed_version)
+
+    # Without a cached project other versions are rebuilt
+    assert validate("0.60.0", "0.60.0") is True
+    assert validate("0.0.0", "0.60.0") is True
+    assert validate("0.59.2", "0.60.0") is False
+
+    project_db.save(library_list=[], objects={"testcase": ["tc_1"]})
+    # Only projects from older versions are migrated
+    assert validate("0.59.2", "0.60.0") is True
+    assert validate("0.9.0", "0.10.0") is True
+    assert validate("0.61.0", "0.60.0") is False
+    project_db.close()
+
+
+def test_slots_record_pickle():
+    project = FakeProject()
+    library = FakeLibrary("my_lib", project)
+    logger = Logger.get_logger(name="test_projectdb", project=project)
+    assert Logger.get_logger(name="test_projectdb", project=project) is logger
+
+    entity = EntityModule(name="my_ent", library=library, logger=logger)
+    entity.add_generic("gc_testcase")
+    assert not hasattr(entity, "__dict__")
+
+    entities = pickle.loads(pickle.dumps([entity, entity]))
+    assert entities[0] is entities[1]
+    assert entities[0].get_name() == "my_ent"
+    assert entities[0].get_generic() == ["gc_testcase"]
+    assert entities[0].get_library().get_name() == "my_lib"
+
+
+def test_shared_loggers_released_with_project():
+    project = FakeProject()
+    logger = Logger.get_logger(name="test_projectdb", project=project)
+    assert Logger.get_logger(name="test_projectdb") is not logger
+    project_ref = weakref.ref(project)
+    del project, logger
+    gc.collect()
+    assert project_ref() is None
+
+
+def test_save_object(tmp_path):
+    project_db = ProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    assert project_db.save_object("listing", {"testcase": ("abc", "TC:1 - tb.test")})
+    assert not project_db.save_object("listing", {"testcase": ("abc", "TC:1 - tb.test")})
+    project_db.close()
+
+    project_db = ProjectDatabase(project=FakeProject(), output_path=str(tmp_path))
+    assert project_db.load_object("listing") == {"testcase": ("abc", "TC:1 - tb.test")}
+    project_db.close()
+
+
+def get_file_path(path) -> str:
+    """
+    Adjust file paths to match running directory.
+    """
+    TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(TEST_DIR, path)
+
+
+class LegacyPickler(pickle.Pickler):
+    """
+    Pickler writing objects as versions without a project database,
+    i.e. objects keep a copy of the project and loggers are not shared.
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, HDLRegression):
+            return (copyreg.__newobj__, (HDLRegression,), {"settings": obj.settings})
+        if isinstance(obj, Logger):
+            return (copyreg.__newobj__, (Logger,), dict(vars(obj)))
+        return NotImplemented
+
+
+def save_legacy_project(project, version):
+    """
+    Replace the project database with the project files (.dat) of
+    versions without a project database.
+    """
+    output_path = project.settings.get_output_path()
+    settings = project.settings
+    settings.set_hdlregression_version(version)
+    tests = project.runner.get_re_run_test_obj_list()
+    # Settings and test attributes added after the project files.
+    del settings.test_retries
+    for test in tests:
+        del test.num_retries
+        del test.transcript_file
+
+    for (filename, obj) in [
+        ("library.dat", project.library_container),
+        ("generic.dat", project.generic_container),
+        ("testgroup.dat", project.testgroup_container),
+        ("testgroup_collection.dat", project.testgroup_collection_container),
+        ("settings.dat", settings),
+        ("testcase.dat", tests),
+        ("simulator.dat", settings.get_simulator_settings()),
+    ]:
+        with open(os.path.join(output_path, filename), "wb") as dump_file:
+            LegacyPickler(dump_file, pickle.HIGHEST_PROTOCOL).dump(obj)
+    project.project_db.close()
+    os.remove(os.path.join(output_path, ProjectDatabase.FILENAME))
+
+
+def test_legacy_project_upgrade(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["regression.py"])
+    # Simulator without output, i.e. compiling passes and tests fail.
+    os.mkdir("ghdl")
+    with open(os.path.join("ghdl", "ghdl"), "w") as ghdl:
+        ghdl.write("#!/bin/sh\necho GHDL\n")
+    os.chmod(os.path.join("ghdl", "ghdl"), 0o755)
+    monkeypatch.setenv("PATH", str(tmp_path / "ghdl") + os.pathsep + os.environ["PATH"])
+    os.mkdir("tb")
+    shutil.copy(get_file_path("../../tb/tb_passing.vhd"), "tb")
+
+    hr = HDLRegression(simulator="GHDL")
+    hr.add_files(str(tmp_path / "tb" / "*.vhd"), "tb_lib")
+    hr.start()
+    save_legacy_project(hr, "1.0.0")
+    compiled_file = os.path.join(hr.settings.get_library_path(), "compiled")
+    with open(compiled_file, "w"):
+        pass
+
+    hr = HDLRegression(simulator="GHDL")
+    # Compiled libraries, scanned files and tests to re-run are kept.
+    assert os.path.isfile(compiled_file)
+    library = hr.library_container.get("tb_lib")
+    assert library.project is hr
+    assert [hdlfile.project for hdlfile in library.get_hdlfile_list()] == [hr]
+    assert [test.get_num_retries() for test in hr.re_run_tc_list] == [0]
+    assert hr.settings.get_test_retries() == 0
+
+    hr.add_files(str(tmp_path / "tb" / "*.vhd"), "tb_lib")
+    capsys.readouterr()
+    hr.start()
+    output = capsys.readouterr().out
+    assert "Running: tb_lib.tb_passing.test" in output
+    assert "Compiling library" not in output
+    assert os.path.isfile(os.path.join("hdlregression", ProjectDatabase.FILENAME))
+    assert not os.path.isfile(os.path.join("hdlregression", "library.dat"))
@@ -0,0 +1,154 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import json
+
+from hdlregression.construct.container import Container
+from hdlregression.report.reporters import REPORTER_CLASSES
+from hdlregression.hdlregression_pkg import import_class
+from hdlregression.report.reportmodel import build_report_model
+from hdlregression.report.resultfile import MergedResults
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def __init__(self, test_path):
+        self.test_path = test_path
+
+    def get_test_path(self):
+        return self.test_path
+
+
+class FakeProject:
+    """
+    Project without results, i.e. reporters have to render from the model.
+    """
+
+    def __init__(self, test_path):
+        self.settings = FakeSettings(test_path)
+
+
+def get_merged_results(tmp_path):
+    filename = str(tmp_path / "results.jsonl")
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps({"format": 1, "sim_time": 2500, "return_code": 1}) + "\n")
+        for (key, status, usage) in [
+            ("lib.tb_a.arch", "PASS_WITH_MINOR", {"user_time": 1.0}),
+            ("lib.tb_b.arch", "FAIL", {"user_time": 3.0}),
+            ("lib.tb_c.arch", "PASS", {"user_time": 2.0}),
+            ("lib.tb_d.arch", "NOT_RUN", {}),
+        ]:
+            record = {"test": key, "key": key, "status": status, "sim_time": 100,
+                      "resource_usage": usage}
+            result_file.write(json.dumps(record) + "\n")
+    merged_results = MergedResults(test_path=str(tmp_path))
+    merged_results.merge(filename)
+    return merged_results
+
+
+def test_build_report_model(tmp_path):
+    model = build_report_model(get_merged_results(tmp_path))
+
+    assert model.pass_tests == ("lib.tb_c.arch", "lib.tb_a.arch")
+    assert model.fail_tests == ("lib.tb_b.arch",)
+    assert model.not_run_tests == ("lib.tb_d.arch",)
+    assert model.num_tests_run == 3
+    assert model.num_tests == 4
+    assert [test for (test, usage) in model.resource_usage] == \
+        ["lib.tb_b.arch", "lib.tb_c.arch", "lib.tb_a.arch"]
+    assert model.settings.time_of_sim == 2500
+
+    # Reporters may render the model in parallel, i.e. it can not be changed.
+    test_result = next(iter(model.test_results))
+    with pytest.raises(AttributeError):
+        test_result.status = "FAIL"
+    with pytest.raises(TypeError):
+        test_result.resource_usage["user_time"] = 0
+    assert [test_result.test for test_result in model.test_results] == \
+        ["lib.tb_a.arch", "lib.tb_b.arch", "lib.tb_c.arch", "lib.tb_d.arch"]
+
+
+def test_report_model_output_tail_read_when_used(tmp_path):
+    merged_results = get_merged_results(tmp_path)
+    reads = []
+    iter_test_results = merged_results._iter_test_results
+
+    def iter_test_results_with_tail():
+        reads.append("results")
+        for test_result in iter_test_results():
+            if test_result["status"] == "FAIL":
+                test_result["output_tail"] = lambda: reads.append("tail") or ["error"]
+            yield test_result
+
+    merged_results._iter_test_results = iter_test_results_with_tail
+    model = build_report_model(merged_results)
+    assert reads == ["results"]
+
+    # Results are read once, only the output tails are read each time they are used.
+    fail_result = [test_result for test_result in model.test_results if test_result.status == "FAIL"][0]
+    assert list(fail_result.output_tail) == ["error"]
+    assert list(fail_result.output_tail) == ["error"]
+    assert reads == ["results", "tail", "tail"]
+
+
+def test_report_model_testgroups(tmp_path):
+    merged_results = get_merged_results(tmp_path)
+    coverage_rank_testgroup = Container("coverage_rank")
+    coverage_rank_testgroup.add(("tb_a", "arch", None, None))
+    testgroup_collection = Container("testgroup_collection")
+    testgroup_collection.add(coverage_rank_testgroup)
+    # E.g. the testgroup generated from code coverage ranking.
+    merged_results._get_testgroup_collection = lambda: testgroup_collection
+
+    model = build_report_model(merged_results)
+    assert [testgroup.name for testgroup in model.testgroups] == ["coverage_rank"]
+    assert model.testgroups[0].items == (("tb_a", "arch", None, None),)
+
+
+def test_reporters_render_model(tmp_path):
+    model = build_report_model(get_merged_results(tmp_path))
+    project = FakeProject(str(tmp_path))
+
+    for report_file in ["report.txt", "report.csv", "report.json", "report.xml",
+                        "report_junit.xml", "report.html"]:
+        for extension, (module_name, class_name) in REPORTER_CLASSES.items():
+            if report_file.endswith(extension):
+                reporter = import_class(module_name, class_name)(project=project, filename=report_file)
+                break
+        reporter.report(model)
+        with open(reporter.get_full_filename()) as report:
+            assert "lib.tb_b.arch" in report.read()
+
+
+def test_report_items_per_reporter(tmp_path):
+    project = FakeProject(str(tmp_path))
+    reporter_class = import_class(*REPORTER_CLASSES[".json"])
+    reporter = reporter_class(project=project, filename="report.json")
+    other_reporter = reporter_class(project=project, filename="other_report.json")
+
+    reporter.set_report_items(report_compile_order=False, report_spec_cov=True, report_library=True)
+    other_reporter.set_report_items(report_compile_order=True, report_spec_cov=False, report_library=False)
+
+    assert (reporter.get_report_compile_order(), reporter.get_report_spec_cov(),
+            reporter.get_report_library()) == (False, True, True)
+    assert (other_reporter.get_report_compile_order(), other_reporter.get_report_spec_cov(),
+            other_reporter.get_report_library()) == (True, False, False)
+    # New reporters start with the default report items.
+    assert reporter_class(project=project, filename="new_report.json").get_report_library() is False
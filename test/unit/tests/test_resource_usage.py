@@ -0,0 +1,96 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import json
+import subprocess
+
+from hdlregression.report.resultfile import MergedResults, read_result_file
+from hdlregression.run.resource_monitor import add_resource_usage, reap_process
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+def get_process(code):
+    return subprocess.Popen([sys.executable, "-c", code])
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="os.wait4 not available")
+def test_reap_process():
+    process = get_process("import sys; sum(range(100000)); sys.exit(3)")
+    resource_usage = reap_process(process, wait=True)
+    assert process.returncode == 3
+    assert resource_usage["user_time"] + resource_usage["system_time"] > 0
+    assert resource_usage["peak_rss"] > 1024 * 1024
+    assert resource_usage["read_bytes"] >= 0
+    assert resource_usage["write_bytes"] >= 0
+
+    # Already reaped processes have no resource usage.
+    assert reap_process(process) == {}
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="os.wait4 not available")
+def test_reap_running_process():
+    process = get_process("import time; time.sleep(0.5)")
+    assert reap_process(process) is None
+    assert process.returncode is None
+    assert reap_process(process, wait=True) is not None
+    assert process.returncode == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="os.wait4 not available")
+def test_reap_killed_process():
+    process = get_process("import time; time.sleep(10)")
+    process.kill()
+    reap_process(process, wait=True)
+    assert process.returncode < 0
+
+
+def test_add_resource_usage():
+    usage = {"user_time": 1.0, "system_time": 0.5, "peak_rss": 200, "read_bytes": 10, "write_bytes": 0}
+    usage = add_resource_usage(usage, {"user_time": 2.0, "peak_rss": 100, "write_bytes": 512})
+    assert usage == {
+        "user_time": 3.0,
+        "system_time": 0.5,
+        "peak_rss": 200,
+        "read_bytes": 10,
+        "write_bytes": 512,
+    }
+
+
+def test_merged_resource_usage(tmp_path):
+    usage = {"user_time": 1.5, "system_time": 0.25, "peak_rss": 4096, "read_bytes": 0, "write_bytes": 512}
+    filename = str(tmp_path / "results.jsonl")
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps({"format": 1, "sim_time": 10, "return_code": 0}) + "\n")
+        for (key, status) in [("lib.tb_a", "PASS"), ("lib.tb_b", "NOT_RUN")]:
+            record = {"test": key, "key": key, "status": status, "resource_usage": usage}
+            result_file.write(json.dumps(record) + "\n")
+        # Result files from earlier versions have no resource usage.
+        result_file.write(json.dumps({"test": "lib.tb_c", "key": "lib.tb_c", "status": "FAIL"}) + "\n")
+
+    merged_results = MergedResults()
+    merged_results.merge(filename)
+    assert merged_results.get_resource_usage() == [("lib.tb_a", usage)]
+
+    merged_file = str(tmp_path / "merged.jsonl")
+    merged_results.write_result_file(merged_file)
+    records = list(read_result_file(merged_file))[1:]
+    assert records[0]["resource_usage"] == usage
+    assert "resource_usage" not in records[2]
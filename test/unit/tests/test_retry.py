@@ -0,0 +1,113 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import json
+import threading
+
+from hdlregression.arg_parser import arg_parser_reader
+from hdlregression.report.reportmodel import build_report_model
+from hdlregression.report.resultfile import MergedResults
+from hdlregression.run.sim_runner import SimRunner
+from hdlregression.run.hdltests import TestStatus
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def __init__(self, retries):
+        self.retries = retries
+
+    def get_test_retries(self):
+        return self.retries
+
+
+class FakeProject:
+    def __init__(self, retries):
+        self.settings = FakeSettings(retries)
+
+
+class FakeTest:
+    def __init__(self):
+        self.num_retries = 0
+        self.num_sim_errors = 3
+        self.num_sim_warnings = 1
+
+    def set_num_retries(self, num):
+        self.num_retries = num
+
+    def get_num_retries(self):
+        return self.num_retries
+
+    def set_num_sim_errors(self, num):
+        self.num_sim_errors = num
+
+    def set_num_sim_warnings(self, num):
+        self.num_sim_warnings = num
+
+
+class FakeRunner(SimRunner):
+    def __init__(self, project, retry_budget=None):
+        self.project = project
+        self.retry_budget = retry_budget
+        self.retry_lock = threading.Lock()
+
+
+def test_test_retries_are_limited():
+    runner = FakeRunner(FakeProject(retries=2))
+    test = FakeTest()
+    assert runner._use_test_retry(test)
+    assert test.get_num_retries() == 1
+    assert test.num_sim_errors == 0 and test.num_sim_warnings == 0
+    assert runner._use_test_retry(test)
+    assert not runner._use_test_retry(test)
+    assert test.get_num_retries() == 2
+
+    assert not FakeRunner(FakeProject(retries=0))._use_test_retry(FakeTest())
+
+
+def test_retry_budget_is_shared_by_tests():
+    runner = FakeRunner(FakeProject(retries=2), retry_budget=3)
+    tests = [FakeTest() for _ in range(3)]
+    assert [runner._use_test_retry(test) for test in tests] == [True, True, True]
+    assert not runner._use_test_retry(tests[0])
+    assert runner.retry_budget == 0
+
+
+def test_retry_arguments():
+    args = arg_parser_reader(argv=["--retries", "2", "--retry-budget", "10"])
+    assert (args.retries, args.retry_budget) == (2, 10)
+    assert arg_parser_reader(argv=[]).retries is None
+    with pytest.raises(SystemExit):
+        arg_parser_reader(argv=["--retries", "-1"])
+
+
+def test_pass_after_retry_is_passing(tmp_path):
+    filename = str(tmp_path / "results.jsonl")
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps({"format": 1}) + "\n")
+        for (key, status) in [("lib.tb_a.arch", TestStatus.PASS_AFTER_RETRY),
+                              ("lib.tb_b.arch", TestStatus.PASS)]:
+            result_file.write(json.dumps({"test": key, "key": key, "status": status}) + "\n")
+    merged_results = MergedResults(test_path=str(tmp_path))
+    merged_results.merge(filename)
+
+    assert merged_results.get_results() == [["lib.tb_a.arch", "lib.tb_b.arch"], [], []]
+    model = build_report_model(merged_results)
+    assert model.pass_tests == ("lib.tb_b.arch", "lib.tb_a.arch")
+    assert model.num_tests_run == 2
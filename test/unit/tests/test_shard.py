@@ -0,0 +1,147 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import pytest
+import sys
+
+from hdlregression.hdlregression import HDLRegression
+from hdlregression.hdlregression_pkg import parse_shard, split_shards, SHARD_LOAD_FACTOR
+from hdlregression.run import testbuilder
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeSettings:
+    def __init__(self, shard):
+        self.shard = shard
+
+    def get_is_gui_mode(self):
+        return False
+
+    def get_use_log_color(self):
+        return False
+
+    def get_shard(self):
+        return self.shard
+
+
+class FakeProject:
+    def __init__(self, shard, shard_durations):
+        self.settings = FakeSettings(shard)
+        self.shard_durations = shard_durations
+
+    def _get_shard_durations(self):
+        return self.shard_durations
+
+
+class FakeTest:
+    def __init__(self, test_key):
+        self.test_key = test_key
+
+    def get_test_key(self):
+        return self.test_key
+
+
+def get_shards(test_keys, num_shards, test_durations={}) -> list:
+    shards = []
+    for shard_index in range(1, num_shards + 1):
+        builder = testbuilder.TestBuilder(FakeProject((shard_index, num_shards), test_durations))
+        for test_key in test_keys:
+            builder.tests_to_run_container.add(FakeTest(test_key))
+        builder._build_shard()
+        shards.append([test.get_test_key() for test in builder.get_list_of_tests_to_run()])
+    return shards
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    assert parse_shard((1, 1)) == (1, 1)
+    for shard in ["0/4", "5/4", "1", "a/b", "1/2/3"]:
+        with pytest.raises(ValueError):
+            parse_shard(shard)
+
+
+def test_shard_split():
+    test_keys = ["lib.tb_%d.arch" % (idx) for idx in range(40)]
+    shards = get_shards(test_keys, 4)
+
+    # Each test is run by exactly one shard, in the original order.
+    assert sorted(sum(shards, [])) == sorted(test_keys)
+    for shard in shards:
+        assert shard == [test_key for test_key in test_keys if test_key in shard]
+
+
+def test_shard_split_by_test_name():
+    test_keys = ["lib.tb_%d.arch" % (idx) for idx in range(40)]
+    shards = get_shards(test_keys, 4)
+
+    # Without durations the split only depends on the test names,
+    # not their order, and all tests count the same.
+    assert get_shards(list(reversed(test_keys)), 4) == [list(reversed(shard)) for shard in shards]
+    assert all(len(shard) <= 11 for shard in shards)
+
+
+def test_shard_balanced_by_duration():
+    test_durations = {"lib.tb_%d.arch" % (idx): 100 * (idx % 10 + 1) for idx in range(60)}
+    test_keys = list(test_durations)
+    shards = get_shards(test_keys, 3, test_durations)
+
+    shard_durations = [sum(test_durations[key] for key in shard) for shard in shards]
+    assert sorted(sum(shards, [])) == sorted(test_keys)
+    assert max(shard_durations) <= SHARD_LOAD_FACTOR * sum(test_durations.values()) / 3
+
+
+def test_shard_untimed_tests_count_as_median():
+    test_durations = {"lib.tb_%d.arch" % (idx): 1000 for idx in range(6)}
+    test_keys = list(test_durations) + ["lib.tb_new_%d.arch" % (idx) for idx in range(6)]
+    shards = get_shards(test_keys, 3, test_durations)
+
+    assert all(len(shard) == 4 for shard in shards)
+
+
+def test_shard_stable_under_test_additions():
+    test_durations = {"lib.tb_%d.arch" % (idx): 100 * (idx % 7 + 1) for idx in range(200)}
+
+    # Adding or removing one test moves only a few other tests, whatever
+    # the number of tests.
+    test_shards = split_shards(test_durations, 4)
+    for idx in range(20):
+        new_test_key = "lib.tb_new_%d.arch" % (idx)
+        extended_shards = split_shards(dict(test_durations, **{new_test_key: 400}), 4)
+        moved_tests = [key for key in test_shards if test_shards[key] != extended_shards[key]]
+        assert len(moved_tests) <= 3
+
+
+def test_shard_durations_default_file(tmp_path):
+    class FakeDurationsSettings:
+        def get_shard_durations_file(self):
+            return None
+
+        def get_script_path(self):
+            return str(tmp_path)
+
+    class FakeDurationsProject:
+        settings = FakeDurationsSettings()
+
+    project = FakeDurationsProject()
+    assert HDLRegression._get_shard_durations(project) == {}
+
+    with open(tmp_path / "shard_durations.jsonl", "w") as durations_file:
+        durations_file.write(json.dumps({"format": 1}) + "\n")
+        durations_file.write(json.dumps({"key": "lib.tb.arch", "sim_time": 1234}) + "\n")
+    assert HDLRegression._get_shard_durations(project) == {"lib.tb.arch": 1234}
@@ -0,0 +1,94 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import subprocess
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+# Start-up time budget for "import hdlregression", in seconds.
+IMPORT_TIME_BUDGET = 0.5
+
+# Modules that are only imported when used.
+LAZY_MODULES = [
+    "hdlregression.run.sim_runner",
+    "hdlregression.run.tcl_runner",
+    "hdlregression.run.runner_modelsim",
+    "hdlregression.run.runner_aldec",
+    "hdlregression.run.runner_ghdl",
+    "hdlregression.run.runner_nvc",
+    "hdlregression.run.vivado_runner",
+    "hdlregression.report.hdlreporter",
+    "hdlregression.report.txtreporter",
+    "hdlregression.report.csvreporter",
+    "hdlregression.report.jsonreporter",
+    "hdlregression.report.xmlreporter",
+    "hdlregression.report.htmlreporter",
+]
+
+
+def run_python(code, *options) -> str:
+    """
+    Run code in a new Python process, i.e. with no modules imported.
+    """
+    install_path = os.path.abspath(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [install_path] + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    result = subprocess.run(
+        [sys.executable] + list(options) + ["-c", code],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return result.stdout + result.stderr
+
+
+def test_runners_and_reporters_not_imported():
+    output = run_python(
+        "import sys, hdlregression; "
+        "print('\\n'.join(name for name in sys.modules if name.startswith('hdlregression')))"
+    )
+    imported_modules = output.split()
+    assert "hdlregression.hdlregression" in imported_modules
+    for module_name in LAZY_MODULES:
+        assert module_name not in imported_modules, "%s imported at start-up" % (module_name)
+
+
+def test_import_time_budget():
+    # Warm up, i.e. do not measure writing of byte code.
+    run_python("import hdlregression")
+
+    import_times = []
+    for _ in range(3):
+        output = run_python("import hdlregression", "-X", "importtime")
+        for line in output.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "hdlregression":
+                import_times.append(int(fields[1]) / 1e6)
+    assert import_times, "no import time measured"
+    assert min(import_times) < IMPORT_TIME_BUDGET, "import hdlregression took %.3f s" % (
+        min(import_times)
+    )
@@ -0,0 +1,130 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import io
+import json
+from xml.dom import minidom
+
+from hdlregression.report.junitreporter import JUnitReporter
+from hdlregression.report.jsonreporter import JSONReporter
+from hdlregression.report.xmlreporter import XMLReporter
+from hdlregression.report.reportmodel import build_report_model
+from hdlregression.report.resultfile import MergedResults
+from hdlregression.report.streamwriter import JSONStreamWriter, XMLStreamWriter
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+def get_merged_results(tmp_path):
+    filename = str(tmp_path / "results.jsonl")
+    with open(filename, "w") as result_file:
+        result_file.write(json.dumps({"format": 1, "sim_time": 2500, "return_code": 1}) + "\n")
+        for (key, status, sim_time) in [
+            ("lib.tb_a.arch", "PASS", 1000),
+            ("lib.tb_b.arch.tc_1 g_width=8", "FAIL", 1500),
+            ("lib.tb_c.arch", "NOT_RUN", 0),
+        ]:
+            record = {"test": key + " <&>", "key": key, "status": status, "sim_time": sim_time}
+            result_file.write(json.dumps(record) + "\n")
+    merged_results = MergedResults(test_path=str(tmp_path))
+    merged_results.merge(filename)
+    return merged_results
+
+
+def test_json_stream_writer():
+    output = io.StringIO()
+    writer = JSONStreamWriter(output)
+    writer.begin_object()
+    writer.value("PASS", "tb_a")
+    writer.begin_array("Items")
+    writer.value({"Name": 'a"b'})
+    writer.value(2)
+    writer.end_array()
+    writer.begin_array("Empty")
+    writer.end_array()
+    writer.end_object()
+    assert json.loads(output.getvalue()) == {"tb_a": "PASS", "Items": [{"Name": 'a"b'}, 2], "Empty": []}
+
+
+def test_xml_stream_writer():
+    output = io.StringIO()
+    writer = XMLStreamWriter(output)
+    writer.start("Report", {"name": "a<b"})
+    writer.start("Empty")
+    writer.end()
+    # Terminal color codes are not allowed in XML.
+    writer.element("Text", "\x1b[31merror\x1b[0m & more")
+    writer.end()
+    document = minidom.parseString(output.getvalue())
+    report = document.documentElement
+    assert report.getAttribute("name") == "a<b"
+    assert "<Empty/>" in output.getvalue()
+    assert report.getElementsByTagName("Text")[0].firstChild.data == "[31merror[0m & more"
+
+
+def test_junit_report(tmp_path):
+    reporter = JUnitReporter(project=get_merged_results(tmp_path), filename="report_junit.xml")
+    reporter.report()
+
+    document = minidom.parse(reporter.get_full_filename())
+    testsuite = document.getElementsByTagName("testsuite")[0]
+    assert testsuite.getAttribute("tests") == "3"
+    assert testsuite.getAttribute("failures") == "1"
+    assert testsuite.getAttribute("skipped") == "1"
+    assert testsuite.getAttribute("time") == "2.500"
+
+    testcases = document.getElementsByTagName("testcase")
+    assert [t.getAttribute("classname") for t in testcases] == ["lib.tb_a", "lib.tb_b", "lib.tb_c"]
+    assert testcases[0].getAttribute("name") == "lib.tb_a.arch <&>"
+    assert testcases[1].getAttribute("time") == "1.500"
+    assert len(testcases[1].getElementsByTagName("failure")) == 1
+    assert len(testcases[2].getElementsByTagName("skipped")) == 1
+
+
+def test_junit_report_reads_results_once(tmp_path):
+    merged_results = get_merged_results(tmp_path)
+    model = build_report_model(merged_results)
+    reads = []
+    iter_test_results = merged_results._iter_test_results
+    merged_results._iter_test_results = lambda: reads.append(1) or iter_test_results()
+
+    # Results are read when the model is built, not again for the report.
+    JUnitReporter(project=merged_results, filename="report_junit.xml").report(model)
+    assert reads == []
+
+
+def test_json_and_xml_report(tmp_path):
+    merged_results = get_merged_results(tmp_path)
+    json_reporter = JSONReporter(project=merged_results, filename="report.json")
+    json_reporter.report()
+    # Written again, i.e. the file is not appended to.
+    json_reporter.report()
+    with open(json_reporter.get_full_filename()) as report_file:
+        report = json.load(report_file)
+    assert report["Test results"] == {
+        "lib.tb_a.arch <&>": "PASS",
+        "lib.tb_b.arch.tc_1 g_width=8 <&>": "FAIL",
+        "lib.tb_c.arch <&>": "NOT_RUN",
+    }
+
+    xml_reporter = XMLReporter(project=merged_results, filename="report.xml")
+    xml_reporter.report()
+    results = minidom.parse(xml_reporter.get_full_filename()).getElementsByTagName("Results")[0]
+    failing = results.getElementsByTagName("Failing")[0].getElementsByTagName("Test")
+    assert [t.firstChild.data for t in failing] == ["lib.tb_b.arch.tc_1 g_width=8 <&>"]
@@ -0,0 +1,105 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import json
+import threading
+
+from hdlregression.report.trace import Tracer, COORDINATOR_PID
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+def read_trace(filename):
+    with open(filename) as trace_file:
+        events = json.load(trace_file)["traceEvents"]
+    lanes = {
+        (event["pid"], event["tid"]): event["args"]["name"]
+        for event in events
+        if event["name"] == "thread_name"
+    }
+    spans = [event for event in events if event["ph"] == "X"]
+    return (spans, lanes)
+
+
+def test_tracer_disabled(tmpdir):
+    tracer = Tracer()
+    with tracer.span("compile", "phase") as span_args:
+        span_args["success"] = True
+    assert tracer.is_enabled() is False
+    assert tracer.events == []
+    tracer.write()
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_spans_written_in_chrome_trace_format(tmpdir):
+    trace_file = os.path.join(str(tmpdir), "out", "trace.json")
+    tracer = Tracer()
+    tracer.start(trace_file)
+    with tracer.span("run", "phase"):
+        with tracer.span("compile", "phase"):
+            with tracer.span("tb_adder.vhd", "compile") as span_args:
+                span_args["success"] = True
+    tracer.write()
+    assert tracer.is_enabled() is False
+
+    (spans, lanes) = read_trace(trace_file)
+    spans = {span["name"]: span for span in spans}
+    assert set(spans) == {"run", "compile", "tb_adder.vhd"}
+    assert spans["tb_adder.vhd"]["cat"] == "compile"
+    assert spans["tb_adder.vhd"]["args"] == {"success": True}
+    # Nested spans are within the enclosing span on the same lane.
+    (run, compile_file) = (spans["run"], spans["tb_adder.vhd"])
+    assert run["ts"] <= compile_file["ts"]
+    assert compile_file["ts"] + compile_file["dur"] <= run["ts"] + run["dur"]
+    assert run["tid"] == compile_file["tid"]
+    assert lanes[(COORDINATOR_PID, run["tid"])] == threading.current_thread().name
+
+
+def test_thread_lanes(tmpdir):
+    trace_file = os.path.join(str(tmpdir), "trace.json")
+    tracer = Tracer()
+    tracer.start(trace_file)
+
+    def run_test(name):
+        with tracer.span(name, "test"):
+            pass
+
+    threads = [
+        threading.Thread(target=run_test, args=("test_%d" % (i),), name="Simulation thread %d" % (i + 1))
+        for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    tracer.write()
+
+    (spans, lanes) = read_trace(trace_file)
+    assert {span["name"]: lanes[(span["pid"], span["tid"])] for span in spans} == {
+        "test_0": "Simulation thread 1",
+        "test_1": "Simulation thread 2",
+        "test_2": "Simulation thread 3",
+    }
+
+
+def test_trace_argument():
+    from hdlregression.arg_parser import arg_parser_reader
+
+    assert arg_parser_reader(argv=["--trace", "trace.json"]).trace == "trace.json"
+    assert arg_parser_reader(argv=[]).trace is None
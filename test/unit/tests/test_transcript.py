@@ -0,0 +1,130 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+
+from hdlregression.run.cmd_runner import CommandRunner
+from hdlregression.run.hdltests import HdlRegressionTest
+from hdlregression.run.transcript import (
+    compress_transcript,
+    open_transcript,
+    open_transcript_writer,
+    read_transcript_lines,
+)
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeLogger:
+    def debug(self, msg):
+        pass
+
+
+class FakeSettings:
+    def __init__(self, compression):
+        self.compression = compression
+
+    def get_ignored_simulator_exit_codes(self):
+        return []
+
+    def get_transcript_compression(self):
+        return self.compression
+
+
+class FakeProject:
+    def __init__(self, compression=None):
+        self.logger = FakeLogger()
+        self.settings = FakeSettings(compression)
+
+
+def write_transcript(filename, compression, lines):
+    with open_transcript_writer(filename, compression) as transcript_file:
+        for line in lines:
+            transcript_file.write(line + "\n")
+
+
+def test_compressed_transcript_is_read_back(tmpdir):
+    filename = os.path.join(str(tmpdir), "transcript")
+    lines = ["# line %d" % (idx) for idx in range(100)]
+    write_transcript(filename, "gzip", lines)
+
+    assert not os.path.exists(filename)
+    assert read_transcript_lines(filename + ".gz") == lines
+    assert read_transcript_lines(filename + ".gz", 30) == lines[-30:]
+
+
+def test_compressed_transcript_replaces_earlier_transcript(tmpdir):
+    filename = os.path.join(str(tmpdir), "transcript")
+    with open(filename, "w") as transcript_file:
+        transcript_file.write("earlier run\n")
+
+    write_transcript(filename, "gzip", ["latest run", "", "done"])
+
+    assert not os.path.exists(filename)
+    assert read_transcript_lines(filename + ".gz") == ["latest run", "done"]
+
+
+def test_simulator_transcript_is_compressed(tmpdir):
+    filename = os.path.join(str(tmpdir), "transcript")
+    with open(filename, "w") as transcript_file:
+        transcript_file.write("# ** Note: done\n")
+
+    assert compress_transcript(filename, "gzip") == filename + ".gz"
+    assert not os.path.exists(filename)
+    with open_transcript(filename + ".gz") as transcript_file:
+        assert transcript_file.read() == "# ** Note: done\n"
+
+
+def test_command_output_is_compressed(tmpdir):
+    filename = os.path.join(str(tmpdir), "transcript")
+    runner = CommandRunner(project=FakeProject("gzip"))
+    command = [
+        sys.executable,
+        "-c",
+        "import sys; print('hello'); sys.stdout.flush(); print('oops', file=sys.stderr)",
+    ]
+    lines = list(runner.run(command, path=str(tmpdir), output_file=filename))
+
+    assert ("hello\n", True) in lines
+    assert sorted(read_transcript_lines(filename + ".gz")) == ["hello", "oops"]
+
+
+def test_test_output_read_from_transcript(tmpdir):
+    filename = os.path.join(str(tmpdir), "transcript")
+    lines = ["line %d" % (idx) for idx in range(40)]
+    write_transcript(filename, "gzip", lines)
+
+    test = HdlRegressionTest()
+    test.add_output_lines(lines)
+    test.set_transcript_file(filename + ".gz")
+    test.release_output()
+
+    assert test.get_output_no_format() == []
+    assert test.get_output_lines() == lines
+    assert test.get_output_lines(30) == lines[-30:]
+    assert test.get_output() == "\n".join(lines)
+    assert "line 10\n" in test.get_test_error_summary()
+    assert "line 9\n" not in test.get_test_error_summary()
+
+
+def test_test_output_kept_without_transcript():
+    test = HdlRegressionTest()
+    test.add_output_lines(["line 1", "line 2"])
+    test.release_output()
+
+    assert test.get_output_lines(1) == ["line 2"]
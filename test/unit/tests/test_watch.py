@@ -0,0 +1,107 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import os
+import threading
+
+from hdlregression.watch import FileWatcher
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeHDLFile:
+    def __init__(self, filename):
+        self.filename = filename
+
+    def get_filename_with_path(self):
+        return self.filename
+
+
+class FakeLibrary:
+    def __init__(self, filenames, precompiled=False):
+        self.hdlfile_list = [FakeHDLFile(filename) for filename in filenames]
+        self.precompiled = precompiled
+
+    def get_is_precompiled(self):
+        return self.precompiled
+
+    def get_hdlfile_list(self):
+        return self.hdlfile_list
+
+
+class FakeContainer:
+    def __init__(self, libraries):
+        self.libraries = libraries
+
+    def get(self):
+        return self.libraries
+
+
+class FakeProject:
+    def __init__(self, libraries):
+        self.library_container = FakeContainer(libraries)
+
+
+def touch(filename, change_date):
+    with open(filename, "a"):
+        pass
+    os.utime(filename, (change_date, change_date))
+
+
+def test_watch_changed_files(tmp_path):
+    (file_a, file_b) = (str(tmp_path / "a.vhd"), str(tmp_path / "b.vhd"))
+    touch(file_a, 1000)
+    touch(file_b, 1000)
+    library = FakeLibrary([file_a])
+    project = FakeProject([library, FakeLibrary([file_b], precompiled=True)])
+
+    watcher = FileWatcher(project=project)
+    assert watcher.get_watched_files() == [file_a]
+    watcher.update()
+    assert watcher.get_changed_files() == []
+
+    # Files new to the project are not reported as changed.
+    library.hdlfile_list.append(FakeHDLFile(file_b))
+    assert watcher.get_changed_files() == []
+
+    touch(file_b, 2000)
+    assert watcher.get_changed_files() == [file_b]
+    os.remove(file_a)
+    assert watcher.get_changed_files() == [file_a, file_b]
+
+
+def test_watch_debounce(tmp_path):
+    (file_a, file_b) = (str(tmp_path / "a.vhd"), str(tmp_path / "b.vhd"))
+    touch(file_a, 1000)
+    touch(file_b, 1000)
+    watcher = FileWatcher(
+        project=FakeProject([FakeLibrary([file_a, file_b])]),
+        poll_interval=0.01,
+        debounce_time=0.3,
+    )
+    watcher.update()
+
+    # A burst of saves is reported as one change.
+    timers = [
+        threading.Timer(0.05, touch, (file_a, 2000)),
+        threading.Timer(0.15, touch, (file_b, 2000)),
+    ]
+    for timer in timers:
+        timer.start()
+    assert sorted(watcher.wait_for_changes()) == [file_a, file_b]
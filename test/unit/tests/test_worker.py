@@ -0,0 +1,344 @@
+# ================================================================================================================================
+#  Copyright 2021 Bitvis
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0 and in the provided LICENSE.TXT.
+#
+#  Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#  an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and limitations under the License.
+# ================================================================================================================================
+#  Note : Any functionality not explicitly described in the documentation is subject to change at any time
+# --------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+import sys
+import json
+import os
+import socket
+import threading
+import time
+
+from hdlregression.worker import WorkerPool, WorkerAgent, WorkerError
+from hdlregression.run.cmd_runner import RemoteCommandRunner
+from hdlregression.run.sim_runner import SimRunner
+from hdlregression.hdlregression_pkg import parse_address
+from hdlregression.report.trace import Tracer
+
+
+if len(sys.argv) >= 2:
+    """
+    Remove pytest from argument list
+    """
+    sys.argv.pop(1)
+
+
+class FakeLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+    def debug(self, msg):
+        pass
+
+
+class FakeSettings:
+    def __init__(self, ignored_exit_codes=[]):
+        self.ignored_exit_codes = ignored_exit_codes
+
+    def get_ignored_simulator_exit_codes(self):
+        return self.ignored_exit_codes
+
+    def get_transcript_compression(self):
+        return None
+
+
+class FakeProject:
+    def __init__(self, ignored_exit_codes=[]):
+        self.logger = FakeLogger()
+        self.settings = FakeSettings(ignored_exit_codes)
+        self.tracer = Tracer()
+
+
+class RecordingPool(WorkerPool):
+    """
+    Records the most jobs running at the same time on each worker.
+    """
+
+    def __init__(self, project, address, token=None):
+        super().__init__(project, address, token)
+        self.max_running = {}
+
+    def _acquire(self, job_id, job_queue):
+        worker = super()._acquire(job_id, job_queue)
+        with self.condition:
+            self.max_running[worker.name] = max(
+                self.max_running.get(worker.name, 0), worker.num_running
+            )
+        return worker
+
+
+def start_pool(project, pool_class=WorkerPool, token=None):
+    pool = pool_class(project=project, address=("127.0.0.1", 0), token=token)
+    pool.start()
+    return pool
+
+
+def start_worker(pool, name, capacity=1, token=None):
+    agent = WorkerAgent(pool.get_address(), capacity=capacity, name=name, token=token)
+    assert agent.connect(timeout=5) is True
+    thread = threading.Thread(target=agent.serve)
+    thread.daemon = True
+    thread.start()
+    return agent
+
+
+def wait_for_workers(pool, num_workers):
+    for _ in range(100):
+        if len(pool.get_workers()) == num_workers:
+            return
+        time.sleep(0.05)
+    raise AssertionError("Workers did not connect")
+
+
+def python_command(code):
+    return [sys.executable, "-c", code]
+
+
+def test_parse_address():
+    assert parse_address("9600") == ("localhost", 9600)
+    assert parse_address("build01:9600") == ("build01", 9600)
+    assert parse_address(("0.0.0.0", 9600)) == ("0.0.0.0", 9600)
+    with pytest.raises(ValueError):
+        parse_address("build01")
+    with pytest.raises(ValueError):
+        parse_address("70000")
+
+
+def test_output_and_exit_code_streamed_back(tmpdir):
+    project = FakeProject()
+    pool = start_pool(project)
+    start_worker(pool, "worker_1")
+    wait_for_workers(pool, 1)
+
+    transcript = os.path.join(str(tmpdir), "transcript")
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    command = python_command(
+        "import sys; print('hello'); sys.stdout.flush(); "
+        "print('oops', file=sys.stderr); sys.exit(3)"
+    )
+    lines = list(runner.run(command, path=str(tmpdir), output_file=transcript))
+    pool.close()
+
+    assert ("hello\n", True) in lines
+    assert ("oops\n", False) in lines
+    assert lines[-1] == ("Error: Program ended with exit code 3", False)
+    with open(transcript) as transcript_file:
+        assert sorted(transcript_file.read().splitlines()) == ["hello", "oops"]
+
+
+def test_ignored_exit_code():
+    project = FakeProject(ignored_exit_codes=[3])
+    pool = start_pool(project)
+    start_worker(pool, "worker_1")
+
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    lines = list(runner.run(python_command("import sys; sys.exit(3)")))
+    pool.close()
+
+    assert lines == []
+
+
+def test_descriptor_has_run_do_cwd_and_env(tmpdir):
+    project = FakeProject()
+    pool = start_pool(project)
+    start_worker(pool, "worker_1")
+
+    test_path = str(tmpdir.mkdir("test_1"))
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    env = dict(os.environ, TEST_ENV="1")
+    job = runner.get_job(python_command("pass"), path=test_path, env=env)
+    assert job["run_do"] is None
+    assert job["cwd"] == os.path.abspath(test_path)
+    # Only variables set by the regression script are sent.
+    assert job["env"] == {"TEST_ENV": "1"}
+
+    # Worker writes run.do content and uses environment and folder.
+    job["run_do"] = "vsim tb"
+    job["command"] = python_command(
+        "import os; print(open('run.do').read(), os.environ['TEST_ENV'])"
+    )
+    messages = list(pool.run_job(job))
+    pool.close()
+
+    assert {"output": "vsim tb 1\n", "stderr": False, "id": 1} in messages
+    assert messages[-1]["exit_code"] == 0
+    assert os.path.isfile(os.path.join(test_path, "run.do"))
+
+
+def test_jobs_scheduled_by_capacity():
+    project = FakeProject()
+    pool = start_pool(project, pool_class=RecordingPool)
+    start_worker(pool, "small", capacity=1)
+    start_worker(pool, "large", capacity=2)
+    wait_for_workers(pool, 2)
+    assert pool.get_capacity() == 3
+
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    results = []
+
+    def run_test():
+        results.append(list(runner.run(python_command("import time; time.sleep(0.3)"))))
+
+    threads = [threading.Thread(target=run_test) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    pool.close()
+
+    assert results == [[]] * 6
+    assert pool.max_running == {"small": 1, "large": 2}
+
+
+def test_worker_slots_traced(tmpdir):
+    project = FakeProject()
+    trace_file = os.path.join(str(tmpdir), "trace.json")
+    project.tracer.start(trace_file)
+    pool = start_pool(project)
+    start_worker(pool, "large", capacity=2)
+    wait_for_workers(pool, 1)
+
+    def run_test(name):
+        runner = RemoteCommandRunner(project=project, worker_pool=pool, name=name)
+        list(runner.run(python_command("import time; time.sleep(0.3)")))
+
+    threads = [threading.Thread(target=run_test, args=("test_%d" % (i),)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    pool.close()
+    project.tracer.write()
+
+    with open(trace_file) as trace:
+        events = json.load(trace)["traceEvents"]
+    lanes = {
+        event["tid"]: event["args"]["name"]
+        for event in events
+        if event.get("name") == "thread_name"
+    }
+    spans = [event for event in events if event["ph"] == "X"]
+    assert sorted(span["name"] for span in spans) == ["test_0", "test_1"]
+    assert sorted(lanes[span["tid"]] for span in spans) == ["large slot 1", "large slot 2"]
+    assert all(span["args"]["exit_code"] == 0 for span in spans)
+
+
+def test_jobs_wait_for_worker_to_connect():
+    project = FakeProject()
+    pool = start_pool(project)
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    results = []
+
+    thread = threading.Thread(
+        target=lambda: results.append(list(runner.run(python_command("print('late')"))))
+    )
+    thread.start()
+    time.sleep(0.2)
+    assert results == []
+
+    start_worker(pool, "worker_1")
+    thread.join(timeout=30)
+    pool.close()
+
+    assert results == [[("late\n", True)]]
+
+
+def test_lost_worker_fails_running_job():
+    project = FakeProject()
+    pool = start_pool(project)
+    agent = start_worker(pool, "worker_1")
+    wait_for_workers(pool, 1)
+
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    lines = runner.run(python_command("import time; print('started', flush=True); time.sleep(30)"))
+    assert next(lines) == ("started\n", True)
+
+    agent.connection.shutdown(2)
+    remaining = list(lines)
+    pool.close()
+
+    assert ("Error: Lost connection to worker worker_1\n", False) in remaining
+    assert remaining[-1] == ("Error: Program ended with exit code None", False)
+
+
+def test_threads_limited_by_worker_capacity():
+    project = FakeProject()
+    pool = start_pool(project)
+    start_worker(pool, "small", capacity=1)
+    start_worker(pool, "large", capacity=2)
+    wait_for_workers(pool, 2)
+    project.worker_pool = pool
+    project.settings.get_num_threads = lambda: 0
+
+    runner = SimRunner.__new__(SimRunner)
+    runner.project = project
+    runner.get_test_list = lambda: list(range(1000))
+    assert runner._get_number_of_threads() == 3
+
+    project.settings.get_num_threads = lambda: 2
+    assert runner._get_number_of_threads() == 2
+
+    runner.get_test_list = lambda: []
+    assert runner._get_number_of_threads() == 1
+    pool.close()
+
+
+def test_worker_token_authenticated():
+    project = FakeProject()
+    pool = start_pool(project, token="secret")
+    start_worker(pool, "worker_1", token="secret")
+    wait_for_workers(pool, 1)
+
+    runner = RemoteCommandRunner(project=project, worker_pool=pool)
+    lines = list(runner.run(python_command("print('authenticated')")))
+    pool.close()
+
+    assert lines == [("authenticated\n", True)]
+
+
+def test_worker_token_mismatch_rejected():
+    project = FakeProject()
+    pool = start_pool(project, token="secret")
+
+    # A worker does not accept jobs from a coordinator without the token.
+    agent = WorkerAgent(pool.get_address(), capacity=1, name="worker_1", token="other")
+    with pytest.raises(WorkerError):
+        agent.connect(timeout=5)
+
+    # A client without the token is not sent any jobs.
+    connection = socket.create_connection(pool.get_address())
+    connection.sendall(b'{"hello": {"name": "client", "challenge": "1"}}\n{"auth": "0"}\n')
+    connection.recv(65536)
+    assert connection.recv(65536) == b""
+    connection.close()
+    pool.close()
+
+    assert pool.get_workers() == []
+    assert "Worker client rejected, invalid HDLREGRESSION_WORKER_TOKEN." in project.logger.messages
+
+
+def test_worker_token_required_off_loopback():
+    project = FakeProject()
+    pool = WorkerPool(project=project, address=("0.0.0.0", 0), token=None)
+    with pytest.raises(WorkerError):
+        pool.start()
+    assert pool.server is None
+
+    agent = WorkerAgent(("192.0.2.1", 9600), token=None)
+    with pytest.raises(WorkerError):
+        agent.connect(timeout=0)